@@ -8,11 +8,10 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-from openai import OpenAI
-import os
-import json
 from datetime import datetime
 
+from core import llm
+
 # CORRECT IMPORTS - gebruik de echte model namen
 from .models import (
     Course, 
@@ -30,8 +29,6 @@ except ImportError:
     PracticeAssignment = None
     Exam = None
 
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-
 # ============================================================================
 # AI COMPLETE COURSE GENERATION
 # ============================================================================
@@ -71,25 +68,16 @@ Return ONLY valid JSON (no markdown):
   ]
 }}"""
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        course_structure = llm.complete_json(
+            [
                 {"role": "system", "content": "You are a professional course designer. Return ONLY valid JSON."},
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.7,
             max_tokens=3000
         )
         
-        content = response.choices[0].message.content.strip()
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
-        content = content.strip()
-        
-        course_structure = json.loads(content)
-        
         # Create the course
         course = Course.objects.create(
             title=course_structure['course_title'],
@@ -227,24 +215,15 @@ Return ONLY JSON:
 }}"""
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        skills_data = llm.complete_json(
+            [
                 {"role": "system", "content": "Return ONLY JSON."},
                 {"role": "user", "content": prompt}
             ],
+            model="gpt-4o-mini",
             temperature=0.7,
             max_tokens=1000
         )
-        
-        content = response.choices[0].message.content.strip()
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
-        content = content.strip()
-        
-        skills_data = json.loads(content)
         created_skills = []
         
         for skill_data in skills_data['skills']:
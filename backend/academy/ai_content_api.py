@@ -1,22 +1,16 @@
+from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-import os
-import requests
-import json
 
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+from core import llm
+from core.async_views import async_api_view
 
 # ============================================================================
 # ENHANCEDCOURSEBUILDER FUNCTIONS (6 new functions)
 # ============================================================================
 
-@api_view(['POST'])
-@permission_classes([IsAdminUser])
-def generate_content(request):
-    """Generate lesson content using AI (EnhancedCourseBuilder)"""
-    context = request.data.get('context', {})
-    
+def _content_request(context):
     prompt = f"""Generate a comprehensive lesson transcript for:
 
 Course: {context.get('courseTitle')}
@@ -33,39 +27,40 @@ Create an engaging, educational transcript that:
 
 Return ONLY the transcript content, no metadata."""
 
+    return dict(
+        messages=[
+            {'role': 'system', 'content': 'You are an expert course content creator.'},
+            {'role': 'user', 'content': prompt}
+        ],
+        model='gpt-4o-mini',
+        temperature=0.7,
+        timeout=60,
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def generate_content(request):
+    """Generate lesson content using AI (EnhancedCourseBuilder)"""
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'You are an expert course content creator.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7
-            },
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        content = response.json()['choices'][0]['message']['content']
+        content = llm.complete(**_content_request(request.data.get('context', {}))).content
         
         return Response({'content': content})
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 
-@api_view(['POST'])
-@permission_classes([IsAdminUser])
-def generate_quiz(request):
-    """Generate quiz questions from lesson content (EnhancedCourseBuilder)"""
-    context = request.data.get('context', {})
-    num_questions = request.data.get('num_questions', 5)
-    
+@async_api_view(['POST'], permission_classes=[IsAdminUser])
+async def agenerate_content(request):
+    """generate_content for ASGI"""
+    try:
+        content = (await llm.acomplete(**_content_request(request.data.get('context', {})))).content
+        return JsonResponse({'content': content})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def _quiz_request(context, num_questions):
     prompt = f"""Create {num_questions} multiple-choice quiz questions for:
 
 Course: {context.get('courseTitle')}
@@ -85,34 +80,44 @@ Return JSON with this exact format:
   ]
 }}"""
 
+    return dict(
+        messages=[
+            {'role': 'system', 'content': 'You create educational quiz questions. Return valid JSON only.'},
+            {'role': 'user', 'content': prompt}
+        ],
+        model='gpt-4o-mini',
+        temperature=0.7,
+        json_mode=True,
+        timeout=60,
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def generate_quiz(request):
+    """Generate quiz questions from lesson content (EnhancedCourseBuilder)"""
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'You create educational quiz questions. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.7
-            },
-            timeout=60
+        questions = llm.complete_json(
+            **_quiz_request(request.data.get('context', {}), request.data.get('num_questions', 5))
         )
         
-        response.raise_for_status()
-        data = response.json()
-        questions = json.loads(data['choices'][0]['message']['content'])
-        
         return Response({'questions': questions.get('questions', [])})
     except Exception as e:
         return Response({'error': str(e)}, status=500)
 
 
+@async_api_view(['POST'], permission_classes=[IsAdminUser])
+async def agenerate_quiz(request):
+    """generate_quiz for ASGI"""
+    try:
+        questions = await llm.acomplete_json(
+            **_quiz_request(request.data.get('context', {}), request.data.get('num_questions', 5))
+        )
+        return JsonResponse({'questions': questions.get('questions', [])})
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
 @api_view(['POST'])
 @permission_classes([IsAdminUser])
 def generate_simulation(request):
@@ -148,28 +153,17 @@ Return JSON with this exact format:
 }}"""
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'Create realistic PM simulations. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.8
-            },
-            timeout=60
+        simulation = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'Create realistic PM simulations. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.8,
+            json_mode=True,
+            timeout=60,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        simulation = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(simulation)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -205,28 +199,17 @@ Return JSON with this exact format:
 }}"""
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'Create practical assignments. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.7
-            },
-            timeout=60
+        assignment = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'Create practical assignments. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.7,
+            json_mode=True,
+            timeout=60,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        assignment = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(assignment)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -264,28 +247,17 @@ Return JSON with this exact format:
 }}"""
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'Create comprehensive exams. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.7
-            },
-            timeout=90
+        exam = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'Create comprehensive exams. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.7,
+            json_mode=True,
+            timeout=90,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        exam = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(exam)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -314,28 +286,17 @@ Return JSON with this exact format:
 }}"""
 
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'Extract skills from educational content. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.5
-            },
-            timeout=30
+        skills = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'Extract skills from educational content. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.5,
+            json_mode=True,
+            timeout=30,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        skills = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(skills)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -368,28 +329,17 @@ Return JSON with this exact format:
   }}
 }}"""
 
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'You are an educational content analyst. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.7
-            },
-            timeout=60
+        result = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'You are an educational content analyst. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.7,
+            json_mode=True,
+            timeout=60,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        result = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(result)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -419,28 +369,17 @@ Return JSON with this exact format:
   ]
 }}"""
 
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'You identify skills from educational content. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.5
-            },
-            timeout=60
+        skills_data = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'You identify skills from educational content. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.5,
+            json_mode=True,
+            timeout=60,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        skills_data = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(skills_data)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -471,28 +410,17 @@ Return JSON with this exact format:
   }}
 }}"""
 
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {OPENAI_API_KEY}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'You suggest educational visuals. Return valid JSON only.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.8
-            },
-            timeout=60
+        visual = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'You suggest educational visuals. Return valid JSON only.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.8,
+            json_mode=True,
+            timeout=60,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        visual = json.loads(data['choices'][0]['message']['content'])
-        
         return Response(visual)
     except Exception as e:
         return Response({'error': str(e)}, status=500)
@@ -517,28 +445,17 @@ Content length: {len(lesson.content or '')} characters
 Return JSON: {{"quality_score": 85, "needs_improvement": false, "priority": "medium"}}"""
 
             try:
-                response = requests.post(
-                    'https://api.openai.com/v1/chat/completions',
-                    headers={
-                        'Authorization': f'Bearer {OPENAI_API_KEY}',
-                        'Content-Type': 'application/json'
-                    },
-                    json={
-                        'model': 'gpt-4o-mini',
-                        'messages': [
-                            {'role': 'system', 'content': 'Quick lesson quality analysis. Return valid JSON only.'},
-                            {'role': 'user', 'content': prompt}
-                        ],
-                        'response_format': {'type': 'json_object'},
-                        'temperature': 0.5
-                    },
-                    timeout=30
+                analysis = llm.complete_json(
+                    [
+                        {'role': 'system', 'content': 'Quick lesson quality analysis. Return valid JSON only.'},
+                        {'role': 'user', 'content': prompt}
+                    ],
+                    model='gpt-4o-mini',
+                    temperature=0.5,
+                    json_mode=True,
+                    timeout=30,
                 )
                 
-                response.raise_for_status()
-                data = response.json()
-                analysis = json.loads(data['choices'][0]['message']['content'])
-                
                 results.append({
                     'lesson_id': lesson.id,
                     'lesson_title': lesson.title,
@@ -1,6 +1,7 @@
 import os
 import json
 import re
+from core import llm
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -33,26 +34,22 @@ def ai_curate_course(request):
         
         print(f"Key found: {api_key[:15]}...")
         
-        from openai import OpenAI
-        print("Creating OpenAI client...")
-        client = OpenAI(api_key=api_key)
-        
         print("Calling API...")
-        response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
-            messages=[
+        response = llm.complete(
+            [
                 {"role": "system", "content": "Return only valid JSON."},
                 {"role": "user", "content": f"""Create course about {topic}. Return JSON:
 {{"title": "Title", "subtitle": "Subtitle", "description": "Desc", "difficulty": "Intermediate", 
 "methodology": "generic", "category": "project-management", "duration": "12",
 "selectedModules": [{{"courseId": "{available_modules[0]['courseId']}", "moduleId": "{available_modules[0]['moduleId']}", "rationale": "Relevant"}}]}}"""}
             ],
+            model="gpt-4-turbo-preview",
             temperature=0.7,
             max_tokens=2000,
         )
         
         print("Got response!")
-        content = response.choices[0].message.content
+        content = response.content
         print(f"Content: {content[:100]}")
         
         json_match = re.search(r'\{[\s\S]*\}', content)
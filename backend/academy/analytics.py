@@ -0,0 +1,134 @@
+"""
+Academy admin analytics.
+
+The admin analytics page and dashboard summary are computed in the
+database: one aggregate over the catalogue, one over enrollments (students,
+revenue from the amounts actually paid, completions), one over quiz
+attempts and one over open quote requests, plus monthly buckets from
+core/timeseries.py for revenue, enrollments and completions.
+
+The result is cached under ANALYTICS_KEY. academy/signals.py drops it
+whenever an enrollment, quiz attempt, course, review or quote request is
+written, and forgets the time-series buckets an enrollment write lands in
+so a late status change (a refund, say) is reflected in closed months too.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q, Sum
+
+from core.timeseries import Metric, series
+from .models import Course, Enrollment, QuizAttempt, QuoteRequest
+
+ANALYTICS_KEY = "academy:analytics"
+ANALYTICS_TIMEOUT = 60 * 60
+MONTHS = 6
+
+# Enrollments that brought in money (pending were never paid, refunded were returned)
+PAID_ENROLLMENT_STATUSES = ["active", "completed", "expired"]
+
+REVENUE_METRIC = "academy.revenue"
+ENROLLMENTS_METRIC = "academy.enrollments"
+COMPLETIONS_METRIC = "academy.completions"
+
+
+def _paid_enrollments():
+    return Enrollment.objects.filter(status__in=PAID_ENROLLMENT_STATUSES)
+
+
+def _rate(part, whole):
+    return round(part / whole * 100, 1) if whole else 0
+
+
+def compute_analytics():
+    """All academy admin numbers, from a fixed number of queries"""
+    catalogue = Course.objects.aggregate(
+        total=Count("id"),
+        avg_rating=Avg("rating", filter=Q(rating__gt=0)),
+    )
+    enrollments = Enrollment.objects.aggregate(
+        students=Count("email", distinct=True, filter=Q(status__in=PAID_ENROLLMENT_STATUSES)),
+        paid=Count("id", filter=Q(status__in=PAID_ENROLLMENT_STATUSES)),
+        completed=Count("id", filter=Q(status="completed")),
+        revenue=Sum("amount_paid", filter=Q(status__in=PAID_ENROLLMENT_STATUSES)),
+    )
+    quizzes = QuizAttempt.objects.filter(completed_at__isnull=False).aggregate(
+        attempts=Count("id"),
+        passed=Count("id", filter=Q(passed=True)),
+    )
+    new_quotes = QuoteRequest.objects.filter(status="new").count()
+
+    revenue = series(
+        Metric(REVENUE_METRIC, _paid_enrollments(), "enrolled_at", Sum("amount_paid")),
+        "month", periods=MONTHS,
+    )
+    enrolled = series(Metric(ENROLLMENTS_METRIC, _paid_enrollments(), "enrolled_at"), "month", periods=MONTHS)
+    completed = series(
+        Metric(COMPLETIONS_METRIC, Enrollment.objects.filter(status="completed"), "completed_at"),
+        "month", periods=MONTHS,
+    )
+
+    return {
+        "total_courses": catalogue["total"],
+        "total_students": enrollments["students"],
+        "total_revenue": int(enrollments["revenue"] or 0),
+        "avg_rating": round(float(catalogue["avg_rating"] or 0), 1),
+        "new_quotes": new_quotes,
+        "completion_rate": _rate(enrollments["completed"], enrollments["paid"]),
+        "quiz_pass_rate": _rate(quizzes["passed"], quizzes["attempts"]),
+        "monthly_revenue": [
+            {"month": point["period"].strftime("%b"), "revenue": int(point["value"])}
+            for point in revenue
+        ],
+        "monthly_enrollments": [
+            {"month": a["period"].strftime("%b"), "enrollments": a["value"], "completions": b["value"]}
+            for a, b in zip(enrolled, completed)
+        ],
+    }
+
+
+def get_analytics():
+    data = cache.get(ANALYTICS_KEY)
+    if data is None:
+        data = compute_analytics()
+        cache.set(ANALYTICS_KEY, data, ANALYTICS_TIMEOUT)
+    return data
+
+
+def invalidate_analytics():
+    cache.delete(ANALYTICS_KEY)
+
+
+def recent_enrollments(limit=5):
+    rows = Enrollment.objects.select_related("course").order_by("-enrolled_at")[:limit]
+    return [
+        {
+            "id": str(enrollment.id),
+            "user": f"{enrollment.first_name} {enrollment.last_name}".strip() or enrollment.email,
+            "email": enrollment.email,
+            "course": enrollment.course.title,
+            "date": enrollment.enrolled_at.date().isoformat(),
+            "status": enrollment.status,
+            "progress": enrollment.progress,
+        }
+        for enrollment in rows
+    ]
+
+
+def recent_quotes(limit=3):
+    rows = (
+        QuoteRequest.objects.filter(status="new")
+        .annotate(course_count=Count("courses"))
+        .order_by("-created_at")[:limit]
+    )
+    return [
+        {
+            "id": str(quote.id),
+            "company": quote.company_name,
+            "contact": quote.contact_name,
+            "email": quote.email,
+            "courses": quote.course_count,
+            "teamSize": quote.team_size,
+            "date": quote.created_at.date().isoformat(),
+            "status": quote.status,
+        }
+        for quote in rows
+    ]
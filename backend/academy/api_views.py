@@ -113,9 +113,7 @@ def analyze_lesson_for_visual(request):
     Analyze lesson using OpenAI for visual selection.
     POST /api/v1/academy/analyze-lesson/
     """
-    from openai import OpenAI
-    from django.conf import settings
-    import json
+    from core import llm
     import logging
     
     logger = logging.getLogger(__name__)
@@ -128,8 +126,6 @@ def analyze_lesson_for_visual(request):
         
         logger.info(f"🤖 Analyzing lesson: {lesson_title}")
         
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        
         prompt = f"""Analyze this project management lesson and extract key semantic information.
 
 Course: {course_title}
@@ -153,15 +149,13 @@ Return JSON:
   "reasoning": "Brief explanation"
 }}"""
 
-        response = client.chat.completions.create(
+        result = llm.complete_json(
+            prompt,
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
             temperature=0.2,
             max_tokens=300,
-            response_format={"type": "json_object"}
+            json_mode=True,
         )
-        
-        result = json.loads(response.choices[0].message.content)
         logger.info(f"✅ OpenAI analysis complete: {result}")
         
         return Response(result, status=200)
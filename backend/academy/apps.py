@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AcademyConfig(AppConfig):
+    name = 'academy'
+
+    def ready(self):
+        import academy.signals
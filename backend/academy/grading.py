@@ -0,0 +1,176 @@
+"""
+Quiz grading.
+
+Each quiz lesson has an answer key: its questions with their points,
+explanations and the ids of the correct answers. The key is built with two
+queries and cached under a per-lesson version, which academy/signals.py
+replaces whenever a question or answer of the lesson is written, so a
+stale key is simply never read again.
+
+Grading is pure Python against the key, so a submission costs a cache read
+plus the writes of the attempt itself, and `grade_attempts()` grades a whole
+batch (an exam sitting, imported results) with a fixed number of queries.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Enrollment, QuizAnswer, QuizAttempt, QuizQuestion
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+PASS_PERCENTAGE = 70
+
+
+def _version_key(lesson_id):
+    return f"academy:answer_key:{lesson_id}:version"
+
+
+def answer_key_version(lesson_id):
+    return cache.get_or_set(_version_key(lesson_id), lambda: uuid.uuid4().hex[:12], None)
+
+
+def invalidate_answer_key(lesson_id):
+    """Move the lesson to a new key version; the old key expires on its own"""
+    if lesson_id:
+        cache.delete(_version_key(lesson_id))
+
+
+def build_answer_key(lesson_id):
+    questions = list(
+        QuizQuestion.objects.filter(lesson_id=lesson_id)
+        .order_by("order", "id")
+        .values("id", "points", "explanation", "explanation_nl")
+    )
+    correct = {}
+    for question_id, answer_id in (
+        QuizAnswer.objects.filter(question__lesson_id=lesson_id, is_correct=True)
+        .order_by("id")
+        .values_list("question_id", "id")
+    ):
+        correct.setdefault(question_id, []).append(answer_id)
+
+    for question in questions:
+        question["correct"] = correct.get(question["id"], [])
+    return {
+        "lesson_id": lesson_id,
+        "questions": questions,
+        "max_score": sum(question["points"] for question in questions),
+    }
+
+
+def get_answer_key(lesson_id):
+    version = answer_key_version(lesson_id)
+    cache_key = f"academy:answer_key:{lesson_id}:v{version}"
+    key = cache.get(cache_key)
+    if key is None:
+        key = build_answer_key(lesson_id)
+        key["version"] = version
+        cache.set(cache_key, key, ANSWER_KEY_TIMEOUT)
+    return key
+
+
+def grade(key, answers, lang=None):
+    """
+    Score `answers` ({question_id: [answer_id, ...]}) against an answer key.
+    Raises ValueError for answer ids that are not numbers.
+    """
+    score = 0
+    results = []
+    for question in key["questions"]:
+        correct_ids = set(question["correct"])
+        selected_ids = set(int(a) for a in answers.get(str(question["id"]), []))
+        is_correct = correct_ids == selected_ids
+        if is_correct:
+            score += question["points"]
+
+        results.append({
+            "question_id": question["id"],
+            "correct": is_correct,
+            "correct_answers": list(correct_ids),
+            "selected_answers": list(selected_ids),
+            "explanation": (
+                question["explanation_nl"] if lang == "nl" and question["explanation_nl"] else question["explanation"]
+            ),
+        })
+
+    max_score = key["max_score"]
+    return {
+        "score": score,
+        "max_score": max_score,
+        "percentage": int(score / max_score * 100) if max_score > 0 else 0,
+        "passed": (score / max_score * 100) >= PASS_PERCENTAGE if max_score > 0 else False,
+        "results": results,
+        "key_version": key["version"],
+    }
+
+
+def _uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _moment(value):
+    if isinstance(value, str):
+        return parse_datetime(value)
+    return value
+
+
+def grade_attempts(lesson, submissions, lang=None):
+    """
+    Grade and store a batch of attempts for one quiz lesson.
+
+    `submissions` is a list of {"enrollment": id, "answers": {...}} with an
+    optional "completed_at". Returns one entry per submission, in order: the
+    grade, or {"enrollment": id, "error": ...} when it could not be graded.
+    Passed attempts mark the lesson completed on their enrollment.
+    """
+    from .analytics import invalidate_analytics
+
+    key = get_answer_key(lesson.pk)
+    ids = [_uuid(s.get("enrollment")) for s in submissions]
+    enrollments = Enrollment.objects.filter(course_id=lesson.module.course_id).in_bulk(
+        [pk for pk in ids if pk is not None]
+    )
+
+    now = timezone.now()
+    outcomes, attempts, completed = [], [], []
+    for submission, pk in zip(submissions, ids):
+        enrollment = enrollments.get(pk)
+        if enrollment is None:
+            outcomes.append({"enrollment": submission.get("enrollment"), "error": "Enrollment not found for this course"})
+            continue
+        answers = submission.get("answers") or {}
+        try:
+            result = grade(key, answers, lang)
+        except (AttributeError, TypeError, ValueError):
+            outcomes.append({"enrollment": submission.get("enrollment"), "error": "Invalid answers"})
+            continue
+
+        attempts.append(QuizAttempt(
+            enrollment=enrollment,
+            lesson=lesson,
+            score=result["score"],
+            max_score=result["max_score"],
+            passed=result["passed"],
+            answers=answers,
+            completed_at=_moment(submission.get("completed_at")) or now,
+        ))
+        if result["passed"]:
+            completed.append(enrollment.pk)
+        outcomes.append({"enrollment": str(enrollment.pk), **result})
+
+    if attempts:
+        QuizAttempt.objects.bulk_create(attempts)
+        # bulk_create sends no post_save, so drop the analytics here
+        invalidate_analytics()
+    if completed:
+        through = Enrollment.completed_lessons.through
+        through.objects.bulk_create(
+            [through(enrollment_id=pk, courselesson_id=lesson.pk) for pk in set(completed)],
+            ignore_conflicts=True,
+        )
+    return outcomes
@@ -608,6 +608,12 @@ class Skill(models.Model):
     
     def __str__(self):
         return f"{self.category.name} - {self.name}"
+    
+    def level_for(self, points):
+        for level in (5, 4, 3, 2):
+            if points >= getattr(self, f'level_{level}_points'):
+                return level
+        return 1
 
 
 class UserSkill(models.Model):
@@ -626,15 +632,7 @@ class UserSkill(models.Model):
         return f"{self.user.email} - {self.skill.name}: Level {self.level}"
     
     def calculate_level(self):
-        if self.points >= self.skill.level_5_points:
-            return 5
-        elif self.points >= self.skill.level_4_points:
-            return 4
-        elif self.points >= self.skill.level_3_points:
-            return 3
-        elif self.points >= self.skill.level_2_points:
-            return 2
-        return 1
+        return self.skill.level_for(self.points)
     
     def get_progress_to_next_level(self):
         if self.level == 5:
@@ -0,0 +1,46 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.timeseries import forget
+from .analytics import (
+    COMPLETIONS_METRIC, ENROLLMENTS_METRIC, REVENUE_METRIC, invalidate_analytics,
+)
+from .grading import invalidate_answer_key
+from .models import (
+    Course, CourseReview, Enrollment, QuizAnswer, QuizAttempt, QuizQuestion, QuoteRequest,
+)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_analytics_on_enrollment_change(sender, instance, **kwargs):
+    # The month may have closed already; its cached buckets must be recounted
+    forget(REVENUE_METRIC, instance.enrolled_at)
+    forget(ENROLLMENTS_METRIC, instance.enrolled_at)
+    forget(COMPLETIONS_METRIC, instance.completed_at)
+    invalidate_analytics()
+
+
+@receiver(post_save, sender=QuizAttempt)
+@receiver(post_delete, sender=QuizAttempt)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseReview)
+@receiver(post_delete, sender=CourseReview)
+@receiver(post_save, sender=QuoteRequest)
+@receiver(post_delete, sender=QuoteRequest)
+def invalidate_analytics_on_change(sender, instance, **kwargs):
+    invalidate_analytics()
+
+
+@receiver(post_save, sender=QuizQuestion)
+@receiver(post_delete, sender=QuizQuestion)
+def invalidate_answer_key_on_question_change(sender, instance, **kwargs):
+    invalidate_answer_key(instance.lesson_id)
+
+
+@receiver(post_save, sender=QuizAnswer)
+@receiver(post_delete, sender=QuizAnswer)
+def invalidate_answer_key_on_answer_change(sender, instance, **kwargs):
+    lesson_id = QuizQuestion.objects.filter(pk=instance.question_id).values_list('lesson_id', flat=True).first()
+    invalidate_answer_key(lesson_id)
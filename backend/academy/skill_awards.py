@@ -0,0 +1,144 @@
+"""
+Skill point awards.
+
+`award_skill_points()` takes a list of learning events (a lesson completed,
+a quiz passed, ...) and applies all of them in one pass:
+
+- the lesson-to-skill mappings of every event are loaded with one query and
+  the points per skill are summed in memory;
+- the user's skill rows are locked and read once, new totals and levels are
+  computed in memory and written back with one
+  bulk_create(update_conflicts=True) upsert;
+- one SkillActivity per event and skill is written with one bulk_create;
+- level-ups are detected in the same pass and achieved goals are closed.
+
+A single lesson completion and an offline progress sync replaying hundreds
+of events cost the same handful of queries.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LessonSkillMapping, SkillActivity, SkillGoal, UserSkill
+
+DEFAULT_ACTIVITY = "lesson_complete"
+BONUS_FIELDS = {
+    "quiz_pass": "quiz_bonus",
+    "simulation_correct": "simulation_bonus",
+    "practice_submit": "practice_bonus",
+}
+
+
+def points_for(mapping, activity_type, multiplier=1.0):
+    """Points a mapping is worth for an activity, with the bonus multiplier applied"""
+    points = mapping.points_awarded
+    bonus = BONUS_FIELDS.get(activity_type)
+    if bonus:
+        points += getattr(mapping, bonus)
+    return int(points * multiplier)
+
+
+def award_skill_points(user, events):
+    """
+    Apply a list of events, each {"lesson_id", "activity_type",
+    "bonus_multiplier", "occurred_at"} (all but lesson_id optional). Returns
+    the awarded skills, the level-ups and the lesson ids without mappings.
+    """
+    by_lesson = defaultdict(list)
+    for mapping in LessonSkillMapping.objects.filter(
+        lesson_id__in={str(event["lesson_id"]) for event in events}
+    ).select_related("skill"):
+        by_lesson[mapping.lesson_id].append(mapping)
+
+    skills = {}
+    awarded = defaultdict(int)
+    activities = []
+    unmatched = []
+    for event in events:
+        lesson_id = str(event["lesson_id"])
+        mappings = by_lesson.get(lesson_id)
+        if not mappings:
+            unmatched.append(lesson_id)
+            continue
+        activity_type = event.get("activity_type") or DEFAULT_ACTIVITY
+        multiplier = float(event.get("bonus_multiplier", 1.0))
+        metadata = {"lesson_id": lesson_id}
+        if event.get("occurred_at"):
+            # Replayed offline progress keeps when it actually happened
+            metadata["occurred_at"] = str(event["occurred_at"])
+        for mapping in mappings:
+            points = points_for(mapping, activity_type, multiplier)
+            skills[mapping.skill_id] = mapping.skill
+            awarded[mapping.skill_id] += points
+            activities.append(SkillActivity(
+                user=user,
+                skill_id=mapping.skill_id,
+                activity_type=activity_type,
+                points=points,
+                metadata=metadata,
+            ))
+
+    if not awarded:
+        return {"awarded_skills": [], "level_ups": [], "unmatched_lessons": unmatched}
+
+    with transaction.atomic():
+        # Make sure every row exists so the read below can lock it
+        UserSkill.objects.bulk_create(
+            [UserSkill(user=user, skill_id=skill_id, points=0, level=1) for skill_id in awarded],
+            ignore_conflicts=True,
+        )
+        current = {
+            row["skill_id"]: row
+            for row in UserSkill.objects.select_for_update()
+            .filter(user=user, skill_id__in=list(awarded))
+            .values("skill_id", "points", "level")
+        }
+
+        rows, awarded_skills, level_ups = [], [], []
+        for skill_id, points in awarded.items():
+            skill = skills[skill_id]
+            old_level = current[skill_id]["level"]
+            total = current[skill_id]["points"] + points
+            level = skill.level_for(total)
+            rows.append(UserSkill(user=user, skill_id=skill_id, points=total, level=level))
+            awarded_skills.append({
+                "skill_id": skill_id,
+                "skill_name": skill.name,
+                "points_awarded": points,
+                "total_points": total,
+                "level": level,
+                "leveled_up": level > old_level,
+            })
+            if level > old_level:
+                level_ups.append({
+                    "skill_id": skill_id,
+                    "skill_name": skill.name,
+                    "old_level": old_level,
+                    "new_level": level,
+                })
+
+        UserSkill.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["user", "skill"],
+            update_fields=["points", "level", "last_updated"],
+        )
+        SkillActivity.objects.bulk_create(activities)
+        if level_ups:
+            _close_goals(user, {up["skill_id"]: up["new_level"] for up in level_ups})
+
+    return {"awarded_skills": awarded_skills, "level_ups": level_ups, "unmatched_lessons": unmatched}
+
+
+def _close_goals(user, levels):
+    """Mark open goals reached by the new levels as achieved"""
+    now = timezone.now()
+    reached = []
+    for goal in SkillGoal.objects.filter(user=user, skill_id__in=list(levels), achieved=False):
+        if levels[goal.skill_id] >= goal.target_level:
+            goal.achieved = True
+            goal.achieved_at = now
+            reached.append(goal)
+    if reached:
+        SkillGoal.objects.bulk_update(reached, ["achieved", "achieved_at"])
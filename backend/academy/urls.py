@@ -25,7 +25,11 @@ urlpatterns = [
     
     # Quiz/Exam endpoints
     path('quiz/<str:lesson_id>/', quiz_exam_api.get_quiz, name='get-quiz'),
-    path('quiz/<str:lesson_id>/submit/', quiz_exam_api.submit_quiz, name='submit-quiz'),
+    # Quiz lessons in the database are graded from the cached answer key;
+    # slug ids are the file-based quizzes under academy/data/quizzes/
+    path('quiz/<int:lesson_id>/submit/', views.submit_quiz, name='submit-quiz'),
+    path('quiz/<str:lesson_id>/submit/', quiz_exam_api.submit_quiz, name='submit-file-quiz'),
+    path('quiz/<int:lesson_id>/grade/', views.grade_quiz_batch, name='grade-quiz-batch'),
     
     # AI Content Generation endpoints
     path('ai/analyze-lesson/<int:lesson_id>/', ai_content_api.analyze_lesson_content, name='ai-analyze-lesson'),
@@ -36,6 +40,8 @@ urlpatterns = [
     # EnhancedCourseBuilder AI endpoints
     path('ai/generate-content/', ai_content_api.generate_content, name='ai-generate-content'),
     path('ai/generate-quiz/', ai_content_api.generate_quiz, name='ai-generate-quiz'),
+    path('ai/generate-content/async/', ai_content_api.agenerate_content, name='ai-generate-content-async'),
+    path('ai/generate-quiz/async/', ai_content_api.agenerate_quiz, name='ai-generate-quiz-async'),
     path('ai/generate-simulation/', ai_content_api.generate_simulation, name='ai-generate-simulation'),
     path('ai/generate-assignment/', ai_content_api.generate_assignment, name='ai-generate-assignment'),
     path('ai/generate-exam/', ai_content_api.generate_exam, name='ai-generate-exam'),
@@ -27,18 +27,19 @@ from .models import LessonResource
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from django.db.models import Sum, Avg
+from .analytics import get_analytics, recent_enrollments, recent_quotes
+from .grading import get_answer_key, grade, grade_attempts
+from .skill_awards import award_skill_points
 from .models import (
     SkillCategory, Skill, UserSkill, SkillGoal, 
-    LessonSkillMapping, SkillActivity
+    SkillActivity
 )
 from .serializers import (
     SkillCategorySerializer, SkillSerializer, UserSkillSerializer,
     SkillGoalSerializer, SkillActivitySerializer
 )
 from rest_framework.decorators import api_view
-from openai import OpenAI
-from django.conf import settings
-import json
+from core import llm
 import logging
 
 logger = logging.getLogger(__name__)
@@ -726,33 +727,9 @@ def admin_quote_send(request, quote_id):
 def admin_get_analytics(request):
     """
     Get analytics for admin panel - FROM DATABASE
+    Aggregated and cached in academy/analytics.py
     """
-    from .models import Course
-    
-    total_courses = Course.objects.count()
-    total_students = sum(c.student_count for c in Course.objects.all())
-    total_revenue = sum(c.student_count * float(c.price) for c in Course.objects.all())
-    
-    ratings = [float(c.rating) for c in Course.objects.all() if c.rating > 0]
-    avg_rating = sum(ratings) / len(ratings) if ratings else 0
-    
-    new_quotes = sum(1 for q in QUOTE_REQUESTS if q['status'] == 'new')
-    
-    return Response({
-        'total_courses': total_courses,
-        'total_students': total_students,
-        'total_revenue': int(total_revenue),
-        'avg_rating': round(avg_rating, 1),
-        'new_quotes': new_quotes,
-        'monthly_revenue': [
-            {'month': 'Jul', 'revenue': 180000},
-            {'month': 'Aug', 'revenue': 220000},
-            {'month': 'Sep', 'revenue': 280000},
-            {'month': 'Oct', 'revenue': 350000},
-            {'month': 'Nov', 'revenue': 420000},
-            {'month': 'Dec', 'revenue': 380000},
-        ],
-    })
+    return Response(get_analytics())
 
 
 @api_view(['GET'])
@@ -761,26 +738,18 @@ def admin_dashboard_summary(request):
     """
     Get dashboard summary for admin
     """
-    from .models import Course
-    
-    total_courses = Course.objects.count()
-    total_students = sum(c.student_count for c in Course.objects.all())
-    total_revenue = sum(c.student_count * float(c.price) for c in Course.objects.all())
-    
-    ratings = [float(c.rating) for c in Course.objects.all() if c.rating > 0]
-    avg_rating = sum(ratings) / len(ratings) if ratings else 0
-    
-    new_quotes = sum(1 for q in QUOTE_REQUESTS if q['status'] == 'new')
-    
+    data = get_analytics()
     return Response({
-        'total_courses': total_courses,
-        'total_students': total_students,
-        'total_revenue': int(total_revenue),
-        'avg_rating': round(avg_rating, 1),
-        'new_quotes': new_quotes,
-        'recent_enrollments': ENROLLMENTS[:5],
-        'recent_quotes': [q for q in QUOTE_REQUESTS if q['status'] == 'new'][:3],
+        'total_courses': data['total_courses'],
+        'total_students': data['total_students'],
+        'total_revenue': data['total_revenue'],
+        'avg_rating': data['avg_rating'],
+        'new_quotes': data['new_quotes'],
+        'recent_enrollments': recent_enrollments(5),
+        'recent_quotes': recent_quotes(3),
     })
+
+
 # ============================================
 # ADMIN API ENDPOINTS - Modules & Lessons
 # ============================================
@@ -1323,65 +1292,62 @@ def get_quiz(request, lesson_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submit_quiz(request, lesson_id):
-    """Submit quiz answers and get results"""
+    """Submit quiz answers and get results, graded against the cached answer key"""
     try:
-        lesson = CourseLesson.objects.get(id=lesson_id, lesson_type='quiz')
+        lesson = CourseLesson.objects.select_related('module').get(id=lesson_id, lesson_type='quiz')
     except CourseLesson.DoesNotExist:
         return Response({'error': 'Quiz not found'}, status=404)
     
     user_answers = request.data.get('answers', {})
-    questions = lesson.questions.prefetch_related('answers').all()
-    
-    score = 0
-    max_score = 0
-    results = []
-    
-    for q in questions:
-        max_score += q.points
-        correct_ids = set(q.answers.filter(is_correct=True).values_list('id', flat=True))
-        selected_ids = set(int(a) for a in user_answers.get(str(q.id), []))
-        is_correct = correct_ids == selected_ids
-        
-        if is_correct:
-            score += q.points
-        
-        results.append({
-            'question_id': q.id,
-            'correct': is_correct,
-            'correct_answers': list(correct_ids),
-            'selected_answers': list(selected_ids),
-            'explanation': q.explanation_nl if request.data.get('lang') == 'nl' and q.explanation_nl else q.explanation,
-        })
-    
-    passed = (score / max_score * 100) >= 70 if max_score > 0 else False
+    try:
+        result = grade(get_answer_key(lesson.pk), user_answers, request.data.get('lang'))
+    except (AttributeError, TypeError, ValueError):
+        return Response({'error': 'Invalid answers'}, status=400)
     
     # Save attempt
     enrollment = Enrollment.objects.filter(
         user=request.user,
-        course=lesson.module.course
+        course_id=lesson.module.course_id
     ).first()
     
     if enrollment:
-        from .models import QuizAttempt
         QuizAttempt.objects.create(
             enrollment=enrollment,
             lesson=lesson,
-            score=score,
-            max_score=max_score,
-            passed=passed,
+            score=result['score'],
+            max_score=result['max_score'],
+            passed=result['passed'],
             answers=user_answers,
             completed_at=timezone.now(),
         )
         
         # Mark lesson as completed if passed
-        if passed:
+        if result['passed']:
             enrollment.completed_lessons.add(lesson)
     
+    return Response(result)
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def grade_quiz_batch(request, lesson_id):
+    """
+    Grade a batch of quiz attempts (an exam sitting, imported results)
+    Body: {"attempts": [{"enrollment": uuid, "answers": {...}, "completed_at": optional}]}
+    """
+    try:
+        lesson = CourseLesson.objects.select_related('module').get(id=lesson_id, lesson_type='quiz')
+    except CourseLesson.DoesNotExist:
+        return Response({'error': 'Quiz not found'}, status=404)
+    
+    attempts = request.data.get('attempts')
+    if not isinstance(attempts, list) or not all(isinstance(a, dict) for a in attempts):
+        return Response({'error': 'attempts must be a list of objects'}, status=400)
+    
+    results = grade_attempts(lesson, attempts, request.data.get('lang'))
     return Response({
-        'score': score,
-        'max_score': max_score,
-        'percentage': int(score / max_score * 100) if max_score > 0 else 0,
-        'passed': passed,
+        'graded': sum(1 for r in results if 'error' not in r),
+        'failed': sum(1 for r in results if 'error' in r),
         'results': results,
     })
 
@@ -1547,97 +1513,37 @@ class UserSkillViewSet(viewsets.ReadOnlyModelViewSet):
             "activity_type": "lesson_complete",  # optional
             "bonus_multiplier": 1.0  # optional
         }
+        or, to replay offline progress in one call:
+        Body: {"events": [{"lesson_id": "l1", "activity_type": ..., "occurred_at": ...}, ...]}
         """
-        lesson_id = request.data.get('lesson_id')
-        activity_type = request.data.get('activity_type', 'lesson_complete')
-        bonus_multiplier = float(request.data.get('bonus_multiplier', 1.0))
-        
-        if not lesson_id:
+        events = request.data.get('events')
+        if events is None:
+            events = [request.data]
+        if not isinstance(events, list) or not all(isinstance(e, dict) and e.get('lesson_id') for e in events):
             return Response(
                 {'error': 'lesson_id is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get skill mappings for this lesson
-        mappings = LessonSkillMapping.objects.filter(
-            lesson_id=lesson_id
-        ).select_related('skill')
-        
-        if not mappings.exists():
+        try:
+            result = award_skill_points(request.user, events)
+        except (TypeError, ValueError):
             return Response(
-                {'error': f'No skill mappings found for lesson {lesson_id}'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'bonus_multiplier must be a number'},
+                status=status.HTTP_400_BAD_REQUEST
             )
         
-        awarded_skills = []
-        level_ups = []
-        
-        for mapping in mappings:
-            # Calculate points based on activity type
-            points = mapping.points_awarded
-            
-            if activity_type == 'quiz_pass':
-                points += mapping.quiz_bonus
-            elif activity_type == 'simulation_correct':
-                points += mapping.simulation_bonus
-            elif activity_type == 'practice_submit':
-                points += mapping.practice_bonus
-            
-            # Apply bonus multiplier (for streaks, etc.)
-            points = int(points * bonus_multiplier)
-            
-            # Get or create user skill
-            user_skill, created = UserSkill.objects.get_or_create(
-                user=request.user,
-                skill=mapping.skill,
-                defaults={'points': 0, 'level': 1}
-            )
-            
-            old_level = user_skill.level
-            leveled_up = user_skill.add_points(points)
-            
-            # Log activity
-            SkillActivity.objects.create(
-                user=request.user,
-                skill=mapping.skill,
-                activity_type=activity_type,
-                points=points,
-                metadata={'lesson_id': lesson_id}
+        if not result['awarded_skills']:
+            return Response(
+                {'error': f"No skill mappings found for lesson {', '.join(result['unmatched_lessons'])}"},
+                status=status.HTTP_404_NOT_FOUND
             )
-            
-            awarded_skills.append({
-                'skill_id': mapping.skill.id,
-                'skill_name': mapping.skill.name,
-                'points_awarded': points,
-                'total_points': user_skill.points,
-                'level': user_skill.level,
-                'leveled_up': leveled_up
-            })
-            
-            if leveled_up:
-                level_ups.append({
-                    'skill_id': mapping.skill.id,
-                    'skill_name': mapping.skill.name,
-                    'old_level': old_level,
-                    'new_level': user_skill.level
-                })
-                
-                # Check if goal achieved
-                goals = SkillGoal.objects.filter(
-                    user=request.user,
-                    skill=mapping.skill,
-                    achieved=False
-                )
-                for goal in goals:
-                    if user_skill.level >= goal.target_level:
-                        goal.achieved = True
-                        goal.achieved_at = timezone.now()
-                        goal.save()
         
         return Response({
-            'awarded_skills': awarded_skills,
-            'level_ups': level_ups,
-            'total_skills_updated': len(awarded_skills)
+            'awarded_skills': result['awarded_skills'],
+            'level_ups': result['level_ups'],
+            'total_skills_updated': len(result['awarded_skills']),
+            'unmatched_lessons': result['unmatched_lessons'],
         })
     
     @action(detail=False, methods=['get'])
@@ -1746,9 +1652,6 @@ def analyze_lesson_for_visual(request):
         
         logger.info(f"Analyzing lesson: {lesson_title}")
         
-        # Initialize OpenAI client
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        
         # Create prompt
         prompt = f"""Analyze this project management lesson and extract key concepts:
 
@@ -1787,10 +1690,9 @@ Respond ONLY with JSON (no markdown):
   "reasoning": "Lesson focuses on project manager roles and responsibilities"
 }}"""
 
-        # Call OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        # Call OpenAI through the gateway
+        result = llm.complete_json(
+            [
                 {
                     "role": "system",
                     "content": "You are an expert in project management education. Extract semantic concepts accurately and respond ONLY with valid JSON."
@@ -1800,15 +1702,12 @@ Respond ONLY with JSON (no markdown):
                     "content": prompt
                 }
             ],
+            model="gpt-4o-mini",
             temperature=0.2,
             max_tokens=300,
-            response_format={"type": "json_object"}
+            json_mode=True,
         )
         
-        # Parse result
-        result_str = response.choices[0].message.content
-        result = json.loads(result_str)
-        
         logger.info(f"Analysis complete: {result.get('primaryConcepts', [])}")
         
         return Response(result, status=200)
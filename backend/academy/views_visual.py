@@ -5,8 +5,8 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
 import requests
 import os
-import json
 
+from core import llm
 from .models import LessonVisual, Course, CourseLesson
 from .serializers_visual import (
     LessonVisualSerializer, 
@@ -166,28 +166,19 @@ CUSTOM REQUIREMENTS: {custom_keywords}
 
 Return JSON with: visual_id, confidence (0-100), concepts (array), intent, methodology"""
 
-            response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers={
-                    'Authorization': f'Bearer {api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'gpt-4o-mini',
-                    'messages': [
-                        {'role': 'system', 'content': 'Generate visual metadata. Return valid JSON only.'},
-                        {'role': 'user', 'content': prompt}
-                    ],
-                    'response_format': {'type': 'json_object'},
-                    'temperature': 0.7
-                },
-                timeout=60
+            visual_data = llm.complete_json(
+                [
+                    {'role': 'system', 'content': 'Generate visual metadata. Return valid JSON only.'},
+                    {'role': 'user', 'content': prompt}
+                ],
+                model='gpt-4o-mini',
+                temperature=0.7,
+                json_mode=True,
+                timeout=60,
+                # A regeneration should not get the previous answer back
+                use_cache=False,
             )
             
-            response.raise_for_status()
-            data = response.json()
-            visual_data = json.loads(data['choices'][0]['message']['content'])
-            
             visual.visual_id = visual_data.get('visual_id', visual.visual_id)[:200]
             visual.ai_confidence = min(100, max(0, visual_data.get('confidence', visual.ai_confidence)))
             visual.ai_concepts = visual_data.get('concepts', visual.ai_concepts)
@@ -286,28 +277,17 @@ Duration: {lesson.duration_minutes} min
 
 Suggest visual and return JSON with: visual_id, confidence, concepts, intent, methodology"""
         
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {'role': 'system', 'content': 'Suggest visual for PM lesson. Return valid JSON.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-                'response_format': {'type': 'json_object'},
-                'temperature': 0.7
-            },
-            timeout=30
+        result = llm.complete_json(
+            [
+                {'role': 'system', 'content': 'Suggest visual for PM lesson. Return valid JSON.'},
+                {'role': 'user', 'content': prompt}
+            ],
+            model='gpt-4o-mini',
+            temperature=0.7,
+            json_mode=True,
+            timeout=30,
         )
         
-        response.raise_for_status()
-        data = response.json()
-        result = json.loads(data['choices'][0]['message']['content'])
-        
         return {
             'visual_id': result.get('visual_id', 'lifecycle'),
             'confidence': min(100, max(0, result.get('confidence', 70))),
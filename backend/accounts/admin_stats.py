@@ -0,0 +1,242 @@
+"""
+Superadmin portal numbers.
+
+The company list is one annotated queryset: user counts, the owner and
+the latest subscription come from correlated subqueries instead of three
+queries per company.
+
+The admin dashboard stats are computed with a handful of conditional
+aggregates (MRR is summed in the database) plus cached daily buckets from
+core/timeseries.py for the growth windows, and stored in a StatsSnapshot
+row. The view serves the snapshot with its computed_at timestamp; a stale
+snapshot is refreshed in the background, and `manage.py refresh_admin_stats`
+refreshes it from cron.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import (
+    Case, Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.background import run_in_background
+from core.timeseries import Metric, series, total
+from .models import Company, StatsSnapshot
+
+User = get_user_model()
+
+ADMIN_STATS_KEY = "admin_stats"
+ACTIVE_SUBSCRIPTION_STATUSES = ["active", "trialing"]
+OWNER_ROLES = ["admin", "superadmin"]
+SIGNUPS_METRIC = "admin.signups"
+COMPANIES_METRIC = "admin.companies"
+
+
+# ============================================================
+# COMPANY LIST
+# ============================================================
+
+def annotated_companies():
+    """Companies with user count, owner and latest subscription annotated"""
+    from subscriptions.models import CompanySubscription
+
+    user_count = (
+        User.objects.filter(company=OuterRef("pk"))
+        .order_by()
+        .values("company")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    owner = User.objects.filter(company=OuterRef("pk"), role__in=OWNER_ROLES).order_by("pk")
+    latest = CompanySubscription.objects.filter(company=OuterRef("pk")).order_by("-created_at")
+
+    return Company.objects.order_by("name").annotate(
+        user_count=Coalesce(Subquery(user_count, output_field=IntegerField()), 0),
+        owner_id=Subquery(owner.values("id")[:1]),
+        owner_email=Subquery(owner.values("email")[:1]),
+        owner_first_name=Subquery(owner.values("first_name")[:1]),
+        owner_last_name=Subquery(owner.values("last_name")[:1]),
+        subscription_status=Subquery(latest.values("status")[:1]),
+        plan_name=Subquery(latest.values("plan__name")[:1]),
+        billing_cycle=Subquery(latest.values("billing_cycle")[:1]),
+        payment_method=Subquery(latest.values("payment_method")[:1]),
+    )
+
+
+def company_row(company):
+    owner = None
+    if company.owner_id:
+        full_name = f"{company.owner_first_name} {company.owner_last_name}".strip()
+        owner = {
+            "id": company.owner_id,
+            "email": company.owner_email,
+            "full_name": full_name or company.owner_email,
+        }
+    return {
+        "id": company.id,
+        "name": company.name,
+        "description": company.description,
+        "is_subscribed": company.is_subscribed,
+        "user_count": company.user_count,
+        "subscription_status": company.subscription_status or "none",
+        "plan_name": company.plan_name,
+        "billing_cycle": company.billing_cycle,
+        "payment_method": company.payment_method,
+        "owner": owner,
+        "created_at": company.created_at.isoformat() if company.created_at else None,
+        "updated_at": company.updated_at.isoformat() if company.updated_at else None,
+    }
+
+
+# ============================================================
+# DASHBOARD STATS
+# ============================================================
+
+def monthly_price_expression():
+    """A subscription's plan price per month; yearly plans count for a twelfth"""
+    money = DecimalField(max_digits=12, decimal_places=2)
+    return Case(
+        When(billing_cycle="yearly", then=F("plan__price") / Value(Decimal("12"), output_field=money)),
+        default=F("plan__price"),
+        output_field=money,
+    )
+
+
+def _growth(current, previous):
+    if previous > 0:
+        return ((current - previous) / previous) * 100
+    return 100 if current > 0 else 0
+
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+def compute_admin_stats(now=None):
+    """All admin dashboard numbers, from a fixed number of queries"""
+    from subscriptions.models import CompanySubscription
+
+    now = now or timezone.now()
+    month_ago = now - timedelta(days=30)
+
+    users = User.objects.aggregate(
+        total=Count("id"),
+        active=Count("id", filter=Q(is_active=True)),
+        admins=Count("id", filter=Q(role__in=OWNER_ROLES)),
+        pms=Count("id", filter=Q(role="pm")),
+    )
+    total_companies = Company.objects.count()
+
+    # Signups over the last 7 days vs the 7 before, and new companies over
+    # the last 30 days vs the 30 before, from cached daily buckets
+    signups = series(Metric(SIGNUPS_METRIC, User.objects.all(), "date_joined"), "day", periods=14, now=now)
+    recent_users, previous_week_users = total(signups[7:]), total(signups[:7])
+    new_companies = series(Metric(COMPANIES_METRIC, Company.objects.all(), "created_at"), "day", periods=60, now=now)
+    recent_companies, previous_month_companies = total(new_companies[30:]), total(new_companies[:30])
+
+    active_subs = CompanySubscription.objects.filter(status__in=ACTIVE_SUBSCRIPTION_STATUSES)
+    older = Q(created_at__lt=month_ago)
+    subscriptions = active_subs.aggregate(
+        active=Count("id"),
+        last_month=Count("id", filter=older),
+        mrr=Sum(monthly_price_expression()),
+        mrr_last_month=Sum(monthly_price_expression(), filter=older),
+    )
+    mrr = _money(subscriptions["mrr"])
+    mrr_last_month = _money(subscriptions["mrr_last_month"])
+
+    subscriptions_by_plan = [
+        {"plan": row["plan__name"] or "Unknown", "count": row["count"]}
+        for row in active_subs.order_by().values("plan__name").annotate(count=Count("id"))
+    ]
+
+    newest = list(User.objects.select_related("company").order_by("-date_joined")[:10])
+    new_users = [
+        {
+            "id": user.id,
+            "email": user.email,
+            "full_name": f"{user.first_name} {user.last_name}".strip() or user.email,
+            "company_name": user.company.name if user.company else None,
+            "is_active": user.is_active,
+            "date_joined": user.date_joined.isoformat() if user.date_joined else None,
+        }
+        for user in newest
+    ]
+    recent_activity = [
+        {
+            "id": f"signup_{user.id}",
+            "user_email": user.email,
+            "action": "user_signup",
+            "description": f"New user registered: {user.email}",
+            "created_at": user.date_joined.isoformat() if user.date_joined else now.isoformat(),
+            "severity": "info",
+        }
+        for user in newest[:5]
+    ]
+
+    return {
+        "overview": {
+            "total_users": users["total"],
+            "active_users": users["active"],
+            "inactive_users": users["total"] - users["active"],
+            "total_companies": total_companies,
+            "active_subscriptions": subscriptions["active"],
+        },
+        "revenue": {
+            "mrr": mrr,
+            "arr": round(mrr * 12, 2),
+            "currency": "EUR",
+        },
+        "users": {
+            "admins": users["admins"],
+            "project_managers": users["pms"],
+            "recent_signups": recent_users,
+        },
+        "growth": {
+            "users": round(_growth(recent_users, previous_week_users), 1),
+            "companies": round(_growth(recent_companies, previous_month_companies), 1),
+            "mrr": round(_growth(mrr, mrr_last_month), 1),
+            "subscriptions": round(_growth(subscriptions["active"], subscriptions["last_month"]), 1),
+        },
+        "activity": {
+            "recent_logins": users["active"],
+            "active_projects": 0,  # Placeholder - implement when projects model is available
+            "pending_tasks": 0,  # Placeholder
+        },
+        "recent_activity": recent_activity,
+        "new_users": new_users,
+        "subscriptions_by_plan": subscriptions_by_plan,
+    }
+
+
+def refresh_admin_stats():
+    """Recompute the dashboard stats and store them as the current snapshot"""
+    now = timezone.now()
+    snapshot, _ = StatsSnapshot.objects.update_or_create(
+        key=ADMIN_STATS_KEY,
+        defaults={"data": compute_admin_stats(now), "computed_at": now},
+    )
+    cache.delete(f"accounts:stats_refresh:{ADMIN_STATS_KEY}")
+    return snapshot
+
+
+def get_admin_stats(force=False):
+    """
+    The current snapshot. Missing snapshots (or force) are computed inline;
+    stale ones are served as-is while one background refresh runs.
+    """
+    snapshot = StatsSnapshot.objects.filter(key=ADMIN_STATS_KEY).first()
+    if snapshot is None or force:
+        return refresh_admin_stats()
+
+    max_age = timedelta(seconds=getattr(settings, "ADMIN_STATS_MAX_AGE", 300))
+    if timezone.now() - snapshot.computed_at > max_age:
+        # cache.add is the guard against queueing a refresh per request
+        if cache.add(f"accounts:stats_refresh:{ADMIN_STATS_KEY}", True, 60):
+            run_in_background(refresh_admin_stats)
+    return snapshot
@@ -0,0 +1,222 @@
+"""
+Client for the external CRM's tenant user API, and the local user mirror.
+
+The CRM serves tenant users a page (at most 100) at a time. Instead of the
+frontend walking pages through CrmApiKeyViewSet.fetch_users, the sync job
+(`sync_tenant_users`, run by the `sync` action and the sync_crm_users
+command) walks them server-side:
+
+- every call goes through one pooled requests.Session whose adapter retries
+  timeouts, 429 and 5xx answers with exponential backoff (CRM_MAX_RETRIES,
+  CRM_BACKOFF), honouring Retry-After;
+- pages are fetched CRM_SYNC_CONCURRENCY at a time and upserted into
+  CrmUser with one bulk_create(update_conflicts=True) per page, so memory
+  stays bounded by the window;
+- after each window the next page is checkpointed in CrmApiKey.sync_cursor,
+  and an interrupted run resumes from there with the same `since`;
+- runs are incremental: only users updated since the last completed sync
+  are asked for. That is the mirror's own watermark rather than
+  last_fetched_at, which single-page fetches also move. A full run (first
+  sync, or full=True) also deactivates mirrored users the CRM no longer
+  returns.
+
+Newsletters read CRM recipients from the mirror (newsletters/recipients.py).
+
+The async view (`acrm_fetch_users`) uses an httpx.AsyncClient instead,
+so a worker is not held while the CRM answers. Async clients keep their
+connection pool per event loop.
+"""
+import asyncio
+import logging
+import math
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+TENANT_USERS_PATH = "/api/accounts/tenant-users/"
+CRM_TIMEOUT = 30
+# The CRM serves at most this many users per page
+MAX_PAGE_SIZE = 100
+MIRROR_FIELDS = ["email", "first_name", "last_name", "raw_data", "is_active", "last_synced_at"]
+
+_session = None
+_session_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def tenant_users_request(api_key_obj, page=1, page_size=MAX_PAGE_SIZE, since=None):
+    """URL, headers and params of one page of the key's tenant users"""
+    params = {"page": page, "page_size": min(page_size, MAX_PAGE_SIZE)}
+    if since:
+        params["updated_since"] = since
+    return {
+        "url": api_key_obj.api_base_url.rstrip("/") + TENANT_USERS_PATH,
+        "headers": {
+            "X-Tenant-API-Key": api_key_obj.api_key,
+            "Content-Type": "application/json",
+        },
+        "params": params,
+    }
+
+
+def session():
+    """The process-wide CRM session: pooled connections, retries with backoff"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=getattr(settings, "CRM_MAX_RETRIES", 4),
+                    backoff_factor=getattr(settings, "CRM_BACKOFF", 0.5),
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset({"GET"}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_maxsize=getattr(settings, "CRM_SYNC_CONCURRENCY", 4), max_retries=retry
+                )
+                new_session = requests.Session()
+                new_session.mount("https://", adapter)
+                new_session.mount("http://", adapter)
+                _session = new_session
+    return _session
+
+
+def fetch_tenant_users(api_key_obj, page=1, page_size=MAX_PAGE_SIZE, since=None):
+    """One page of tenant users as a requests.Response; raises requests.RequestException"""
+    return session().get(**tenant_users_request(api_key_obj, page, page_size, since), timeout=CRM_TIMEOUT)
+
+
+def _async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(timeout=CRM_TIMEOUT)
+    return client
+
+
+async def afetch_tenant_users(api_key_obj, page=1, page_size=MAX_PAGE_SIZE):
+    """One page of tenant users as an httpx.Response; raises httpx.HTTPError"""
+    return await _async_client().get(**tenant_users_request(api_key_obj, page, page_size))
+
+
+# ============================================================
+# SYNC
+# ============================================================
+
+def _page(api_key_obj, page, since):
+    response = fetch_tenant_users(api_key_obj, page, since=since)
+    response.raise_for_status()
+    return response.json()
+
+
+def _mirror_rows(api_key_obj, users, synced_at):
+    from accounts.models import CrmUser
+
+    rows = {}
+    for user in users:
+        if not isinstance(user, dict) or not user.get("email"):
+            continue
+        external_id = str(user.get("id") or user["email"])
+        rows[external_id] = CrmUser(
+            api_key=api_key_obj,
+            external_id=external_id,
+            email=user["email"],
+            first_name=(user.get("first_name") or "")[:150],
+            last_name=(user.get("last_name") or "")[:150],
+            raw_data=user,
+            is_active=user.get("is_active", True) is not False,
+            last_synced_at=synced_at,
+        )
+    return list(rows.values())
+
+
+def upsert_users(api_key_obj, users, synced_at=None):
+    """Insert or update one page of CRM users in the mirror; returns the rows written"""
+    from accounts.models import CrmUser
+
+    rows = _mirror_rows(api_key_obj, users, synced_at or timezone.now())
+    if rows:
+        CrmUser.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["api_key", "external_id"],
+            update_fields=MIRROR_FIELDS,
+        )
+    return len(rows)
+
+
+def _checkpoint(api_key_obj, cursor):
+    api_key_obj.sync_cursor = cursor
+    api_key_obj.save(update_fields=["sync_cursor"])
+
+
+def sync_tenant_users(api_key_obj, full=False):
+    """
+    Mirror the key's tenant users, resuming a checkpointed run if there is
+    one. Returns {"pages", "users", "resumed"}; raises requests.RequestException
+    with the checkpoint kept, so the next run continues where this one stopped.
+    """
+    from accounts.models import CrmUser
+
+    cursor = api_key_obj.sync_cursor
+    resumed = bool(cursor)
+    if not resumed:
+        # Every row of a run is stamped with its start, so this is when the last run began
+        watermark = None if full else CrmUser.objects.filter(api_key=api_key_obj).aggregate(
+            latest=Max("last_synced_at")
+        )["latest"]
+        since = watermark.isoformat() if watermark else None
+        cursor = {"page": 1, "since": since, "started_at": timezone.now().isoformat()}
+        _checkpoint(api_key_obj, cursor)
+    started_at = parse_datetime(cursor["started_at"])
+    since = cursor["since"]
+
+    page = cursor["page"]
+    first = _page(api_key_obj, page, since)
+    written = upsert_users(api_key_obj, first.get("users", []), started_at)
+    last_page = max(page, math.ceil((first.get("count") or 0) / MAX_PAGE_SIZE))
+    fetched = 1
+    _checkpoint(api_key_obj, {**cursor, "page": page + 1})
+
+    concurrency = max(1, getattr(settings, "CRM_SYNC_CONCURRENCY", 4))
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crm-sync") as pool:
+        for start in range(page + 1, last_page + 1, concurrency):
+            window = range(start, min(start + concurrency, last_page + 1))
+            # Fetched together, written in page order on this thread
+            for data in pool.map(lambda number: _page(api_key_obj, number, since), window):
+                written += upsert_users(api_key_obj, data.get("users", []), started_at)
+            fetched += len(window)
+            _checkpoint(api_key_obj, {**cursor, "page": window.stop})
+
+    if since is None:
+        # A full listing: whoever was not in it has left the CRM
+        CrmUser.objects.filter(api_key=api_key_obj, last_synced_at__lt=started_at).update(is_active=False)
+
+    api_key_obj.sync_cursor = None
+    api_key_obj.last_fetched_at = started_at
+    api_key_obj.save(update_fields=["sync_cursor", "last_fetched_at"])
+    logger.info("CRM sync of key %s: %s users from %s pages", api_key_obj.pk, written, fetched)
+    return {"pages": fetched, "users": written, "resumed": resumed}
+
+
+def sync_tenant_users_by_id(api_key_id, full=False):
+    """sync_tenant_users() for background tasks"""
+    from accounts.models import CrmApiKey
+
+    try:
+        sync_tenant_users(CrmApiKey.objects.get(pk=api_key_id), full=full)
+    except requests.RequestException:
+        logger.exception("CRM sync of key %s stopped; it resumes on the next run", api_key_id)
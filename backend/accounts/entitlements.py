@@ -0,0 +1,185 @@
+"""
+Per-company entitlements: subscription tier, feature flags and usage.
+
+Everything SubscriptionTier needs is kept in the cache so a feature or
+limit check is a memory lookup:
+
+- the company's tier (from its active subscription), dropped when a
+  subscription changes;
+- a user's trial end date (from their Registration), dropped when the
+  registration changes;
+- usage counters for active users, programs and projects. They are
+  counted once and then adjusted with cache.incr/decr from the
+  create/delete signals in accounts/signals.py. Changes the signals cannot
+  follow (a user deactivated or moved) drop the counters so they are
+  counted again.
+
+get_entitlements() memoizes the result on the user object, so one request
+resolves it at most once.
+"""
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+USAGE_RESOURCES = ("users", "programs", "projects")
+ENTITLEMENTS_TIMEOUT = 60 * 60
+NO_TRIAL = "none"
+
+
+def _usage_key(company_id, resource):
+    return f"entitlements:{company_id}:usage:{resource}"
+
+
+def _tier_key(company_id):
+    return f"entitlements:{company_id}:tier"
+
+
+def _trial_key(user_id):
+    return f"entitlements:trial:{user_id}"
+
+
+def _count_subquery(model, condition=None):
+    qs = model.objects.filter(company=OuterRef("pk"), **(condition or {}))
+    qs = qs.order_by().values("company").annotate(total=Count("pk")).values("total")
+    return Coalesce(Subquery(qs, output_field=IntegerField()), 0)
+
+
+def company_usage(company_id):
+    """Active users, programs and projects of a company, counted once then cached"""
+    keys = {_usage_key(company_id, resource): resource for resource in USAGE_RESOURCES}
+    usage = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    if len(usage) < len(USAGE_RESOURCES):
+        from accounts.models import Company, CustomUser
+        from programs.models import Program
+        from projects.models import Project
+
+        counts = Company.objects.filter(pk=company_id).annotate(
+            usage_users=_count_subquery(CustomUser, {"is_active": True}),
+            usage_programs=_count_subquery(Program),
+            usage_projects=_count_subquery(Project),
+        ).values("usage_users", "usage_programs", "usage_projects").first() or {}
+        usage = {resource: counts.get(f"usage_{resource}", 0) for resource in USAGE_RESOURCES}
+        cache.set_many(
+            {_usage_key(company_id, resource): value for resource, value in usage.items()},
+            ENTITLEMENTS_TIMEOUT,
+        )
+    return usage
+
+
+def company_tier(company_id):
+    """Plan level of the company's active subscription (starter without one)"""
+    from accounts.models import SubscriptionTier
+
+    tier = cache.get(_tier_key(company_id))
+    if tier is None:
+        from subscriptions.models import CompanySubscription
+
+        tier = (
+            CompanySubscription.objects.filter(company_id=company_id, status__in=["active", "trialing"])
+            .values_list("plan__plan_level", flat=True)
+            .first()
+        ) or SubscriptionTier.STARTER
+        cache.set(_tier_key(company_id), tier, ENTITLEMENTS_TIMEOUT)
+    return tier
+
+
+def trial_end(user):
+    """End of the user's trial, or None when they have no trial"""
+    value = cache.get(_trial_key(user.pk))
+    if value is None:
+        from accounts.models import Registration
+
+        registration = Registration.objects.filter(user=user, trial_days__gt=0).values("trial_end_date").first()
+        end = registration and registration["trial_end_date"]
+        value = end.isoformat() if end else NO_TRIAL
+        cache.set(_trial_key(user.pk), value, ENTITLEMENTS_TIMEOUT)
+    return None if value == NO_TRIAL else parse_datetime(value)
+
+
+class Entitlements:
+    """Tier, features, limits and usage resolved for one user"""
+
+    def __init__(self, tier, usage, company_id=None, on_trial=False):
+        from accounts.models import SubscriptionTier
+
+        self.tier = tier
+        self.usage = usage
+        self.company_id = company_id
+        self.on_trial = on_trial
+        self.config = SubscriptionTier.TIER_FEATURES.get(tier, {})
+
+    @property
+    def features(self):
+        return self.config.get("features", {})
+
+    def has_feature(self, feature_name):
+        return self.features.get(feature_name, False)
+
+    def limit(self, limit_name):
+        """-1 = unlimited, 0 = not allowed"""
+        return self.config.get(limit_name, 0)
+
+    def can_create(self, resource_type):
+        limit = self.limit(f"max_{resource_type}")
+        if limit == -1:
+            return True
+        if limit == 0 or not self.company_id:
+            return False
+        if resource_type not in self.usage:
+            return True
+        return self.usage[resource_type] < limit
+
+
+def get_entitlements(user):
+    """Entitlements for a user, memoized on the user object for the request"""
+    cached = getattr(user, "_entitlements", None)
+    if cached is not None:
+        return cached
+
+    from accounts.models import SubscriptionTier
+
+    company_id = getattr(user, "company_id", None)
+    end = trial_end(user)
+    on_trial = bool(end and end > timezone.now())
+    if on_trial:
+        tier = SubscriptionTier.TRIAL
+    elif company_id:
+        tier = company_tier(company_id)
+    else:
+        tier = SubscriptionTier.STARTER
+    usage = company_usage(company_id) if company_id else {}
+
+    user._entitlements = Entitlements(tier, usage, company_id, on_trial)
+    return user._entitlements
+
+
+def adjust_usage(company_id, resource, delta):
+    """Move a cached usage counter; counters not in the cache are left to be counted"""
+    if not company_id:
+        return
+    key = _usage_key(company_id, resource)
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        else:
+            cache.decr(key, -delta)
+    except ValueError:
+        pass
+
+
+def invalidate_usage(company_id, resources=USAGE_RESOURCES):
+    if company_id:
+        cache.delete_many([_usage_key(company_id, resource) for resource in resources])
+
+
+def invalidate_tier(company_id):
+    if company_id:
+        cache.delete(_tier_key(company_id))
+
+
+def invalidate_trial(user_id):
+    if user_id:
+        cache.delete(_trial_key(user_id))
@@ -0,0 +1,123 @@
+"""
+Request identity: who is calling, resolved once.
+
+CachedJWTAuthentication replaces simplejwt's JWTAuthentication. A token is
+still validated on every request (signature, expiry, the revoke claim), but
+the user row it points at, with its company joined in, comes from the cache
+for IDENTITY_CACHE_TIMEOUT seconds instead of a query per request. The
+entry is dropped by accounts/signals.py whenever the user or their company
+is saved or deleted. That only reaches every worker when the cache is shared
+(Redis, REDIS_URL), so the timeout defaults to 0, a query per request as
+before, on the per-process cache; with Redis, role, activation and password
+changes apply on the next request.
+
+get_identity() bundles that user with their company, role, token and plan
+entitlements (accounts/entitlements.py) in one Identity, memoized on the
+user object. Views and the bot's AI tools (bot/ai/utils/session_context.py)
+read the same object, so a request resolves each of them at most once.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from accounts.entitlements import get_entitlements
+
+
+def _user_key(user_id):
+    return f"identity:user:{user_id}"
+
+
+def invalidate_identity(*user_ids):
+    cache.delete_many([_user_key(user_id) for user_id in user_ids if user_id])
+
+
+def invalidate_company_identities(company_id):
+    """Drop the cached users of a company, e.g. after the company changed"""
+    from accounts.models import CustomUser
+
+    if company_id:
+        invalidate_identity(*CustomUser.objects.filter(company_id=company_id).values_list("pk", flat=True))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user from the cache"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = _user_key(user_id)
+        timeout = getattr(settings, "IDENTITY_CACHE_TIMEOUT", 0)
+        user = cache.get(key) if timeout else None
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related("company").get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            if timeout:
+                cache.set(key, user, timeout)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        user._identity = Identity(user, validated_token)
+        return user
+
+
+class Identity:
+    """The user behind a request with their company, role, token and plan"""
+
+    def __init__(self, user, token=None):
+        self.user = user
+        self._token = token
+
+    @property
+    def token(self):
+        """The raw access token, or None for session and test logins"""
+        return str(self._token) if self._token is not None else None
+
+    @property
+    def jti(self):
+        return self._token.get(api_settings.JTI_CLAIM) if hasattr(self._token, "get") else None
+
+    @property
+    def company(self):
+        return self.user.company
+
+    @property
+    def company_id(self):
+        return self.user.company_id
+
+    @property
+    def role(self):
+        return self.user.role
+
+    @property
+    def entitlements(self):
+        return get_entitlements(self.user)
+
+    @property
+    def tier(self):
+        return self.entitlements.tier
+
+
+def get_identity(user, token=None):
+    """The request's Identity for this user, memoized on the user object"""
+    identity = getattr(user, "_identity", None)
+    if identity is None:
+        identity = user._identity = Identity(user, token)
+    elif token is not None and identity._token is None:
+        identity._token = token
+    return identity
@@ -0,0 +1,20 @@
+"""
+Management command to refresh the superadmin dashboard stats snapshot.
+Usage: python manage.py refresh_admin_stats   (run from cron every few minutes)
+"""
+
+from django.core.management.base import BaseCommand
+from accounts.admin_stats import refresh_admin_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the superadmin dashboard stats snapshot"
+
+    def handle(self, *args, **options):
+        snapshot = refresh_admin_stats()
+        overview = snapshot.data["overview"]
+        self.stdout.write(
+            f"{overview['total_companies']} companies, {overview['total_users']} users, "
+            f"MRR {snapshot.data['revenue']['mrr']}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Admin stats computed at {snapshot.computed_at:%Y-%m-%d %H:%M:%S}"))
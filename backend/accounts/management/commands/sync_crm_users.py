@@ -0,0 +1,37 @@
+"""
+Management command to mirror CRM tenant users into CrmUser.
+Usage: python manage.py sync_crm_users [--key ID] [--full]   (run from cron)
+
+Each active key resumes its checkpointed run if one was interrupted,
+otherwise fetches the users changed since its last sync (all of them
+with --full).
+"""
+
+import requests
+from django.core.management.base import BaseCommand
+from accounts.crm import sync_tenant_users
+from accounts.models import CrmApiKey
+
+
+class Command(BaseCommand):
+    help = "Sync CRM tenant users into the local mirror"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--key", type=int, help="Only sync this CRM API key")
+        parser.add_argument("--full", action="store_true", help="Re-read every user, not just changes")
+
+    def handle(self, *args, **options):
+        keys = CrmApiKey.objects.filter(is_active=True)
+        if options["key"]:
+            keys = keys.filter(pk=options["key"])
+
+        for key in keys:
+            try:
+                result = sync_tenant_users(key, full=options["full"])
+            except requests.RequestException as e:
+                self.stdout.write(self.style.WARNING(f"{key}: stopped at page {key.sync_cursor['page']} ({e})"))
+                continue
+            resumed = " (resumed)" if result["resumed"] else ""
+            self.stdout.write(f"{key}: {result['users']} users from {result['pages']} pages{resumed}")
+
+        self.stdout.write(self.style.SUCCESS("CRM sync complete"))
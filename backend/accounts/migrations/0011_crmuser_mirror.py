@@ -0,0 +1,42 @@
+# Generated by Django 4.2.28 on 2026-10-19 14:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_statssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crmapikey',
+            name='sync_cursor',
+            field=models.JSONField(blank=True, help_text='Checkpoint of the user sync in progress (next page, since, started_at); empty when idle', null=True),
+        ),
+        migrations.CreateModel(
+            name='CrmUser',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.CharField(help_text="The user's id in the CRM", max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('first_name', models.CharField(blank=True, max_length=150)),
+                ('last_name', models.CharField(blank=True, max_length=150)),
+                ('raw_data', models.JSONField(blank=True, default=dict)),
+                ('is_active', models.BooleanField(default=True)),
+                ('last_synced_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('api_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crm_users', to='accounts.crmapikey')),
+            ],
+            options={
+                'ordering': ['email', 'id'],
+                'indexes': [models.Index(fields=['api_key', 'is_active'], name='accounts_cr_api_key_56c8fe_idx'), models.Index(fields=['email'], name='accounts_cr_email_543f8f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='crmuser',
+            constraint=models.UniqueConstraint(fields=('api_key', 'external_id'), name='unique_crm_user_per_key'),
+        ),
+    ]
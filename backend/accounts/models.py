@@ -21,6 +21,16 @@ class Company(models.Model):
         super().save(*args, **kwargs)
 
 
+class StatsSnapshot(models.Model):
+    """Precomputed dashboard numbers, refreshed periodically (see accounts/admin_stats.py)"""
+    key = models.CharField(max_length=100, unique=True)
+    data = models.JSONField(default=dict)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} @ {self.computed_at:%Y-%m-%d %H:%M}"
+
+
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     image = models.ImageField(upload_to="user_images/", null=True, blank=True)
@@ -118,6 +128,10 @@ class CrmApiKey(models.Model):
         null=True, blank=True,
         help_text="Last time CRM users were successfully fetched using this key"
     )
+    sync_cursor = models.JSONField(
+        null=True, blank=True,
+        help_text="Checkpoint of the user sync in progress (next page, since, started_at); empty when idle"
+    )
     created_by = models.ForeignKey(
         CustomUser,
         on_delete=models.SET_NULL,
@@ -137,6 +151,36 @@ class CrmApiKey(models.Model):
     def __str__(self):
         return f"{self.name} ({self.company.name})"
 
+
+class CrmUser(models.Model):
+    """Local mirror of a CRM tenant user, kept current by accounts/crm.py"""
+
+    api_key = models.ForeignKey(
+        CrmApiKey, on_delete=models.CASCADE, related_name="crm_users"
+    )
+    external_id = models.CharField(max_length=255, help_text="The user's id in the CRM")
+    email = models.EmailField()
+    first_name = models.CharField(max_length=150, blank=True)
+    last_name = models.CharField(max_length=150, blank=True)
+    raw_data = models.JSONField(default=dict, blank=True)
+    is_active = models.BooleanField(default=True)
+    last_synced_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["email", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["api_key", "external_id"], name="unique_crm_user_per_key"),
+        ]
+        indexes = [
+            models.Index(fields=["api_key", "is_active"]),
+            models.Index(fields=["email"]),
+        ]
+
+    def __str__(self):
+        return self.email
+
+
 class Registration(models.Model):
     """Track user registrations with metadata"""
     
@@ -251,24 +295,19 @@ class TrialLimits:
         if not TrialLimits.is_trial_user(user):
             return True  # Not a trial user, no limits
         
-        company = user.company
-        if not company:
+        company_id = getattr(user, "company_id", None)
+        if not company_id:
             return False
         
-        if resource_type == "programs":
-            from programs.models import Program
-            count = Program.objects.filter(company=company).count()
-            return count < TrialLimits.MAX_PROGRAMS
-        
-        elif resource_type == "projects":
-            from projects.models import Project
-            count = Project.objects.filter(company=company).count()
-            return count < TrialLimits.MAX_PROJECTS
-        
-        elif resource_type == "users":
-            from accounts.models import CustomUser
-            count = CustomUser.objects.filter(company=company, is_active=True).count()
-            return count < TrialLimits.MAX_USERS
+        from accounts.entitlements import company_usage
+        usage = company_usage(company_id)
+        limits = {
+            "programs": TrialLimits.MAX_PROGRAMS,
+            "projects": TrialLimits.MAX_PROJECTS,
+            "users": TrialLimits.MAX_USERS,
+        }
+        if resource_type in limits:
+            return usage[resource_type] < limits[resource_type]
         
         return True
 
@@ -397,78 +436,28 @@ class SubscriptionTier:
     @staticmethod
     def get_user_tier(user):
         """Get subscription tier for a user"""
-        # Check if trial user
-        try:
-            from accounts.models import Registration
-            from django.utils import timezone
-            
-            reg = Registration.objects.get(user=user)
-            if reg.trial_days > 0:
-                if reg.trial_end_date and reg.trial_end_date > timezone.now():
-                    return SubscriptionTier.TRIAL
-        except Registration.DoesNotExist:
-            pass
-        
-        # Check company subscription
-        if hasattr(user, "company") and user.company:
-            try:
-                from subscriptions.models import CompanySubscription
-                subscription = CompanySubscription.objects.filter(
-                    company=user.company,
-                    status__in=["active", "trialing"]
-                ).select_related("plan").first()
-                
-                if subscription and hasattr(subscription.plan, "plan_level"):
-                    return subscription.plan.plan_level
-            except:
-                pass
-        
-        # Default to starter
-        return SubscriptionTier.STARTER
+        # Trial, then the company subscription, then starter (accounts/entitlements.py)
+        from accounts.entitlements import get_entitlements
+        return get_entitlements(user).tier
     
     @staticmethod
     def has_feature(user, feature_name):
         """Check if user has access to a feature"""
-        tier = SubscriptionTier.get_user_tier(user)
-        tier_config = SubscriptionTier.TIER_FEATURES.get(tier, {})
-        features = tier_config.get("features", {})
-        return features.get(feature_name, False)
+        from accounts.entitlements import get_entitlements
+        return get_entitlements(user).has_feature(feature_name)
     
     @staticmethod
     def get_limit(user, limit_name):
         """Get limit value for user (-1 = unlimited, 0 = not allowed)"""
-        tier = SubscriptionTier.get_user_tier(user)
-        tier_config = SubscriptionTier.TIER_FEATURES.get(tier, {})
-        return tier_config.get(limit_name, 0)
+        from accounts.entitlements import get_entitlements
+        return get_entitlements(user).limit(limit_name)
     
     @staticmethod
     def check_limit(user, resource_type):
         """Check if user can create more of a resource type"""
-        limit = SubscriptionTier.get_limit(user, f"max_{resource_type}")
-        
-        if limit == -1:  # Unlimited
-            return True
-        elif limit == 0:  # Not allowed
-            return False
-        
-        # Count current resources
-        company = user.company if hasattr(user, "company") else None
-        if not company:
-            return False
-        
-        if resource_type == "users":
-            from accounts.models import CustomUser
-            count = CustomUser.objects.filter(company=company, is_active=True).count()
-        elif resource_type == "programs":
-            from programs.models import Program
-            count = Program.objects.filter(company=company).count()
-        elif resource_type == "projects":
-            from projects.models import Project
-            count = Project.objects.filter(company=company).count()
-        else:
-            return True
-        
-        return count < limit# ============================================
+        # Usage comes from cached counters, see accounts/entitlements.py
+        from accounts.entitlements import get_entitlements
+        return get_entitlements(user).can_create(resource_type)# ============================================
 # ADD THIS TO: backend/accounts/models.py
 # LOCATION: After the SubscriptionTier class
 # ============================================
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.core.mail import send_mail
 from django.conf import settings
-from accounts.models import Company, CustomUser, PasswordResetToken, VerificationToken, CrmApiKey
+from accounts.models import Company, CustomUser, PasswordResetToken, VerificationToken, CrmApiKey, CrmUser
 from django.utils import timezone
 
 
@@ -485,11 +485,12 @@ class CrmApiKeySerializer(serializers.ModelSerializer):
             "api_base_url",
             "is_active",
             "last_fetched_at",
+            "sync_cursor",
             "created_by_email",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at", "last_fetched_at", "created_by_email"]
+        read_only_fields = ["created_at", "updated_at", "last_fetched_at", "sync_cursor", "created_by_email"]
     
     def to_representation(self, instance):
         """Mask API key when reading (not when creating/updating)"""
@@ -535,13 +536,14 @@ class CrmApiKeyCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class CrmUserSerializer(serializers.Serializer):
-    """Serializer for CRM users fetched from external API"""
-    id = serializers.IntegerField()
-    email = serializers.EmailField()
-    first_name = serializers.CharField(required=False, allow_blank=True)
-    last_name = serializers.CharField(required=False, allow_blank=True)
-    # Add other fields as needed from the CRM API response
+class CrmUserSerializer(serializers.ModelSerializer):
+    """Serializer for mirrored CRM users, shaped like the CRM API's users"""
+    id = serializers.CharField(source="external_id", read_only=True)
+
+    class Meta:
+        model = CrmUser
+        fields = ["id", "email", "first_name", "last_name", "is_active", "last_synced_at"]
+        read_only_fields = fields
 
 def send_verification_email(user, verification_token):
     """Send HTML verification email with ProjeXtPal branding"""
@@ -0,0 +1,114 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.admin_stats import COMPANIES_METRIC, SIGNUPS_METRIC
+from accounts.models import Company, CustomUser, Registration
+from accounts.entitlements import adjust_usage, invalidate_tier, invalidate_trial, invalidate_usage
+from accounts.identity import invalidate_company_identities, invalidate_identity
+from core.timeseries import forget
+from overview.views import PROJECTS_METRIC, REVENUE_METRIC, SUBSCRIPTIONS_METRIC, USERS_METRIC
+from programs.models import Program
+from projects.models import Project
+from subscriptions.models import CompanySubscription
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_user_company(sender, instance, update_fields=None, **kwargs):
+    """Keep the company a user is moving away from, for track_user_usage"""
+    if instance.pk and (update_fields is None or "company" in update_fields):
+        instance._previous_company_id = (
+            CustomUser.objects.filter(pk=instance.pk).values_list("company_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=CustomUser)
+def track_user_usage(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        if instance.is_active:
+            adjust_usage(instance.company_id, "users", 1)
+        return
+    # Activation or a company move cannot be applied as a delta without the
+    # previous values, so both companies are counted again on the next check
+    if update_fields is None or {"is_active", "company"} & set(update_fields):
+        invalidate_usage(instance.company_id, ["users"])
+        previous = getattr(instance, "_previous_company_id", None)
+        if previous != instance.company_id:
+            invalidate_usage(previous, ["users"])
+
+
+@receiver(post_delete, sender=CustomUser)
+def untrack_user_usage(sender, instance, **kwargs):
+    if instance.is_active:
+        adjust_usage(instance.company_id, "users", -1)
+    invalidate_trial(instance.pk)
+
+
+@receiver(post_save, sender=Program)
+def track_program_usage(sender, instance, created, **kwargs):
+    if created:
+        adjust_usage(instance.company_id, "programs", 1)
+
+
+@receiver(post_delete, sender=Program)
+def untrack_program_usage(sender, instance, **kwargs):
+    adjust_usage(instance.company_id, "programs", -1)
+
+
+@receiver(post_save, sender=Project)
+def track_project_usage(sender, instance, created, **kwargs):
+    if created:
+        adjust_usage(instance.company_id, "projects", 1)
+
+
+@receiver(post_delete, sender=Project)
+def untrack_project_usage(sender, instance, **kwargs):
+    adjust_usage(instance.company_id, "projects", -1)
+
+
+@receiver(post_save, sender=CompanySubscription)
+@receiver(post_delete, sender=CompanySubscription)
+def invalidate_company_tier(sender, instance, **kwargs):
+    invalidate_tier(instance.company_id)
+
+
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Registration)
+def invalidate_registration_trial(sender, instance, **kwargs):
+    invalidate_trial(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_identity(sender, instance, **kwargs):
+    invalidate_identity(instance.pk)
+
+
+@receiver(post_save, sender=Company)
+def invalidate_company_users(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_company_identities(instance.pk)
+
+
+@receiver(post_save, sender=CompanySubscription)
+@receiver(post_delete, sender=CompanySubscription)
+def forget_subscription_buckets(sender, instance, **kwargs):
+    # The month may have closed already; a status change moves the
+    # subscription in or out of the billable metrics, so recount it
+    forget(REVENUE_METRIC, instance.created_at)
+    forget(SUBSCRIPTIONS_METRIC, instance.created_at)
+
+
+@receiver(post_delete, sender=Project)
+def forget_project_buckets(sender, instance, **kwargs):
+    forget(PROJECTS_METRIC, instance.created_at)
+
+
+@receiver(post_delete, sender=CustomUser)
+def forget_user_buckets(sender, instance, **kwargs):
+    forget(USERS_METRIC, instance.date_joined)
+    forget(SIGNUPS_METRIC, instance.date_joined)
+
+
+@receiver(post_delete, sender=Company)
+def forget_company_buckets(sender, instance, **kwargs):
+    forget(COMPANIES_METRIC, instance.created_at)
@@ -16,6 +16,7 @@ from accounts.views import (
     UpdateOwnProfileView,
     ChangePasswordView,
     CrmApiKeyViewSet,
+    acrm_fetch_users,
     ApproveRegistrationView,
     DeactivateUserView,
     ActivateUserView,
@@ -43,6 +44,8 @@ router = DefaultRouter()
 router.register(r"crm-api-keys", CrmApiKeyViewSet, basename="crm-api-key")
 
 urlpatterns = [
+    # Async variant of crm-api-keys/<pk>/fetch-users/ for ASGI
+    path("crm-api-keys/<int:pk>/fetch-users/async/", acrm_fetch_users, name="crm-api-key-fetch-users-async"),
     path("login/", MyTokenObtainPairView.as_view(), name="login"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("logout/", LogoutView.as_view(), name="logout"),
@@ -7,6 +7,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser
+from core.pagination import KeysetPagination
 from django.utils import timezone
 import requests
 from accounts.serializers import (
@@ -634,6 +635,7 @@ class ChangePasswordView(APIView):
 class CrmApiKeyViewSet(viewsets.ModelViewSet):
     """ViewSet for managing CRM API keys"""
     permission_classes = [IsAuthenticated, HasRole("admin", "pm")]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Filter API keys by user's company"""
@@ -721,36 +723,18 @@ class CrmApiKeyViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=["post"], url_path="fetch-users")
     def fetch_users(self, request, pk=None):
-        """Fetch users from the CRM API using the stored API key"""
+        """Fetch one page of users from the CRM API using the stored API key"""
+        from accounts.crm import fetch_tenant_users
+
         api_key_obj = self.get_object()
         
         # Get pagination parameters
         page = int(request.data.get("page", 1))
         page_size = int(request.data.get("page_size", 100))
-        page_size = min(page_size, 100)  # Max 100 per page
         
         try:
-            # Construct the API endpoint URL
-            base_url = api_key_obj.api_base_url.rstrip('/')
-            api_url = f"{base_url}/api/accounts/tenant-users/"
-            
-            # Make request to CRM API
-            headers = {
-                "X-Tenant-API-Key": api_key_obj.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            params = {
-                "page": page,
-                "page_size": page_size
-            }
-            
-            response = requests.get(
-                api_url,
-                headers=headers,
-                params=params,
-                timeout=30
-            )
+            # Make request to CRM API (at most 100 users per page, pooled connection)
+            response = fetch_tenant_users(api_key_obj, page, page_size)
             
             if response.status_code == 200:
                 data = response.json()
@@ -792,73 +776,111 @@ class CrmApiKeyViewSet(viewsets.ModelViewSet):
                 "message": f"An error occurred: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=["post"], url_path="sync")
+    def sync(self, request, pk=None):
+        """Mirror all CRM users in the background; ?full=true re-reads everything"""
+        from accounts.crm import sync_tenant_users_by_id
+        from core.background import run_in_background
+
+        api_key_obj = self.get_object()
+        full = str(request.data.get("full", request.query_params.get("full", ""))).lower() in ("1", "true")
+        run_in_background(sync_tenant_users_by_id, api_key_obj.pk, full=full)
+        api_key_obj.refresh_from_db(fields=["sync_cursor", "last_fetched_at"])
+        return Response({
+            "success": True,
+            "sync_cursor": api_key_obj.sync_cursor,
+            "last_fetched_at": api_key_obj.last_fetched_at,
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"], url_path="users")
+    def users(self, request, pk=None):
+        """The key's mirrored CRM users; ?search= filters by email or name"""
+        from django.db.models import Q
+        from accounts.serializers import CrmUserSerializer
+
+        api_key_obj = self.get_object()
+        queryset = api_key_obj.crm_users.filter(is_active=True)
+        search = request.query_params.get("search", "").strip()
+        if search:
+            queryset = queryset.filter(
+                Q(email__icontains=search) | Q(first_name__icontains=search) | Q(last_name__icontains=search)
+            )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(CrmUserSerializer(page, many=True).data)
+        return Response(CrmUserSerializer(queryset, many=True).data)
+
+
+from django.http import JsonResponse
+from core.async_views import async_api_view
+
+
+@async_api_view(["POST"], permission_classes=[HasRole("admin", "pm")])
+async def acrm_fetch_users(request, pk):
+    """CrmApiKeyViewSet.fetch_users for ASGI: the CRM call is awaited, not blocking a worker"""
+    import httpx
+    from accounts.crm import afetch_tenant_users
+
+    try:
+        api_key_obj = await CrmApiKey.objects.aget(pk=pk, company_id=request.user.company_id)
+    except CrmApiKey.DoesNotExist:
+        return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        response = await afetch_tenant_users(
+            api_key_obj,
+            page=int(request.data.get("page", 1)),
+            page_size=int(request.data.get("page_size", 100)),
+        )
+
+        if response.status_code == 200:
+            data = response.json()
+            await CrmApiKey.objects.filter(pk=api_key_obj.pk).aupdate(last_fetched_at=timezone.now())
+            return JsonResponse({
+                "success": True,
+                "users": data.get("users", []),
+                "count": data.get("count", 0),
+                "next": data.get("next"),
+                "previous": data.get("previous"),
+                "tenant_name": data.get("tenant_name"),
+                "tenant_type": data.get("tenant_type"),
+            })
+        error_data = response.json() if response.content else {}
+        return JsonResponse({
+            "success": False,
+            "message": error_data.get("message", f"API request failed with status {response.status_code}"),
+            "status_code": response.status_code
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    except httpx.TimeoutException:
+        return JsonResponse({
+            "success": False,
+            "message": "Request timed out. Please try again."
+        }, status=status.HTTP_408_REQUEST_TIMEOUT)
+    except httpx.HTTPError as e:
+        return JsonResponse({
+            "success": False,
+            "message": f"Failed to connect to CRM API: {str(e)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return JsonResponse({
+            "success": False,
+            "message": f"An error occurred: {str(e)}"
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 class CompanyListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        from accounts.models import Company
         if not request.user.is_superuser:
             return Response({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
         
-        companies = Company.objects.all().order_by('name')
-        data = []
-        
-        for c in companies:
-            # Get user count
-            user_count = User.objects.filter(company=c).count()
-            
-            # Get owner (first admin/superadmin user)
-            owner = User.objects.filter(
-                company=c, 
-                role__in=['admin', 'superadmin']
-            ).first()
-            
-            owner_data = None
-            if owner:
-                owner_data = {
-                    'id': owner.id,
-                    'email': owner.email,
-                    'full_name': f"{owner.first_name} {owner.last_name}".strip() or owner.email
-                }
-            
-            # Get subscription status
-            subscription_status = 'none'
-            plan_name = None
-            billing_cycle = None
-            payment_method = None
-            
-            try:
-                from subscriptions.models import CompanySubscription
-                # Get ANY subscription, not just active ones
-                subscription = CompanySubscription.objects.filter(
-                    company=c
-                ).select_related('plan').order_by('-created_at').first()  # Get most recent
-                
-                if subscription:
-                    subscription_status = subscription.status
-                    if hasattr(subscription, 'plan') and subscription.plan:
-                        plan_name = subscription.plan.name
-                    # FIXED: Get billing_cycle and payment_method from subscription
-                    billing_cycle = getattr(subscription, 'billing_cycle', None)
-                    payment_method = getattr(subscription, 'payment_method', None)
-            except:
-                pass
-            
-            data.append({
-                'id': c.id,
-                'name': c.name,
-                'description': c.description if hasattr(c, 'description') else None,
-                'is_subscribed': c.is_subscribed if hasattr(c, 'is_subscribed') else False,
-                'user_count': user_count,
-                'subscription_status': subscription_status,
-                'plan_name': plan_name,
-                'billing_cycle': billing_cycle,
-                'payment_method': payment_method,
-                'owner': owner_data,
-                'created_at': c.created_at.isoformat() if hasattr(c, 'created_at') and c.created_at else None,
-                'updated_at': c.updated_at.isoformat() if hasattr(c, 'updated_at') and c.updated_at else None,
-            })
+        from accounts.admin_stats import annotated_companies, company_row
+
+        # One query: counts, owner and latest subscription are subqueries
+        data = [company_row(c) for c in annotated_companies()]
         
         return Response(data, status=status.HTTP_200_OK)
     
@@ -1084,238 +1106,19 @@ class AdminStatsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from accounts.models import Company
-        from datetime import timedelta
-        from django.db.models import Sum, Count, Q
+        from accounts.admin_stats import get_admin_stats
         
         if not request.user.is_superuser:
             return Response({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
         
-        now = timezone.now()
-        week_ago = now - timedelta(days=7)
-        two_weeks_ago = now - timedelta(days=14)
-        month_ago = now - timedelta(days=30)
-        two_months_ago = now - timedelta(days=60)
-        
-        # ============================================================
-        # OVERVIEW STATS
-        # ============================================================
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        inactive_users = total_users - active_users
-        total_companies = Company.objects.count()
-        
-        # Active subscriptions
-        try:
-            from subscriptions.models import CompanySubscription
-            active_subscriptions = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing']
-            ).count()
-        except:
-            active_subscriptions = 0
-        
-        # ============================================================
-        # REVENUE CALCULATION
-        # ============================================================
-        mrr = 0
-        arr = 0
-        mrr_last_month = 0
-        currency = 'EUR'
-        
-        try:
-            from subscriptions.models import CompanySubscription
-            
-            # Current MRR - sum of all active subscription prices
-            active_subs = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing']
-            ).select_related('plan')
-            
-            for sub in active_subs:
-                if hasattr(sub, 'plan') and hasattr(sub.plan, 'price'):
-                    # Convert to monthly if needed
-                    if sub.billing_cycle == 'yearly':
-                        mrr += sub.plan.price / 12
-                    else:  # monthly
-                        mrr += sub.plan.price
-            
-            arr = mrr * 12
-            
-            # Last month MRR for growth calculation
-            subs_last_month = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing'],
-                created_at__lt=month_ago
-            ).select_related('plan')
-            
-            for sub in subs_last_month:
-                if hasattr(sub, 'plan') and hasattr(sub.plan, 'price'):
-                    if sub.billing_cycle == 'yearly':
-                        mrr_last_month += sub.plan.price / 12
-                    else:
-                        mrr_last_month += sub.plan.price
-        except Exception as e:
-            print(f"Revenue calculation error: {e}")
-        
-        # ============================================================
-        # USERS BY ROLE
-        # ============================================================
-        admins = User.objects.filter(role__in=['admin', 'superadmin']).count()
-        pms = User.objects.filter(role='pm').count()
-        
-        # ============================================================
-        # GROWTH CALCULATIONS
-        # ============================================================
-        
-        # Users growth (last 7 days vs previous 7 days)
-        recent_users = User.objects.filter(date_joined__gte=week_ago).count()
-        previous_week_users = User.objects.filter(
-            date_joined__gte=two_weeks_ago,
-            date_joined__lt=week_ago
-        ).count()
-        
-        users_growth = 0
-        if previous_week_users > 0:
-            users_growth = ((recent_users - previous_week_users) / previous_week_users) * 100
-        elif recent_users > 0:
-            users_growth = 100
-        
-        # Companies growth
-        recent_companies = Company.objects.filter(
-            created_at__gte=month_ago
-        ).count() if hasattr(Company, 'created_at') else 0
-        
-        previous_month_companies = Company.objects.filter(
-            created_at__gte=two_months_ago,
-            created_at__lt=month_ago
-        ).count() if hasattr(Company, 'created_at') else 0
-        
-        companies_growth = 0
-        if previous_month_companies > 0:
-            companies_growth = ((recent_companies - previous_month_companies) / previous_month_companies) * 100
-        elif recent_companies > 0:
-            companies_growth = 100
-        
-        # MRR growth
-        mrr_growth = 0
-        if mrr_last_month > 0:
-            mrr_growth = ((mrr - mrr_last_month) / mrr_last_month) * 100
-        elif mrr > 0:
-            mrr_growth = 100
-        
-        # Subscriptions growth
-        try:
-            from subscriptions.models import CompanySubscription
-            current_subs = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing']
-            ).count()
-            
-            last_month_subs = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing'],
-                created_at__lt=month_ago
-            ).count()
-            
-            subscriptions_growth = 0
-            if last_month_subs > 0:
-                subscriptions_growth = ((current_subs - last_month_subs) / last_month_subs) * 100
-            elif current_subs > 0:
-                subscriptions_growth = 100
-        except:
-            subscriptions_growth = 0
-        
-        # ============================================================
-        # NEW USERS (Last 10)
-        # ============================================================
-        new_users_queryset = User.objects.order_by('-date_joined')[:10]
-        new_users = []
-        
-        for user in new_users_queryset:
-            company_name = None
-            if hasattr(user, 'company') and user.company:
-                company_name = user.company.name
-            
-            new_users.append({
-                'id': user.id,
-                'email': user.email,
-                'full_name': f"{user.first_name} {user.last_name}".strip() or user.email,
-                'company_name': company_name,
-                'is_active': user.is_active,
-                'date_joined': user.date_joined.isoformat() if user.date_joined else None,
-            })
-        
-        # ============================================================
-        # RECENT ACTIVITY (Mock data for now)
-        # ============================================================
-        recent_activity = []
-        
-        # Get recent user signups as activity
-        recent_signups = User.objects.order_by('-date_joined')[:5]
-        for user in recent_signups:
-            recent_activity.append({
-                'id': f'signup_{user.id}',
-                'user_email': user.email,
-                'action': 'user_signup',
-                'description': f"New user registered: {user.email}",
-                'created_at': user.date_joined.isoformat() if user.date_joined else now.isoformat(),
-                'severity': 'info',
-            })
+        # Served from the stats snapshot; ?refresh=1 recomputes it now
+        force = request.query_params.get('refresh') in ('1', 'true')
+        snapshot = get_admin_stats(force=force)
         
-        # ============================================================
-        # SUBSCRIPTIONS BY PLAN
-        # ============================================================
-        subscriptions_by_plan = []
-        
-        try:
-            from subscriptions.models import CompanySubscription
-            
-            plan_counts = CompanySubscription.objects.filter(
-                status__in=['active', 'trialing']
-            ).values('plan__name').annotate(count=Count('id'))
-            
-            for item in plan_counts:
-                subscriptions_by_plan.append({
-                    'plan': item['plan__name'] or 'Unknown',
-                    'count': item['count'],
-                })
-        except:
-            pass
-        
-        # ============================================================
-        # STRUCTURE RESPONSE
-        # ============================================================
-        stats = {
-            'overview': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'inactive_users': inactive_users,
-                'total_companies': total_companies,
-                'active_subscriptions': active_subscriptions,
-            },
-            'revenue': {
-                'mrr': round(mrr, 2),
-                'arr': round(arr, 2),
-                'currency': currency,
-            },
-            'users': {
-                'admins': admins,
-                'project_managers': pms,
-                'recent_signups': recent_users,
-            },
-            'growth': {
-                'users': round(users_growth, 1),
-                'companies': round(companies_growth, 1),
-                'mrr': round(mrr_growth, 1),
-                'subscriptions': round(subscriptions_growth, 1),
-            },
-            'activity': {
-                'recent_logins': active_users,
-                'active_projects': 0,  # Placeholder - implement when projects model is available
-                'pending_tasks': 0,  # Placeholder
-            },
-            'recent_activity': recent_activity,
-            'new_users': new_users,
-            'subscriptions_by_plan': subscriptions_by_plan,
-        }
-        
-        return Response(stats, status=status.HTTP_200_OK)
+        return Response(
+            {**snapshot.data, 'computed_at': snapshot.computed_at.isoformat()},
+            status=status.HTTP_200_OK
+        )
 
 
 class PlanViewSet(viewsets.ModelViewSet):
@@ -1740,40 +1543,24 @@ class UserFeaturesView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        from accounts.models import SubscriptionTier
-        
-        user = request.user
-        tier = SubscriptionTier.get_user_tier(user)
-        tier_config = SubscriptionTier.TIER_FEATURES.get(tier, {})
+        from accounts.entitlements import get_entitlements
         
-        # Calculate current usage
-        company = user.company if hasattr(user, "company") else None
-        usage = {}
-        
-        if company:
-            from accounts.models import CustomUser
-            from programs.models import Program
-            from projects.models import Project
-            
-            usage = {
-                "users": CustomUser.objects.filter(company=company, is_active=True).count(),
-                "programs": Program.objects.filter(company=company).count(),
-                "projects": Project.objects.filter(company=company).count(),
-            }
+        # Tier, flags and usage come from the entitlement cache
+        entitlements = get_entitlements(request.user)
         
         return Response({
-            "tier": tier,
-            "features": tier_config.get("features", {}),
+            "tier": entitlements.tier,
+            "features": entitlements.features,
             "limits": {
-                "max_users": tier_config.get("max_users", 0),
-                "max_programs": tier_config.get("max_programs", 0),
-                "max_projects": tier_config.get("max_projects", 0),
+                "max_users": entitlements.limit("max_users"),
+                "max_programs": entitlements.limit("max_programs"),
+                "max_projects": entitlements.limit("max_projects"),
             },
-            "usage": usage,
+            "usage": entitlements.usage,
             "can_create": {
-                "user": SubscriptionTier.check_limit(user, "users"),
-                "program": SubscriptionTier.check_limit(user, "programs"),
-                "project": SubscriptionTier.check_limit(user, "projects"),
+                "user": entitlements.can_create("users"),
+                "program": entitlements.can_create("programs"),
+                "project": entitlements.can_create("projects"),
             }
         }, status=status.HTTP_200_OK)
 
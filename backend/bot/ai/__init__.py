@@ -1,5 +1,3 @@
-from django.conf import settings
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage
 from langchain.agents import AgentExecutor
@@ -9,6 +7,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from typing import List, Dict, Any, TypedDict, Annotated, Sequence
 import json
 import logging
+from core import llm
 from bot.ai.tools import FORM_TOOLS_LIST
 
 logger = logging.getLogger("bot.ai")
@@ -104,11 +103,8 @@ class AgentState(TypedDict):
 
 class ERPAIAgent:
     def __init__(self, tools: List = None, user=None):
-        self.llm = ChatOpenAI(
-            temperature=0.3,
-            model_name="gpt-4o",
-            openai_api_key=settings.OPENAI_API_KEY,
-        )
+        # Pooled chat model from the LLM gateway (the stub backend in tests)
+        self.llm = llm.chat_model(model="gpt-4o", temperature=0.3)
 
         self.user = user
         self.tools = tools
@@ -2,11 +2,10 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db.models import Q, Count, Avg, Sum, F
-from django.conf import settings
-from langchain_openai import ChatOpenAI
 import json
 import logging
 
+from core import llm
 from bot.ai.tools import ToolRegistry
 from bot.ai.utils.permissions import require_permission
 from bot.ai.utils.session_context import get_user_session
@@ -593,12 +592,6 @@ def generate_ai_insights(analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         Dict with AI-generated insights
     """
     try:
-        llm = ChatOpenAI(
-            temperature=0.3,
-            model_name="gpt-4.1",
-            openai_api_key=settings.OPENAI_API_KEY,
-        )
-
         # Prepare the prompt with analysis data
         prompt = f"""You are a project management analyst AI. Analyze the following project metrics and provide actionable insights.
 
@@ -641,20 +634,7 @@ Format your response as JSON with this structure:
     "positive_highlights": ["string"]
 }}"""
 
-        response = llm.invoke(prompt)
-
-        # Parse the response
-        content = response.content.strip()
-
-        # Try to extract JSON from markdown code blocks if present
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0].strip()
-
-        insights = json.loads(content)
-
-        return insights
+        return llm.complete_json(prompt, model="gpt-4.1", temperature=0.3)
 
     except Exception as e:
         logger.error(f"Error generating AI insights: {str(e)}", exc_info=True)
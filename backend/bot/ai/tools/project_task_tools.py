@@ -1,11 +1,9 @@
 from typing import Dict, Any, List
-from django.conf import settings
-from langchain_openai import ChatOpenAI
+from core import llm
 from bot.ai.tools import ToolRegistry
 from bot.ai.utils.permissions import require_permission
 from bot.ai.utils.session_context import get_user_session
 from projects.models import Project, Milestone, Task, Subtask
-import json
 from datetime import datetime, timedelta
 
 
@@ -41,13 +39,6 @@ def parse_and_create_project_structure(
             "error": f"Project with ID {project_id} not found or you don't have access to it."
         }
 
-    # Initialize OpenAI LLM
-    llm = ChatOpenAI(
-        temperature=0.2,
-        model_name="gpt-4.1",
-        openai_api_key=settings.OPENAI_API_KEY,
-    )
-
     # Create a detailed prompt for the AI to parse the project description
     system_prompt = """You are a project management expert. Your task is to analyze project descriptions 
     and break them down into structured milestones, tasks, and subtasks.
@@ -107,24 +98,7 @@ def parse_and_create_project_structure(
             {"role": "user", "content": user_prompt},
         ]
 
-        response = llm.invoke(messages)
-
-        # Parse the AI response
-        ai_content = response.content.strip()
-
-        # Remove markdown code blocks if present
-        if ai_content.startswith("```json"):
-            ai_content = ai_content[7:]
-        elif ai_content.startswith("```"):
-            ai_content = ai_content[3:]
-
-        if ai_content.endswith("```"):
-            ai_content = ai_content[:-3]
-
-        ai_content = ai_content.strip()
-
-        # Parse JSON
-        parsed_structure = json.loads(ai_content)
+        parsed_structure = llm.complete_json(messages, model="gpt-4.1", temperature=0.2)
 
         # Validate structure
         if "milestones" not in parsed_structure:
@@ -229,9 +203,9 @@ def parse_and_create_project_structure(
             },
         }
 
-    except json.JSONDecodeError as e:
+    except llm.LLMError as e:
         return {
-            "error": f"Failed to parse AI response as JSON: {str(e)}. Please try again with a clearer description."
+            "error": f"Failed to get a valid AI response: {str(e)}. Please try again with a clearer description."
         }
     except Exception as e:
         return {
@@ -251,13 +225,6 @@ def suggest_project_structure(description: str) -> Dict[str, Any]:
     if permission_error:
         return permission_error
 
-    # Initialize OpenAI LLM
-    llm = ChatOpenAI(
-        temperature=0.2,
-        model_name="gpt-4.1",
-        openai_api_key=settings.OPENAI_API_KEY,
-    )
-
     # Create a detailed prompt for the AI
     system_prompt = """You are a project management expert. Your task is to analyze project descriptions 
     and break them down into structured milestones, tasks, and subtasks.
@@ -318,24 +285,7 @@ def suggest_project_structure(description: str) -> Dict[str, Any]:
             {"role": "user", "content": user_prompt},
         ]
 
-        response = llm.invoke(messages)
-
-        # Parse the AI response
-        ai_content = response.content.strip()
-
-        # Remove markdown code blocks if present
-        if ai_content.startswith("```json"):
-            ai_content = ai_content[7:]
-        elif ai_content.startswith("```"):
-            ai_content = ai_content[3:]
-
-        if ai_content.endswith("```"):
-            ai_content = ai_content[:-3]
-
-        ai_content = ai_content.strip()
-
-        # Parse JSON
-        parsed_structure = json.loads(ai_content)
+        parsed_structure = llm.complete_json(messages, model="gpt-4.1", temperature=0.2)
 
         # Validate structure
         if "milestones" not in parsed_structure:
@@ -383,9 +333,9 @@ def suggest_project_structure(description: str) -> Dict[str, Any]:
             "full_structure": parsed_structure,
         }
 
-    except json.JSONDecodeError as e:
+    except llm.LLMError as e:
         return {
-            "error": f"Failed to parse AI response as JSON: {str(e)}. Please try again with a clearer description."
+            "error": f"Failed to get a valid AI response: {str(e)}. Please try again with a clearer description."
         }
     except Exception as e:
         return {
@@ -4,9 +4,19 @@ from bot.ai.tools import ToolRegistry
 from bot.ai.utils.permissions import require_permission
 from bot.ai.utils.session_context import get_user_session
 from projects.models import Project, Milestone, Task
+from projects.timeline_service import (
+    shift_timeline,
+    shift_milestone_timeline,
+    shift_project_timeline,
+)
+from programs.models import Program
 import re
 
 
+def _as_bool(value: str) -> bool:
+    return value.lower() in ["true", "yes", "1"]
+
+
 def parse_duration(duration_str: str) -> Optional[timedelta]:
     """
     Parse natural language duration strings into timedelta objects.
@@ -171,6 +181,7 @@ def adjust_milestone_timeline(
     duration: str,
     adjust_end_date_only: str = "true",
     cascade_to_tasks: str = "true",
+    dry_run: str = "false",
 ) -> Dict[str, Any]:
     """
     Adjusts the timeline of a milestone by extending or reducing its duration.
@@ -181,6 +192,7 @@ def adjust_milestone_timeline(
         duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
         adjust_end_date_only: If "true", only adjust end date. If "false", shift both dates. Default is true.
         cascade_to_tasks: If "true", also adjust all tasks within this milestone proportionally.
+        dry_run: If "true", only preview what would change without saving anything.
 
     Examples:
     - "extend milestone by 1 week"
@@ -220,47 +232,39 @@ def adjust_milestone_timeline(
         }
 
     # Convert strings to booleans
-    adjust_end_only = adjust_end_date_only.lower() in ["true", "yes", "1"]
-    cascade = cascade_to_tasks.lower() in ["true", "yes", "1"]
+    adjust_end_only = _as_bool(adjust_end_date_only)
+    cascade = _as_bool(cascade_to_tasks)
+    preview_only = _as_bool(dry_run)
 
     # Store old dates
     old_start = milestone.start_date
     old_end = milestone.end_date
 
-    # Adjust milestone dates
-    if adjust_end_only:
-        if milestone.end_date:
-            milestone.end_date = milestone.end_date + time_delta
-    else:
-        if milestone.start_date:
-            milestone.start_date = milestone.start_date + time_delta
-        if milestone.end_date:
-            milestone.end_date = milestone.end_date + time_delta
-
-    milestone.save()
-
-    # Cascade to tasks if requested
-    tasks_adjusted = 0
-    if cascade:
-        tasks = Task.objects.filter(milestone=milestone)
-        for task in tasks:
-            if adjust_end_only:
-                # Only adjust due date
-                if task.due_date:
-                    task.due_date = task.due_date + time_delta
-            else:
-                # Shift both dates
-                if task.start_date:
-                    task.start_date = task.start_date + time_delta
-                if task.due_date:
-                    task.due_date = task.due_date + time_delta
-            task.save()
-            tasks_adjusted += 1
+    # Milestone and its tasks are shifted in bulk (one UPDATE per level)
+    result = shift_milestone_timeline(
+        [milestone.id],
+        time_delta,
+        end_only=adjust_end_only,
+        cascade_to_tasks=cascade,
+        user=user,
+        dry_run=preview_only,
+    )
+    tasks_adjusted = result["tasks"]["rows"] if cascade else 0
 
     # Prepare response
     action = "extended" if time_delta.total_seconds() > 0 else "reduced"
     days = abs(time_delta.days)
 
+    if preview_only:
+        return {
+            "success": True,
+            "message": f"Preview: milestone '{milestone.name}' would be {action} by {days} day(s)."
+            + (f" {tasks_adjusted} task(s) would also be adjusted." if cascade else ""),
+            "details": result,
+        }
+
+    milestone.refresh_from_db(fields=["start_date", "end_date"])
+
     return {
         "success": True,
         "message": f"Milestone '{milestone.name}' timeline has been {action} by {days} day(s)."
@@ -375,212 +379,264 @@ def adjust_task_timeline(
     }
 
 
-# @ToolRegistry.register_tool(return_direct=False)
-# def adjust_all_project_tasks_timeline(
-#     project_id: str,
-#     duration: str,
-#     adjust_due_date_only: str = "true",
-# ) -> Dict[str, Any]:
-#     """
-#     Adjusts the timeline of ALL tasks within a project by extending or reducing their duration.
-#     This is useful when you want to uniformly adjust all tasks without changing milestone boundaries.
-
-#     Args:
-#         project_id: The ID of the project whose tasks to adjust
-#         duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
-#         adjust_due_date_only: If "true", only adjust due dates. If "false", shift both start and due dates. Default is true.
-
-#     Examples:
-#     - "extend all project tasks by 1 week"
-#     - "push all tasks by 2 days"
-#     """
-#     # Check user permissions
-#     permission_error = require_permission(return_dict=True)
-#     if permission_error:
-#         return permission_error
-
-#     # Validate project ID
-#     if not project_id.isdigit():
-#         return {"error": "Invalid project ID format"}
-
-#     project_id = int(project_id)
-
-#     # Get user session
-#     user_session = get_user_session()
-#     user = user_session["user"]
-
-#     # Get the project
-#     project = Project.objects.filter(id=project_id, company=user.company).first()
-
-#     if not project:
-#         return {
-#             "error": f"Project with ID {project_id} not found or you don't have access to it."
-#         }
-
-#     # Parse duration
-#     time_delta = parse_duration(duration)
-
-#     if time_delta is None:
-#         return {
-#             "error": f"Could not parse duration '{duration}'. Please use formats like '2 weeks', '3 days', etc."
-#         }
-
-#     # Convert string to boolean
-#     adjust_due_only = adjust_due_date_only.lower() in ["true", "yes", "1"]
-
-#     # Get all tasks for this project
-#     tasks = Task.objects.filter(milestone__project=project)
-
-#     if not tasks.exists():
-#         return {"error": f"No tasks found for project '{project.name}'."}
-
-#     # Adjust all tasks
-#     tasks_adjusted = 0
-#     for task in tasks:
-#         if adjust_due_only:
-#             # Only adjust due date
-#             if task.due_date:
-#                 task.due_date = task.due_date + time_delta
-#         else:
-#             # Shift both dates
-#             if task.start_date:
-#                 task.start_date = task.start_date + time_delta
-#             if task.due_date:
-#                 task.due_date = task.due_date + time_delta
-#         task.save()
-#         tasks_adjusted += 1
-
-#     # Prepare response
-#     action = "extended" if time_delta.total_seconds() > 0 else "reduced"
-#     days = abs(time_delta.days)
-
-#     return {
-#         "success": True,
-#         "message": f"All {tasks_adjusted} task(s) in project '{project.name}' have been {action} by {days} day(s).",
-#         "details": {
-#             "project_id": project.id,
-#             "project_name": project.name,
-#             "tasks_adjusted": tasks_adjusted,
-#             "adjusted_by_days": time_delta.days,
-#             "due_date_only": adjust_due_only,
-#         },
-#     }
-
-
-# @ToolRegistry.register_tool(return_direct=False)
-# def bulk_adjust_milestones_timeline(
-#     project_id: str,
-#     duration: str,
-#     adjust_end_date_only: str = "true",
-#     include_tasks: str = "true",
-# ) -> Dict[str, Any]:
-#     """
-#     Adjusts the timeline of ALL milestones within a project and optionally their tasks.
-#     By default, extends milestones by adjusting end dates only.
-
-#     Args:
-#         project_id: The ID of the project whose milestones to adjust
-#         duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
-#         adjust_end_date_only: If "true", only adjust end dates. If "false", shift both start and end dates. Default is true.
-#         include_tasks: If "true", also adjust all tasks within each milestone
-
-#     Examples:
-#     - "extend all milestones by 2 weeks"
-#     - "push entire project schedule by 1 month"
-#     """
-#     # Check user permissions
-#     permission_error = require_permission(return_dict=True)
-#     if permission_error:
-#         return permission_error
-
-#     # Validate project ID
-#     if not project_id.isdigit():
-#         return {"error": "Invalid project ID format"}
-
-#     project_id = int(project_id)
-
-#     # Get user session
-#     user_session = get_user_session()
-#     user = user_session["user"]
-
-#     # Get the project
-#     project = Project.objects.filter(id=project_id, company=user.company).first()
-
-#     if not project:
-#         return {
-#             "error": f"Project with ID {project_id} not found or you don't have access to it."
-#         }
-
-#     # Parse duration
-#     time_delta = parse_duration(duration)
-
-#     if time_delta is None:
-#         return {
-#             "error": f"Could not parse duration '{duration}'. Please use formats like '2 weeks', '3 days', etc."
-#         }
-
-#     # Convert strings to booleans
-#     adjust_end_only = adjust_end_date_only.lower() in ["true", "yes", "1"]
-#     adjust_tasks = include_tasks.lower() in ["true", "yes", "1"]
-
-#     # Get all milestones for this project
-#     milestones = Milestone.objects.filter(project=project)
-
-#     if not milestones.exists():
-#         return {"error": f"No milestones found for project '{project.name}'."}
-
-#     # Adjust all milestones
-#     milestones_adjusted = 0
-#     tasks_adjusted = 0
-
-#     for milestone in milestones:
-#         if adjust_end_only:
-#             # Only adjust end date
-#             if milestone.end_date:
-#                 milestone.end_date = milestone.end_date + time_delta
-#         else:
-#             # Shift both dates
-#             if milestone.start_date:
-#                 milestone.start_date = milestone.start_date + time_delta
-#             if milestone.end_date:
-#                 milestone.end_date = milestone.end_date + time_delta
-#         milestone.save()
-#         milestones_adjusted += 1
-
-#         # Adjust tasks if requested
-#         if adjust_tasks:
-#             tasks = Task.objects.filter(milestone=milestone)
-#             for task in tasks:
-#                 if adjust_end_only:
-#                     # Only adjust due date
-#                     if task.due_date:
-#                         task.due_date = task.due_date + time_delta
-#                 else:
-#                     # Shift both dates
-#                     if task.start_date:
-#                         task.start_date = task.start_date + time_delta
-#                     if task.due_date:
-#                         task.due_date = task.due_date + time_delta
-#                 task.save()
-#                 tasks_adjusted += 1
-
-#     # Prepare response
-#     action = "extended" if time_delta.total_seconds() > 0 else "reduced"
-#     days = abs(time_delta.days)
-
-#     message = f"All {milestones_adjusted} milestone(s) in project '{project.name}' have been {action} by {days} day(s)."
-#     if adjust_tasks:
-#         message += f" {tasks_adjusted} task(s) were also adjusted."
-
-#     return {
-#         "success": True,
-#         "message": message,
-#         "details": {
-#             "project_id": project.id,
-#             "project_name": project.name,
-#             "milestones_adjusted": milestones_adjusted,
-#             "tasks_adjusted": tasks_adjusted,
-#             "adjusted_by_days": time_delta.days,
-#             "end_date_only": adjust_end_only,
-#         },
-#     }
+@ToolRegistry.register_tool(return_direct=False)
+def adjust_all_project_tasks_timeline(
+    project_id: str,
+    duration: str,
+    adjust_due_date_only: str = "true",
+    task_status: str = "",
+    dry_run: str = "false",
+) -> Dict[str, Any]:
+    """
+    Adjusts the timeline of ALL tasks within a project by extending or reducing their duration.
+    This is useful when you want to uniformly adjust all tasks without changing milestone boundaries.
+    Tasks can be narrowed down by status (e.g. only open tasks) through the task_status argument.
+
+    Args:
+        project_id: The ID of the project whose tasks to adjust
+        duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
+        adjust_due_date_only: If "true", only adjust due dates. If "false", shift both start and due dates. Default is true.
+        task_status: Optional comma separated task statuses to limit the shift to (todo, in_progress, done, blocked).
+        dry_run: If "true", only preview what would change without saving anything.
+
+    Examples:
+    - "extend all project tasks by 1 week"
+    - "push all tasks by 2 days"
+    - "push all open tasks by 3 days" (task_status="todo,in_progress")
+    """
+    # Check user permissions
+    permission_error = require_permission(return_dict=True)
+    if permission_error:
+        return permission_error
+
+    # Validate project ID
+    if not project_id.isdigit():
+        return {"error": "Invalid project ID format"}
+
+    project_id = int(project_id)
+
+    # Get user session
+    user_session = get_user_session()
+    user = user_session["user"]
+
+    # Get the project
+    project = Project.objects.filter(id=project_id, company=user.company).first()
+
+    if not project:
+        return {
+            "error": f"Project with ID {project_id} not found or you don't have access to it."
+        }
+
+    # Parse duration
+    time_delta = parse_duration(duration)
+
+    if time_delta is None:
+        return {
+            "error": f"Could not parse duration '{duration}'. Please use formats like '2 weeks', '3 days', etc."
+        }
+
+    tasks = Task.objects.filter(milestone__project=project)
+    statuses = [value.strip() for value in task_status.split(",") if value.strip()]
+    if statuses:
+        tasks = tasks.filter(status__in=statuses)
+
+    if not tasks.exists():
+        return {"error": f"No tasks found for project '{project.name}'."}
+
+    result = shift_timeline(
+        time_delta,
+        tasks=tasks,
+        end_only=_as_bool(adjust_due_date_only),
+        user=user,
+        dry_run=_as_bool(dry_run),
+    )
+
+    # Prepare response
+    action = "extended" if time_delta.total_seconds() > 0 else "reduced"
+    days = abs(time_delta.days)
+    tasks_adjusted = result["tasks"]["rows"]
+
+    if result["dry_run"]:
+        message = f"Preview: {tasks_adjusted} task(s) in project '{project.name}' would be {action} by {days} day(s)."
+    else:
+        message = f"All {tasks_adjusted} task(s) in project '{project.name}' have been {action} by {days} day(s)."
+
+    return {
+        "success": True,
+        "message": message,
+        "details": {
+            "project_id": project.id,
+            "project_name": project.name,
+            "tasks_adjusted": tasks_adjusted,
+            **result,
+        },
+    }
+
+
+@ToolRegistry.register_tool(return_direct=False)
+def bulk_adjust_milestones_timeline(
+    project_id: str,
+    duration: str,
+    adjust_end_date_only: str = "true",
+    include_tasks: str = "true",
+    dry_run: str = "false",
+) -> Dict[str, Any]:
+    """
+    Adjusts the timeline of a whole project: the project itself, ALL its milestones and optionally their tasks.
+    By default, extends by adjusting end dates only.
+
+    Args:
+        project_id: The ID of the project whose schedule to adjust
+        duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
+        adjust_end_date_only: If "true", only adjust end dates. If "false", shift both start and end dates. Default is true.
+        include_tasks: If "true", also adjust all tasks within each milestone
+        dry_run: If "true", only preview what would change without saving anything.
+
+    Examples:
+    - "extend all milestones by 2 weeks"
+    - "push entire project schedule by 1 month"
+    """
+    # Check user permissions
+    permission_error = require_permission(return_dict=True)
+    if permission_error:
+        return permission_error
+
+    # Validate project ID
+    if not project_id.isdigit():
+        return {"error": "Invalid project ID format"}
+
+    project_id = int(project_id)
+
+    # Get user session
+    user_session = get_user_session()
+    user = user_session["user"]
+
+    # Get the project
+    project = Project.objects.filter(id=project_id, company=user.company).first()
+
+    if not project:
+        return {
+            "error": f"Project with ID {project_id} not found or you don't have access to it."
+        }
+
+    # Parse duration
+    time_delta = parse_duration(duration)
+
+    if time_delta is None:
+        return {
+            "error": f"Could not parse duration '{duration}'. Please use formats like '2 weeks', '3 days', etc."
+        }
+
+    adjust_tasks = _as_bool(include_tasks)
+
+    result = shift_project_timeline(
+        [project.id],
+        time_delta,
+        end_only=_as_bool(adjust_end_date_only),
+        include_tasks=adjust_tasks,
+        user=user,
+        dry_run=_as_bool(dry_run),
+    )
+
+    # Prepare response
+    action = "extended" if time_delta.total_seconds() > 0 else "reduced"
+    days = abs(time_delta.days)
+    milestones_adjusted = result["milestones"]["rows"]
+    tasks_adjusted = result["tasks"]["rows"] if adjust_tasks else 0
+
+    verb = "would be" if result["dry_run"] else "have been"
+    message = f"All {milestones_adjusted} milestone(s) in project '{project.name}' {verb} {action} by {days} day(s)."
+    if adjust_tasks:
+        message += f" {tasks_adjusted} task(s) {verb} adjusted as well."
+    if result["dry_run"]:
+        message = "Preview: " + message
+
+    return {
+        "success": True,
+        "message": message,
+        "details": {
+            "project_id": project.id,
+            "project_name": project.name,
+            "milestones_adjusted": milestones_adjusted,
+            "tasks_adjusted": tasks_adjusted,
+            **result,
+        },
+    }
+
+
+@ToolRegistry.register_tool(return_direct=False)
+def adjust_program_timeline(
+    program_id: str,
+    duration: str,
+    adjust_end_date_only: str = "true",
+    dry_run: str = "true",
+) -> Dict[str, Any]:
+    """
+    Shifts the schedule of every project in a program, including all milestones and tasks.
+    Defaults to a dry run so the user can confirm the preview before anything is saved;
+    call again with dry_run="false" to apply.
+
+    Args:
+        program_id: The ID of the program whose projects to shift
+        duration: Duration to adjust by (e.g., "2 weeks", "3 days", "-1 week")
+        adjust_end_date_only: If "true", only adjust end dates. If "false", shift both start and end dates. Default is true.
+        dry_run: If "true" (default), only preview what would change.
+
+    Examples:
+    - "push the whole program by 2 weeks"
+    - "delay every project in the program by 1 month"
+    """
+    # Check user permissions
+    permission_error = require_permission(return_dict=True)
+    if permission_error:
+        return permission_error
+
+    # Validate program ID
+    if not program_id.isdigit():
+        return {"error": "Invalid program ID format"}
+
+    user_session = get_user_session()
+    user = user_session["user"]
+
+    program = Program.objects.filter(id=int(program_id), company=user.company).first()
+
+    if not program:
+        return {
+            "error": f"Program with ID {program_id} not found or you don't have access to it."
+        }
+
+    time_delta = parse_duration(duration)
+
+    if time_delta is None:
+        return {
+            "error": f"Could not parse duration '{duration}'. Please use formats like '2 weeks', '3 days', etc."
+        }
+
+    project_ids = list(program.projects.values_list("id", flat=True))
+    if not project_ids:
+        return {"error": f"No projects found for program '{program.name}'."}
+
+    result = shift_project_timeline(
+        project_ids,
+        time_delta,
+        end_only=_as_bool(adjust_end_date_only),
+        user=user,
+        dry_run=_as_bool(dry_run),
+    )
+
+    action = "extended" if time_delta.total_seconds() > 0 else "reduced"
+    days = abs(time_delta.days)
+    verb = "would be" if result["dry_run"] else "have been"
+
+    return {
+        "success": True,
+        "message": (
+            f"{result['projects']['rows']} project(s), {result['milestones']['rows']} milestone(s) "
+            f"and {result['tasks']['rows']} task(s) in program '{program.name}' {verb} {action} by {days} day(s)."
+        ),
+        "details": {
+            "program_id": program.id,
+            "program_name": program.name,
+            **result,
+        },
+    }
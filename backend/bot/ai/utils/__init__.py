@@ -6,7 +6,7 @@ session context, permissions, and integration with the ERP system.
 """
 
 from .permissions import check_user_permission, require_permission
-from .session_context import get_user_session, set_user_session, clear_user_session
+from .session_context import get_user_session, set_user_session, clear_user_session, get_current_identity
 
 __all__ = [
     "check_user_permission",
@@ -14,4 +14,5 @@ __all__ = [
     "get_user_session",
     "set_user_session",
     "clear_user_session",
+    "get_current_identity",
 ]
@@ -1,17 +1,26 @@
 # bot/ai/utils/session_context.py
 import contextvars
 
-# Context variable for user session (token + user details)
+from accounts.identity import get_identity
+
+# Context variable for user session (token + user details + request identity)
 user_session_ctx = contextvars.ContextVar("user_session", default=None)
 
 
 def set_user_session(token, user_details):
-    user_session_ctx.set({"token": token, "user": user_details})
+    # The tools share the identity the request authenticated with
+    identity = get_identity(user_details, token)
+    user_session_ctx.set({"token": identity.token, "user": identity.user, "identity": identity})
 
 
 def get_user_session():
     return user_session_ctx.get()
 
 
+def get_current_identity():
+    session = user_session_ctx.get()
+    return session["identity"] if session else None
+
+
 def clear_user_session():
     user_session_ctx.set(None)
@@ -2,13 +2,11 @@
 Public chatbot for landing page visitors - no authentication required.
 """
 import json
-from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from openai import OpenAI
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from core import llm
 
 SYSTEM_PROMPT = """Je bent de ProjeXtPal AI Assistent, een vriendelijke en behulpzame chatbot op de website van ProjeXtPal.
 
@@ -66,14 +64,8 @@ def public_chat(request):
         
         messages.append({"role": "user", "content": message})
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=300
-        )
-        
-        reply = response.choices[0].message.content
+        # Landing page questions repeat a lot; identical conversations hit the cache
+        reply = llm.complete(messages, model="gpt-4o-mini", temperature=0.7, max_tokens=300).content
         
         return JsonResponse({
             'reply': reply,
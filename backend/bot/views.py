@@ -2,6 +2,7 @@ import json
 import logging
 import re
 
+from accounts.identity import get_identity
 from bot.ai.utils.session_context import (
     clear_user_session,
     get_user_session,
@@ -145,17 +146,10 @@ class ChatViewSet(viewsets.ModelViewSet):
             
         language_instruction = get_language_instruction(final_language)
         
-        # Get authentication token from request
-        token = None
-        if hasattr(request, "auth") and request.auth:
-            token = str(request.auth)
-        elif "HTTP_AUTHORIZATION" in request.META:
-            auth_header = request.META["HTTP_AUTHORIZATION"]
-            if auth_header.startswith("Bearer "):
-                token = auth_header[7:]
-
-        if user_details and token:
-            set_user_session(token, user_details)
+        # The AI tools share the identity the request authenticated with
+        identity = get_identity(request.user, request.auth)
+        if user_details and identity.token:
+            set_user_session(request.auth, user_details)
         else:
             clear_user_session()
 
@@ -358,17 +352,10 @@ class ChatViewSet(viewsets.ModelViewSet):
                 # Delete all messages that came after this user message
                 subsequent_messages.delete()
 
-                # Get authentication token from request
-                token = None
-                if hasattr(request, "auth") and request.auth:
-                    token = str(request.auth)
-                elif "HTTP_AUTHORIZATION" in request.META:
-                    auth_header = request.META["HTTP_AUTHORIZATION"]
-                    if auth_header.startswith("Bearer "):
-                        token = auth_header[7:]
-
-                if request.user and token:
-                    set_user_session(token, request.user)
+                # The AI tools share the identity the request authenticated with
+                identity = get_identity(request.user, request.auth)
+                if request.user and identity.token:
+                    set_user_session(request.auth, request.user)
                 else:
                     clear_user_session()
 
@@ -495,16 +482,9 @@ class ProjectAnalysisAPIView(APIView):
             )
 
         # Set up user session for permission checking
-        token = None
-        if hasattr(request, "auth") and request.auth:
-            token = str(request.auth)
-        elif "HTTP_AUTHORIZATION" in request.META:
-            auth_header = request.META["HTTP_AUTHORIZATION"]
-            if auth_header.startswith("Bearer "):
-                token = auth_header[7:]
-
-        if request.user and token:
-            set_user_session(token, request.user)
+        identity = get_identity(request.user, request.auth)
+        if request.user and identity.token:
+            set_user_session(request.auth, request.user)
         else:
             return Response(
                 {"error": "Authentication required"},
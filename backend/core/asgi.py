@@ -9,19 +9,25 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
-import notifications.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
+# Populate the app registry before importing consumers, which import models
 django_asgi_app = get_asgi_application()
 
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.auth import AuthMiddlewareStack
+import notifications.routing
+import projects.routing
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AuthMiddlewareStack(
-            URLRouter(notifications.routing.websocket_urlpatterns)
+            URLRouter(
+                notifications.routing.websocket_urlpatterns
+                + projects.routing.websocket_urlpatterns
+            )
         ),
     }
 )
@@ -0,0 +1,79 @@
+"""
+Async API views for endpoints that mostly wait on the network.
+
+A DRF view holds a worker thread for as long as it waits on the model or an
+external API. Under ASGI (core/asgi.py) Django runs sync views on one shared
+thread, so a worker answers one AI request at a time. An `async def` view
+awaits instead, and the same worker keeps serving other requests meanwhile:
+
+    @async_api_view(["POST"])
+    async def agenerate_survey_generic(request):
+        result = await agenerate_project_survey(request.data["project_data"])
+        return JsonResponse(result)
+
+The decorator gives the view what the DRF views around it rely on: JWT
+authentication through accounts.identity.CachedJWTAuthentication (bearer
+tokens only, so no CSRF), DRF permission classes, `request.data` parsed from
+the JSON body and `request.query_params`, and DRF's error bodies for 401,
+403 and 405. Views use the async ORM (`aget`, `acount`, `async for`) and
+core.llm.acomplete(); anything else blocking goes through sync_to_async.
+
+The sync views stay in place for WSGI deployments; the async variants live
+on parallel URLs ending in `async/`.
+"""
+import functools
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+
+from accounts.identity import CachedJWTAuthentication
+
+_authentication = CachedJWTAuthentication()
+
+
+def _error(exc):
+    return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+
+
+def async_api_view(methods, permission_classes=(IsAuthenticated,)):
+    """Decorate an `async def` view with authentication, permissions and body parsing"""
+    methods = [method.upper() for method in methods]
+
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return _error(exceptions.MethodNotAllowed(request.method))
+            try:
+                # Token check and the (usually cached) user lookup
+                authenticated = await sync_to_async(_authentication.authenticate)(request)
+            except exceptions.APIException as exc:
+                return _error(exc)
+            if authenticated is not None:
+                request.user, request.auth = authenticated
+            else:
+                # Not the session user: resolving it would query from the event loop
+                request.user, request.auth = AnonymousUser(), None
+
+            for permission_class in permission_classes:
+                if not permission_class().has_permission(request, None):
+                    if authenticated is None:
+                        return _error(exceptions.NotAuthenticated())
+                    return _error(exceptions.PermissionDenied())
+
+            try:
+                request.data = json.loads(request.body) if request.body else {}
+            except ValueError as exc:
+                return _error(exceptions.ParseError(f"JSON parse error - {exc}"))
+            request.query_params = request.GET
+            return await view(request, *args, **kwargs)
+
+        # Bearer tokens only, so no CSRF; csrf_exempt() would wrap the coroutine in a sync view
+        wrapper.csrf_exempt = True
+        return wrapper
+
+    return decorator
@@ -0,0 +1,48 @@
+"""
+Minimal background execution for work that should not block a request.
+
+Tasks run on a small thread pool once the current transaction commits.
+Anything that must survive a restart keeps its state in the database
+(job rows, delivery rows) and has a management command that resumes it,
+so a lost thread only delays work instead of dropping it.
+
+Set BACKGROUND_TASKS_EAGER = True to run tasks inline (tests, shell).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "BACKGROUND_TASK_WORKERS", 4),
+            thread_name_prefix="background",
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, "__name__", func))
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Schedule func(*args, **kwargs) to run after the current transaction commits"""
+    if getattr(settings, "BACKGROUND_TASKS_EAGER", False):
+        func(*args, **kwargs)
+        return
+
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
@@ -0,0 +1,37 @@
+"""
+Cache backends that count hits and misses for the request metrics
+(core/metrics.py). They behave exactly like Django's own:
+
+    CACHES = {"default": {"BACKEND": "core.cache.LocMemCache"}}   # or core.cache.RedisCache
+
+Every read goes through get() (Django's get_many, get_or_set and the async
+a* methods all call it), except RedisCache.get_many, which is counted itself.
+"""
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+
+from core.metrics import record_cache
+
+_MISSING = object()
+
+
+class CountingCacheMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            record_cache(misses=1)
+            return default
+        record_cache(hits=1)
+        return value
+
+
+class LocMemCache(CountingCacheMixin, BaseLocMemCache):
+    pass
+
+
+class RedisCache(CountingCacheMixin, BaseRedisCache):
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        record_cache(hits=len(found), misses=len(keys) - len(found))
+        return found
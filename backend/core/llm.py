@@ -0,0 +1,499 @@
+"""
+LLM gateway.
+
+Every chat completion in the backend goes through `complete()` (or
+`complete_json()` for prompts that answer in JSON):
+
+    reply = llm.complete([{"role": "user", "content": prompt}], temperature=0.3)
+    plan = llm.complete_json(messages, model="gpt-4o")   # parsed dict
+
+Async views use `acomplete()` / `acomplete_json()`, which await the model
+on the event loop instead of holding a worker thread for the whole call.
+
+The gateway owns:
+
+- one pooled client per process (a shared httpx connection pool), instead
+  of a client per call;
+- response caching for deterministic prompts (temperature 0, or any call
+  passing use_cache=True), keyed by a hash of model, messages, temperature
+  and output options. Sampled prompts are not cached, so a retry or a
+  "regenerate" gets a fresh answer;
+- coalescing: identical prompts already in flight wait for the first call
+  instead of being sent again;
+- a semaphore (LLM_MAX_CONCURRENCY) per process, and per event loop for
+  async calls, and per-call timeouts;
+- token and latency counters, readable with `metrics()`, and each call's
+  latency on the current request's metrics (core/metrics.py).
+
+The backend is pluggable with the LLM_BACKEND setting. OpenAIBackend talks
+to the API; StubBackend answers offline with canned text (LLM_STUB_RESPONSE,
+`register_stub()` and LLM_STUB_LATENCY) and is what the test suite and load
+runs use. LangChain agents that need a chat model object get a pooled one
+from `chat_model()`.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from core.metrics import record_llm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o"
+ROLES = {"system": "system", "human": "user", "user": "user", "ai": "assistant", "assistant": "assistant"}
+
+
+class LLMError(Exception):
+    """The model could not be reached, timed out or answered unusably"""
+
+
+@dataclass
+class Completion:
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    cached: bool = False
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class OpenAIBackend:
+    """Chat completions over one pooled OpenAI client (and one per event loop for async calls)"""
+
+    def __init__(self):
+        import httpx
+        from openai import OpenAI
+
+        self.http_client = httpx.Client(limits=self._limits())
+        self.client = OpenAI(http_client=self.http_client, **self._client_options())
+        # Async connections belong to the loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _limits():
+        import httpx
+
+        return httpx.Limits(max_connections=_setting("LLM_MAX_CONCURRENCY", 8) * 2)
+
+    @staticmethod
+    def _client_options():
+        return {
+            "api_key": settings.OPENAI_API_KEY,
+            "timeout": _setting("LLM_TIMEOUT", 60),
+            "max_retries": _setting("LLM_MAX_RETRIES", 2),
+        }
+
+    def _async_client(self):
+        import httpx
+        from openai import AsyncOpenAI
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = AsyncOpenAI(
+                http_client=httpx.AsyncClient(limits=self._limits()), **self._client_options()
+            )
+        return client
+
+    @staticmethod
+    def _create_kwargs(request):
+        options = {}
+        if request.get("max_tokens"):
+            options["max_tokens"] = request["max_tokens"]
+        if request.get("json_mode"):
+            options["response_format"] = {"type": "json_object"}
+        return {
+            "model": request["model"],
+            "messages": request["messages"],
+            "temperature": request["temperature"],
+            **options,
+        }
+
+    def complete(self, request, timeout):
+        response = self.client.with_options(timeout=timeout).chat.completions.create(
+            **self._create_kwargs(request)
+        )
+        return self._completion(response)
+
+    async def acomplete(self, request, timeout):
+        response = await self._async_client().with_options(timeout=timeout).chat.completions.create(
+            **self._create_kwargs(request)
+        )
+        return self._completion(response)
+
+    @staticmethod
+    def _completion(response):
+        usage = response.usage
+        return Completion(
+            content=response.choices[0].message.content or "",
+            model=response.model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def chat_model(self, model, temperature, **kwargs):
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            openai_api_key=settings.OPENAI_API_KEY,
+            timeout=_setting("LLM_TIMEOUT", 60),
+            max_retries=_setting("LLM_MAX_RETRIES", 2),
+            http_client=self.http_client,
+            **kwargs,
+        )
+
+
+_stubs = []
+
+
+def register_stub(match, content):
+    """Answer prompts containing `match` with `content` on the stub backend"""
+    _stubs.insert(0, (match, content if isinstance(content, str) else json.dumps(content)))
+
+
+def clear_stubs():
+    _stubs.clear()
+
+
+class StubBackend:
+    """Offline answers for tests and load runs; nothing leaves the process"""
+
+    def complete(self, request, timeout):
+        latency = _setting("LLM_STUB_LATENCY", 0)
+        if latency:
+            time.sleep(latency)
+        return self._answer(request)
+
+    async def acomplete(self, request, timeout):
+        latency = _setting("LLM_STUB_LATENCY", 0)
+        if latency:
+            await asyncio.sleep(latency)
+        return self._answer(request)
+
+    @staticmethod
+    def _answer(request):
+        prompt = "\n".join(message["content"] for message in request["messages"])
+        content = next((text for match, text in _stubs if match in prompt), None)
+        if content is None:
+            content = _setting("LLM_STUB_RESPONSE", None) or ("{}" if request.get("json_mode") else "Stub response")
+        return Completion(
+            content=content,
+            model=request["model"],
+            prompt_tokens=len(prompt.split()),
+            completion_tokens=len(content.split()),
+        )
+
+    def chat_model(self, model, temperature, **kwargs):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        return FakeListChatModel(responses=[_setting("LLM_STUB_RESPONSE", None) or "Stub response"])
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    path = _setting("LLM_BACKEND", "core.llm.OpenAIBackend")
+    backend = _backends.get(path)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(path)
+            if backend is None:
+                backend = _backends[path] = import_string(path)()
+    return backend
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _metrics.update(
+            requests=0, cache_hits=0, coalesced=0, errors=0,
+            prompt_tokens=0, completion_tokens=0, latency_ms=0.0,
+        )
+
+
+reset_metrics()
+
+
+def _count(**values):
+    with _metrics_lock:
+        for name, value in values.items():
+            _metrics[name] += value
+
+
+def metrics():
+    """Counters since start (or reset_metrics): calls, cache hits, tokens, latency"""
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+# ============================================================
+# GATEWAY
+# ============================================================
+
+def normalize_messages(messages):
+    """A prompt string, LangChain messages or role/content dicts, as role/content dicts"""
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    normalized = []
+    for message in messages:
+        if isinstance(message, dict):
+            normalized.append({"role": message["role"], "content": message["content"]})
+        else:
+            normalized.append({"role": ROLES.get(message.type, "user"), "content": message.content})
+    return normalized
+
+
+def prompt_hash(request):
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_semaphores = {}
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _semaphore():
+    size = _setting("LLM_MAX_CONCURRENCY", 8)
+    with _inflight_lock:
+        if size not in _semaphores:
+            _semaphores[size] = threading.BoundedSemaphore(size)
+        return _semaphores[size]
+
+
+def _call(request, timeout):
+    semaphore = _semaphore()
+    if not semaphore.acquire(timeout=timeout):
+        raise LLMError("LLM gateway is at capacity")
+    started = time.monotonic()
+    try:
+        completion = get_backend().complete(request, timeout)
+    except Exception as exc:
+        _count(errors=1)
+        raise LLMError(str(exc)) from exc
+    finally:
+        semaphore.release()
+    return _record(completion, started)
+
+
+def _record(completion, started):
+    completion.latency_ms = (time.monotonic() - started) * 1000
+    _count(
+        requests=1,
+        prompt_tokens=completion.prompt_tokens,
+        completion_tokens=completion.completion_tokens,
+        latency_ms=completion.latency_ms,
+    )
+    record_llm(completion.latency_ms)
+    logger.debug(
+        "LLM %s: %s+%s tokens in %.0fms",
+        completion.model, completion.prompt_tokens, completion.completion_tokens, completion.latency_ms,
+    )
+    return completion
+
+
+def _request(messages, model, temperature, max_tokens, json_mode):
+    return {
+        "model": model or _setting("LLM_DEFAULT_MODEL", DEFAULT_MODEL),
+        "messages": normalize_messages(messages),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "json_mode": json_mode,
+    }
+
+
+def _should_cache(use_cache, temperature):
+    """Cache only deterministic prompts unless the caller says otherwise"""
+    return temperature == 0 if use_cache is None else use_cache
+
+
+def complete(messages, *, model=None, temperature=0.7, max_tokens=None, json_mode=False, timeout=None, use_cache=None):
+    """
+    One chat completion. Identical prompts share the call already in flight;
+    deterministic ones (temperature 0, or use_cache=True) are also served
+    from the cache. Raises LLMError.
+    """
+    use_cache = _should_cache(use_cache, temperature)
+    request = _request(messages, model, temperature, max_tokens, json_mode)
+    timeout = timeout or _setting("LLM_TIMEOUT", 60)
+    key = prompt_hash(request)
+    cache_key = f"llm:completion:{key}"
+
+    if use_cache:
+        hit = cache.get(cache_key)
+        if hit is not None:
+            _count(cache_hits=1)
+            return Completion(**{**hit, "cached": True})
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        _count(coalesced=1)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError as exc:
+            raise LLMError("Timed out waiting for an identical request") from exc
+
+    try:
+        completion = _call(request, timeout)
+        future.set_result(completion)
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+    if use_cache:
+        cache.set(cache_key, completion.__dict__, _setting("LLM_CACHE_TIMEOUT", 60 * 60))
+    return completion
+
+
+# Async calls coalesce and queue per event loop: asyncio futures and
+# semaphores cannot be shared between loops
+_loop_states = weakref.WeakKeyDictionary()
+
+
+def _loop_state():
+    loop = asyncio.get_running_loop()
+    with _inflight_lock:
+        state = _loop_states.get(loop)
+        if state is None:
+            state = _loop_states[loop] = {
+                "semaphore": asyncio.BoundedSemaphore(_setting("LLM_MAX_CONCURRENCY", 8)),
+                "inflight": {},
+            }
+        return state
+
+
+async def _acall(request, timeout, semaphore):
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except asyncio.TimeoutError as exc:
+        raise LLMError("LLM gateway is at capacity") from exc
+    started = time.monotonic()
+    backend = get_backend()
+    # Backends without an async path run in a worker thread
+    acomplete_ = getattr(backend, "acomplete", None) or sync_to_async(backend.complete, thread_sensitive=False)
+    try:
+        completion = await acomplete_(request, timeout)
+    except Exception as exc:
+        _count(errors=1)
+        raise LLMError(str(exc)) from exc
+    finally:
+        semaphore.release()
+    return _record(completion, started)
+
+
+async def acomplete(messages, *, model=None, temperature=0.7, max_tokens=None, json_mode=False, timeout=None,
+                    use_cache=None):
+    """complete() for async views: waits on the event loop instead of a thread"""
+    use_cache = _should_cache(use_cache, temperature)
+    request = _request(messages, model, temperature, max_tokens, json_mode)
+    timeout = timeout or _setting("LLM_TIMEOUT", 60)
+    key = prompt_hash(request)
+    cache_key = f"llm:completion:{key}"
+
+    if use_cache:
+        hit = await cache.aget(cache_key)
+        if hit is not None:
+            _count(cache_hits=1)
+            return Completion(**{**hit, "cached": True})
+
+    state = _loop_state()
+    future = state["inflight"].get(key)
+    if future is not None:
+        _count(coalesced=1)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as exc:
+            raise LLMError("Timed out waiting for an identical request") from exc
+
+    future = state["inflight"][key] = asyncio.get_running_loop().create_future()
+    try:
+        completion = await _acall(request, timeout, state["semaphore"])
+        future.set_result(completion)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Nobody may be waiting on it; don't log it as unretrieved
+        future.exception()
+        raise
+    finally:
+        state["inflight"].pop(key, None)
+
+    if use_cache:
+        await cache.aset(cache_key, completion.__dict__, _setting("LLM_CACHE_TIMEOUT", 60 * 60))
+    return completion
+
+
+def parse_json(text):
+    """JSON from a model reply; a markdown code fence around it is stripped"""
+    text = (text or "").strip()
+    if "```" in text:
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError as exc:
+        raise LLMError(f"Model reply is not valid JSON: {exc}") from exc
+
+
+def complete_json(messages, **kwargs):
+    """complete() for prompts that answer with a JSON object; returns the parsed object"""
+    return parse_json(complete(messages, **kwargs).content)
+
+
+async def acomplete_json(messages, **kwargs):
+    """acomplete() for prompts that answer with a JSON object"""
+    return parse_json((await acomplete(messages, **kwargs)).content)
+
+
+_chat_models = {}
+
+
+def chat_model(model=None, temperature=0.7, **kwargs):
+    """A pooled LangChain chat model on the configured backend, for agents"""
+    model = model or _setting("LLM_DEFAULT_MODEL", DEFAULT_MODEL)
+    key = (_setting("LLM_BACKEND", "core.llm.OpenAIBackend"), model, temperature, tuple(sorted(kwargs.items())))
+    if key not in _chat_models:
+        _chat_models[key] = get_backend().chat_model(model, temperature, **kwargs)
+    return _chat_models[key]
+
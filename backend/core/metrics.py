@@ -0,0 +1,337 @@
+"""
+Request instrumentation.
+
+PerformanceLoggingMiddleware (core/middleware/performance.py) opens a
+RequestMetrics for every request. While it is open:
+
+- every SQL statement is timed by an execute wrapper installed once on each
+  database connection (`instrument()`), giving the request's query count,
+  DB time and statements. A statement run N_PLUS_ONE_THRESHOLD times or
+  more in one request is reported as a likely N+1;
+- cache reads count hits and misses (the core/cache.py backends);
+- LLM gateway calls add their latency (core/llm.py).
+
+The open RequestMetrics lives in a context variable, so async views, and the
+threads sync_to_async runs their ORM calls on, report to the request that
+started them.
+
+Finished requests are aggregated per route into a process-local registry:
+latency and query-count histograms plus DB, cache, LLM and N+1 counters,
+served in the Prometheus text format by `metrics_view` (/metrics/) along
+with the gateway's `llm.metrics()`. Requests slower than SLOW_REQUEST_MS keep
+their statements; the slowest SLOW_REQUEST_SAMPLES are served as JSON by
+`slow_requests_view` (/metrics/slow/). Every worker process keeps its own
+registry, so each worker is scraped on its own.
+"""
+import bisect
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+# Statements kept per request for the slow-request sampler
+MAX_RECORDED_STATEMENTS = 200
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+@dataclass
+class RequestMetrics:
+    queries: int = 0
+    db_ms: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    llm_calls: int = 0
+    llm_ms: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+    recorded: list = field(default_factory=list)
+
+    def duplicates(self, threshold):
+        """(sql, count) of the statements run at least `threshold` times, most repeated first"""
+        repeated = []
+        for sql, count in self.statements.most_common():
+            if count < threshold:
+                break
+            repeated.append((sql, count))
+        return repeated
+
+
+def start():
+    """Open a RequestMetrics for the current context; returns it and the token for stop()"""
+    request_metrics = RequestMetrics()
+    return request_metrics, _current.set(request_metrics)
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def record_cache(hits=0, misses=0):
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.cache_hits += hits
+        request_metrics.cache_misses += misses
+
+
+def record_llm(latency_ms):
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.llm_calls += 1
+        request_metrics.llm_ms += latency_ms
+
+
+# ============================================================
+# SQL
+# ============================================================
+
+def _execute(execute, sql, params, many, context):
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        request_metrics.queries += 1
+        request_metrics.db_ms += ms
+        request_metrics.statements[sql] += 1
+        if len(request_metrics.recorded) < MAX_RECORDED_STATEMENTS:
+            request_metrics.recorded.append((sql, ms))
+
+
+def instrument(connection):
+    """Time the connection's statements for whichever request is running them"""
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+def instrument_all():
+    """instrument() this thread's existing connections"""
+    for connection in connections.all(initialized_only=True):
+        instrument(connection)
+
+
+@receiver(connection_created)
+def _instrument_new_connection(sender, connection, **kwargs):
+    instrument(connection)
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+_registry_lock = threading.Lock()
+_routes = {}
+_statuses = Counter()
+_slow = []
+_sequence = itertools.count()
+
+
+def reset_metrics():
+    with _registry_lock:
+        _routes.clear()
+        _statuses.clear()
+        _slow.clear()
+
+
+def _route_stats():
+    return {
+        "latency": [0] * (len(LATENCY_BUCKETS) + 1),
+        "latency_sum": 0.0,
+        "queries": [0] * (len(QUERY_BUCKETS) + 1),
+        "queries_sum": 0,
+        "count": 0,
+        "db_seconds": 0.0,
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "llm_calls": 0,
+        "llm_seconds": 0.0,
+        "n_plus_one": 0,
+    }
+
+
+def observe(request, status, seconds, request_metrics, route, duplicates=()):
+    """Add one finished request to its route's histograms, and to the slow sample if it qualifies"""
+    key = (route, request.method)
+    duration_ms = seconds * 1000
+    slow = duration_ms >= getattr(settings, "SLOW_REQUEST_MS", 500)
+    with _registry_lock:
+        stats = _routes.get(key)
+        if stats is None:
+            stats = _routes[key] = _route_stats()
+        stats["latency"][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats["latency_sum"] += seconds
+        stats["queries"][bisect.bisect_left(QUERY_BUCKETS, request_metrics.queries)] += 1
+        stats["queries_sum"] += request_metrics.queries
+        stats["count"] += 1
+        stats["db_seconds"] += request_metrics.db_ms / 1000
+        stats["cache_hits"] += request_metrics.cache_hits
+        stats["cache_misses"] += request_metrics.cache_misses
+        stats["llm_calls"] += request_metrics.llm_calls
+        stats["llm_seconds"] += request_metrics.llm_ms / 1000
+        stats["n_plus_one"] += bool(duplicates)
+        _statuses[key + (status,)] += 1
+        if slow:
+            _sample(duration_ms, request, status, route, request_metrics, duplicates)
+
+
+def _sample(duration_ms, request, status, route, request_metrics, duplicates):
+    size = getattr(settings, "SLOW_REQUEST_SAMPLES", 20)
+    if size <= 0 or (len(_slow) >= size and duration_ms <= _slow[0][0]):
+        return
+    sample = {
+        "at": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.path,
+        "route": route,
+        "status": status,
+        "duration_ms": round(duration_ms, 1),
+        "queries": request_metrics.queries,
+        "db_ms": round(request_metrics.db_ms, 1),
+        "cache_hits": request_metrics.cache_hits,
+        "cache_misses": request_metrics.cache_misses,
+        "llm_ms": round(request_metrics.llm_ms, 1),
+        "duplicates": [{"sql": sql, "count": count} for sql, count in duplicates],
+        "statements": [{"sql": sql, "ms": round(ms, 2)} for sql, ms in request_metrics.recorded],
+    }
+    entry = (duration_ms, next(_sequence), sample)
+    if len(_slow) < size:
+        heapq.heappush(_slow, entry)
+    else:
+        heapq.heapreplace(_slow, entry)
+
+
+def slow_requests():
+    """The sampled slow requests, slowest first"""
+    with _registry_lock:
+        return [sample for _, _, sample in sorted(_slow, key=lambda entry: entry[0], reverse=True)]
+
+
+# ============================================================
+# EXPOSITION
+# ============================================================
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram(lines, name, labels, buckets, counts, total, count):
+    cumulative = 0
+    for bound, bucket in zip(buckets + ("+Inf",), counts):
+        cumulative += bucket
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {count}")
+
+
+ROUTE_COUNTERS = (
+    ("http_request_db_seconds_total", "db_seconds", "Time spent in SQL"),
+    ("http_request_cache_hits_total", "cache_hits", "Cache reads that hit"),
+    ("http_request_cache_misses_total", "cache_misses", "Cache reads that missed"),
+    ("http_request_llm_calls_total", "llm_calls", "LLM calls made"),
+    ("http_request_llm_seconds_total", "llm_seconds", "Time spent waiting on the LLM"),
+    ("http_request_n_plus_one_total", "n_plus_one", "Requests that repeated a SQL statement N_PLUS_ONE_THRESHOLD times"),
+)
+LLM_COUNTERS = (
+    ("llm_requests_total", "requests", "Completions sent to the model"),
+    ("llm_cache_hits_total", "cache_hits", "Completions answered from the cache"),
+    ("llm_coalesced_total", "coalesced", "Completions that waited on an identical call in flight"),
+    ("llm_errors_total", "errors", "Completions that failed"),
+    ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent"),
+    ("llm_completion_tokens_total", "completion_tokens", "Completion tokens received"),
+)
+
+
+def render():
+    """The registry and the LLM gateway counters in the Prometheus text format"""
+    from core import llm
+
+    with _registry_lock:
+        routes = {key: {**stats, "latency": list(stats["latency"]), "queries": list(stats["queries"])}
+                  for key, stats in _routes.items()}
+        statuses = dict(_statuses)
+
+    lines = [
+        "# HELP http_requests_total Requests by route, method and status",
+        "# TYPE http_requests_total counter",
+    ]
+    for (route, method, status), count in sorted(statuses.items()):
+        lines.append(f"http_requests_total{_labels(route=route, method=method, status=status)} {count}")
+
+    lines += [
+        "# HELP http_request_duration_seconds Request latency by route",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (route, method), stats in sorted(routes.items()):
+        _histogram(lines, "http_request_duration_seconds", {"route": route, "method": method},
+                   LATENCY_BUCKETS, stats["latency"], stats["latency_sum"], stats["count"])
+
+    lines += [
+        "# HELP http_request_db_queries SQL statements per request by route",
+        "# TYPE http_request_db_queries histogram",
+    ]
+    for (route, method), stats in sorted(routes.items()):
+        _histogram(lines, "http_request_db_queries", {"route": route, "method": method},
+                   QUERY_BUCKETS, stats["queries"], stats["queries_sum"], stats["count"])
+
+    for name, stat, help_text in ROUTE_COUNTERS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (route, method), stats in sorted(routes.items()):
+            lines.append(f"{name}{_labels(route=route, method=method)} {stats[stat]}")
+
+    gateway = llm.metrics()
+    for name, stat, help_text in LLM_COUNTERS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {gateway[stat]}"]
+    lines += [
+        "# HELP llm_latency_seconds_total Time the model took to answer",
+        "# TYPE llm_latency_seconds_total counter",
+        f"llm_latency_seconds_total {gateway['latency_ms'] / 1000}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _authorized(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_staff)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: METRICS_TOKEN as a bearer token, or a staff session"""
+    if not _authorized(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def slow_requests_view(request):
+    """The slowest sampled requests with their SQL statements"""
+    if not _authorized(request):
+        return JsonResponse({"error": "Forbidden"}, status=403)
+    return JsonResponse({
+        "threshold_ms": getattr(settings, "SLOW_REQUEST_MS", 500),
+        "requests": slow_requests(),
+    })
@@ -0,0 +1,29 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django_otp.middleware import OTPMiddleware as BaseOTPMiddleware
+
+
+class OTPMiddleware(BaseOTPMiddleware):
+    """
+    django-otp's middleware, usable in an async stack.
+
+    The upstream class is sync-only, which makes Django run every async view
+    behind it on the one sync thread. Wrapping request.user is lazy and does
+    no I/O, so the same work can run on either path.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # The base __call__ wraps the user and returns get_response's coroutine
+        return await super().__call__(request)
@@ -1,12 +1,67 @@
+import logging
 import time
-from django.utils.deprecation import MiddlewareMixin
-
-class PerformanceLoggingMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        request._start_time = time.time()
-        
-    def process_response(self, request, response):
-        if hasattr(request, '_start_time'):
-            duration = time.time() - request._start_time
-            response['X-Response-Time'] = f'{duration:.3f}s'
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class PerformanceLoggingMiddleware:
+    """
+    Times every request and records its SQL, cache and LLM work (core/metrics.py).
+
+    Adds X-Response-Time and a Server-Timing header, logs a warning when a
+    statement repeats N_PLUS_ONE_THRESHOLD times, and feeds the per-route
+    histograms and the slow-request sampler. Works on both the sync and the
+    async path, so async views are not pushed onto the sync thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        metrics.instrument_all()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before the wrapper's signal was connected
+        metrics.instrument_all()
+        started = time.perf_counter()
+        request_metrics, token = metrics.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.stop(token)
+        return self._finish(request, response, time.perf_counter() - started, request_metrics)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        request_metrics, token = metrics.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.stop(token)
+        return self._finish(request, response, time.perf_counter() - started, request_metrics)
+
+    def _finish(self, request, response, seconds, request_metrics):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        duplicates = request_metrics.duplicates(getattr(settings, "N_PLUS_ONE_THRESHOLD", 10))
+        if duplicates:
+            sql, count = duplicates[0]
+            logger.warning("Possible N+1 on %s %s: %s runs of %s", request.method, request.path, count, sql)
+        metrics.observe(request, response.status_code, seconds, request_metrics, route, duplicates)
+
+        response["X-Response-Time"] = f"{seconds:.3f}s"
+        response["Server-Timing"] = (
+            f'db;desc="{request_metrics.queries} queries";dur={request_metrics.db_ms:.1f}, '
+            f"llm;dur={request_metrics.llm_ms:.1f}, total;dur={seconds * 1000:.1f}"
+        )
         return response
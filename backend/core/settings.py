@@ -59,6 +59,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Timing, SQL/cache/LLM counts and per-route histograms (core/metrics.py)
+    "core.middleware.performance.PerformanceLoggingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -68,7 +70,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django_otp.middleware.OTPMiddleware', 
+    # Async-capable django_otp.middleware.OTPMiddleware
+    'core.middleware.otp.OTPMiddleware',
 ]
 
 ROOT_URLCONF = "core.urls"
@@ -108,12 +111,13 @@ SIMPLE_JWT = {
 }
 
 
+
 AUTH_USER_MODEL = "accounts.CustomUser"
 LOGIN_FIELD = "email"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.identity.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -182,6 +186,13 @@ EMAIL_HOST_USER = decouple.config("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = decouple.config("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = decouple.config("DEFAULT_FROM_EMAIL")
 
+# Background work (core/background.py) and invoice batch PDF rendering
+BACKGROUND_TASK_WORKERS = decouple.config("BACKGROUND_TASK_WORKERS", default=4, cast=int)
+INVOICE_PDF_PROCESSES = decouple.config("INVOICE_PDF_PROCESSES", default=2, cast=int)
+
+# Seconds before the superadmin dashboard snapshot is refreshed in the background
+ADMIN_STATS_MAX_AGE = decouple.config("ADMIN_STATS_MAX_AGE", default=300, cast=int)
+
 FRONTEND_URL = decouple.config("FRONTEND_URL")
 BASE_URL = decouple.config("BASE_URL")
 
@@ -191,6 +202,50 @@ STRIPE_WEBHOOK_SECRET = decouple.config("STRIPE_WEBHOOK_SECRET")
 
 OPENAI_API_KEY = decouple.config("OPENAI_API_KEY")
 
+# LLM gateway (core/llm.py): backend, pool size, timeouts and prompt cache
+LLM_BACKEND = decouple.config("LLM_BACKEND", default="core.llm.OpenAIBackend")
+LLM_DEFAULT_MODEL = decouple.config("LLM_DEFAULT_MODEL", default="gpt-4o")
+LLM_TIMEOUT = decouple.config("LLM_TIMEOUT", default=60, cast=int)
+LLM_MAX_RETRIES = decouple.config("LLM_MAX_RETRIES", default=2, cast=int)
+LLM_MAX_CONCURRENCY = decouple.config("LLM_MAX_CONCURRENCY", default=8, cast=int)
+LLM_CACHE_TIMEOUT = decouple.config("LLM_CACHE_TIMEOUT", default=60 * 60, cast=int)
+
+# Background risk mitigation generation (projects/mitigation_queue.py): seconds to
+# wait for more risks before generating, and the most risks generated per batch
+MITIGATION_BATCH_WINDOW = decouple.config("MITIGATION_BATCH_WINDOW", default=1.0, cast=float)
+MITIGATION_BATCH_SIZE = decouple.config("MITIGATION_BATCH_SIZE", default=20, cast=int)
+
+# CRM user sync (accounts/crm.py): pages fetched at once, and retries with
+# exponential backoff (seconds) on timeouts, 429 and 5xx answers
+CRM_SYNC_CONCURRENCY = decouple.config("CRM_SYNC_CONCURRENCY", default=4, cast=int)
+CRM_MAX_RETRIES = decouple.config("CRM_MAX_RETRIES", default=4, cast=int)
+CRM_BACKOFF = decouple.config("CRM_BACKOFF", default=0.5, cast=float)
+
+# Request metrics (core/metrics.py): requests slower than SLOW_REQUEST_MS (ms) are
+# sampled with their SQL, the slowest SLOW_REQUEST_SAMPLES kept; a statement run
+# N_PLUS_ONE_THRESHOLD times in one request is logged as a likely N+1. /metrics/
+# accepts METRICS_TOKEN as a bearer token, or a staff session
+SLOW_REQUEST_MS = decouple.config("SLOW_REQUEST_MS", default=500, cast=int)
+SLOW_REQUEST_SAMPLES = decouple.config("SLOW_REQUEST_SAMPLES", default=20, cast=int)
+N_PLUS_ONE_THRESHOLD = decouple.config("N_PLUS_ONE_THRESHOLD", default=10, cast=int)
+METRICS_TOKEN = decouple.config("METRICS_TOKEN", default="")
+
+# Cache backends that count hits and misses for the request metrics (core/cache.py).
+# Production runs several gunicorn workers, so with REDIS_URL set they share one
+# cache and an invalidation in one worker reaches all of them
+REDIS_URL = decouple.config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "core.cache.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "core.cache.LocMemCache"}}
+
+# Seconds a token's user (and company) stays cached, see accounts/identity.py.
+# Deactivation, password and role changes are applied by dropping the entry, which
+# a per-process cache cannot do for the other workers, so it is off without Redis
+IDENTITY_CACHE_TIMEOUT = decouple.config(
+    "IDENTITY_CACHE_TIMEOUT", default=300 if REDIS_URL else 0, cast=int
+)
+
 # drf-spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'ProjExpal API',
@@ -205,12 +260,19 @@ MOBILE_DEEP_LINK = "projextpal://"
 # Use SQLite for testing (faster and no Docker needed)
 import sys
 if 'test' in sys.argv or 'pytest' in sys.modules:
-    DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': ':memory:',
+    # TEST_POSTGRES=1 keeps the Postgres database above, e.g. to run the query budgets
+    # (tests/performance/test_query_budgets.py) against it
+    if not decouple.config("TEST_POSTGRES", default=False, cast=bool):
+        DATABASES = {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': ':memory:',
+            }
         }
-    }
+    # Tests never call the real model
+    LLM_BACKEND = "core.llm.StubBackend"
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+    CACHES = {"default": {"BACKEND": "core.cache.LocMemCache"}}
 
 # Frontend URL for invitation links
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'https://projextpal.com')
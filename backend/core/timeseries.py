@@ -0,0 +1,155 @@
+"""
+Bucketed metric time series for the admin dashboards.
+
+A Metric is a queryset (with its filters), the date field to bucket on and
+the aggregate to measure (COUNT(*) by default). `series()` returns one value
+per day, week or month from a single grouped Trunc query:
+
+    signups = Metric("users.signups", User.objects.all(), "date_joined")
+    series(signups, "month", periods=12)   # [{"period": date, "value": n}, ...]
+    change(series(signups, "month", periods=2))   # month-over-month %
+
+Buckets that have closed are cached indefinitely, keyed by metric and
+bucket start, so a dashboard only queries the open bucket (and whatever
+it has never seen). A closed bucket keeps the value it had when it was
+first computed; bump the metric key if its definition changes, and call
+`forget()` when a row is written into a bucket that has already closed.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+
+BUCKETS = ("day", "week", "month")
+# Closed buckets never change, so they never expire
+CLOSED_BUCKET_TIMEOUT = None
+
+
+class Metric:
+    """What to measure: a queryset, the date field to bucket on and an aggregate"""
+
+    def __init__(self, key, queryset, date_field, measure=None):
+        self.key = key
+        self.queryset = queryset
+        self.date_field = date_field
+        self.measure = measure if measure is not None else Count("pk")
+
+    def __repr__(self):
+        return f"Metric({self.key!r})"
+
+
+def bucket_start(value, bucket):
+    """The first day of the bucket holding `value` (a date or aware datetime)"""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    if bucket == "day":
+        return value
+    if bucket == "week":
+        return value - timedelta(days=value.weekday())
+    if bucket == "month":
+        return value.replace(day=1)
+    raise ValueError(f"Unknown bucket {bucket!r}, expected one of {BUCKETS}")
+
+
+def shift(start, bucket, count):
+    """The bucket `count` buckets after `start` (negative goes back)"""
+    if bucket == "day":
+        return start + timedelta(days=count)
+    if bucket == "week":
+        return start + timedelta(weeks=count)
+    months = start.year * 12 + start.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _aware(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _number(value):
+    if value is None:
+        return 0
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _cache_key(metric, bucket, start):
+    return f"timeseries:{metric.key}:{bucket}:{start.isoformat()}"
+
+
+def _query(metric, bucket, first, last):
+    """Values for the buckets first..last (inclusive) in one grouped query"""
+    rows = (
+        metric.queryset.filter(**{
+            f"{metric.date_field}__gte": _aware(first),
+            f"{metric.date_field}__lt": _aware(shift(last, bucket, 1)),
+        })
+        .order_by()
+        .annotate(timeseries_bucket=Trunc(metric.date_field, bucket))
+        .values("timeseries_bucket")
+        .annotate(timeseries_value=metric.measure)
+    )
+    return {
+        bucket_start(row["timeseries_bucket"], bucket): _number(row["timeseries_value"])
+        for row in rows
+    }
+
+
+def series(metric, bucket="month", periods=12, start=None, now=None):
+    """
+    `periods` consecutive buckets, ending with the current one unless a
+    `start` bucket is given. Buckets in the future are zero.
+    """
+    now = now or timezone.now()
+    current = bucket_start(now, bucket)
+    first = bucket_start(start, bucket) if start else shift(current, bucket, -(periods - 1))
+    starts = [shift(first, bucket, i) for i in range(periods)]
+
+    closed = [s for s in starts if s < current]
+    values = {}
+    if closed:
+        keys = {_cache_key(metric, bucket, s): s for s in closed}
+        values = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [s for s in starts if s <= current and s not in values]
+    if missing:
+        fresh = _query(metric, bucket, missing[0], missing[-1])
+        for s in missing:
+            values[s] = fresh.get(s, 0)
+        cache.set_many(
+            {_cache_key(metric, bucket, s): values[s] for s in missing if s < current},
+            CLOSED_BUCKET_TIMEOUT,
+        )
+
+    return [{"period": s, "value": values.get(s, 0)} for s in starts]
+
+
+def forget(key, moment):
+    """Drop the cached buckets of metric `key` that hold `moment`"""
+    if moment is None:
+        return
+    cache.delete_many([
+        f"timeseries:{key}:{bucket}:{bucket_start(moment, bucket).isoformat()}"
+        for bucket in BUCKETS
+    ])
+
+
+def change(points):
+    """Percentage change from the second-to-last to the last point"""
+    if len(points) < 2:
+        return 0.0
+    return pct_change(points[-1]["value"], points[-2]["value"])
+
+
+def pct_change(current, previous):
+    if previous == 0:
+        return 0.0 if current == 0 else 100.0
+    return round(((current - previous) / previous) * 100.0, 1)
+
+
+def total(points):
+    return sum(point["value"] for point in points)
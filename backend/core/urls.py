@@ -4,6 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from admin_portal.views import CurrentUserView
 from subscriptions.public_api import PublicPlansView
+from core.metrics import metrics_view, slow_requests_view
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -13,6 +14,8 @@ from drf_spectacular.views import (
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", include("health.urls")),
+    path("metrics/", metrics_view, name="metrics"),
+    path("metrics/slow/", slow_requests_view, name="slow-requests"),
     
     # Auth
     path("api/v1/auth/", include("accounts.urls")),
@@ -1,11 +1,10 @@
 """
 AI-powered report generation using OpenAI GPT.
 """
-import json
 import logging
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from django.conf import settings
+
+from core import llm
 
 logger = logging.getLogger(__name__)
 
@@ -178,6 +177,14 @@ Company: {company_name}
 }
 
 
+def _report_messages(prompt_config, context_data):
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", prompt_config["system"]),
+        ("human", prompt_config["human"]),
+    ])
+    return prompt.format_messages(**context_data)
+
+
 def generate_report(report_id, context_data):
     """Generate an AI report based on report type and context data."""
     prompt_config = REPORT_PROMPTS.get(report_id)
@@ -185,33 +192,29 @@ def generate_report(report_id, context_data):
         return {"error": f"Unknown report type: {report_id}"}
 
     try:
-        llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-4o",
-            openai_api_key=settings.OPENAI_API_KEY,
-        )
-
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", prompt_config["system"]),
-            ("human", prompt_config["human"]),
-        ])
-
-        formatted = prompt.format_messages(**context_data)
-        response = llm.invoke(formatted)
-        text = response.content.strip()
-
-        # Parse JSON from response
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-            text = text.strip()
-
-        report = json.loads(text)
-        return report
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse report JSON: {e}")
+        formatted = _report_messages(prompt_config, context_data)
+        return llm.complete_json(formatted, model="gpt-4o", temperature=0.7)
+
+    except llm.LLMError as e:
+        logger.error(f"Report generation failed: {e}")
+        return _fallback_report(report_id)
+    except Exception as e:
+        logger.error(f"Report generation error: {e}", exc_info=True)
+        return _fallback_report(report_id)
+
+
+async def agenerate_report(report_id, context_data):
+    """generate_report() for async views"""
+    prompt_config = REPORT_PROMPTS.get(report_id)
+    if not prompt_config:
+        return {"error": f"Unknown report type: {report_id}"}
+
+    try:
+        formatted = _report_messages(prompt_config, context_data)
+        return await llm.acomplete_json(formatted, model="gpt-4o", temperature=0.7)
+
+    except llm.LLMError as e:
+        logger.error(f"Report generation failed: {e}")
         return _fallback_report(report_id)
     except Exception as e:
         logger.error(f"Report generation error: {e}", exc_info=True)
@@ -26,3 +26,9 @@ from .views import ai_generate_text
 urlpatterns += [
     path('ai/generate/', ai_generate_text, name='ai-generate-text'),
 ]
+
+# Async variant for ASGI (core/async_views.py)
+from .views import agenerate_ai_report
+urlpatterns += [
+    path('reports/generate/async/', agenerate_ai_report, name='generate-ai-report-async'),
+]
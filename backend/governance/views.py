@@ -115,13 +115,62 @@ def generate_ai_report(request):
     return Response(report)
 
 
+from django.http import JsonResponse
+from core.async_views import async_api_view
+
+@async_api_view(['POST'])
+async def agenerate_ai_report(request):
+    """generate_ai_report() for ASGI: async ORM counts, awaited model call."""
+    from .ai_reports import agenerate_report
+    from .models import Portfolio, GovernanceBoard, GovernanceStakeholder
+    from django.contrib.auth import get_user_model
+    from programs.models import Program
+    from projects.models import Project
+
+    User = get_user_model()
+    report_id = request.data.get('report_id')
+
+    if not report_id:
+        return JsonResponse({"error": "report_id is required"}, status=http_status.HTTP_400_BAD_REQUEST)
+
+    user = request.user
+    company = getattr(user, 'company', None)
+
+    if company:
+        portfolio_names = ", ".join([p.name async for p in Portfolio.objects.filter(company=company)])
+        projects = Project.objects.filter(company=company)
+        counts = {
+            "project_count": await projects.acount(),
+            "active_projects": await projects.filter(status='active').acount(),
+            "program_count": await Program.objects.filter(company=company).acount(),
+            "board_count": await GovernanceBoard.objects.filter(portfolio__company=company).acount(),
+            "stakeholder_count": await GovernanceStakeholder.objects.filter(portfolio__company=company).acount(),
+            "team_count": await User.objects.filter(company=company).acount(),
+        }
+    else:
+        portfolio_names = ""
+        counts = dict.fromkeys(
+            ["project_count", "active_projects", "program_count", "board_count", "stakeholder_count", "team_count"], 0
+        )
+
+    context = {
+        "portfolios": portfolio_names or "No portfolios",
+        **counts,
+        "company_name": company.name if company else "Unknown",
+        "user_name": user.get_full_name() or user.email,
+        "user_role": user.role,
+    }
+
+    return JsonResponse(await agenerate_report(report_id, context))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def ai_generate_text(request):
     """Simple AI text generation endpoint."""
     import logging
-    from langchain_openai import ChatOpenAI
     from django.conf import settings
+    from core import llm
 
     logger = logging.getLogger(__name__)
 
@@ -138,12 +187,7 @@ def ai_generate_text(request):
         )
 
     try:
-        llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-4o",
-            openai_api_key=api_key,
-        )
-        response = llm.invoke(prompt)
+        response = llm.complete(prompt, model="gpt-4o", temperature=0.7)
         return Response({"response": response.content.strip()})
     except Exception as e:
         logger.error(f"AI generate failed: {type(e).__name__}: {e}")
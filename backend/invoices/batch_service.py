@@ -0,0 +1,339 @@
+"""
+Invoice batch runs.
+
+A run creates every invoice for a billing period in one transaction
+(bulk inserts, one locked read of the invoice number sequence), then hands
+PDF rendering and email delivery to the background:
+
+- PDFs render in a process pool. Workers receive pickled invoices with
+  their items prefetched plus the invoice settings, so they never touch
+  the database, and reuse their compiled invoice template across tasks.
+  They start from a fork server rather than a fork of this (threaded)
+  process, so they inherit no held locks or open DB connection.
+- Emails are queued as InvoiceDelivery rows and sent over one SMTP
+  connection; failures are retried with exponential backoff.
+
+Reruns for the same period skip subscriptions that already have a
+non-cancelled invoice, and invoices that already have a PDF or a delivery.
+`manage.py process_invoice_batches` resumes interrupted runs and retries
+due deliveries.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings as django_settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.background import run_in_background
+from invoices.models import (
+    CompanyInvoice, InvoiceItem, InvoiceSettings, InvoiceBatchJob, InvoiceDelivery,
+)
+from subscriptions.models import CompanySubscription
+
+
+BILLABLE_STATUSES = ['active', 'trialing']
+MAX_DELIVERY_ATTEMPTS = 5
+DELIVERY_BATCH_SIZE = 200
+
+
+def _customer_email(subscription, settings):
+    company = subscription.company
+    if hasattr(company, 'owner') and company.owner:
+        return company.owner.email
+    return settings.company_email
+
+
+def _money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def start_invoice_batch(user=None, **params):
+    """
+    Create the batch and its invoices, then schedule PDF rendering and
+    delivery. Raises ValueError when invoice settings are missing.
+    """
+    with transaction.atomic():
+        job = InvoiceBatchJob.objects.create(created_by=user, **params)
+        create_batch_invoices(job)
+        run_in_background(process_invoice_batch, job.id)
+    # Eager mode has already processed the batch on another instance
+    job.refresh_from_db()
+    return job
+
+
+def create_batch_invoices(job):
+    """Bulk-create the invoices and line items for a batch"""
+    if not InvoiceSettings.objects.exists():
+        raise ValueError("Invoice settings not configured")
+
+    subscriptions = CompanySubscription.objects.filter(
+        status__in=BILLABLE_STATUSES,
+        billing_cycle=job.billing_period,
+    ).select_related('company', 'plan').order_by('id')
+    if job.company_ids:
+        subscriptions = subscriptions.filter(company_id__in=job.company_ids)
+    subscriptions = list(subscriptions)
+
+    with transaction.atomic():
+        # Locking the settings row serialises concurrent runs: the
+        # already-invoiced check and the number block below cannot interleave.
+        settings = InvoiceSettings.objects.select_for_update().order_by('id').first()
+
+        already_invoiced = set(
+            CompanyInvoice.objects.filter(
+                subscription__in=subscriptions,
+                period_start=job.period_start,
+                period_end=job.period_end,
+            ).exclude(status='cancelled').values_list('subscription_id', flat=True)
+        )
+        pending = [s for s in subscriptions if s.id not in already_invoiced]
+
+        first_number = settings.invoice_number_sequence
+        InvoiceSettings.objects.filter(pk=settings.pk).update(
+            invoice_number_sequence=F('invoice_number_sequence') + len(pending)
+        )
+
+        due_date = job.invoice_date + timedelta(days=settings.payment_terms_days)
+        invoices = []
+        for offset, subscription in enumerate(pending):
+            subtotal = _money(subscription.plan.price)
+            vat_amount = _money(subtotal * settings.default_vat_rate / 100)
+            invoices.append(CompanyInvoice(
+                invoice_number=f"{settings.invoice_prefix}-{first_number + offset:06d}",
+                company=subscription.company,
+                subscription=subscription,
+                batch=job,
+                status='draft',
+                invoice_date=job.invoice_date,
+                due_date=due_date,
+                period_start=job.period_start,
+                period_end=job.period_end,
+                billing_period=job.billing_period,
+                currency=settings.default_currency,
+                subtotal=subtotal,
+                vat_rate=settings.default_vat_rate,
+                vat_amount=vat_amount,
+                total=subtotal + vat_amount,
+                customer_name=subscription.company.name,
+                customer_address=getattr(subscription.company, 'address', ''),
+                customer_vat_number=getattr(subscription.company, 'vat_number', ''),
+                customer_email=_customer_email(subscription, settings),
+                auto_generated=True,
+                generated_by=job.created_by,
+            ))
+        CompanyInvoice.objects.bulk_create(invoices)
+
+        period = f"{job.period_start.strftime('%d %b %Y')} - {job.period_end.strftime('%d %b %Y')}"
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(
+                invoice=invoice,
+                description=f"{subscription.plan.name} - {job.billing_period.title()} Subscription",
+                details=f"Billing period: {period}",
+                quantity=1,
+                unit_price=invoice.subtotal,
+                total=invoice.subtotal,
+                subscription_plan=subscription.plan,
+                order=1,
+            )
+            for invoice, subscription in zip(invoices, pending)
+        ])
+
+        job.subscriptions_total = len(subscriptions)
+        job.created_count = len(invoices)
+        job.skipped_count = len(already_invoiced)
+        job.save(update_fields=['subscriptions_total', 'created_count', 'skipped_count', 'updated_at'])
+
+    return invoices
+
+
+def process_invoice_batch(job_id):
+    """Render missing PDFs and, for auto-send runs, queue and deliver emails"""
+    job = InvoiceBatchJob.objects.get(pk=job_id)
+    job.status = 'running'
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    try:
+        invoices = job.invoices.filter(
+            Q(pdf_file='') | Q(pdf_file__isnull=True)
+        ).prefetch_related('items')
+        rendered, errors = render_invoice_pdfs(invoices)
+
+        InvoiceBatchJob.objects.filter(pk=job.pk).update(
+            pdfs_rendered=F('pdfs_rendered') + rendered
+        )
+        job.refresh_from_db()
+        job.errors.extend(errors)
+
+        if job.auto_send:
+            job.emails_queued += queue_invoice_deliveries(job)
+            job.save(update_fields=['emails_queued', 'updated_at'])
+            deliver_due_invoices(batch=job)
+
+        job.status = 'completed'
+    except Exception as e:
+        job.errors.append({'error': str(e)})
+        job.status = 'failed'
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'errors', 'finished_at', 'updated_at'])
+    return job
+
+
+def _init_worker():
+    """Fork-server workers start without Django; set it up before unpickling models"""
+    import django
+    django.setup()
+
+
+def _render_pdf(invoice, invoice_settings):
+    """Process pool worker: render one invoice without database access"""
+    from invoices.utils import InvoicePDFGenerator
+    generator = InvoicePDFGenerator(invoice, invoice_settings)
+    return invoice.id, generator.generate(), generator.content_hash()
+
+
+def render_invoice_pdfs(invoices):
+    """
+    Render PDFs for invoices (items should be prefetched) and attach them.
+    Returns (rendered_count, errors).
+    """
+    invoices = {invoice.id: invoice for invoice in invoices}
+    if not invoices:
+        return 0, []
+
+    invoice_settings = InvoiceSettings.objects.first()
+    processes = getattr(django_settings, 'INVOICE_PDF_PROCESSES', os.cpu_count() or 1)
+
+    results, errors = {}, []
+    if processes <= 1 or len(invoices) == 1:
+        for invoice in invoices.values():
+            try:
+                results[invoice.id] = _render_pdf(invoice, invoice_settings)[1:]
+            except Exception as e:
+                errors.append({'invoice': invoice.invoice_number, 'error': str(e)})
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(processes, len(invoices)),
+            mp_context=multiprocessing.get_context('forkserver'),
+            initializer=_init_worker,
+        ) as pool:
+            futures = {
+                pool.submit(_render_pdf, invoice, invoice_settings): invoice
+                for invoice in invoices.values()
+            }
+            for future in as_completed(futures):
+                try:
+                    invoice_id, content, content_hash = future.result()
+                    results[invoice_id] = (content, content_hash)
+                except Exception as e:
+                    errors.append({'invoice': futures[future].invoice_number, 'error': str(e)})
+
+    rendered = []
+    if results:
+        from invoices.utils import attach_invoice_pdf
+        for invoice_id, (content, content_hash) in results.items():
+            invoice = invoices[invoice_id]
+            attach_invoice_pdf(invoice, content, content_hash)
+            rendered.append(invoice)
+        CompanyInvoice.objects.bulk_update(rendered, ['pdf_file', 'pdf_hash'])
+
+    return len(rendered), errors
+
+
+def queue_invoice_deliveries(job):
+    """Queue one delivery per draft invoice in the batch that has none yet"""
+    invoices = job.invoices.filter(status='draft').exclude(
+        deliveries__status__in=['queued', 'sent']
+    )
+    now = timezone.now()
+    deliveries = InvoiceDelivery.objects.bulk_create([
+        InvoiceDelivery(invoice=invoice, batch=job, email=invoice.customer_email, next_attempt_at=now)
+        for invoice in invoices
+    ])
+    return len(deliveries)
+
+
+def build_invoice_email(invoice, email=None, subject=None, message=None,
+                        send_copy_to=None, connection=None):
+    """Invoice email with the PDF attached when one exists"""
+    email_msg = EmailMessage(
+        subject=subject or f"Invoice {invoice.invoice_number} from Inclufy",
+        body=render_to_string('invoices/email/invoice_email.html', {
+            'invoice': invoice,
+            'custom_message': message,
+        }),
+        from_email=django_settings.DEFAULT_FROM_EMAIL,
+        to=[email or invoice.customer_email],
+        cc=send_copy_to or [],
+        connection=connection,
+    )
+    email_msg.content_subtype = 'html'
+
+    if invoice.pdf_file:
+        email_msg.attach_file(invoice.pdf_file.path)
+
+    return email_msg
+
+
+def deliver_due_invoices(batch=None, limit=DELIVERY_BATCH_SIZE):
+    """
+    Send queued deliveries whose retry time has come over a single mail
+    connection. Returns counts of sent, retried and failed deliveries.
+    """
+    now = timezone.now()
+    deliveries = InvoiceDelivery.objects.filter(
+        status='queued', next_attempt_at__lte=now
+    ).select_related('invoice').order_by('next_attempt_at')
+    if batch is not None:
+        deliveries = deliveries.filter(batch=batch)
+    deliveries = list(deliveries[:limit])
+
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not deliveries:
+        return counts
+
+    sent_invoices = []
+    connection = get_connection()
+    try:
+        for delivery in deliveries:
+            delivery.attempts += 1
+            try:
+                # No-op once the connection is up; retried if the server was unreachable
+                connection.open()
+                build_invoice_email(delivery.invoice, delivery.email, connection=connection).send()
+            except Exception as e:
+                delivery.last_error = str(e)
+                if delivery.attempts >= MAX_DELIVERY_ATTEMPTS:
+                    delivery.status = 'failed'
+                    counts['failed'] += 1
+                else:
+                    delivery.next_attempt_at = now + timedelta(minutes=2 ** delivery.attempts)
+                    counts['retried'] += 1
+                continue
+
+            delivery.status = 'sent'
+            delivery.sent_at = now
+            delivery.last_error = ''
+            invoice = delivery.invoice
+            invoice.status = 'sent'
+            invoice.sent_date = now
+            invoice.sent_to = delivery.email
+            invoice.updated_at = now
+            sent_invoices.append(invoice)
+            counts['sent'] += 1
+    finally:
+        connection.close()
+
+    InvoiceDelivery.objects.bulk_update(
+        deliveries, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    CompanyInvoice.objects.bulk_update(sent_invoices, ['status', 'sent_date', 'sent_to', 'updated_at'])
+    return counts
@@ -0,0 +1,56 @@
+"""
+Management command to measure per-invoice PDF render time.
+Usage: python manage.py benchmark_invoice_pdfs [--count 20] [--rounds 3]
+
+Reports three paths for the most recent invoices:
+  cold    - template compiled for every invoice (the old behaviour)
+  warm    - template compiled once per process
+  stored  - content hash matches the stored PDF, nothing is rendered
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from invoices.models import CompanyInvoice, InvoiceSettings
+from invoices.utils import InvoicePDFGenerator, clear_invoice_templates
+
+
+class Command(BaseCommand):
+    help = "Benchmark invoice PDF rendering"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=20, help="Number of invoices to render")
+        parser.add_argument("--rounds", type=int, default=3, help="Renders per invoice and path")
+
+    def handle(self, *args, **options):
+        invoices = list(
+            CompanyInvoice.objects.prefetch_related("items").order_by("-id")[: options["count"]]
+        )
+        if not invoices:
+            self.stdout.write(self.style.WARNING("No invoices to benchmark"))
+            return
+
+        settings = InvoiceSettings.objects.first()
+        rounds = options["rounds"]
+
+        def cold(invoice):
+            clear_invoice_templates()
+            InvoicePDFGenerator(invoice, settings).generate()
+
+        def warm(invoice):
+            InvoicePDFGenerator(invoice, settings).generate()
+
+        def stored(invoice):
+            InvoicePDFGenerator(invoice, settings).has_current_pdf()
+
+        self.stdout.write(f"{len(invoices)} invoices, {rounds} rounds")
+        for name, render in (("cold", cold), ("warm", warm), ("stored", stored)):
+            warm(invoices[0])
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for invoice in invoices:
+                    render(invoice)
+            per_invoice = (time.perf_counter() - start) * 1000 / (rounds * len(invoices))
+            self.stdout.write(f"  {name:<7} {per_invoice:8.2f} ms/invoice")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete"))
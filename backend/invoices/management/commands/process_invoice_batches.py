@@ -0,0 +1,50 @@
+"""
+Management command to resume invoice batch runs and retry due email deliveries.
+Usage: python manage.py process_invoice_batches [--batch-id <id>]
+"""
+
+from django.core.management.base import BaseCommand
+from invoices.models import InvoiceBatchJob
+from invoices.batch_service import process_invoice_batch, deliver_due_invoices
+
+
+class Command(BaseCommand):
+    help = "Finish interrupted invoice batches and send queued invoice emails"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-id",
+            type=int,
+            help="Resume a specific batch (also re-runs completed batches)",
+        )
+
+    def handle(self, *args, **options):
+        batch_id = options.get("batch_id")
+
+        if batch_id:
+            batch_ids = [batch_id]
+        else:
+            batch_ids = list(
+                InvoiceBatchJob.objects.filter(
+                    status__in=["pending", "running"]
+                ).values_list("id", flat=True)
+            )
+
+        for job_id in batch_ids:
+            job = process_invoice_batch(job_id)
+            self.stdout.write(
+                f"Batch {job.id}: {job.status}, {job.pdfs_rendered} PDFs, "
+                f"{job.emails_queued} emails queued"
+            )
+
+        # Failed sends are rescheduled into the future, so this drains only what is due
+        while True:
+            counts = deliver_due_invoices()
+            if not any(counts.values()):
+                break
+            self.stdout.write(
+                f"Deliveries: {counts['sent']} sent, {counts['retried']} retrying, "
+                f"{counts['failed']} failed"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Invoice batches processed"))
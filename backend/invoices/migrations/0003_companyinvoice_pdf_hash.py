@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0002_invoicebatchjob_invoicedelivery_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyinvoice',
+            name='pdf_hash',
+            field=models.CharField(blank=True, help_text='Content hash of the stored PDF', max_length=64),
+        ),
+    ]
@@ -123,6 +123,7 @@ class CompanyInvoice(models.Model):
     
     # PDF & Sending
     pdf_file = models.FileField(upload_to='invoices/pdfs/', null=True, blank=True)
+    pdf_hash = models.CharField(max_length=64, blank=True, help_text="Content hash of the stored PDF")
     sent_date = models.DateTimeField(null=True, blank=True)
     sent_to = models.EmailField(blank=True)
     
@@ -137,6 +138,13 @@ class CompanyInvoice(models.Model):
     
     # Auto-generation
     auto_generated = models.BooleanField(default=False)
+    batch = models.ForeignKey(
+        'InvoiceBatchJob',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoices'
+    )
     generated_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -153,6 +161,7 @@ class CompanyInvoice(models.Model):
         indexes = [
             models.Index(fields=['status', 'due_date']),
             models.Index(fields=['company', 'invoice_date']),
+            models.Index(fields=['subscription', 'period_start', 'period_end']),
         ]
     
     def __str__(self):
@@ -294,3 +303,93 @@ class InvoiceReminder(models.Model):
     
     def __str__(self):
         return f"{self.reminder_type} - {self.invoice.invoice_number}"
+
+
+class InvoiceBatchJob(models.Model):
+    """
+    One invoice run for a billing period. Invoices are created in the request;
+    PDF rendering and email delivery continue in the background and report
+    progress here.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    billing_period = models.CharField(max_length=20, choices=CompanyInvoice.PERIOD_CHOICES, default='monthly')
+    invoice_date = models.DateField()
+    period_start = models.DateField()
+    period_end = models.DateField()
+    company_ids = models.JSONField(default=list, blank=True)
+    auto_send = models.BooleanField(default=False)
+
+    # Progress
+    subscriptions_total = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    pdfs_rendered = models.PositiveIntegerField(default=0)
+    emails_queued = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoice_batches'
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Invoice batch {self.id} ({self.billing_period} {self.period_start} - {self.period_end})"
+
+
+class InvoiceDelivery(models.Model):
+    """
+    Queued email delivery for an invoice, retried with backoff
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    invoice = models.ForeignKey(
+        CompanyInvoice,
+        on_delete=models.CASCADE,
+        related_name='deliveries'
+    )
+    batch = models.ForeignKey(
+        InvoiceBatchJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deliveries'
+    )
+    email = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.invoice.invoice_number} -> {self.email} ({self.status})"
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from invoices.models import CompanyInvoice, InvoiceItem, InvoiceSettings, InvoiceReminder
+from django.db.models import Count
+from invoices.models import (
+    CompanyInvoice, InvoiceItem, InvoiceSettings, InvoiceReminder, InvoiceBatchJob,
+)
 from accounts.models import Company
 from subscriptions.models import CompanySubscription
 
@@ -191,6 +194,33 @@ class GenerateInvoiceSerializer(serializers.Serializer):
         return data
 
 
+class InvoiceBatchJobSerializer(serializers.ModelSerializer):
+    """Progress of an invoice batch run"""
+    
+    invoice_ids = serializers.SerializerMethodField()
+    deliveries = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = InvoiceBatchJob
+        fields = [
+            'id', 'status', 'billing_period', 'invoice_date', 'period_start',
+            'period_end', 'company_ids', 'auto_send', 'subscriptions_total',
+            'created_count', 'skipped_count', 'pdfs_rendered', 'emails_queued',
+            'deliveries', 'invoice_ids', 'errors', 'started_at', 'finished_at',
+            'created_at'
+        ]
+    
+    def get_invoice_ids(self, obj):
+        return list(obj.invoices.order_by('id').values_list('id', flat=True))
+    
+    def get_deliveries(self, obj):
+        """Delivery counts by status"""
+        counts = {'queued': 0, 'sent': 0, 'failed': 0}
+        for row in obj.deliveries.order_by().values('status').annotate(total=Count('id')):
+            counts[row['status']] = row['total']
+        return counts
+
+
 class SendInvoiceSerializer(serializers.Serializer):
     """Serializer for sending invoice via email"""
     
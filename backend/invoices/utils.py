@@ -6,7 +6,181 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_RIGHT, TA_CENTER
 from io import BytesIO
 from django.core.files.base import ContentFile
-import os
+import hashlib
+import json
+
+
+# Bump when the layout changes so stored PDFs are re-rendered
+TEMPLATE_VERSION = 1
+
+_UNSET = object()
+
+# Compiled templates for this process, keyed by settings version
+_templates = {}
+
+
+class InvoiceTemplate:
+    """
+    Static parts of the invoice layout: styles, table styles, logo and the
+    company/bank/footer text. Built once per process for each version of
+    InvoiceSettings and shared by every generator.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.styles = getSampleStyleSheet()
+        normal = self.styles['Normal']
+
+        self.header_style = ParagraphStyle(
+            'HeaderStyle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#6366f1'),
+            alignment=TA_RIGHT
+        )
+        self.detail_style = ParagraphStyle('DetailStyle', parent=normal, fontSize=10)
+        self.addr_style = ParagraphStyle('AddressStyle', parent=normal, fontSize=9)
+        self.right_style = ParagraphStyle('RightStyle', parent=normal, fontSize=10, alignment=TA_RIGHT)
+        self.footer_style = ParagraphStyle('FooterStyle', parent=normal, fontSize=9)
+        self.thank_you_style = ParagraphStyle(
+            'ThankYouStyle',
+            parent=normal,
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#6366f1'),
+        )
+
+        self.header_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ])
+        self.details_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('PADDING', (0, 0), (-1, -1), 5),
+        ])
+        self.address_table_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('PADDING', (0, 0), (-1, -1), 5),
+        ])
+        self.items_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6366f1')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('PADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.totals_table_style = TableStyle([
+            ('BACKGROUND', (1, 2), (-1, 2), colors.HexColor('#6366f1')),
+            ('TEXTCOLOR', (1, 2), (-1, 2), colors.whitesmoke),
+            ('FONTSIZE', (1, 2), (-1, 2), 12),
+            ('PADDING', (0, 0), (-1, -1), 8),
+            ('LINEABOVE', (1, 2), (-1, 2), 2, colors.HexColor('#6366f1')),
+        ])
+
+        self.logo_data = self._load_logo()
+        self.company_address = self._company_address()
+        self.bank_details = self._bank_details()
+        self.footer_note = settings.footer_note if settings and settings.footer_note else ''
+
+    def _load_logo(self):
+        """Read the logo once; each document wraps the bytes in its own Image"""
+        if not (self.settings and self.settings.logo):
+            return None
+        try:
+            with open(self.settings.logo.path, 'rb') as logo_file:
+                return logo_file.read()
+        except:
+            return None
+
+    def _company_address(self):
+        address = f"<b>From:</b><br/>"
+        if self.settings:
+            address += f"{self.settings.company_name}<br/>"
+            address += self.settings.company_address.replace('\n', '<br/>')
+            if self.settings.company_vat_number:
+                address += f"<br/>VAT: {self.settings.company_vat_number}"
+        return address
+
+    def _bank_details(self):
+        if not (self.settings and self.settings.bank_name):
+            return ''
+        details = f"<br/><br/><b>Bank Details:</b><br/>"
+        details += f"Bank: {self.settings.bank_name}<br/>"
+        if self.settings.bank_account:
+            details += f"Account: {self.settings.bank_account}<br/>"
+        if self.settings.bank_swift:
+            details += f"SWIFT: {self.settings.bank_swift}"
+        return details
+
+    def logo(self):
+        if not self.logo_data:
+            return None
+        try:
+            logo = Image(BytesIO(self.logo_data), width=40*mm, height=15*mm)
+            logo.hAlign = 'LEFT'
+            return logo
+        except:
+            return None
+
+
+def settings_version(settings):
+    """Identifies one revision of the invoice settings"""
+    if not settings:
+        return None
+    return [settings.pk, settings.updated_at.isoformat() if settings.updated_at else None]
+
+
+def get_invoice_template(settings):
+    """Compiled template for these settings, built on first use in this process"""
+    key = json.dumps(settings_version(settings))
+    template = _templates.get(key)
+    if template is None:
+        # Only the current settings revision is worth keeping
+        _templates.clear()
+        template = _templates[key] = InvoiceTemplate(settings)
+    return template
+
+
+def clear_invoice_templates():
+    _templates.clear()
+
+
+def invoice_content_hash(invoice, settings=None):
+    """
+    Hash of everything that ends up on the PDF. A stored PDF with the same
+    hash is identical to what a fresh render would produce.
+    """
+    payload = {
+        'template': TEMPLATE_VERSION,
+        'settings': settings_version(settings),
+        'invoice': [
+            invoice.invoice_number, invoice.invoice_date, invoice.due_date,
+            invoice.period_start, invoice.period_end, invoice.currency,
+            invoice.subtotal, invoice.vat_rate, invoice.vat_amount, invoice.total,
+            invoice.customer_name, invoice.customer_address,
+            invoice.customer_vat_number, invoice.customer_email, invoice.notes,
+        ],
+        'items': [
+            [item.description, item.details, item.quantity, item.unit_price, item.total]
+            for item in invoice.items.all()
+        ],
+    }
+    encoded = json.dumps(payload, default=str, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def attach_invoice_pdf(invoice, content, content_hash):
+    """Store rendered content under a hash-keyed name; the caller saves the invoice"""
+    invoice.pdf_file.save(
+        f"invoice_{invoice.invoice_number}_{content_hash[:16]}.pdf",
+        ContentFile(content),
+        save=False
+    )
+    invoice.pdf_hash = content_hash
 
 
 class InvoicePDFGenerator:
@@ -14,11 +188,13 @@ class InvoicePDFGenerator:
     Professional PDF invoice generator with multi-currency and VAT support
     """
     
-    def __init__(self, invoice):
+    def __init__(self, invoice, settings=_UNSET):
         self.invoice = invoice
+        self.settings = settings
         self.buffer = BytesIO()
         self.width, self.height = A4
-        self.styles = getSampleStyleSheet()
+        self.template = get_invoice_template(self.get_settings())
+        self.styles = self.template.styles
         
         # Currency symbols
         self.currency_symbols = {
@@ -26,6 +202,16 @@ class InvoicePDFGenerator:
             'USD': '$',
             'GBP': '£',
         }
+
+    def get_settings(self):
+        """Invoice settings, loaded once per generator unless passed in"""
+        if self.settings is _UNSET:
+            from invoices.models import InvoiceSettings
+            try:
+                self.settings = InvoiceSettings.objects.first()
+            except:
+                self.settings = None
+        return self.settings
     
     def get_currency_symbol(self):
         """Get currency symbol for invoice"""
@@ -35,6 +221,9 @@ class InvoicePDFGenerator:
         """Format money with currency symbol"""
         symbol = self.get_currency_symbol()
         return f"{symbol}{amount:,.2f}"
+
+    def content_hash(self):
+        return invoice_content_hash(self.invoice, self.get_settings())
     
     def generate(self):
         """Generate PDF and return file content"""
@@ -85,60 +274,19 @@ class InvoicePDFGenerator:
     
     def _create_header(self):
         """Create invoice header with logo"""
-        elements = []
+        invoice_header = Paragraph(f"<b>INVOICE</b>", self.template.header_style)
         
-        # Get invoice settings
-        from invoices.models import InvoiceSettings
-        try:
-            settings = InvoiceSettings.objects.first()
-        except:
-            settings = None
-        
-        # Logo and company info table
-        data = []
-        
-        if settings and settings.logo:
-            try:
-                logo = Image(settings.logo.path, width=40*mm, height=15*mm)
-                logo.hAlign = 'LEFT'
-                data.append([logo, ''])
-            except:
-                pass
-        
-        # Header table
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#6366f1'),
-            alignment=TA_RIGHT
-        )
-        
-        invoice_header = Paragraph(f"<b>INVOICE</b>", header_style)
-        
-        if not data:
-            data.append(['', invoice_header])
-        else:
-            data[0][1] = invoice_header
+        logo = self.template.logo()
+        data = [[logo, invoice_header]] if logo else [['', invoice_header]]
         
         table = Table(data, colWidths=[90*mm, 80*mm])
-        table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
-        
-        elements.append(table)
+        table.setStyle(self.template.header_table_style)
         
-        return elements
+        return [table]
     
     def _create_invoice_details(self):
         """Create invoice number and dates"""
-        elements = []
-        
-        detail_style = ParagraphStyle(
-            'DetailStyle',
-            parent=self.styles['Normal'],
-            fontSize=10,
-        )
+        detail_style = self.template.detail_style
         
         # Invoice details
         details_data = [
@@ -161,40 +309,13 @@ class InvoicePDFGenerator:
         ]
         
         table = Table(details_data, colWidths=[50*mm, 50*mm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('PADDING', (0, 0), (-1, -1), 5),
-        ]))
-        
-        elements.append(table)
+        table.setStyle(self.template.details_table_style)
         
-        return elements
+        return [table]
     
     def _create_addresses(self):
         """Create company and customer address blocks"""
-        elements = []
-        
-        # Get invoice settings
-        from invoices.models import InvoiceSettings
-        try:
-            settings = InvoiceSettings.objects.first()
-        except:
-            settings = None
-        
-        addr_style = ParagraphStyle(
-            'AddressStyle',
-            parent=self.styles['Normal'],
-            fontSize=9,
-        )
-        
-        # Company address
-        company_address = f"<b>From:</b><br/>"
-        if settings:
-            company_address += f"{settings.company_name}<br/>"
-            company_address += settings.company_address.replace('\n', '<br/>')
-            if settings.company_vat_number:
-                company_address += f"<br/>VAT: {settings.company_vat_number}"
+        addr_style = self.template.addr_style
         
         # Customer address
         customer_address = f"<b>Bill To:</b><br/>"
@@ -205,30 +326,25 @@ class InvoicePDFGenerator:
         customer_address += f"<br/><br/><b>Email:</b> {self.invoice.customer_email}"
         
         addr_data = [[
-            Paragraph(company_address, addr_style),
+            Paragraph(self.template.company_address, addr_style),
             Paragraph(customer_address, addr_style)
         ]]
         
         table = Table(addr_data, colWidths=[85*mm, 85*mm])
-        table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('PADDING', (0, 0), (-1, -1), 5),
-        ]))
-        
-        elements.append(table)
+        table.setStyle(self.template.address_table_style)
         
-        return elements
+        return [table]
     
     def _create_items_table(self):
         """Create line items table"""
-        elements = []
+        normal = self.styles['Normal']
         
         # Header
         data = [[
-            Paragraph('<b>Description</b>', self.styles['Normal']),
-            Paragraph('<b>Quantity</b>', self.styles['Normal']),
-            Paragraph('<b>Unit Price</b>', self.styles['Normal']),
-            Paragraph('<b>Total</b>', self.styles['Normal']),
+            Paragraph('<b>Description</b>', normal),
+            Paragraph('<b>Quantity</b>', normal),
+            Paragraph('<b>Unit Price</b>', normal),
+            Paragraph('<b>Total</b>', normal),
         ]]
         
         # Items
@@ -238,39 +354,20 @@ class InvoicePDFGenerator:
                 desc += f"<br/><font size=8>{item.details}</font>"
             
             data.append([
-                Paragraph(desc, self.styles['Normal']),
-                Paragraph(str(item.quantity), self.styles['Normal']),
-                Paragraph(self.format_money(item.unit_price), self.styles['Normal']),
-                Paragraph(self.format_money(item.total), self.styles['Normal']),
+                Paragraph(desc, normal),
+                Paragraph(str(item.quantity), normal),
+                Paragraph(self.format_money(item.unit_price), normal),
+                Paragraph(self.format_money(item.total), normal),
             ])
         
         table = Table(data, colWidths=[90*mm, 25*mm, 30*mm, 25*mm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6366f1')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('PADDING', (0, 0), (-1, -1), 8),
-        ]))
+        table.setStyle(self.template.items_table_style)
         
-        elements.append(table)
-        
-        return elements
+        return [table]
     
     def _create_totals(self):
         """Create totals section"""
-        elements = []
-        
-        right_style = ParagraphStyle(
-            'RightStyle',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_RIGHT
-        )
+        right_style = self.template.right_style
         
         totals_data = [
             [
@@ -291,84 +388,59 @@ class InvoicePDFGenerator:
         ]
         
         table = Table(totals_data, colWidths=[95*mm, 40*mm, 35*mm])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (1, 2), (-1, 2), colors.HexColor('#6366f1')),
-            ('TEXTCOLOR', (1, 2), (-1, 2), colors.whitesmoke),
-            ('FONTSIZE', (1, 2), (-1, 2), 12),
-            ('PADDING', (0, 0), (-1, -1), 8),
-            ('LINEABOVE', (1, 2), (-1, 2), 2, colors.HexColor('#6366f1')),
-        ]))
-        
-        elements.append(table)
+        table.setStyle(self.template.totals_table_style)
         
-        return elements
+        return [table]
     
     def _create_footer(self):
         """Create payment info and footer"""
         elements = []
         
-        # Get invoice settings
-        from invoices.models import InvoiceSettings
-        try:
-            settings = InvoiceSettings.objects.first()
-        except:
-            settings = None
-        
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=self.styles['Normal'],
-            fontSize=9,
-        )
-        
         # Payment terms
         payment_info = f"<b>Payment Terms:</b> Due within {self.invoice.due_date - self.invoice.invoice_date} days"
-        
-        if settings and settings.bank_name:
-            payment_info += f"<br/><br/><b>Bank Details:</b><br/>"
-            payment_info += f"Bank: {settings.bank_name}<br/>"
-            if settings.bank_account:
-                payment_info += f"Account: {settings.bank_account}<br/>"
-            if settings.bank_swift:
-                payment_info += f"SWIFT: {settings.bank_swift}"
+        payment_info += self.template.bank_details
         
         if self.invoice.notes:
             payment_info += f"<br/><br/><b>Notes:</b><br/>{self.invoice.notes}"
         
-        if settings and settings.footer_note:
-            payment_info += f"<br/><br/>{settings.footer_note}"
+        if self.template.footer_note:
+            payment_info += f"<br/><br/>{self.template.footer_note}"
         
-        elements.append(Paragraph(payment_info, footer_style))
+        elements.append(Paragraph(payment_info, self.template.footer_style))
         
         # Thank you message
-        thank_you_style = ParagraphStyle(
-            'ThankYouStyle',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            textColor=colors.HexColor('#6366f1'),
-        )
-        
         elements.append(Spacer(1, 15*mm))
-        elements.append(Paragraph("<b>Thank you for your business!</b>", thank_you_style))
+        elements.append(Paragraph("<b>Thank you for your business!</b>", self.template.thank_you_style))
         
         return elements
     
-    def save_to_invoice(self):
-        """Generate PDF and save to invoice model"""
-        pdf_content = self.generate()
-        
-        # Save PDF to invoice
-        filename = f"invoice_{self.invoice.invoice_number}.pdf"
-        self.invoice.pdf_file.save(
-            filename,
-            ContentFile(pdf_content),
-            save=True
-        )
+    def has_current_pdf(self, content_hash=None):
+        """True when the stored PDF matches the invoice as it is now"""
+        pdf_file = self.invoice.pdf_file
+        if not pdf_file or self.invoice.pdf_hash != (content_hash or self.content_hash()):
+            return False
+        return pdf_file.storage.exists(pdf_file.name)
+        
+    def save_to_invoice(self, force=False):
+        """
+        Store the PDF on the invoice, rendering only when the invoice content
+        changed since the last render (or when forced)
+        """
+        content_hash = self.content_hash()
+        if not force and self.has_current_pdf(content_hash):
+            return self.invoice.pdf_file.url
+
+        previous = self.invoice.pdf_file.name if self.invoice.pdf_file else None
+        attach_invoice_pdf(self.invoice, self.generate(), content_hash)
+        self.invoice.save(update_fields=['pdf_file', 'pdf_hash', 'updated_at'])
+
+        if previous and previous != self.invoice.pdf_file.name:
+            self.invoice.pdf_file.storage.delete(previous)
         
         return self.invoice.pdf_file.url
 
 
-def generate_invoice_pdf(invoice):
+def generate_invoice_pdf(invoice, force=False):
     """
     Helper function to generate PDF for an invoice
     
@@ -377,4 +449,4 @@ def generate_invoice_pdf(invoice):
         pdf_url = generate_invoice_pdf(invoice)
     """
     generator = InvoicePDFGenerator(invoice)
-    return generator.save_to_invoice()
+    return generator.save_to_invoice(force=force)
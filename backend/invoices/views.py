@@ -4,10 +4,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db.models import Q
-from datetime import datetime, date, timedelta
+from django.http import FileResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from datetime import datetime, date
 from calendar import monthrange
 
-from invoices.models import CompanyInvoice, InvoiceItem, InvoiceSettings, InvoiceReminder
+from invoices.models import CompanyInvoice, InvoiceSettings, InvoiceReminder, InvoiceBatchJob
+from invoices.batch_service import start_invoice_batch, build_invoice_email
 from invoices.serializers import (
     CompanyInvoiceListSerializer,
     CompanyInvoiceDetailSerializer,
@@ -18,9 +22,9 @@ from invoices.serializers import (
     SendInvoiceSerializer,
     MarkPaidSerializer,
     InvoiceItemCreateSerializer,
+    InvoiceBatchJobSerializer,
 )
 from accounts.models import Company
-from subscriptions.models import CompanySubscription
 
 # Helper function to replace dateutil.relativedelta
 def add_months(source_date, months):
@@ -152,47 +156,51 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
                 invoice_date, billing_period
             )
         
-        # Get active subscriptions
-        subscriptions = CompanySubscription.objects.filter(
-            status__in=['active', 'trialing'],
-            billing_cycle=billing_period
-        ).select_related('company', 'plan')
-        
-        if company_ids:
-            subscriptions = subscriptions.filter(company_id__in=company_ids)
-        
-        # Generate invoices
-        generated_invoices = []
-        errors = []
-        
-        for subscription in subscriptions:
-            try:
-                invoice = self._generate_invoice_for_subscription(
-                    subscription=subscription,
-                    invoice_date=invoice_date,
-                    period_start=period_start,
-                    period_end=period_end,
-                    billing_period=billing_period,
-                    user=request.user
-                )
-                generated_invoices.append(invoice)
-                
-                # Auto-send if requested
-                if auto_send and invoice:
-                    self._send_invoice_email(invoice)
-                
-            except Exception as e:
-                errors.append({
-                    'company': subscription.company.name,
-                    'error': str(e)
-                })
+        # Invoices are created here in bulk; PDFs and emails follow in the background
+        try:
+            job = start_invoice_batch(
+                user=request.user,
+                billing_period=billing_period,
+                invoice_date=invoice_date,
+                period_start=period_start,
+                period_end=period_end,
+                company_ids=company_ids or [],
+                auto_send=auto_send,
+            )
+        except ValueError as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        data = InvoiceBatchJobSerializer(job).data
         return Response({
             'success': True,
-            'generated_count': len(generated_invoices),
-            'invoice_ids': [inv.id for inv in generated_invoices],
-            'errors': errors
-        })
+            'batch_id': job.id,
+            'status_url': request.build_absolute_uri(
+                reverse('admin-invoices-batch-status', kwargs={'batch_id': job.id})
+            ),
+            'generated_count': job.created_count,
+            'skipped_count': job.skipped_count,
+            'invoice_ids': data['invoice_ids'],
+            'errors': data['errors'],
+            'batch': data,
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path=r'batches/(?P<batch_id>\d+)', url_name='batch-status')
+    def batch_status(self, request, batch_id=None):
+        """
+        Progress of an invoice batch run
+        GET /api/admin/invoices/batches/{batch_id}/
+        """
+        if not request.user.is_superuser:
+            return Response(
+                {'detail': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        job = get_object_or_404(InvoiceBatchJob, pk=batch_id)
+        return Response(InvoiceBatchJobSerializer(job).data)
     
     @action(detail=True, methods=['post'])
     def send(self, request, pk=None):
@@ -216,10 +224,9 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
         send_copy_to = serializer.validated_data.get('send_copy_to', [])
         
         try:
-            # Generate PDF if not exists
-            if not invoice.pdf_file:
-                from invoices.utils import generate_invoice_pdf
-                generate_invoice_pdf(invoice)
+            # Re-renders only if the invoice changed since the stored PDF
+            from invoices.utils import generate_invoice_pdf
+            generate_invoice_pdf(invoice)
             
             # Send email
             success = self._send_invoice_email(
@@ -278,7 +285,8 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def generate_pdf(self, request, pk=None):
         """
-        Generate PDF for invoice
+        Generate PDF for invoice; unchanged invoices reuse the stored PDF
+        unless {"force": true} is posted
         POST /api/admin/invoices/{id}/generate_pdf/
         """
         if not request.user.is_superuser:
@@ -288,10 +296,11 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
             )
         
         invoice = self.get_object()
+        force = str(request.data.get('force', '')).lower() in ('1', 'true')
         
         try:
             from invoices.utils import generate_invoice_pdf
-            pdf_url = generate_invoice_pdf(invoice)
+            pdf_url = generate_invoice_pdf(invoice, force=force)
             
             return Response({
                 'success': True,
@@ -303,6 +312,36 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
                 'message': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """
+        Download the invoice PDF, streamed from storage while the invoice
+        is unchanged
+        GET /api/admin/invoices/{id}/pdf/
+        """
+        if not request.user.is_superuser:
+            return Response(
+                {'detail': 'Permission denied'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        invoice = self.get_object()
+        
+        from invoices.utils import generate_invoice_pdf
+        generate_invoice_pdf(invoice)
+        
+        etag = f'"{invoice.pdf_hash}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified()
+        
+        response = FileResponse(
+            invoice.pdf_file.open('rb'),
+            content_type='application/pdf',
+            filename=f"invoice_{invoice.invoice_number}.pdf"
+        )
+        response['ETag'] = etag
+        return response
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """
@@ -377,96 +416,14 @@ class CompanyInvoiceViewSet(viewsets.ModelViewSet):
         
         return period_start, period_end
     
-    def _generate_invoice_for_subscription(self, subscription, invoice_date, 
-                                          period_start, period_end, billing_period, user):
-        """Generate invoice for a subscription"""
-        # Get invoice settings
-        settings = InvoiceSettings.objects.first()
-        if not settings:
-            raise Exception("Invoice settings not configured")
-        
-        # Calculate due date
-        due_date = invoice_date + timedelta(days=settings.payment_terms_days)
-        
-        # Create invoice
-        invoice = CompanyInvoice.objects.create(
-            invoice_number=settings.get_next_invoice_number(),
-            company=subscription.company,
-            subscription=subscription,
-            status='draft',
-            invoice_date=invoice_date,
-            due_date=due_date,
-            period_start=period_start,
-            period_end=period_end,
-            billing_period=billing_period,
-            currency=settings.default_currency,
-            vat_rate=settings.default_vat_rate,
-            customer_name=subscription.company.name,
-            customer_address=getattr(subscription.company, 'address', ''),
-            customer_vat_number=getattr(subscription.company, 'vat_number', ''),
-            customer_email=subscription.company.owner.email if hasattr(subscription.company, 'owner') and subscription.company.owner else settings.company_email,
-            auto_generated=True,
-            generated_by=user
-        )
-        
-        # Create invoice item
-        InvoiceItem.objects.create(
-            invoice=invoice,
-            description=f"{subscription.plan.name} - {billing_period.title()} Subscription",
-            details=f"Billing period: {period_start.strftime('%d %b %Y')} - {period_end.strftime('%d %b %Y')}",
-            quantity=1,
-            unit_price=subscription.plan.price,
-            subscription_plan=subscription.plan,
-            order=1
-        )
-        
-        # Calculate totals
-        invoice.calculate_totals()
-        
-        # Generate PDF
-        from invoices.utils import generate_invoice_pdf
-        generate_invoice_pdf(invoice)
-        
-        return invoice
-    
     def _send_invoice_email(self, invoice, email=None, subject=None, 
                            message=None, send_copy_to=None):
         """Send invoice via email"""
-        from django.core.mail import EmailMessage
-        from django.template.loader import render_to_string
-        from django.conf import settings as django_settings
-        
-        if not email:
-            email = invoice.customer_email
-        
-        if not subject:
-            subject = f"Invoice {invoice.invoice_number} from Inclufy"
-        
-        # Render email template
-        context = {
-            'invoice': invoice,
-            'custom_message': message,
-        }
-        
-        html_message = render_to_string('invoices/email/invoice_email.html', context)
-        
-        # Create email
-        email_msg = EmailMessage(
-            subject=subject,
-            body=html_message,
-            from_email=django_settings.DEFAULT_FROM_EMAIL,
-            to=[email],
-            cc=send_copy_to or []
-        )
-        email_msg.content_subtype = 'html'
-        
-        # Attach PDF
-        if invoice.pdf_file:
-            email_msg.attach_file(invoice.pdf_file.path)
+        email_msg = build_invoice_email(invoice, email, subject, message, send_copy_to)
         
         try:
             email_msg.send()
             return True
         except Exception as e:
             print(f"Failed to send email: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,255 @@
+"""
+Newsletter delivery pipeline.
+
+Sending a newsletter queues one NewsletterDelivery row per recipient and
+returns; the actual sending happens in the background:
+
+- Recipients are processed in chunks. Each chunk opens one SMTP connection
+  and sends every message in it through connection.send_messages().
+- Sends are throttled per provider (gmail, microsoft, ...) so one large
+  list does not trip a provider's rate limit.
+- Every recipient has its own status. Failed sends are retried with backoff,
+  so a bad address no longer fails the whole newsletter, and an interrupted
+  run resumes from the rows still queued (`manage.py send_newsletters`).
+- A run claims each chunk before sending it, so the background run, the
+  cron command and a repeated send never email the same recipient twice.
+  A claim is a lease on next_attempt_at; rows claimed by a run that died
+  become due again once the lease expires.
+"""
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from core.background import run_in_background
+from .models import Newsletter, NewsletterDelivery
+
+
+CHUNK_SIZE = getattr(settings, "NEWSLETTER_CHUNK_SIZE", 50)
+QUEUE_BATCH_SIZE = 1000
+MAX_ATTEMPTS = 5
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+# Messages per minute; providers not listed fall back to "default"
+DEFAULT_RATE_LIMITS = {
+    "google": 60,
+    "microsoft": 30,
+    "yahoo": 30,
+    "default": 120,
+}
+
+PROVIDER_DOMAINS = {
+    "gmail.com": "google",
+    "googlemail.com": "google",
+    "outlook.com": "microsoft",
+    "hotmail.com": "microsoft",
+    "live.com": "microsoft",
+    "msn.com": "microsoft",
+    "yahoo.com": "yahoo",
+    "ymail.com": "yahoo",
+}
+
+
+def email_provider(email):
+    domain = email.rsplit("@", 1)[-1].lower()
+    return PROVIDER_DOMAINS.get(domain, domain)
+
+
+class ProviderThrottle:
+    """Spaces out sends per provider to stay under a messages-per-minute rate"""
+
+    def __init__(self, rates=None, clock=time.monotonic, sleep=time.sleep):
+        self.rates = rates or getattr(settings, "NEWSLETTER_PROVIDER_RATE_LIMITS", DEFAULT_RATE_LIMITS)
+        self.clock = clock
+        self.sleep = sleep
+        self.next_slot = {}
+
+    def rate(self, provider):
+        return self.rates.get(provider, self.rates.get("default", DEFAULT_RATE_LIMITS["default"]))
+
+    def wait(self, provider):
+        """Block until the next message may go to provider"""
+        interval = 60.0 / self.rate(provider)
+        now = self.clock()
+        start = max(now, self.next_slot.get(provider, now))
+        if start > now:
+            self.sleep(start - now)
+        self.next_slot[provider] = start + interval
+
+
+def build_message(newsletter, email, html_content):
+    """One message per recipient, so no recipient sees the others"""
+    msg = EmailMultiAlternatives(
+        subject=newsletter.subject,
+        body="Please view this email in HTML format.",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+    msg.attach_alternative(html_content, "text/html")
+    return msg
+
+
+def send_test_email(newsletter, email):
+    """Send a one-off test copy; no delivery row, the newsletter status is untouched"""
+    from .views_helpers import generate_html_content
+
+    build_message(newsletter, email, generate_html_content(newsletter)).send()
+
+
+def queue_newsletter(newsletter, emails, user=None):
+    """
+    Create delivery rows for the recipients and start sending in the
+    background. `emails` may be a stream; rows are inserted in batches.
+    """
+    now = timezone.now()
+    # Earlier failures get a fresh set of attempts
+    NewsletterDelivery.objects.filter(newsletter=newsletter, status="failed").update(
+        status="queued", attempts=0, next_attempt_at=now, last_error=""
+    )
+
+    emails = iter(emails)
+    while True:
+        batch = list(islice(emails, QUEUE_BATCH_SIZE))
+        if not batch:
+            break
+        NewsletterDelivery.objects.bulk_create(
+            [
+                NewsletterDelivery(
+                    newsletter=newsletter,
+                    email=email,
+                    provider=email_provider(email),
+                    next_attempt_at=now,
+                )
+                for email in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+    newsletter.status = "sending"
+    newsletter.save(update_fields=["status", "updated_at"])
+
+    run_in_background(deliver_newsletter, newsletter.id, user.id if user else None)
+
+
+def deliver_newsletter(newsletter_id, user_id=None, throttle=None):
+    """Send every due delivery of a newsletter, chunk by chunk"""
+    from .views_helpers import generate_html_content, log_newsletter_activity
+
+    newsletter = Newsletter.objects.select_related("project").get(pk=newsletter_id)
+    html_content = generate_html_content(newsletter)
+    throttle = throttle or ProviderThrottle()
+
+    last_id = 0
+    while True:
+        chunk = _claim_chunk(newsletter, last_id)
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        _send_chunk(newsletter, chunk, html_content, throttle)
+
+    summary = delivery_summary(newsletter)
+    if summary["queued"]:
+        return summary
+
+    newsletter.status = "sent" if summary["sent"] else "failed"
+    newsletter.sent_at = newsletter.sent_at or timezone.now()
+    newsletter.save(update_fields=["status", "sent_at", "updated_at"])
+
+    if newsletter.status == "sent" and user_id:
+        from django.contrib.auth import get_user_model
+        user = get_user_model().objects.filter(pk=user_id).first()
+        log_newsletter_activity(newsletter, user, "sent")
+
+    return summary
+
+
+_CLAIM_SQL = """
+    UPDATE {table} SET next_attempt_at = %s
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE newsletter_id = %s AND status = 'queued' AND next_attempt_at <= %s AND id > %s
+        ORDER BY id LIMIT %s {lock}
+    )
+    RETURNING *
+"""
+
+
+def _claim_chunk(newsletter, last_id):
+    """
+    Claim the next due rows in one statement: lock them, skipping ones another
+    run holds, and push their next_attempt_at past the lease so no other run
+    picks them up meanwhile. Costs the same single query as reading them.
+    """
+    now = timezone.now()
+    ops = connection.ops
+    sql = _CLAIM_SQL.format(
+        table=ops.quote_name(NewsletterDelivery._meta.db_table),
+        lock="FOR UPDATE SKIP LOCKED" if connection.features.has_select_for_update_skip_locked else "",
+    )
+    params = [
+        ops.adapt_datetimefield_value(now + CLAIM_TIMEOUT),
+        newsletter.pk,
+        ops.adapt_datetimefield_value(now),
+        last_id,
+        CHUNK_SIZE,
+    ]
+    return sorted(NewsletterDelivery.objects.raw(sql, params), key=lambda delivery: delivery.id)
+
+
+def _send_chunk(newsletter, chunk, html_content, throttle):
+    """
+    Send one chunk over a single connection. Each recipient goes through
+    send_messages() on its own so a failure is pinned to that recipient
+    without resending the ones before it.
+    """
+    failures = {}
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        failures = {delivery.id: str(e) for delivery in chunk}
+    else:
+        try:
+            for delivery in chunk:
+                throttle.wait(delivery.provider or email_provider(delivery.email))
+                try:
+                    connection.send_messages([build_message(newsletter, delivery.email, html_content)])
+                except Exception as e:
+                    failures[delivery.id] = str(e)
+        finally:
+            connection.close()
+    _record_results(chunk, failures)
+
+
+def _record_results(deliveries, failures):
+    now = timezone.now()
+    for delivery in deliveries:
+        delivery.attempts += 1
+        if delivery.id in failures:
+            delivery.last_error = failures[delivery.id]
+            if delivery.attempts >= MAX_ATTEMPTS:
+                delivery.status = "failed"
+            else:
+                delivery.next_attempt_at = now + timedelta(minutes=2 ** delivery.attempts)
+        else:
+            delivery.status = "sent"
+            delivery.sent_at = now
+            delivery.last_error = ""
+    NewsletterDelivery.objects.bulk_update(
+        deliveries, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"]
+    )
+
+
+def delivery_summary(newsletter):
+    """Delivery counts by status"""
+    summary = {"queued": 0, "sent": 0, "failed": 0}
+    rows = newsletter.deliveries.order_by().values("status").annotate(total=Count("id"))
+    for row in rows:
+        summary[row["status"]] = row["total"]
+    summary["total"] = sum(summary.values())
+    return summary
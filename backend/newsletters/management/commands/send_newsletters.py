@@ -0,0 +1,33 @@
+"""
+Management command to resume newsletter delivery and retry failed recipients.
+Usage: python manage.py send_newsletters [--newsletter-id <id>]
+"""
+
+from django.core.management.base import BaseCommand
+from newsletters.models import Newsletter
+from newsletters.delivery import deliver_newsletter
+
+
+class Command(BaseCommand):
+    help = "Send queued newsletter deliveries whose retry time has come"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--newsletter-id",
+            type=int,
+            help="Only process this newsletter",
+        )
+
+    def handle(self, *args, **options):
+        newsletters = Newsletter.objects.filter(status="sending")
+        if options.get("newsletter_id"):
+            newsletters = newsletters.filter(id=options["newsletter_id"])
+
+        for newsletter_id in newsletters.values_list("id", flat=True):
+            summary = deliver_newsletter(newsletter_id)
+            self.stdout.write(
+                f"Newsletter {newsletter_id}: {summary['sent']} sent, "
+                f"{summary['queued']} queued, {summary['failed']} failed"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Newsletter deliveries processed"))
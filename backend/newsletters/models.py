@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils.functional import cached_property
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -116,6 +117,7 @@ class Newsletter(models.Model):
 
     STATUS_CHOICES = [
         ("draft", "Draft"),
+        ("sending", "Sending"),
         ("sent", "Sent"),
         ("failed", "Failed"),
     ]
@@ -225,236 +227,51 @@ class Newsletter(models.Model):
             return self.custom_recipients.values_list("id", flat=True)
         return []
 
-    def get_recipient_emails(self):
-        """Get the list of recipient emails"""
-        emails = []
-
-        if self.recipient_type == "mailing_list":
-            # Get emails from mailing lists
-            for mailing_list in self.mailing_lists.all():
-                # Get external subscriber emails
-                external_emails = mailing_list.members.filter(
-                    external_subscriber__isnull=False,
-                    external_subscriber__is_subscribed=True
-                ).values_list('external_subscriber__email', flat=True)
-                emails.extend(external_emails)
-                
-                # Get user emails
-                user_emails = mailing_list.members.filter(
-                    user__isnull=False
-                ).values_list('user__email', flat=True)
-                emails.extend(user_emails)
-        elif self.recipient_type == "stakeholders":
-            # Get emails from Execution Stakeholders
-            if self.project:
-                try:
-                    from execution.models import Stakeholder
-                    stakeholder_emails = Stakeholder.objects.filter(
-                        project=self.project,
-                        contact__isnull=False
-                    ).exclude(contact='').values_list('contact', flat=True)
-                    emails.extend(stakeholder_emails)
-                except ImportError:
-                    pass
-        else:
-            # Get emails from regular users
-            recipient_ids = self.get_recipients()
-            user_emails = User.objects.filter(id__in=recipient_ids).values_list(
-                "email", flat=True
-            )
-            emails.extend(user_emails)
-
-        # Get emails from execution stakeholders
-        if self.execution_stakeholder_ids:
-            try:
-                from execution.models import Stakeholder
-
-                stakeholder_emails = Stakeholder.objects.filter(
-                    id__in=self.execution_stakeholder_ids
-                ).values_list("contact", flat=True)
-                emails.extend([email for email in stakeholder_emails if email])
-            except ImportError:
-                pass
+    @cached_property
+    def recipients(self):
+        """Recipient resolver for this newsletter, shared by everything in one send"""
+        from .recipients import RecipientResolver
+        return RecipientResolver(self)
 
-        # Get emails from CRM users
-        if self.crm_users:
-            for crm_user in self.crm_users:
-                if isinstance(crm_user, dict) and crm_user.get("email"):
-                    emails.append(crm_user["email"])
-
-        # Get emails from project recipients
-        if self.project_recipients:
-            from projects.models import Project
-            for project_recipient in self.project_recipients:
-                if isinstance(project_recipient, dict):
-                    project_id = project_recipient.get("project_id")
-                    recipient_type = project_recipient.get("type")  # 'team' or 'stakeholders'
-                    
-                    if project_id and recipient_type:
-                        try:
-                            project = Project.objects.get(id=project_id)
-                            if recipient_type == 'team':
-                                # Get project team members
-                                team_emails = project.team_members.filter(is_active=True).select_related('user').values_list('user__email', flat=True)
-                                emails.extend(team_emails)
-                            elif recipient_type == 'stakeholders':
-                                # Get Execution Stakeholders for this project (from execution.models.Stakeholder)
-                                try:
-                                    from execution.models import Stakeholder
-                                    stakeholder_emails = Stakeholder.objects.filter(
-                                        project=project,
-                                        contact__isnull=False
-                                    ).exclude(contact='').values_list('contact', flat=True)
-                                    emails.extend(stakeholder_emails)
-                                except ImportError:
-                                    pass
-                        except Project.DoesNotExist:
-                            pass
-
-        return list(set(emails))  # Remove duplicates
+    def get_recipient_emails(self):
+        """Get the list of recipient emails (use recipients.emails() to stream)"""
+        return list(self.recipients.emails())
 
     def get_recipient_details(self):
         """Get detailed recipient information"""
-        result = []
-
-        if self.recipient_type == "mailing_list":
-            # Get details from mailing lists
-            for mailing_list in self.mailing_lists.all():
-                # Get external subscribers
-                external_members = mailing_list.members.filter(
-                    external_subscriber__isnull=False,
-                    external_subscriber__is_subscribed=True
-                ).select_related('external_subscriber')
-                
-                for member in external_members:
-                    subscriber = member.external_subscriber
-                    name = f"{subscriber.first_name} {subscriber.last_name}".strip()
-                    result.append({
-                        "id": f"external_{subscriber.id}",
-                        "name": name or subscriber.email,
-                        "email": subscriber.email,
-                        "role": "External Subscriber",
-                    })
-                
-                # Get users
-                user_members = mailing_list.members.filter(
-                    user__isnull=False
-                ).select_related('user')
-                
-                for member in user_members:
-                    user = member.user
-                    name = user.get_full_name() or user.email
-                    result.append({
-                        "id": user.id,
-                        "name": name,
-                        "email": user.email,
-                        "role": user.role,
-                    })
-        elif self.recipient_type == "stakeholders":
-            # Get Execution Stakeholders for this project
-            if self.project:
-                try:
-                    from execution.models import Stakeholder
-                    stakeholders = Stakeholder.objects.filter(
-                        project=self.project,
-                        contact__isnull=False
-                    ).exclude(contact='')
-                    
-                    for stakeholder in stakeholders:
-                        result.append({
-                            "id": f"stakeholder_{stakeholder.id}",
-                            "name": stakeholder.name,
-                            "email": stakeholder.contact,
-                            "role": stakeholder.role or stakeholder.governance_type or "Stakeholder",
-                        })
-                except ImportError:
-                    pass
-        else:
-            # Get regular users
-            recipient_ids = self.get_recipients()
-            recipients = User.objects.filter(id__in=recipient_ids).values(
-                "id", "email", "first_name", "last_name", "role"
-            )
-
-            for recipient in recipients:
-                name = recipient.get("first_name") or recipient.get("email", "")
-                if recipient.get("last_name"):
-                    name = f"{recipient.get('first_name', '')} {recipient.get('last_name', '')}".strip()
+        return list(self.recipients.details())
 
-                result.append(
-                    {
-                        "id": recipient["id"],
-                        "name": name,
-                        "email": recipient["email"],
-                        "role": recipient["role"],
-                    }
-                )
 
-        # Get execution stakeholders
-        if self.execution_stakeholder_ids:
-            try:
-                from execution.models import Stakeholder
+class NewsletterDelivery(models.Model):
+    """Delivery of a newsletter to one recipient, retried until sent or given up"""
 
-                stakeholders = Stakeholder.objects.filter(
-                    id__in=self.execution_stakeholder_ids
-                ).values("id", "name", "contact", "role", "governance_type")
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
 
-                for stakeholder in stakeholders:
-                    if stakeholder["contact"]:  # Only include stakeholders with email
-                        result.append(
-                            {
-                                "id": f"stakeholder_{stakeholder['id']}",
-                                "name": stakeholder["name"],
-                                "email": stakeholder["contact"],
-                                "role": stakeholder["role"]
-                                or stakeholder["governance_type"],
-                            }
-                        )
-            except ImportError:
-                pass
+    newsletter = models.ForeignKey(
+        Newsletter, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    email = models.EmailField()
+    provider = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        # Get project recipients
-        if self.project_recipients:
-            from projects.models import Project
-            for project_recipient in self.project_recipients:
-                if isinstance(project_recipient, dict):
-                    project_id = project_recipient.get("project_id")
-                    recipient_type = project_recipient.get("type")
-                    
-                    if project_id and recipient_type:
-                        try:
-                            project = Project.objects.get(id=project_id)
-                            if recipient_type == 'team':
-                                # Get project team members
-                                for team_member in project.team_members.filter(is_active=True).select_related('user'):
-                                    user = team_member.user
-                                    name = user.get_full_name() or user.first_name or user.email
-                                    result.append({
-                                        "id": user.id,
-                                        "name": name,
-                                        "email": user.email,
-                                        "role": user.role or "Project Team Member",
-                                    })
-                            elif recipient_type == 'stakeholders':
-                                # Get Execution Stakeholders for this project (from execution.models.Stakeholder)
-                                try:
-                                    from execution.models import Stakeholder
-                                    for stakeholder in Stakeholder.objects.filter(
-                                        project=project,
-                                        contact__isnull=False
-                                    ).exclude(contact=''):
-                                        result.append({
-                                            "id": f"stakeholder_{stakeholder.id}",
-                                            "name": stakeholder.name,
-                                            "email": stakeholder.contact,
-                                            "role": stakeholder.role or stakeholder.governance_type or "Stakeholder",
-                                        })
-                                except ImportError:
-                                    pass
-                        except Project.DoesNotExist:
-                            pass
+    class Meta:
+        ordering = ["id"]
+        unique_together = ("newsletter", "email")
+        indexes = [
+            models.Index(fields=["newsletter", "status", "next_attempt_at"]),
+        ]
 
-        return result
+    def __str__(self):
+        return f"{self.email} ({self.status})"
 
 
 class NewsletterTemplate(models.Model):
@@ -0,0 +1,249 @@
+"""
+Newsletter recipient resolution.
+
+Every recipient source of a newsletter (mailing list members, project
+teams, execution stakeholders, custom recipients, ...) becomes a queryset
+with the same six columns, and the sources are combined with one SQL
+UNION. The database removes duplicates and rows are streamed with
+.iterator(), so even very large audiences are never held in a Python list.
+
+CRM users picked for a newsletter are stored by email in a JSON field.
+They are read from the company's CRM mirror (accounts.CrmUser, kept in sync
+by accounts/crm.py) as one more UNION source, so users who have left the
+CRM are skipped. Picked emails the mirror does not know (yet) are checked
+against the database in one extra query and appended to the stream.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import CharField, F, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from accounts.models import CrmUser
+from .models import MailingListMember
+
+User = get_user_model()
+
+ROW_FIELDS = (
+    "recipient_kind",
+    "recipient_ref",
+    "recipient_email",
+    "recipient_first_name",
+    "recipient_last_name",
+    "recipient_role",
+)
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def _text(value):
+    return Value(value, output_field=CharField())
+
+
+def _rows(queryset, kind, ref, email, first_name, last_name, role):
+    """Project a source onto the shared recipient columns"""
+    # Annotations are added in the same order for every source so the
+    # UNION lines its columns up
+    return (
+        queryset.order_by()
+        .annotate(
+            recipient_kind=_text(kind),
+            recipient_ref=ref,
+            recipient_email=email,
+            recipient_first_name=first_name,
+            recipient_last_name=last_name,
+            recipient_role=role,
+        )
+        .values(*ROW_FIELDS)
+    )
+
+
+def _user_rows(queryset, default_role=None):
+    role = F("role")
+    if default_role:
+        role = Coalesce(NullIf(F("role"), _text("")), _text(default_role))
+    return _rows(queryset, "user", F("id"), F("email"), F("first_name"), F("last_name"), role)
+
+
+def _stakeholder_rows(queryset):
+    role = Coalesce(
+        NullIf(F("role"), _text("")),
+        NullIf(F("governance_type"), _text("")),
+        _text("Stakeholder"),
+    )
+    queryset = queryset.filter(contact__isnull=False).exclude(contact="")
+    return _rows(queryset, "stakeholder", F("id"), F("contact"), F("name"), _text(""), role)
+
+
+def _stakeholders():
+    try:
+        from execution.models import Stakeholder
+        return Stakeholder.objects.all()
+    except ImportError:
+        return None
+
+
+def _crm_emails(newsletter):
+    return list(dict.fromkeys(
+        user["email"] for user in newsletter.crm_users or []
+        if isinstance(user, dict) and user.get("email")
+    ))
+
+
+def _newsletter_company_id(newsletter):
+    """The newsletter's company as a subquery, so no query runs here"""
+    if newsletter.project_id:
+        from projects.models import Project
+        return Subquery(Project.objects.filter(pk=newsletter.project_id).values("company_id")[:1])
+    return Subquery(User.objects.filter(pk=newsletter.created_by_id).values("company_id")[:1])
+
+
+def _mirrored(newsletter, emails):
+    """The company's mirrored CRM users with these emails, active or not"""
+    if not (newsletter.project_id or newsletter.created_by_id):
+        return None
+    return CrmUser.objects.filter(
+        api_key__company_id=_newsletter_company_id(newsletter), api_key__is_active=True, email__in=emails
+    ).order_by()
+
+
+def recipient_sources(newsletter):
+    """One row queryset per recipient source configured on the newsletter"""
+    sources = []
+    stakeholders = _stakeholders()
+    recipient_type = newsletter.recipient_type
+    project = newsletter.project
+
+    if recipient_type == "mailing_list" and newsletter.pk:
+        members = MailingListMember.objects.filter(mailing_list__newsletters=newsletter)
+        sources.append(_rows(
+            members.filter(external_subscriber__is_subscribed=True),
+            "external",
+            F("external_subscriber_id"),
+            F("external_subscriber__email"),
+            F("external_subscriber__first_name"),
+            F("external_subscriber__last_name"),
+            _text("External Subscriber"),
+        ))
+        sources.append(_user_rows(
+            User.objects.filter(mailing_list_memberships__mailing_list__newsletters=newsletter)
+        ))
+    elif recipient_type == "project_team" and project:
+        sources.append(_user_rows(
+            User.objects.filter(project_teams__project=project, project_teams__is_active=True)
+        ))
+    elif recipient_type == "stakeholders" and project and stakeholders is not None:
+        sources.append(_stakeholder_rows(stakeholders.filter(project=project)))
+    elif recipient_type == "steering_committee" and project:
+        sources.append(_user_rows(
+            User.objects.filter(company_id=project.company_id, role__in=["admin", "pm"])
+        ))
+    elif recipient_type == "custom" and newsletter.pk:
+        sources.append(_user_rows(User.objects.filter(newsletters_received=newsletter)))
+
+    if newsletter.execution_stakeholder_ids and stakeholders is not None:
+        sources.append(_stakeholder_rows(
+            stakeholders.filter(id__in=newsletter.execution_stakeholder_ids)
+        ))
+
+    team_projects, stakeholder_projects = [], []
+    for entry in newsletter.project_recipients or []:
+        if isinstance(entry, dict) and entry.get("project_id"):
+            if entry.get("type") == "team":
+                team_projects.append(entry["project_id"])
+            elif entry.get("type") == "stakeholders":
+                stakeholder_projects.append(entry["project_id"])
+    if team_projects:
+        sources.append(_user_rows(
+            User.objects.filter(project_teams__project_id__in=team_projects, project_teams__is_active=True),
+            default_role="Project Team Member",
+        ))
+    if stakeholder_projects and stakeholders is not None:
+        sources.append(_stakeholder_rows(stakeholders.filter(project_id__in=stakeholder_projects)))
+
+    crm_emails = _crm_emails(newsletter)
+    mirrored = _mirrored(newsletter, crm_emails) if crm_emails else None
+    if mirrored is not None:
+        sources.append(_rows(
+            mirrored.filter(is_active=True),
+            "crm", F("id"), F("email"), F("first_name"), F("last_name"), _text("CRM User"),
+        ))
+
+    return sources
+
+
+def _union(querysets):
+    if not querysets:
+        return None
+    if len(querysets) == 1:
+        return querysets[0].distinct()
+    return querysets[0].union(*querysets[1:])
+
+
+class RecipientResolver:
+    """
+    Resolves a newsletter's recipients once per send. The UNION query is
+    built once; the count and the CRM extras are memoized, while the rows
+    themselves are streamed each time they are iterated.
+    """
+
+    def __init__(self, newsletter):
+        self.newsletter = newsletter
+        self.sources = recipient_sources(newsletter)
+        self._count = None
+        self._crm_extras = None
+
+    def email_queryset(self):
+        """Deduplicated recipient emails as a single UNION query"""
+        return _union([
+            source.values_list("recipient_email", flat=True) for source in self.sources
+        ])
+
+    def row_queryset(self):
+        return _union(self.sources)
+
+    def crm_extras(self):
+        """Picked CRM emails that neither the mirror nor another source covers"""
+        if self._crm_extras is None:
+            crm_emails = _crm_emails(self.newsletter)
+            known = set()
+            if crm_emails and self.sources:
+                checks = [
+                    source.filter(recipient_email__in=crm_emails)
+                    .values_list("recipient_email", flat=True)
+                    for source in self.sources
+                ]
+                # Mirrored but inactive: they have left the CRM
+                mirrored = _mirrored(self.newsletter, crm_emails)
+                if mirrored is not None:
+                    checks.append(mirrored.values_list("email", flat=True))
+                known = set(_union(checks))
+            self._crm_extras = [email for email in crm_emails if email not in known]
+        return self._crm_extras
+
+    def emails(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream every distinct recipient email"""
+        queryset = self.email_queryset()
+        if queryset is not None:
+            yield from queryset.iterator(chunk_size=chunk_size)
+        yield from self.crm_extras()
+
+    def count(self):
+        if self._count is None:
+            queryset = self.email_queryset()
+            self._count = (queryset.count() if queryset is not None else 0) + len(self.crm_extras())
+        return self._count
+
+    def details(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream recipient dicts (id, name, email, role) for previews"""
+        queryset = self.row_queryset()
+        if queryset is None:
+            return
+        for row in queryset.iterator(chunk_size=chunk_size):
+            kind = row["recipient_kind"]
+            email = row["recipient_email"]
+            name = f"{row['recipient_first_name'] or ''} {row['recipient_last_name'] or ''}".strip()
+            yield {
+                "id": row["recipient_ref"] if kind == "user" else f"{kind}_{row['recipient_ref']}",
+                "name": name or email,
+                "email": email,
+                "role": row["recipient_role"],
+            }
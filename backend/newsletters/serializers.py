@@ -701,7 +701,7 @@ class NewsletterGlobalSerializer(serializers.ModelSerializer):
 
     def get_recipient_count(self, obj):
         """Get the number of recipients"""
-        return len(obj.get_recipient_emails())
+        return obj.recipients.count()
 
     def get_mailing_list_names(self, obj):
         """Get names of selected mailing lists"""
@@ -6,13 +6,13 @@ from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
 from django.contrib.auth import get_user_model
 from accounts.permissions import HasRole
 from projects.views import CompanyScopedQuerysetMixin
 
 User = get_user_model()
 from .models import Newsletter, NewsletterTemplate, MailingList, ExternalSubscriber, MailingListMember
+from .delivery import queue_newsletter, send_test_email, delivery_summary
 from .serializers import (
     NewsletterSerializer,
     NewsletterListSerializer,
@@ -28,7 +28,72 @@ from .serializers import (
 )
 
 
-class NewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
+class NewsletterDeliveryMixin:
+    """Queued, per-recipient sending shared by project and global newsletters"""
+
+    def _queue_delivery(self, request, newsletter, test_email=None):
+        if test_email:
+            return self._send_test(newsletter, test_email)
+
+        # Streamed from one UNION query; the count is memoized on the resolver
+        recipient_emails = newsletter.recipients.emails()
+        recipient_count = newsletter.recipients.count()
+
+        if not recipient_count:
+            return Response(
+                {"error": "No recipients found"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        queue_newsletter(newsletter, recipient_emails, user=request.user)
+        newsletter.refresh_from_db(fields=["status", "sent_at"])
+
+        return Response(
+            {
+                "message": "Newsletter queued for delivery",
+                "recipient_count": recipient_count,
+                "status": newsletter.status,
+                "sent_at": newsletter.sent_at,
+                "delivery": delivery_summary(newsletter),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def _send_test(self, newsletter, test_email):
+        """Test copies go out directly and leave no trace on the real send"""
+        try:
+            send_test_email(newsletter, test_email)
+        except Exception as e:
+            return Response(
+                {"error": f"Failed to send test email: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response(
+            {
+                "message": "Test email sent successfully",
+                "recipient_count": 1,
+                "status": newsletter.status,
+            }
+        )
+
+    @action(detail=True, methods=["get"], url_path="delivery")
+    def delivery(self, request, pk=None):
+        """Per-recipient delivery status"""
+        newsletter = self.get_object()
+        failed = newsletter.deliveries.filter(status="failed").values(
+            "email", "attempts", "last_error"
+        )
+        return Response(
+            {
+                "status": newsletter.status,
+                "sent_at": newsletter.sent_at,
+                "delivery": delivery_summary(newsletter),
+                "failed": list(failed),
+            }
+        )
+
+
+class NewsletterViewSet(NewsletterDeliveryMixin, CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     """ViewSet for managing newsletters"""
 
     queryset = Newsletter.objects.all().select_related(
@@ -54,7 +119,7 @@ class NewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         return NewsletterSerializer
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve", "preview", "recipients"]:
+        if self.action in ["list", "retrieve", "preview", "recipients", "delivery"]:
             return [IsAuthenticated()]
         return [IsAuthenticated(), HasRole("admin", "pm", "contibuter")()]
 
@@ -113,9 +178,10 @@ class NewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         """Send newsletter to recipients"""
         newsletter = self.get_object()
 
-        if newsletter.status == "sent":
+        if newsletter.status in ("sent", "sending"):
             return Response(
-                {"error": "Newsletter has already been sent"},
+                {"error": "Newsletter has already been sent" if newsletter.status == "sent"
+                 else "Newsletter is already being sent"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -128,121 +194,7 @@ class NewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         data = serializer.validated_data
         test_email = data.get("test_email")
 
-        try:
-            with transaction.atomic():
-                # Get recipient emails
-                if test_email:
-                    recipient_emails = [test_email]
-                else:
-                    recipient_emails = list(newsletter.get_recipient_emails())
-
-                if not recipient_emails:
-                    return Response(
-                        {"error": "No recipients found"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                # Get detailed recipient information for logging
-                recipient_details = newsletter.get_recipient_details()
-                
-                # Print recipients list to console/log
-                print("\n" + "="*80)
-                print(f"NEWSLETTER SENDING: {newsletter.subject}")
-                if test_email:
-                    print(f"Mode: TEST EMAIL to {test_email}")
-                else:
-                    print(f"Project: {newsletter.project.name if newsletter.project else 'N/A'}")
-                print(f"Total Recipients: {len(recipient_emails)}")
-                print("-" * 80)
-                print("RECIPIENT LIST:")
-                for i, detail in enumerate(recipient_details, 1):
-                    print(f"  {i}. {detail.get('name', 'Unknown')} ({detail.get('email', 'No email')}) - {detail.get('role', 'N/A')}")
-                
-                # Also print CRM users if any
-                if hasattr(newsletter, 'crm_users') and newsletter.crm_users:
-                    print("\nCRM USERS:")
-                    for i, crm_user in enumerate(newsletter.crm_users, 1):
-                        name = f"{crm_user.get('first_name', '')} {crm_user.get('last_name', '')}".strip()
-                        if not name:
-                            name = crm_user.get('email', 'Unknown')
-                        print(f"  {i}. {name} ({crm_user.get('email', 'No email')})")
-                
-                # Print project recipients if any
-                if hasattr(newsletter, 'project_recipients') and newsletter.project_recipients:
-                    print("\nPROJECT RECIPIENTS:")
-                    for i, project_recipient in enumerate(newsletter.project_recipients, 1):
-                        project_id = project_recipient.get('project_id')
-                        recipient_type = project_recipient.get('type')
-                        try:
-                            from projects.models import Project
-                            project = Project.objects.get(id=project_id)
-                            if recipient_type == 'team':
-                                count = project.team_members.filter(is_active=True).count()
-                                print(f"  {i}. Project: {project.name} - Team Members ({count} members)")
-                            elif recipient_type == 'stakeholders':
-                                try:
-                                    from execution.models import Stakeholder
-                                    count = Stakeholder.objects.filter(
-                                        project=project,
-                                        contact__isnull=False
-                                    ).exclude(contact='').count()
-                                    print(f"  {i}. Project: {project.name} - Execution Stakeholders ({count} stakeholders)")
-                                except ImportError:
-                                    print(f"  {i}. Project: {project.name} - Stakeholders (0 stakeholders)")
-                        except:
-                            print(f"  {i}. Project ID: {project_id} - {recipient_type} (not found)")
-                
-                print(f"\nTotal Emails to Send: {len(recipient_emails)}")
-                print("="*80 + "\n")
-
-                # Generate HTML content
-                from .views_helpers import (
-                    generate_html_content,
-                    send_newsletter_email,
-                    log_newsletter_activity,
-                )
-
-                html_content = generate_html_content(newsletter)
-
-                # Send email
-                success = send_newsletter_email(
-                    subject=newsletter.subject,
-                    html_content=html_content,
-                    recipient_list=recipient_emails,
-                    project_name=newsletter.project.name,
-                )
-
-                if success:
-                    # Update newsletter status
-                    newsletter.status = "sent"
-                    newsletter.sent_at = timezone.now()
-                    newsletter.save()
-
-                    # Log activity
-                    log_newsletter_activity(newsletter, request.user, "sent")
-
-                    return Response(
-                        {
-                            "message": "Newsletter sent successfully",
-                            "recipient_count": len(recipient_emails),
-                            "sent_at": newsletter.sent_at,
-                        }
-                    )
-                else:
-                    newsletter.status = "failed"
-                    newsletter.save()
-                    return Response(
-                        {"error": "Failed to send newsletter"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
-
-        except Exception as e:
-            newsletter.status = "failed"
-            newsletter.save()
-            return Response(
-                {"error": f"Failed to send newsletter: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return self._queue_delivery(request, newsletter, test_email=test_email)
 
     @action(detail=False, methods=["get"], url_path="recipients")
     def get_recipients(self, request):
@@ -535,7 +487,7 @@ class ExternalSubscriberViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSe
             )
 
 
-class GlobalNewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
+class GlobalNewsletterViewSet(NewsletterDeliveryMixin, CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     """ViewSet for managing global newsletters (company-wide)"""
     
     queryset = Newsletter.objects.all().select_related(
@@ -562,122 +514,14 @@ class GlobalNewsletterViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet)
         """Send global newsletter to recipients"""
         newsletter = self.get_object()
         
-        if newsletter.status == "sent":
+        if newsletter.status in ("sent", "sending"):
             return Response(
-                {"error": "Newsletter has already been sent"},
+                {"error": "Newsletter has already been sent" if newsletter.status == "sent"
+                 else "Newsletter is already being sent"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
         
-        try:
-            with transaction.atomic():
-                # Get recipient emails
-                recipient_emails = list(newsletter.get_recipient_emails())
-                
-                if not recipient_emails:
-                    return Response(
-                        {"error": "No recipients found"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                # Get detailed recipient information for logging
-                recipient_details = newsletter.get_recipient_details()
-                
-                # Print recipients list to console/log
-                print("\n" + "="*80)
-                print(f"NEWSLETTER SENDING: {newsletter.subject}")
-                print(f"Project: {newsletter.project.name if newsletter.project else 'Company Newsletter'}")
-                print(f"Total Recipients: {len(recipient_emails)}")
-                print("-" * 80)
-                print("RECIPIENT LIST:")
-                for i, detail in enumerate(recipient_details, 1):
-                    print(f"  {i}. {detail.get('name', 'Unknown')} ({detail.get('email', 'No email')}) - {detail.get('role', 'N/A')}")
-                
-                # Also print CRM users if any
-                if newsletter.crm_users:
-                    print("\nCRM USERS:")
-                    for i, crm_user in enumerate(newsletter.crm_users, 1):
-                        name = f"{crm_user.get('first_name', '')} {crm_user.get('last_name', '')}".strip()
-                        if not name:
-                            name = crm_user.get('email', 'Unknown')
-                        print(f"  {i}. {name} ({crm_user.get('email', 'No email')})")
-                
-                # Print project recipients if any
-                if hasattr(newsletter, 'project_recipients') and newsletter.project_recipients:
-                    print("\nPROJECT RECIPIENTS:")
-                    for i, project_recipient in enumerate(newsletter.project_recipients, 1):
-                        project_id = project_recipient.get('project_id')
-                        recipient_type = project_recipient.get('type')
-                        try:
-                            from projects.models import Project
-                            project = Project.objects.get(id=project_id)
-                            if recipient_type == 'team':
-                                count = project.team_members.filter(is_active=True).count()
-                                print(f"  {i}. Project: {project.name} - Team Members ({count} members)")
-                            elif recipient_type == 'stakeholders':
-                                try:
-                                    from execution.models import Stakeholder
-                                    count = Stakeholder.objects.filter(
-                                        project=project,
-                                        contact__isnull=False
-                                    ).exclude(contact='').count()
-                                    print(f"  {i}. Project: {project.name} - Execution Stakeholders ({count} stakeholders)")
-                                except ImportError:
-                                    print(f"  {i}. Project: {project.name} - Stakeholders (0 stakeholders)")
-                        except:
-                            print(f"  {i}. Project ID: {project_id} - {recipient_type} (not found)")
-                
-                print(f"\nTotal Emails to Send: {len(recipient_emails)}")
-                print("="*80 + "\n")
-
-                # Generate HTML content
-                from .views_helpers import (
-                    generate_html_content,
-                    send_newsletter_email_bcc,
-                    log_newsletter_activity,
-                )
-
-                html_content = generate_html_content(newsletter)
-
-                # Get project name for email
-                project_name = newsletter.project.name if newsletter.project else "Company Newsletter"
-
-                # Send newsletter
-                success = send_newsletter_email_bcc(
-                    subject=newsletter.subject,
-                    html_content=html_content,
-                    recipient_list=recipient_emails,
-                    project_name=project_name,
-                )
-
-                if success:
-                    newsletter.status = "sent"
-                    newsletter.sent_at = timezone.now()
-                    newsletter.save()
-
-                    # Log activity
-                    log_newsletter_activity(newsletter, request.user, "sent")
-
-                    return Response(
-                        {"message": "Newsletter sent successfully"},
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    return Response(
-                        {"error": "Failed to send newsletter"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    )
-
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"Newsletter sending error: {error_trace}")  # Log full traceback to console
-            
-            newsletter.status = "failed"
-            newsletter.save()
-            return Response(
-                {"error": f"Failed to send newsletter: {str(e)}", "details": str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return self._queue_delivery(request, newsletter)
     
     @action(detail=False, methods=["get"], url_path="projects")
     def get_projects_for_newsletter(self, request):
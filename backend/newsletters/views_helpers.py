@@ -1,5 +1,3 @@
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 
@@ -67,56 +65,6 @@ def generate_html_content(newsletter):
     return template.render(Context(context))
 
 
-def send_newsletter_email(subject, html_content, recipient_list, project_name):
-    """Send email to recipients"""
-    try:
-        # Create email message
-        # Use BCC to hide recipients from each other for privacy
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body="Please view this email in HTML format.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[],  # Empty 'to' field
-            bcc=recipient_list,  # All recipients in BCC for privacy
-        )
-
-        # Attach HTML content
-        msg.attach_alternative(html_content, "text/html")
-
-        # Send email
-        msg.send()
-        return True
-
-    except Exception as e:
-        print(f"Email sending error: {e}")
-        return False
-
-
-def send_newsletter_email_bcc(subject, html_content, recipient_list, project_name):
-    """Send email to recipients using BCC with no-reply address"""
-    try:
-        # Create email message with no-reply address in 'to' field
-        # Use BCC to hide recipients from each other for privacy
-        msg = EmailMultiAlternatives(
-            subject=subject,
-            body="Please view this email in HTML format.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=["noreply@projexpal.com"],  # No-reply address in 'to' field
-            bcc=recipient_list,  # All recipients in BCC for privacy
-        )
-
-        # Attach HTML content
-        msg.attach_alternative(html_content, "text/html")
-
-        # Send email
-        msg.send()
-        return True
-
-    except Exception as e:
-        print(f"Email sending error: {e}")
-        return False
-
-
 def log_newsletter_activity(newsletter, user, action):
     """Log newsletter activity"""
     try:
@@ -1,5 +1,5 @@
 from django.db.models import Count, Sum, Q, Value, DecimalField
-from django.db.models.functions import TruncMonth, TruncWeek, ExtractWeekDay, Coalesce
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -12,6 +12,14 @@ from accounts.permissions import HasRole
 from accounts.serializers import AdminCreateUserSerializer, CustomUserSerializer
 from projects.models import Project, Expense
 from subscriptions.models import CompanySubscription
+from core.timeseries import Metric, bucket_start, change, series
+
+BILLABLE_STATUSES = ["active", "trialing", "past_due"]
+USERS_METRIC = "overview.users"
+SUBSCRIPTIONS_METRIC = "overview.subscriptions"
+REVENUE_METRIC = "overview.revenue"
+PROJECTS_METRIC = "overview.projects"
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
 
 
 @api_view(["GET"])
@@ -27,162 +35,47 @@ def overview_stats(request):
         * weekly_projects: current week Mon-Sun [{day: 'Mon', value: number}]
     """
     now = timezone.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    prev_month_end = start_of_month - timezone.timedelta(seconds=1)
-    start_of_prev_month = prev_month_end.replace(
-        day=1, hour=0, minute=0, second=0, microsecond=0
-    )
+    billable = CompanySubscription.objects.filter(status__in=BILLABLE_STATUSES)
 
     # Totals (to-date)
     total_users = CustomUser.objects.count()
     total_projects = Project.objects.count()
     # Revenue proxy using active/trialing/past_due subscriptions' plan price
-    total_revenue = (
-        CompanySubscription.objects.filter(status__in=["active", "trialing", "past_due"])  # type: ignore
-        .aggregate(
-            total=Coalesce(
-                Sum("plan__price"),
-                Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)),
-            )
-        )
-        .get("total", 0)
-    )
-    active_subscriptions = CompanySubscription.objects.filter(
-        status__in=["active", "trialing", "past_due"]
-    ).count()
-
-    # Month-over-month metrics
-    def safe_pct(curr: float, prev: float) -> float:
-        if prev == 0:
-            return 0.0 if curr == 0 else 100.0
-        return round(((curr - prev) / prev) * 100.0, 1)
-
-    # Current month counts
-    cm_users = CustomUser.objects.filter(
-        date_joined__gte=start_of_month, date_joined__lte=now
-    ).count()
-    pm_users = CustomUser.objects.filter(
-        date_joined__gte=start_of_prev_month, date_joined__lte=prev_month_end
-    ).count()
-
-    cm_projects = Project.objects.filter(
-        created_at__gte=start_of_month, created_at__lte=now
-    ).count()
-    pm_projects = Project.objects.filter(
-        created_at__gte=start_of_prev_month, created_at__lte=prev_month_end
-    ).count()
-
-    cm_revenue = (
-        CompanySubscription.objects.filter(
-            status__in=["active", "trialing", "past_due"],
-            created_at__gte=start_of_month,
-            created_at__lte=now,
-        ).aggregate(
-            total=Coalesce(
-                Sum("plan__price"),
-                Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)),
-            )
-        )
-    ).get("total", 0)
-    pm_revenue = (
-        CompanySubscription.objects.filter(
-            status__in=["active", "trialing", "past_due"],
-            created_at__gte=start_of_prev_month,
-            created_at__lte=prev_month_end,
-        ).aggregate(
-            total=Coalesce(
-                Sum("plan__price"),
-                Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)),
-            )
-        )
-    ).get("total", 0)
-
-    cm_active_subs = CompanySubscription.objects.filter(
-        status__in=["active", "trialing", "past_due"],
-        created_at__gte=start_of_month,
-        created_at__lte=now,
-    ).count()
-    pm_active_subs = CompanySubscription.objects.filter(
-        status__in=["active", "trialing", "past_due"],
-        created_at__gte=start_of_prev_month,
-        created_at__lte=prev_month_end,
-    ).count()
-
-    # Series: last 12 months revenue
-    last_12_months_start = (start_of_month - timezone.timedelta(days=365)).replace(
-        day=1
+    subscription_totals = billable.aggregate(
+        revenue=Coalesce(
+            Sum("plan__price"),
+            Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        ),
+        active=Count("id"),
     )
-    monthly_revenue_qs = (
-        CompanySubscription.objects.filter(
-            status__in=["active", "trialing", "past_due"],
-            created_at__gte=last_12_months_start,
-            created_at__lte=now,
-        )
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(
-            value=Coalesce(
-                Sum("plan__price"),
-                Value(0, output_field=DecimalField(max_digits=12, decimal_places=2)),
-            )
-        )
-        .order_by("month")
+    total_revenue = subscription_totals["revenue"]
+    active_subscriptions = subscription_totals["active"]
+
+    # Monthly series; the last two months give the MoM deltas. Closed months
+    # come from the cache, so a warm dashboard only queries the current one.
+    users_monthly = series(Metric(USERS_METRIC, CustomUser.objects.all(), "date_joined"), "month", periods=2, now=now)
+    subs_monthly = series(Metric(SUBSCRIPTIONS_METRIC, billable, "created_at"), "month", periods=2, now=now)
+    revenue_monthly = series(
+        Metric(REVENUE_METRIC, billable, "created_at", Sum("plan__price")), "month", periods=12, now=now
     )
-    # Ensure all months present
-    series_months = {}
-    for row in monthly_revenue_qs:
-        series_months[row["month"].strftime("%Y-%m")] = float(row["value"])
-    # Build ordered 12-month list up to current month
-    months_series = []
-    cursor = start_of_month.replace(day=1)
-    # go back 11 months
-    months = []
-    for i in range(11, -1, -1):
-        m = (cursor - timezone.timedelta(days=30 * i)).replace(day=1)
-        months.append(m)
-    for m in months:
-        key = m.strftime("%Y-%m")
-        months_series.append({"month": key, "value": series_months.get(key, 0.0)})
+    projects = Metric(PROJECTS_METRIC, Project.objects.all(), "created_at")
+    projects_monthly = series(projects, "month", periods=12, now=now)
 
-    # Series: current week Mon-Sun project creations
-    # Django weekday: ExtractWeekDay -> 1=Sunday..7=Saturday; we map to Mon..Sun
-    start_of_week = (now - timezone.timedelta(days=(now.weekday()))).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )  # Monday
-    end_of_week = start_of_week + timezone.timedelta(
-        days=6, hours=23, minutes=59, seconds=59
-    )
-    weekly_qs = (
-        Project.objects.filter(
-            created_at__gte=start_of_week, created_at__lte=end_of_week
-        )
-        .annotate(dow=ExtractWeekDay("created_at"))
-        .values("dow")
-        .annotate(value=Count("id"))
-    )
-    dow_map = {1: "Sun", 2: "Mon", 3: "Tue", 4: "Wed", 5: "Thu", 6: "Fri", 7: "Sat"}
-    # We want Mon..Sun order
-    order = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-    weekly_counts = {dow_map.get(row["dow"]): row["value"] for row in weekly_qs}
-    weekly_series = [{"day": d, "value": int(weekly_counts.get(d, 0))} for d in order]
+    # Current week Mon-Sun project creations
+    projects_daily = series(projects, "day", periods=7, start=bucket_start(now, "week"), now=now)
 
-    # Monthly projects series for last 12 months
-    monthly_projects_qs = (
-        Project.objects.filter(
-            created_at__gte=last_12_months_start, created_at__lte=now
-        )
-        .annotate(month=TruncMonth("created_at"))
-        .values("month")
-        .annotate(value=Count("id"))
-        .order_by("month")
-    )
-    mp_map = {
-        row["month"].strftime("%Y-%m"): int(row["value"]) for row in monthly_projects_qs
-    }
-    monthly_projects_series = []
-    for m in months:
-        key = m.strftime("%Y-%m")
-        monthly_projects_series.append({"month": key, "value": mp_map.get(key, 0)})
+    months_series = [
+        {"month": point["period"].strftime("%Y-%m"), "value": float(point["value"])}
+        for point in revenue_monthly
+    ]
+    weekly_series = [
+        {"day": WEEKDAYS[point["period"].weekday()], "value": int(point["value"])}
+        for point in projects_daily
+    ]
+    monthly_projects_series = [
+        {"month": point["period"].strftime("%Y-%m"), "value": int(point["value"])}
+        for point in projects_monthly
+    ]
 
     return Response(
         {
@@ -193,10 +86,10 @@ def overview_stats(request):
                 "active_subscriptions": active_subscriptions,
             },
             "mom_change_pct": {
-                "users": safe_pct(cm_users, pm_users),
-                "projects": safe_pct(cm_projects, pm_projects),
-                "revenue": float(safe_pct(float(cm_revenue), float(pm_revenue))),
-                "active_subscriptions": safe_pct(cm_active_subs, pm_active_subs),
+                "users": change(users_monthly),
+                "projects": change(projects_monthly),
+                "revenue": change(revenue_monthly),
+                "active_subscriptions": change(subs_monthly),
             },
             "series": {
                 "monthly_revenue": months_series,
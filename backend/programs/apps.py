@@ -5,3 +5,6 @@ class ProgramsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'programs'
     verbose_name = 'Programs'
+
+    def ready(self):
+        import programs.signals
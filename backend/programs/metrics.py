@@ -0,0 +1,129 @@
+"""
+Program rollups.
+
+All figures for any number of programs come from two queries: one
+annotated query over the linked projects (progress, spent, team size as
+correlated subqueries) and one over programs with conditional counts
+for risks and benefits. Rollups are cached per program and invalidated
+from programs/signals.py.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from projects.models import Project
+from projects.queries import with_rollups, rounded_progress
+from .models import Program, ProgramBenefit, ProgramRisk
+
+
+METRICS_CACHE_TIMEOUT = 60 * 5
+
+
+def metrics_cache_key(program_id):
+    return f"programs:metrics:{program_id}"
+
+
+def invalidate_program_metrics(program_ids):
+    cache.delete_many([metrics_cache_key(pid) for pid in program_ids if pid])
+
+
+def _count(model, condition=None):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(program=OuterRef("pk"))
+            .order_by()
+            .values("program")
+            .annotate(total=Count("pk", filter=condition))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def compute_program_metrics(program_ids):
+    """Build rollups for the given programs without touching the cache"""
+    program_ids = list(program_ids)
+    if not program_ids:
+        return {}
+
+    programs = (
+        Program.objects.filter(id__in=program_ids)
+        .order_by()
+        .annotate(
+            benefit_total=_count(ProgramBenefit),
+            benefit_realized=_count(ProgramBenefit, Q(status="realized")),
+            risk_open=_count(ProgramRisk, Q(status="open")),
+            risk_high=_count(ProgramRisk, Q(status="open", impact="high")),
+        )
+        .values(
+            "id", "total_budget", "spent_budget",
+            "benefit_total", "benefit_realized", "risk_open", "risk_high",
+        )
+    )
+
+    project_rows = {}
+    projects = (
+        with_rollups(Project.objects.filter(programs__in=program_ids))
+        .order_by("id")
+        .values(
+            "programs", "id", "name", "status", "budget", "start_date", "end_date",
+            "progress_value", "active_team_count", "expenses_sum",
+        )
+    )
+    for row in projects:
+        row["progress"] = rounded_progress(row.pop("progress_value"))
+        project_rows.setdefault(row.pop("programs"), []).append(row)
+
+    metrics = {}
+    for program in programs:
+        rows = project_rows.get(program["id"], [])
+        statuses = Counter(row["status"] for row in rows)
+        metrics[program["id"]] = {
+            "total_projects": len(rows),
+            "status_distribution": [
+                {"status": name, "count": count} for name, count in sorted(statuses.items())
+            ],
+            "program_budget": float(program["total_budget"]),
+            "spent_budget": float(program["spent_budget"]),
+            "project_budget_total": float(sum(row["budget"] or 0 for row in rows)),
+            "project_spent_total": float(sum(row["expenses_sum"] or 0 for row in rows)),
+            "progress": int(round(sum(row["progress"] for row in rows) / len(rows))) if rows else 0,
+            "team_size": sum(row["active_team_count"] for row in rows),
+            "total_benefits": program["benefit_total"],
+            "realized_benefits": program["benefit_realized"],
+            "open_risks": program["risk_open"],
+            "high_risks": program["risk_high"],
+            "projects": rows,
+        }
+
+    return metrics
+
+
+def get_program_metrics_many(program_ids):
+    """Cached rollups for many programs; cache misses are computed together"""
+    program_ids = list(dict.fromkeys(program_ids))
+    keys = {metrics_cache_key(pid): pid for pid in program_ids}
+    metrics = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [pid for pid in program_ids if pid not in metrics]
+    if missing:
+        fresh = compute_program_metrics(missing)
+        cache.set_many(
+            {metrics_cache_key(pid): value for pid, value in fresh.items()},
+            METRICS_CACHE_TIMEOUT,
+        )
+        metrics.update(fresh)
+
+    return metrics
+
+
+def get_program_metrics(program_id):
+    return get_program_metrics_many([program_id]).get(program_id)
+
+
+def public_metrics(metrics):
+    """Metrics payload without the per-project rows"""
+    return {key: value for key, value in metrics.items() if key != "projects"}
@@ -73,8 +73,8 @@ class ProgramDetailSerializer(serializers.ModelSerializer):
     program_manager_name = serializers.SerializerMethodField()
     executive_sponsor_name = serializers.SerializerMethodField()
     created_by_name = serializers.SerializerMethodField()
-    progress = serializers.IntegerField(read_only=True)
-    project_count = serializers.IntegerField(read_only=True)
+    progress = serializers.SerializerMethodField()
+    project_count = serializers.SerializerMethodField()
     budget_variance = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
     
     # Nested data
@@ -102,6 +102,15 @@ class ProgramDetailSerializer(serializers.ModelSerializer):
             return obj.program_manager.get_full_name() or obj.program_manager.email
         return None
 
+    def get_progress(self, obj):
+        # Rollups from programs.metrics avoid per-project progress queries
+        metrics = self.context.get('program_metrics')
+        return metrics['progress'] if metrics else obj.progress
+
+    def get_project_count(self, obj):
+        metrics = self.context.get('program_metrics')
+        return metrics['total_projects'] if metrics else obj.project_count
+
     def get_executive_sponsor_name(self, obj):
         if obj.executive_sponsor:
             return obj.executive_sponsor.get_full_name() or obj.executive_sponsor.email
@@ -0,0 +1,56 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from projects.models import Project, Expense, ProjectTeam
+from .metrics import invalidate_program_metrics
+from .models import Program, ProgramBenefit, ProgramRisk
+
+
+@receiver(post_save, sender=Program)
+def invalidate_metrics_on_program_save(sender, instance, **kwargs):
+    invalidate_program_metrics([instance.pk])
+
+
+@receiver(m2m_changed, sender=Program.projects.through)
+def invalidate_metrics_on_projects_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Linking or unlinking projects changes every rollup on the program side"""
+    if not reverse:
+        if action.startswith("post_"):
+            invalidate_program_metrics([instance.pk])
+        return
+    # instance is a Project and pk_set holds program ids; a clear has no pk_set,
+    # so the programs are read before they are unlinked
+    if action == "pre_clear":
+        invalidate_program_metrics(instance.programs.values_list("id", flat=True))
+    elif action in ("post_add", "post_remove"):
+        invalidate_program_metrics(pk_set or [])
+
+
+@receiver(post_save, sender=ProgramBenefit)
+@receiver(post_delete, sender=ProgramBenefit)
+@receiver(post_save, sender=ProgramRisk)
+@receiver(post_delete, sender=ProgramRisk)
+def invalidate_metrics_on_program_item(sender, instance, **kwargs):
+    invalidate_program_metrics([instance.program_id])
+
+
+def _invalidate_for_project(project_id):
+    invalidate_program_metrics(
+        Program.projects.through.objects.filter(project_id=project_id)
+        .values_list("program_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Project)
+def invalidate_metrics_on_project_save(sender, instance, created, **kwargs):
+    if not created:
+        _invalidate_for_project(instance.pk)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=ProjectTeam)
+@receiver(post_delete, sender=ProjectTeam)
+def invalidate_metrics_on_project_item(sender, instance, **kwargs):
+    # Task/subtask progress changes are picked up by the short cache timeout
+    _invalidate_for_project(instance.project_id)
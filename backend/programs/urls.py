@@ -9,6 +9,7 @@ from .views import (
     ProgramBudgetCategoryViewSet,
     ProgramBudgetItemViewSet,
     ProgramBudgetOverviewViewSet,
+    program_ai_insights,
 )
 
 # Router
@@ -52,4 +53,5 @@ urlpatterns = [
 ]
 # AI Insights endpoints
 urlpatterns += [
+    path('<int:program_id>/ai-insights/', program_ai_insights, name='program-ai-insights'),
 ]
@@ -2,7 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q
+from django.db.models import Q
 from .models import Program, ProgramBenefit, ProgramRisk, ProgramMilestone
 from .serializers import (
     ProgramListSerializer,
@@ -12,6 +12,7 @@ from .serializers import (
     ProgramRiskSerializer,
     ProgramMilestoneSerializer,
 )
+from .metrics import get_program_metrics, get_program_metrics_many, public_metrics
 
 
 class ProgramViewSet(viewsets.ModelViewSet):
@@ -108,51 +109,45 @@ class ProgramViewSet(viewsets.ModelViewSet):
     def metrics(self, request, pk=None):
         """Get program metrics."""
         program = self.get_object()
-        
-        projects = program.projects.all()
-        total_projects = projects.count()
-        
-        # Calculate project status distribution
-        status_distribution = projects.values('status').annotate(count=Count('id'))
-        
-        # Calculate total budget from projects
-        project_budget = projects.aggregate(total=Sum('budget'))['total'] or 0
-        
-        # Benefits metrics
-        benefits = program.benefits.all()
-        total_benefits = benefits.count()
-        realized_benefits = benefits.filter(status='realized').count()
-        
-        # Risk metrics
-        risks = program.risks.all()
-        open_risks = risks.filter(status='open').count()
-        high_risks = risks.filter(impact='high', status='open').count()
-        
-        return Response({
-            'total_projects': total_projects,
-            'status_distribution': list(status_distribution),
-            'program_budget': float(program.total_budget),
-            'spent_budget': float(program.spent_budget),
-            'project_budget_total': float(project_budget),
-            'progress': program.progress,
-            'total_benefits': total_benefits,
-            'realized_benefits': realized_benefits,
-            'open_risks': open_risks,
-            'high_risks': high_risks,
-        })
+        return Response(public_metrics(get_program_metrics(program.id)))
 
     @action(detail=True, methods=['get'])
     def dashboard(self, request, pk=None):
         """Get dashboard data for program."""
         program = self.get_object()
-        serializer = ProgramDetailSerializer(program)
+        metrics = get_program_metrics(program.id)
+        program = (
+            Program.objects.filter(pk=program.pk)
+            .select_related('program_manager', 'executive_sponsor', 'created_by')
+            .prefetch_related('benefits__owner', 'risks__owner', 'milestones')
+            .get()
+        )
+        serializer = ProgramDetailSerializer(program, context={'program_metrics': metrics})
         
         # Add additional dashboard data
         data = serializer.data
-        data['metrics'] = self.metrics(request, pk).data
+        data['metrics'] = public_metrics(metrics)
         
         return Response(data)
 
+    @action(detail=False, methods=['get'], url_path='portfolio-metrics')
+    def portfolio_metrics(self, request):
+        """
+        Metrics for every program the user can see, in one batch.
+        Accepts the same filters as the list (e.g. ?portfolio=<id>).
+        """
+        programs = list(self.get_queryset().order_by('name').values('id', 'name', 'portfolio'))
+        metrics = get_program_metrics_many([p['id'] for p in programs])
+        return Response([
+            {
+                'program_id': p['id'],
+                'program_name': p['name'],
+                'portfolio': p['portfolio'],
+                **public_metrics(metrics[p['id']]),
+            }
+            for p in programs if p['id'] in metrics
+        ])
+
 
 class ProgramBenefitViewSet(viewsets.ModelViewSet):
     """ViewSet for Program Benefits."""
@@ -367,7 +362,7 @@ class ProgramBudgetOverviewViewSet(viewsets.ViewSet):
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+from datetime import datetime
 from .ai_utils import RiskDetector, BudgetForecaster, ProjectHealthScorer
 
 
@@ -428,15 +423,16 @@ def program_ai_insights(request, program_id):
     Generate AI-powered insights for a specific program
     """
     try:
-        program = Program.objects.get(id=program_id)
+        program = Program.objects.get(id=program_id, company=request.user.company)
         
-        # Aggregate metrics from program projects
-        projects = program.projects.all()
+        # Aggregate metrics from program projects (cached rollup, no per-project queries)
+        metrics = get_program_metrics(program.id)
+        projects = metrics['projects']
         
-        total_budget = sum(p.budget_allocated or 0 for p in projects)
-        total_spent = sum(p.budget_spent or 0 for p in projects)
-        avg_progress = sum(p.progress or 0 for p in projects) / len(projects) if projects else 0
-        total_team = sum(p.team_members.filter(is_active=True).count() for p in projects)
+        total_budget = sum(p['budget'] or 0 for p in projects)
+        total_spent = sum(p['expenses_sum'] or 0 for p in projects)
+        avg_progress = metrics['progress']
+        total_team = metrics['team_size']
         
         # Run AI analysis
         budget_risk = RiskDetector.analyze_budget_risk(total_spent, total_budget, int(avg_progress))
@@ -452,18 +448,20 @@ def program_ai_insights(request, program_id):
         project_insights = []
         for project in projects:
             p_budget_risk = RiskDetector.analyze_budget_risk(
-                project.budget_spent or 0,
-                project.budget_allocated or 0,
-                project.progress or 0
+                project['expenses_sum'] or 0,
+                project['budget'] or 0,
+                project['progress']
             )
             
             if p_budget_risk['risk_level'] in ['high', 'medium']:
                 project_insights.append({
-                    'project_id': project.id,
-                    'project_name': project.name,
+                    'project_id': project['id'],
+                    'project_name': project['name'],
                     'risk': p_budget_risk
                 })
         
+        project_insights.sort(key=lambda insight: insight['risk']['severity'], reverse=True)
+        
         return Response({
             'program_id': program.id,
             'program_name': program.name,
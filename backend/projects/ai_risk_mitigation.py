@@ -3,14 +3,14 @@ AI-powered risk mitigation generation using OpenAI GPT.
 """
 
 import logging
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from django.conf import settings
+
+from core import llm
 
 logger = logging.getLogger(__name__)
 
 
-def generate_ai_mitigation(risk_data):
+def generate_ai_mitigation(risk_data, use_cache=False):
     """
     Generate AI-powered mitigation plan for a given risk.
 
@@ -24,6 +24,8 @@ def generate_ai_mitigation(risk_data):
             - level: Risk level (High, Medium, Low)
             - project_name: Name of the project (optional)
             - project_description: Description of the project (optional)
+        use_cache: Serve an identical earlier prompt from the gateway cache.
+            Off by default so generating or regenerating gives a fresh plan.
 
     Returns:
         Dictionary containing:
@@ -34,13 +36,6 @@ def generate_ai_mitigation(risk_data):
             - effectiveness: Effectiveness percentage
     """
     try:
-        # Initialize OpenAI LLM
-        llm = ChatOpenAI(
-            temperature=0.7,
-            model_name="gpt-4o",
-            openai_api_key=settings.OPENAI_API_KEY,
-        )
-
         # Create the prompt template
         prompt_template = ChatPromptTemplate.from_messages(
             [
@@ -108,22 +103,10 @@ Generate a detailed, actionable mitigation plan.""",
             project_context=project_context,
         )
 
-        # Get AI response
-        response = llm.invoke(formatted_prompt)
-        response_text = response.content.strip()
-
-        # Parse JSON response
-        import json
-
-        # Try to extract JSON if wrapped in markdown code blocks
-        if response_text.startswith("```"):
-            # Remove markdown code blocks
-            response_text = response_text.split("```")[1]
-            if response_text.startswith("json"):
-                response_text = response_text[4:]
-            response_text = response_text.strip()
-
-        mitigation_plan = json.loads(response_text)
+        # Get AI response through the gateway
+        mitigation_plan = llm.complete_json(
+            formatted_prompt, model="gpt-4o", temperature=0.7, use_cache=use_cache
+        )
 
         # Validate the response structure
         required_fields = ["strategy", "actions", "timeline", "cost", "effectiveness"]
@@ -149,9 +132,8 @@ Generate a detailed, actionable mitigation plan.""",
 
         return mitigation_plan
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse AI response as JSON: {e}")
-        logger.error(f"Response text: {response_text}")
+    except llm.LLMError as e:
+        logger.error(f"AI mitigation request failed: {e}")
         # Return a fallback mitigation plan
         return _get_fallback_mitigation(risk_data)
 
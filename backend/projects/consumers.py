@@ -0,0 +1,34 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .mitigation_queue import group_name
+from .models import Project
+
+
+class ProjectRiskConsumer(AsyncWebsocketConsumer):
+    """Pushes AI mitigations to a project's risk page as they are generated"""
+
+    async def connect(self):
+        project_id = self.scope["url_route"]["kwargs"]["project_id"]
+        if not await self.can_view(project_id):
+            await self.close()
+            return
+        self.room_group_name = group_name(project_id)
+        await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "room_group_name"):
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+
+    @database_sync_to_async
+    def can_view(self, project_id):
+        user = self.scope.get("user")
+        if not user or not user.is_authenticated:
+            return False
+        return Project.objects.filter(id=project_id, company=user.company).exists()
+
+    async def mitigation_ready(self, event):
+        await self.send(text_data=json.dumps({"type": "mitigation_ready", "risks": event["risks"]}))
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import calendar
 import json
 import logging
@@ -13,7 +14,7 @@ from django.db.models import Sum
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 
-from openai import OpenAI, OpenAIError
+from core import llm
 
 from .models import Expense, Project
 
@@ -32,32 +33,17 @@ class ForecastResult:
     generated_at: str
 
 
-def _call_openai_predictions(
-    *,
+def _prediction_request(
     project: Project,
     history_months: Sequence[date],
     history_values: Sequence[float],
     horizon_months: int,
-) -> Optional[List[float]]:
-    """
-    Ask OpenAI to generate predictions for the upcoming months.
-
-    Returns:
-        A list of floats (length == horizon_months) or None on failure.
-
-    The helper keeps the call wrapped in defensive logging so the caller can decide
-    when to fall back to in-house heuristics without leaking the implementation details.
-    """
+) -> Optional[Dict[str, object]]:
+    """The llm.complete_json() arguments for a forecast, or None when OpenAI is unconfigured."""
     api_key = getattr(settings, "OPENAI_API_KEY", None)
     if not api_key:
         return None
 
-    try:
-        client = OpenAI(api_key=api_key)
-    except Exception:
-        logger.exception("Failed to initialise OpenAI client")
-        return None
-
     model_name = getattr(settings, "OPENAI_FORECAST_MODEL", "gpt-4.1")
 
     history_payload = [
@@ -84,37 +70,72 @@ def _call_openai_predictions(
         }
     )
 
-    try:
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_input,
-                },
-            ],
-            response_format={"type": "json_object"},
-        )
-    except OpenAIError:
-        logger.exception("OpenAI request failed for project %s", project.id)
+    return {
+        "messages": [
+            {
+                "role": "system",
+                "content": prompt,
+            },
+            {
+                "role": "user",
+                "content": user_input,
+            },
+        ],
+        "model": model_name,
+        "temperature": 0,
+        "json_mode": True,
+    }
+
+
+def _call_openai_predictions(
+    *,
+    project: Project,
+    history_months: Sequence[date],
+    history_values: Sequence[float],
+    horizon_months: int,
+) -> Optional[List[float]]:
+    """
+    Ask OpenAI to generate predictions for the upcoming months.
+
+    Returns:
+        A list of floats (length == horizon_months) or None on failure.
+
+    The helper keeps the call wrapped in defensive logging so the caller can decide
+    when to fall back to in-house heuristics without leaking the implementation details.
+    """
+    request = _prediction_request(project, history_months, history_values, horizon_months)
+    if request is None:
         return None
-    except Exception:
-        logger.exception("Unexpected error during OpenAI forecast request")
+    try:
+        data = llm.complete_json(**request)
+    except llm.LLMError:
+        logger.exception("OpenAI forecast request failed for project %s", project.id)
         return None
+    return _clean_predictions(data, horizon_months)
 
-    message = response.choices[0].message.content
-    if not message:
-        logger.exception("Unexpected OpenAI response format: %s", response)
-        return None
 
+async def _acall_openai_predictions(
+    *,
+    project: Project,
+    history_months: Sequence[date],
+    history_values: Sequence[float],
+    horizon_months: int,
+) -> Optional[List[float]]:
+    """_call_openai_predictions() for async callers."""
+    request = _prediction_request(project, history_months, history_values, horizon_months)
+    if request is None:
+        return None
     try:
-        data = json.loads(message)
-    except json.JSONDecodeError:
-        logger.exception("Failed to parse OpenAI JSON response")
+        data = await llm.acomplete_json(**request)
+    except llm.LLMError:
+        logger.exception("OpenAI forecast request failed for project %s", project.id)
+        return None
+    return _clean_predictions(data, horizon_months)
+
+
+def _clean_predictions(data, horizon_months: int) -> Optional[List[float]]:
+    if not isinstance(data, dict):
+        logger.warning("Unexpected OpenAI response format: %s", data)
         return None
 
     predictions = data.get("predictions")
@@ -210,22 +231,15 @@ def _prepare_months(end_month: date, count: int) -> List[date]:
     return months
 
 
-def forecast_project_budget(
-    project: Project,
-    window_months: int = 4,
-    horizon_months: int = 3,
-) -> ForecastResult:
-    """
-    Compute a simple budget forecast for the given project using a linear trend over the
-    last `window_months` (default 4). Forecast uses a basic linear regression on the
-    aggregated monthly totals and projects `horizon_months` forward.
-    """
+def _check_window(window_months: int, horizon_months: int) -> None:
     if window_months < 1:
         raise ValueError("window_months must be >= 1")
     if horizon_months < 1:
         raise ValueError("horizon_months must be >= 1")
 
-    expense_qs = (
+
+def _monthly_expenses(project: Project):
+    return (
         Expense.objects.filter(project=project)
         .annotate(month=TruncMonth("date"))
         .values("month")
@@ -233,8 +247,11 @@ def forecast_project_budget(
         .order_by("month")
     )
 
+
+def _history(rows, window_months: int) -> Tuple[date, List[date], List[float]]:
+    """(latest month, window months, window totals) from the monthly expense rows."""
     month_totals: Dict[date, float] = {}
-    for row in expense_qs:
+    for row in rows:
         month_value = row["month"]
         month_dt = month_value.date() if hasattr(month_value, "date") else month_value
         month_totals[month_dt] = float(row["total"])
@@ -247,11 +264,23 @@ def forecast_project_budget(
     # Build the month list for the historical window and ensure zero for missing months
     history_months = _prepare_months(latest_month, window_months)
     history_values = [month_totals.get(month, 0.0) for month in history_months]
+    return latest_month, history_months, history_values
 
-    forecast_months = [
-        add_months(latest_month, step) for step in range(1, horizon_months + 1)
-    ]
-    variance_values: List[float] = []
+
+def forecast_project_budget(
+    project: Project,
+    window_months: int = 4,
+    horizon_months: int = 3,
+) -> ForecastResult:
+    """
+    Compute a simple budget forecast for the given project using a linear trend over the
+    last `window_months` (default 4). Forecast uses a basic linear regression on the
+    aggregated monthly totals and projects `horizon_months` forward.
+    """
+    _check_window(window_months, horizon_months)
+    latest_month, history_months, history_values = _history(
+        _monthly_expenses(project), window_months
+    )
 
     predictions = _call_openai_predictions(
         project=project,
@@ -259,6 +288,47 @@ def forecast_project_budget(
         history_values=history_values,
         horizon_months=horizon_months,
     )
+    return _forecast_result(
+        project, window_months, horizon_months,
+        latest_month, history_months, history_values, predictions,
+    )
+
+
+async def aforecast_project_budget(
+    project: Project,
+    window_months: int = 4,
+    horizon_months: int = 3,
+) -> ForecastResult:
+    """forecast_project_budget() for async views: async ORM and an awaited model call."""
+    _check_window(window_months, horizon_months)
+    rows = [row async for row in _monthly_expenses(project)]
+    latest_month, history_months, history_values = _history(rows, window_months)
+
+    predictions = await _acall_openai_predictions(
+        project=project,
+        history_months=history_months,
+        history_values=history_values,
+        horizon_months=horizon_months,
+    )
+    return _forecast_result(
+        project, window_months, horizon_months,
+        latest_month, history_months, history_values, predictions,
+    )
+
+
+def _forecast_result(
+    project: Project,
+    window_months: int,
+    horizon_months: int,
+    latest_month: date,
+    history_months: List[date],
+    history_values: List[float],
+    predictions: Optional[List[float]],
+) -> ForecastResult:
+    forecast_months = [
+        add_months(latest_month, step) for step in range(1, horizon_months + 1)
+    ]
+    variance_values: List[float] = []
 
     if predictions is not None:
         forecast_values = [max(0.0, value) for value in predictions]
@@ -294,6 +364,15 @@ def forecast_project_budget(
     )
 
 
+def _active_projects(company=None):
+    active_projects = Project.objects.filter(
+        status__in=["pending", "in_progress"]
+    ).select_related("company")
+    if company is not None:
+        active_projects = active_projects.filter(company=company)
+    return active_projects
+
+
 def forecast_for_active_projects(
     *,
     window_months: int = 4,
@@ -303,17 +382,34 @@ def forecast_for_active_projects(
     """
     Generate forecasts for all active projects (pending or in-progress) using the same window.
     """
-    active_projects = Project.objects.filter(
-        status__in=["pending", "in_progress"]
-    ).select_related("company")
-    if company is not None:
-        active_projects = active_projects.filter(company=company)
-
     results: List[ForecastResult] = []
-    for project in active_projects:
+    for project in _active_projects(company):
         results.append(
             forecast_project_budget(
                 project, window_months=window_months, horizon_months=horizon_months
             )
         )
     return results
+
+
+async def aforecast_for_active_projects(
+    *,
+    window_months: int = 4,
+    horizon_months: int = 3,
+    company=None,
+) -> List[ForecastResult]:
+    """
+    forecast_for_active_projects() for async views. The model calls for all projects are
+    in flight together (up to LLM_MAX_CONCURRENCY) instead of one after another.
+    """
+    projects = [project async for project in _active_projects(company)]
+    return list(
+        await asyncio.gather(
+            *(
+                aforecast_project_budget(
+                    project, window_months=window_months, horizon_months=horizon_months
+                )
+                for project in projects
+            )
+        )
+    )
@@ -1,11 +1,13 @@
 """
 Management command to generate AI mitigation plans for existing risks.
-Usage: python manage.py generate_ai_mitigations [--all] [--risk-id <id>]
+Usage: python manage.py generate_ai_mitigations [--all] [--risk-id <id>] [--pending]
 """
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from projects.models import Risk, AIMitigation
 from projects.ai_risk_mitigation import generate_ai_mitigation
+from projects.mitigation_queue import generate_batch
 
 
 class Command(BaseCommand):
@@ -22,11 +24,20 @@ class Command(BaseCommand):
             type=int,
             help="Generate AI mitigation for a specific risk ID",
         )
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Finish mitigations still pending from the background queue",
+        )
 
     def handle(self, *args, **options):
         all_risks = options.get("all")
         risk_id = options.get("risk_id")
 
+        if options.get("pending"):
+            self.generate_pending()
+            return
+
         if risk_id:
             # Generate for specific risk
             try:
@@ -83,6 +94,19 @@ class Command(BaseCommand):
                 )
             )
 
+    def generate_pending(self):
+        """Generate pending mitigations in batches, pushing each batch"""
+        risk_ids = list(
+            AIMitigation.objects.filter(status=AIMitigation.STATUS_PENDING).values_list(
+                "risk_id", flat=True
+            )
+        )
+        size = getattr(settings, "MITIGATION_BATCH_SIZE", 20)
+        done = 0
+        for start in range(0, len(risk_ids), size):
+            done += len(generate_batch(risk_ids[start : start + size]))
+        self.stdout.write(self.style.SUCCESS(f"Generated {done} pending AI mitigations"))
+
     def generate_for_risk(self, risk, force=False):
         """Generate AI mitigation for a single risk"""
         risk_data = {
@@ -109,6 +133,7 @@ class Command(BaseCommand):
                     "timeline": ai_plan["timeline"],
                     "cost": ai_plan["cost"],
                     "effectiveness": ai_plan["effectiveness"],
+                    "status": AIMitigation.STATUS_READY,
                 },
             )
 
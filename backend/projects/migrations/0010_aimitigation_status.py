@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_project_portfolio_project_program'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aimitigation',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='ready', max_length=20),
+        ),
+    ]
@@ -0,0 +1,174 @@
+"""
+Background generation of AI risk mitigations.
+
+Creating or regenerating a risk no longer waits for the model. The view
+saves the AIMitigation with status "pending" and calls `queue_mitigations()`,
+which hands the risk ids to a background worker (core/background.py):
+
+- ids that arrive within MITIGATION_BATCH_WINDOW seconds of each other are
+  collected into one batch (up to MITIGATION_BATCH_SIZE risks);
+- a batch loads its risks with one query, generates the plans in parallel
+  through the LLM gateway and writes them back with one bulk_update;
+- every finished batch is pushed over the Channels layer to the
+  "project_risks_<project id>" group (see projects/consumers.py), so open
+  risk pages replace the placeholder without polling.
+
+Pending rows live in the database, so anything lost with a restarted
+worker is picked up by `manage.py generate_ai_mitigations --pending`.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.utils import timezone
+
+from core.background import run_in_background
+
+from .ai_risk_mitigation import generate_ai_mitigation
+from .models import AIMitigation, Risk
+
+logger = logging.getLogger(__name__)
+
+PLAN_FIELDS = ["strategy", "actions", "timeline", "cost", "effectiveness"]
+PLACEHOLDER = {
+    "strategy": "AI analysis pending...",
+    "actions": ["Analyzing risk factors...", "Generating mitigation strategies..."],
+    "timeline": "TBD",
+    "cost": "Medium",
+    "effectiveness": "TBD",
+}
+
+_lock = threading.Lock()
+_queued = {}  # risk id -> None, an insertion-ordered set
+_draining = False
+
+
+def group_name(project_id):
+    return f"project_risks_{project_id}"
+
+
+def risk_payload(risk):
+    """The risk fields generate_ai_mitigation() expects"""
+    return {
+        "name": risk.name,
+        "description": risk.description,
+        "category": risk.category,
+        "impact": risk.impact,
+        "probability": risk.probability,
+        "level": risk.level,
+        "project_name": risk.project.name if risk.project else None,
+        "project_description": risk.project.description if risk.project else None,
+    }
+
+
+def mark_pending(risk):
+    """Create the placeholder mitigation, or flag an existing one as pending"""
+    mitigation, created = AIMitigation.objects.get_or_create(
+        risk=risk, defaults={**PLACEHOLDER, "status": AIMitigation.STATUS_PENDING}
+    )
+    if not created and mitigation.status != AIMitigation.STATUS_PENDING:
+        # Keep the previous plan on screen until the new one arrives
+        mitigation.status = AIMitigation.STATUS_PENDING
+        mitigation.save(update_fields=["status", "updated_at"])
+    risk.ai_mitigation = mitigation
+    return mitigation
+
+
+def queue_mitigations(risk_ids):
+    """Generate the pending mitigations of these risks once the transaction commits"""
+    run_in_background(_collect, list(risk_ids))
+
+
+def _collect(risk_ids):
+    """Add ids to the queue; the first worker to arrive drains it in batches"""
+    global _draining
+    with _lock:
+        _queued.update(dict.fromkeys(risk_ids))
+        if _draining:
+            return
+        _draining = True
+    eager = getattr(settings, "BACKGROUND_TASKS_EAGER", False)
+    try:
+        while True:
+            if not eager:
+                # Let risks created right after this one join the batch
+                time.sleep(getattr(settings, "MITIGATION_BATCH_WINDOW", 1.0))
+            with _lock:
+                batch = list(_queued)[: getattr(settings, "MITIGATION_BATCH_SIZE", 20)]
+                for risk_id in batch:
+                    del _queued[risk_id]
+                if not batch:
+                    _draining = False
+                    return
+            generate_batch(batch)
+    except BaseException:
+        with _lock:
+            _draining = False
+        raise
+
+
+def generate_batch(risk_ids, use_cache=False):
+    """
+    Generate, store and push the mitigations of pending risks; returns them.
+    The gateway cache is bypassed unless use_cache is set, so regenerating an
+    unchanged risk asks the model again instead of writing back the old plan.
+    """
+    risks = list(
+        Risk.objects.filter(
+            id__in=risk_ids, ai_mitigation__status=AIMitigation.STATUS_PENDING
+        ).select_related("project", "ai_mitigation")
+    )
+    if not risks:
+        return []
+
+    workers = max(1, min(len(risks), getattr(settings, "LLM_MAX_CONCURRENCY", 8)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_ai_mitigation, risk_payload(risk), use_cache) for risk in risks]
+
+    now = timezone.now()
+    mitigations = []
+    for risk, future in zip(risks, futures):
+        mitigation = risk.ai_mitigation
+        try:
+            plan = future.result()
+        except Exception:
+            logger.exception("AI mitigation failed for risk %s", risk.id)
+            mitigation.status = AIMitigation.STATUS_FAILED
+        else:
+            for field in PLAN_FIELDS:
+                setattr(mitigation, field, plan[field])
+            mitigation.status = AIMitigation.STATUS_READY
+        mitigation.updated_at = now
+        mitigations.append(mitigation)
+
+    AIMitigation.objects.bulk_update(mitigations, PLAN_FIELDS + ["status", "updated_at"])
+    push_mitigations(risks)
+    return mitigations
+
+
+def push_mitigations(risks):
+    """Send finished mitigations to the risk pages of their projects"""
+    from .serializers import AIMitigationSerializer
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    by_project = defaultdict(list)
+    for risk in risks:
+        by_project[risk.project_id].append({
+            "risk_id": risk.id,
+            "ai_mitigation": AIMitigationSerializer(risk.ai_mitigation).data,
+        })
+    for project_id, items in by_project.items():
+        try:
+            async_to_sync(channel_layer.group_send)(
+                group_name(project_id), {"type": "mitigation_ready", "risks": items}
+            )
+        except Exception:
+            # The rows are saved; clients still see them on the next fetch
+            logger.warning("Could not push mitigations for project %s", project_id, exc_info=True)
@@ -507,6 +507,15 @@ class AIMitigation(models.Model):
         ("High", "High"),
     ]
 
+    STATUS_PENDING = "pending"
+    STATUS_READY = "ready"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_READY, "Ready"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
     risk = models.OneToOneField(
         Risk, on_delete=models.CASCADE, related_name="ai_mitigation"
     )
@@ -515,6 +524,10 @@ class AIMitigation(models.Model):
     timeline = models.CharField(max_length=100)
     cost = models.CharField(max_length=20, choices=COST_CHOICES)
     effectiveness = models.CharField(max_length=50)  # e.g., "85%"
+    # Generation runs in the background (see mitigation_queue)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_READY, db_index=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,156 @@
+"""
+Queryset annotations for project rollups, and prefetches for the
+milestone/task trees.
+
+The annotations mirror the Python helpers on the models
+(Project.compute_progress_from_work, Task.compute_progress_from_subtasks, the
+expense and team counts used by the serializers) so that lists and
+dashboards can read them from a single query.
+
+The tree helpers load milestones, tasks (with their assignee and RACI
+users joined in) and subtasks as one flat query each and let the ORM stitch
+them together in memory, so a nested MilestoneSerializer costs three queries
+however many tasks there are. The RACI consulted/informed lists add one query
+each and are skipped when a sparse fieldset leaves them out.
+"""
+from django.db.models import (
+    Avg, Case, Count, DecimalField, F, FloatField, IntegerField,
+    OuterRef, Prefetch, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import Exact, GreaterThan
+
+from .models import Milestone, Task, Subtask, Expense, ProjectTeam
+
+
+def _count(queryset, group_by, condition=None):
+    """Correlated COUNT(*) subquery grouped on `group_by`"""
+    return Subquery(
+        queryset.order_by()
+        .values(group_by)
+        .annotate(total=Count("pk", filter=condition))
+        .values("total"),
+        output_field=IntegerField(),
+    )
+
+
+def _rounded_percent(part, whole):
+    """
+    round(part * 100 / whole) in integer arithmetic, halves to even like
+    Python's round(), so every backend agrees with the model helpers
+    """
+    scaled = part * 100
+    quotient = scaled / whole
+    twice_remainder = (scaled - quotient * whole) * 2
+    return Case(
+        When(GreaterThan(twice_remainder, whole), then=quotient + 1),
+        When(Exact(twice_remainder, whole), then=quotient + quotient % 2),
+        default=quotient,
+        output_field=IntegerField(),
+    )
+
+
+def task_progress_expression():
+    """Same result as Task.compute_progress_from_subtasks"""
+    subtasks = (
+        Subtask.objects.filter(task=OuterRef("pk"))
+        .order_by()
+        .values("task")
+        .annotate(percent=_rounded_percent(Count("pk", filter=Q(completed=True)), Count("pk")))
+        .values("percent")
+    )
+    return Coalesce(Subquery(subtasks, output_field=IntegerField()), F("progress"), output_field=IntegerField())
+
+
+def project_progress_expression():
+    """
+    Same result as Project.compute_progress_from_work, before the final
+    rounding: average of the (rounded) task progress, falling back to the
+    share of completed milestones.
+    """
+    task_average = Subquery(
+        Task.objects.filter(milestone__project=OuterRef("pk"))
+        .order_by()
+        .annotate(effective_progress=task_progress_expression())
+        .values("milestone__project")
+        .annotate(average=Avg("effective_progress"))
+        .values("average"),
+        output_field=FloatField(),
+    )
+    milestones = Milestone.objects.filter(project=OuterRef("pk"))
+    milestone_ratio = (
+        Cast(_count(milestones, "project", Q(status="completed")), FloatField())
+        * 100.0
+        / Cast(_count(milestones, "project"), FloatField())
+    )
+    return Coalesce(task_average, milestone_ratio, Value(0.0), output_field=FloatField())
+
+
+def active_team_count_expression():
+    return Coalesce(
+        _count(ProjectTeam.objects.filter(project=OuterRef("pk"), is_active=True), "project"),
+        0,
+    )
+
+
+def expenses_total_expression():
+    money = DecimalField(max_digits=14, decimal_places=2)
+    return Coalesce(
+        Subquery(
+            Expense.objects.filter(project=OuterRef("pk"))
+            .order_by()
+            .values("project")
+            .annotate(total=Sum("amount"))
+            .values("total"),
+            output_field=money,
+        ),
+        Value(0),
+        output_field=money,
+    )
+
+
+def with_rollups(queryset):
+    """
+    Annotate a Project queryset with progress_value, active_team_count and
+    expenses_sum. Each is a correlated subquery, so the row count is unchanged
+    and no joins multiply.
+    """
+    return queryset.annotate(
+        progress_value=project_progress_expression(),
+        active_team_count=active_team_count_expression(),
+        expenses_sum=expenses_total_expression(),
+    )
+
+
+def rounded_progress(value):
+    """Round an annotated progress value the way compute_progress_from_work does"""
+    return int(round(value or 0))
+
+
+TASK_USER_FIELDS = ["assigned_to", "raci_responsible", "raci_accountable"]
+TASK_M2M_FIELDS = {"raci_consulted_ids": "raci_consulted", "raci_informed_ids": "raci_informed"}
+
+
+def wants(fields, name):
+    """Whether a sparse fieldset (None means everything) includes a task field"""
+    return fields is None or name in fields
+
+
+def with_task_details(queryset, fields=None):
+    """
+    Join the users a TaskSerializer reads and prefetch subtasks and, when
+    rendered, the RACI lists. `fields` is the set of task fields requested.
+    """
+    queryset = queryset.select_related(*TASK_USER_FIELDS)
+    if wants(fields, "subtasks"):
+        queryset = queryset.prefetch_related("subtasks")
+    return queryset.prefetch_related(
+        *(relation for name, relation in TASK_M2M_FIELDS.items() if wants(fields, name))
+    )
+
+
+def with_task_tree(queryset, fields=None):
+    """Prefetch the task tree of a Milestone queryset (see with_task_details)"""
+    return queryset.prefetch_related(
+        Prefetch("tasks", queryset=with_task_details(Task.objects.all(), fields))
+    )
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from django.db.models import Sum
 from django.contrib.auth import get_user_model
 from .models import (
@@ -19,11 +20,49 @@ from .models import (
     TrainingMaterial,
     TimeEntry,
 )
+from .queries import rounded_progress
 
 User = get_user_model()
 
 
-class TaskSerializer(serializers.ModelSerializer):
+def sparse_fields(request, prefix=""):
+    """
+    Field names requested under `prefix` with ?fields=, or None for all of
+    them. ?fields=id,name,tasks.title asks for id and name and, of each
+    task, only its title; naming a nested field without sub-fields keeps it whole.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    names = set()
+    for item in (request.query_params.get("fields") or "").split(","):
+        item = item.strip()
+        if item.startswith(prefix) and len(item) > len(prefix):
+            names.add(item[len(prefix):].split(".")[0])
+    return names or None
+
+
+class SparseFieldsetMixin:
+    """Renders only the fields picked with ?fields= (see sparse_fields)"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = sparse_fields(self.context.get("request"), self.field_path())
+        if wanted is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in wanted}
+
+    def field_path(self):
+        """Dotted prefix of this serializer inside the root, e.g. "milestones.tasks." """
+        names = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                names.append(node.field_name)
+            node = node.parent
+        return "".join(f"{name}." for name in reversed(names))
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     assigned_to_email = serializers.ReadOnlyField(source="assigned_to.email")
     assigned_to_name = serializers.SerializerMethodField()
     assigned_to_role = serializers.ReadOnlyField(source="assigned_to.role")
@@ -89,7 +128,7 @@ class SubtaskSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class MilestoneSerializer(serializers.ModelSerializer):
+class MilestoneSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
 
     class Meta:
@@ -110,7 +149,7 @@ class MilestoneSerializer(serializers.ModelSerializer):
         read_only_fields = ["created_at", "updated_at"]
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     milestones = MilestoneSerializer(many=True, read_only=True)
     expenses_total = serializers.SerializerMethodField()
     expenses = serializers.SerializerMethodField()
@@ -181,7 +220,11 @@ class ProjectSerializer(serializers.ModelSerializer):
 
 
 class ProjectListSerializer(serializers.ModelSerializer):
-    """Lightweight serializer for project lists - optimized for performance"""
+    """
+    Lightweight serializer for project lists. Reads the rollups annotated by
+    projects.queries.with_rollups and falls back to per-object queries for
+    instances that were loaded without them.
+    """
 
     progress = serializers.SerializerMethodField()
     team_members_count = serializers.SerializerMethodField()
@@ -208,15 +251,21 @@ class ProjectListSerializer(serializers.ModelSerializer):
         ]
 
     def get_progress(self, obj):
+        if hasattr(obj, "progress_value"):
+            return rounded_progress(obj.progress_value)
         try:
             return obj.compute_progress_from_work()
         except Exception:
             return 0
 
     def get_team_members_count(self, obj):
+        if hasattr(obj, "active_team_count"):
+            return obj.active_team_count
         return obj.team_members.filter(is_active=True).count()
 
     def get_expenses_total(self, obj):
+        if hasattr(obj, "expenses_sum"):
+            return obj.expenses_sum
         total = obj.expenses.aggregate(total=Sum("amount")).get("total")
         return total or 0
 
@@ -348,10 +397,11 @@ class AIMitigationSerializer(serializers.ModelSerializer):
             "timeline",
             "cost",
             "effectiveness",
+            "status",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_at", "updated_at"]
+        read_only_fields = ["status", "created_at", "updated_at"]
 
 
 class ManualMitigationSerializer(serializers.ModelSerializer):
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from .models import (
@@ -10,6 +11,7 @@ from .models import (
     ProjectTeam,
     ApprovalStage,
 )
+from .timeline_cache import OWNER_FIELDS, invalidate_timeline, invalidate_user_timelines
 
 
 @receiver(post_save, sender=Subtask)
@@ -214,3 +216,33 @@ def log_approval_stage_changes(sender, instance, created, **kwargs):
                 )
     except Exception:
         pass
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_timeline(sender, instance, **kwargs):
+    invalidate_timeline(instance.pk)
+
+
+@receiver(post_save, sender=Milestone)
+@receiver(post_delete, sender=Milestone)
+def invalidate_milestone_timeline(sender, instance, **kwargs):
+    invalidate_timeline(instance.project_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_timeline(sender, instance, **kwargs):
+    project_id = (
+        Milestone.objects.filter(pk=instance.milestone_id)
+        .values_list("project_id", flat=True)
+        .first()
+    )
+    invalidate_timeline(project_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_owner_timelines(sender, instance, created, update_fields=None, **kwargs):
+    """Timelines show owner names and roles"""
+    if not created and (update_fields is None or OWNER_FIELDS & set(update_fields)):
+        invalidate_user_timelines(instance.pk)
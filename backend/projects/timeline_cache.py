@@ -0,0 +1,168 @@
+"""
+Cached timeline payloads for the Gantt view.
+
+The timeline of a project is the same for every viewer, so it is rendered
+once per change instead of once per request:
+
+- the payload is built with three queries (milestones, tasks with their
+  owners) and stored as JSON bytes, plus a gzipped copy when it is large
+  enough to be worth it, under a per-project version;
+- projects/signals.py moves the version on every Project, Milestone and
+  Task write, and on user saves that touch a name or role shown as an
+  owner; timeline_service does the same after its bulk UPDATEs, which
+  bypass signals; a stale payload is simply never read again;
+- the ETag is a hash of the bytes, so clients that already hold the
+  current payload get a 304 without a body. The gzipped copy is a
+  different representation and carries its own ETag.
+"""
+import gzip
+import hashlib
+import json
+import uuid
+from datetime import date
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from .models import Milestone, Project, Task
+
+TIMELINE_TIMEOUT = 60 * 60 * 24
+# Smaller payloads are not worth the CPU of compressing
+GZIP_MIN_BYTES = 1024
+
+MILESTONE_STATUS = {
+    "completed": "completed",
+    "in_progress": "in-progress",
+    "pending": "not-started",
+    "on_hold": "not-started",
+}
+TASK_STATUS = {
+    "done": "completed",
+    "in_progress": "in-progress",
+    "todo": "not-started",
+    "blocked": "not-started",
+}
+PRIORITY = {"low": "Low", "medium": "Normal", "high": "High", "urgent": "High"}
+# User fields that appear in a timeline's owners
+OWNER_FIELDS = {"first_name", "email", "role"}
+
+
+def _version_key(project_id):
+    return f"projects:timeline:{project_id}:version"
+
+
+def timeline_version(project_id):
+    return cache.get_or_set(_version_key(project_id), lambda: uuid.uuid4().hex[:12], None)
+
+
+def invalidate_timeline(*project_ids):
+    """Move the projects to a new timeline version"""
+    cache.delete_many([_version_key(project_id) for project_id in project_ids if project_id])
+
+
+def invalidate_user_timelines(user_id):
+    """Move the timelines that show this user as project creator or task owner"""
+    created = Project.objects.filter(created_by_id=user_id).values_list("pk", flat=True)
+    owned = (
+        Task.objects.filter(
+            Q(assigned_to_id=user_id) | Q(raci_responsible_id=user_id) | Q(raci_accountable_id=user_id)
+        )
+        .order_by()
+        .values_list("milestone__project_id", flat=True)
+        .distinct()
+    )
+    invalidate_timeline(*set(created).union(owned))
+
+
+def ddmmyyyy(d: date | None) -> str:
+    if not d:
+        return ""
+    return d.strftime("%d/%m/%Y")
+
+
+def build_timeline(project):
+    """The timeline dict served by ProjectViewSet.timeline"""
+    milestones = (
+        Milestone.objects.filter(project=project)
+        .prefetch_related("tasks__assigned_to", "tasks__raci_responsible", "tasks__raci_accountable")
+        .order_by("order_index", "id")
+    )
+
+    # Default owner fallback from project creator
+    creator = project.created_by if project.created_by_id else None
+    default_owner_name = (getattr(creator, "first_name", None) or getattr(creator, "email", "")) if creator else ""
+    default_owner_role = getattr(creator, "role", "") if creator else ""
+
+    items = []
+    for m in milestones:
+        # Milestone marker entry (diamond)
+        items.append({
+            "name": m.name,
+            "completed": m.status == "completed",
+            "details": {
+                "id": f"m-{m.id}",
+                "subject": m.name,
+                "type": "MILESTONE",
+                "status": MILESTONE_STATUS.get((m.status or "").lower(), "not-started"),
+                "priority": "Normal",
+                "startDate": m.start_date,
+                "endDate": m.end_date,
+                "color": "#00308F",
+                "owner": {"name": default_owner_name, "avatar": "", "role": default_owner_role},
+            },
+        })
+
+        # Tasks as timeline bars under the milestone (prefetched in Task ordering)
+        for t in m.tasks.all():
+            owner = t.assigned_to or t.raci_responsible or t.raci_accountable
+            if owner:
+                owner_name = getattr(owner, "first_name", None) or getattr(owner, "email", None) or default_owner_name
+                owner_role = getattr(owner, "role", default_owner_role)
+            else:
+                owner_name, owner_role = default_owner_name, default_owner_role
+            items.append({
+                "name": t.title,
+                "completed": t.status == "done" or t.progress == 100,
+                "details": {
+                    "id": f"t-{t.id}",
+                    "subject": t.title,
+                    "type": "TASK",
+                    "status": TASK_STATUS.get((t.status or "").lower(), "not-started"),
+                    "priority": PRIORITY.get((t.priority or "").lower(), "Normal"),
+                    # Use task start_date, fallback to milestone start, then project start
+                    "startDate": t.start_date or m.start_date or project.start_date,
+                    # Use task due_date, fallback to milestone end
+                    "endDate": t.due_date or m.end_date,
+                    "color": "#406dc7",
+                    "owner": {"name": owner_name, "avatar": "", "role": owner_role},
+                },
+            })
+
+    return {
+        "id": str(project.id),
+        "title": project.name,
+        "dateline": ddmmyyyy(project.end_date),
+        "milestones": items,
+        "dependencies": [],
+    }
+
+
+def get_timeline_payload(project):
+    """
+    The rendered timeline as {"body", "gzip", "etag", "gzip_etag"}: JSON
+    bytes, their gzipped copy (or None) and the quoted ETag of each.
+    """
+    key = f"projects:timeline:{project.id}:{timeline_version(project.id)}"
+    payload = cache.get(key)
+    if payload is None:
+        body = json.dumps(build_timeline(project), cls=DjangoJSONEncoder).encode("utf-8")
+        digest = hashlib.sha1(body).hexdigest()
+        payload = {
+            "body": body,
+            "gzip": gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None,
+            "etag": '"%s"' % digest,
+            "gzip_etag": '"%s-gzip"' % digest,
+        }
+        cache.set(key, payload, TIMELINE_TIMEOUT)
+    return payload
@@ -0,0 +1,172 @@
+"""
+Bulk timeline shifting for projects, milestones and tasks.
+
+Every level is moved with a single UPDATE ... SET date = date + interval,
+so model save() and the per-row post_save activity signals are bypassed.
+Instead one summarized ProjectActivity is written per affected project
+and the cached timeline payloads of those projects are invalidated.
+"""
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count, DateField, ExpressionWrapper, F, Max, Min
+
+from .models import Project, Milestone, Task, ProjectActivity
+from .timeline_cache import invalidate_timeline
+
+
+# (start field, end field) per model
+TIMELINE_FIELDS = {
+    Project: ("start_date", "end_date"),
+    Milestone: ("start_date", "end_date"),
+    Task: ("start_date", "due_date"),
+}
+
+
+def _shifted(field_name, delta):
+    return ExpressionWrapper(F(field_name) + delta, output_field=DateField())
+
+
+def _fields_to_shift(model, end_only):
+    start_field, end_field = TIMELINE_FIELDS[model]
+    return [end_field] if end_only else [start_field, end_field]
+
+
+def _preview(queryset, fields, delta):
+    """Row count and date range before/after the shift, without writing"""
+    aggregates = {"rows": Count("pk")}
+    for field in fields:
+        aggregates[f"{field}__min"] = Min(field)
+        aggregates[f"{field}__max"] = Max(field)
+    result = queryset.order_by().aggregate(**aggregates)
+
+    preview = {"rows": result["rows"]}
+    for field in fields:
+        old_min, old_max = result[f"{field}__min"], result[f"{field}__max"]
+        preview[field] = {
+            "old_min": str(old_min) if old_min else None,
+            "old_max": str(old_max) if old_max else None,
+            "new_min": str(old_min + delta) if old_min else None,
+            "new_max": str(old_max + delta) if old_max else None,
+        }
+    return preview
+
+
+def _apply(queryset, fields, delta):
+    """One UPDATE statement for all rows and all shifted fields"""
+    return queryset.order_by().update(**{field: _shifted(field, delta) for field in fields})
+
+
+def shift_timeline(
+    delta,
+    projects=None,
+    milestones=None,
+    tasks=None,
+    end_only=True,
+    user=None,
+    dry_run=False,
+    summary=None,
+):
+    """
+    Shift the given querysets by `delta` (whole days).
+
+    Args:
+        delta: timedelta to move dates by; negative values pull dates in
+        projects / milestones / tasks: querysets to shift (any may be None)
+        end_only: only move end/due dates, otherwise move start and end
+        user: recorded on the summarized activity rows
+        dry_run: return what would change without writing anything
+        summary: optional activity message; a default one is generated
+
+    Returns a dict with per-level row counts, a date-range preview and
+    the number of activity records written.
+    """
+    delta = timedelta(days=delta.days)
+    levels = [
+        ("projects", Project, projects),
+        ("milestones", Milestone, milestones),
+        ("tasks", Task, tasks),
+    ]
+
+    result = {
+        "dry_run": dry_run,
+        "adjusted_by_days": delta.days,
+        "end_date_only": end_only,
+    }
+
+    if dry_run:
+        for name, model, queryset in levels:
+            if queryset is not None:
+                result[name] = _preview(queryset, _fields_to_shift(model, end_only), delta)
+        return result
+
+    # Collect the affected projects before dates move
+    project_ids = set()
+    if projects is not None:
+        project_ids.update(projects.values_list("id", flat=True))
+    if milestones is not None:
+        project_ids.update(milestones.values_list("project_id", flat=True))
+    if tasks is not None:
+        project_ids.update(tasks.values_list("milestone__project_id", flat=True))
+
+    with transaction.atomic():
+        for name, model, queryset in levels:
+            if queryset is not None:
+                result[name] = {"rows": _apply(queryset, _fields_to_shift(model, end_only), delta)}
+
+        action = "extended" if delta.days > 0 else "reduced"
+        message = summary or "Timeline {} by {} day(s): {}".format(
+            action,
+            abs(delta.days),
+            ", ".join(
+                f"{result[name]['rows']} {name}"
+                for name, _, queryset in levels
+                if queryset is not None
+            ),
+        )
+        project_type = ContentType.objects.get_for_model(Project)
+        ProjectActivity.objects.bulk_create([
+            ProjectActivity(
+                project_id=project_id,
+                user=user,
+                action="updated",
+                message=message[:512],
+                target_content_type=project_type,
+                target_object_id=project_id,
+            )
+            for project_id in sorted(project_ids)
+        ])
+
+    # The UPDATEs above bypass the signals that move the timeline version
+    invalidate_timeline(*project_ids)
+    result["activities_logged"] = len(project_ids)
+    return result
+
+
+def shift_project_timeline(project_ids, delta, end_only=True, include_milestones=True,
+                           include_tasks=True, user=None, dry_run=False):
+    """Shift one or more projects and, optionally, everything scheduled inside them"""
+    projects = Project.objects.filter(id__in=project_ids)
+    return shift_timeline(
+        delta,
+        projects=projects,
+        milestones=Milestone.objects.filter(project_id__in=project_ids) if include_milestones else None,
+        tasks=Task.objects.filter(milestone__project_id__in=project_ids) if include_tasks else None,
+        end_only=end_only,
+        user=user,
+        dry_run=dry_run,
+    )
+
+
+def shift_milestone_timeline(milestone_ids, delta, end_only=True, cascade_to_tasks=True,
+                             user=None, dry_run=False):
+    """Shift milestones and, optionally, their tasks"""
+    return shift_timeline(
+        delta,
+        milestones=Milestone.objects.filter(id__in=milestone_ids),
+        tasks=Task.objects.filter(milestone_id__in=milestone_ids) if cascade_to_tasks else None,
+        end_only=end_only,
+        user=user,
+        dry_run=dry_run,
+    )
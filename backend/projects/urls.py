@@ -23,6 +23,7 @@ from .views import (
 
 # Methodology views
 from .views_methodology import MethodologyListView, MethodologyDetailView, MethodologyTemplateView
+from .views import aproject_forecast, aproject_forecasts
 
 router = DefaultRouter()
 # CHANGED: Empty prefix because core/urls.py already has "api/v1/projects/"
@@ -48,6 +49,9 @@ router.register(r'budget-items', BudgetItemViewSet, basename='budget-item')
 router.register(r"", ProjectViewSet, basename="project")  # ← MOVED TO END
 
 urlpatterns = [
+    # Async forecast variants for ASGI; ahead of the router's project catch-all
+    path("forecasts/async/", aproject_forecasts, name="project-forecasts-async"),
+    path("<int:pk>/forecast/async/", aproject_forecast, name="project-forecast-async"),
     path("", include(router.urls)),
     path("", include("projects.document_urls")),
     path("", include("projects.training_material_urls")),
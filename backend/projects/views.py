@@ -4,6 +4,7 @@ from .methodology_service import apply_methodology_template
 
 from rest_framework import viewsets
 from core.ai_utils import RiskDetector, BudgetForecaster, ProjectHealthScorer
+from core.pagination import KeysetPagination
 from rest_framework import serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -11,7 +12,8 @@ from rest_framework import status  # Keep this
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import HasRole
 from django.db import models
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils import timezone
 from .models import (
     Project,
@@ -23,7 +25,6 @@ from .models import (
     ApprovalStage,
     Upload,
     Risk,
-    AIMitigation,
     ManualMitigation,
     ProjectTeam,
     ProjectEvent,
@@ -32,6 +33,9 @@ from .models import (
     TimeEntry,
 )
 from .forecasting import forecast_for_active_projects, forecast_project_budget
+from .mitigation_queue import mark_pending, queue_mitigations
+from .queries import wants, with_rollups, with_task_details, with_task_tree
+from .timeline_cache import get_timeline_payload
 from .serializers import (
     ProjectSerializer,
     ProjectListSerializer,
@@ -55,6 +59,7 @@ from .serializers import (
     TimeEntrySerializer,
     TimeEntrySummarySerializer,
     ProjectTeamWithRateSerializer,
+    sparse_fields,
 )
 
 class CompanyScopedQuerysetMixin:
@@ -111,6 +116,7 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         .prefetch_related("team_members")
     )
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -124,7 +130,7 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter projects based on team membership - supports cross-company collaboration."""
-        from django.db.models import Q
+        from django.db.models import Exists, OuterRef, Q
 
         user = self.request.user
         
@@ -134,22 +140,16 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         # SuperAdmins see everything
         if user.role == "superadmin":
             qs = Project.objects.all()
-            portfolio = self.request.query_params.get('portfolio')
-            if portfolio:
-                qs = qs.filter(portfolio_id=portfolio)
-            program = self.request.query_params.get('program')
-            if program:
-                qs = qs.filter(program_id=program)
-            return qs
-
-        # For ALL other users: show projects where they are team members OR creators
-        # This allows freelancers/consultants to work across multiple companies
-        # NOTE: We bypass CompanyScopedQuerysetMixin to allow cross-company access
-        qs = Project.objects.filter(
-            Q(team_members__user=user, team_members__is_active=True)
-            | Q(created_by=user)
-        ).select_related("company", "created_by").prefetch_related("team_members").distinct()
-        
+        else:
+            # For ALL other users: show projects where they are team members OR creators
+            # This allows freelancers/consultants to work across multiple companies
+            # NOTE: We bypass CompanyScopedQuerysetMixin to allow cross-company access
+            # EXISTS instead of a join + DISTINCT keeps one row per project
+            membership = ProjectTeam.objects.filter(
+                project=OuterRef("pk"), user=user, is_active=True
+            )
+            qs = Project.objects.filter(Q(Exists(membership)) | Q(created_by=user))
+
         portfolio = self.request.query_params.get('portfolio')
         if portfolio:
             qs = qs.filter(portfolio_id=portfolio)
@@ -157,7 +157,16 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         program = self.request.query_params.get('program')
         if program:
             qs = qs.filter(program_id=program)
-        
+
+        if self.action == "list":
+            # Progress, team size and spend come from annotations, not per-row queries
+            return with_rollups(qs)
+        qs = qs.select_related("company", "created_by").prefetch_related("team_members")
+        if self.action == "retrieve" and wants(sparse_fields(self.request), "milestones"):
+            milestones = with_task_tree(
+                Milestone.objects.all(), sparse_fields(self.request, "milestones.tasks.")
+            )
+            qs = qs.prefetch_related(Prefetch("milestones", queryset=milestones))
         return qs
 
     def perform_create(self, serializer):
@@ -421,6 +430,9 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     def timeline(self, request, pk=None):
         """Return timeline data for a project including milestones and tasks.
 
+        Served from a cached, pre-serialized payload (see timeline_cache) with
+        an ETag, gzipped when the client accepts it.
+
         Shape tailored for the frontend timeline component:
         {
           id: str,
@@ -445,142 +457,24 @@ class ProjectViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
           ]
         }
         """
-        from datetime import date
-
         project = self.get_object()
+        payload = get_timeline_payload(project)
 
-        # Helper mappers
-        def map_milestone_status(s: str) -> str:
-            return {
-                "completed": "completed",
-                "in_progress": "in-progress",
-                "pending": "not-started",
-                "on_hold": "not-started",
-            }.get((s or "").lower(), "not-started")
-
-        def map_task_status(s: str) -> str:
-            return {
-                "done": "completed",
-                "in_progress": "in-progress",
-                "todo": "not-started",
-                "blocked": "not-started",
-            }.get((s or "").lower(), "not-started")
-
-        def map_priority(p: str) -> str:
-            return {
-                "low": "Low",
-                "medium": "Normal",
-                "high": "High",
-                "urgent": "High",
-            }.get((p or "").lower(), "Normal")
-
-        def ddmmyyyy(d: date | None) -> str:
-            if not d:
-                return ""
-            return d.strftime("%d/%m/%Y")
-
-        milestones_qs = (
-            Milestone.objects.filter(project=project)
-            .select_related("project")
-            .prefetch_related(
-                "tasks",
-                "tasks__assigned_to",
-                "tasks__raci_responsible",
-                "tasks__raci_accountable",
-            )
-            .order_by("order_index", "id")
-        )
-
-        timeline_items = []
-
-        # Default owner fallback from project creator
-        default_owner_name = (
-            getattr(project.created_by, "first_name", None)
-            or getattr(project.created_by, "email", "")
-            if project.created_by_id
-            else ""
-        )
-        default_owner_role = (
-            getattr(project.created_by, "role", "") if project.created_by_id else ""
-        )
-
-        for m in milestones_qs:
-            # Milestone marker entry (diamond)
-            timeline_items.append(
-                {
-                    "name": m.name,
-                    "completed": (m.status == "completed"),
-                    "details": {
-                        "id": f"m-{m.id}",
-                        "subject": m.name,
-                        "type": "MILESTONE",
-                        "status": map_milestone_status(m.status),
-                        "priority": "Normal",
-                        "startDate": m.start_date,
-                        "endDate": m.end_date,
-                        "color": "#00308F",
-                        "owner": {
-                            "name": default_owner_name,
-                            "avatar": "",
-                            "role": default_owner_role,
-                        },
-                    },
-                }
-            )
-
-            # Tasks as timeline bars under the milestone
-            for t in m.tasks.all().order_by("order_index", "id"):
-                owner_user = (
-                    t.assigned_to or t.raci_responsible or t.raci_accountable or None
-                )
-                owner_name = (
-                    getattr(owner_user, "first_name", None)
-                    or getattr(owner_user, "email", None)
-                    or default_owner_name
-                    if owner_user
-                    else default_owner_name
-                )
-                owner_role = (
-                    getattr(owner_user, "role", default_owner_role)
-                    if owner_user
-                    else default_owner_role
-                )
+        zipped = payload["gzip"] and "gzip" in request.headers.get("Accept-Encoding", "")
+        etag = payload["gzip_etag"] if zipped else payload["etag"]
 
-                timeline_items.append(
-                    {
-                        "name": t.title,
-                        "completed": (t.status == "done" or t.progress == 100),
-                        "details": {
-                            "id": f"t-{t.id}",
-                            "subject": t.title,
-                            "type": "TASK",
-                            "status": map_task_status(t.status),
-                            "priority": map_priority(t.priority),
-                            # Use task start_date, fallback to milestone start, then project start
-                            "startDate": t.start_date
-                            or m.start_date
-                            or project.start_date,
-                            # Use task due_date, fallback to milestone end
-                            "endDate": t.due_date or m.end_date,
-                            "color": "#406dc7",
-                            "owner": {
-                                "name": owner_name,
-                                "avatar": "",
-                                "role": owner_role,
-                            },
-                        },
-                    }
-                )
-
-        data = {
-            "id": str(project.id),
-            "title": project.name,
-            "dateline": ddmmyyyy(project.end_date),
-            "milestones": timeline_items,
-            "dependencies": [],
-        }
-
-        return Response(data, status=status.HTTP_200_OK)
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        elif zipped:
+            response = HttpResponse(payload["gzip"], content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(payload["body"], content_type="application/json")
+        response["ETag"] = etag
+        response["Vary"] = "Accept-Encoding"
+        # Any viewer may reuse it, but must revalidate with the ETag first
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
     @action(detail=True, methods=["get"], url_path="team")
     def get_team(self, request, pk=None):
@@ -880,6 +774,11 @@ class MilestoneViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         program_id = self.request.query_params.get("program")
         if program_id:
             qs = qs.filter(project__program_id=program_id)
+
+        # Tasks, their users and subtasks come in flat prefetch queries;
+        # ?fields= (e.g. for the Gantt view) trims both the payload and the prefetches
+        if wants(sparse_fields(self.request), "tasks"):
+            qs = with_task_tree(qs, sparse_fields(self.request, "tasks."))
         return qs
 
 
@@ -908,7 +807,7 @@ class TaskViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         milestone_id = self.request.query_params.get("milestone")
         if milestone_id:
             qs = qs.filter(milestone_id=milestone_id)
-        return qs
+        return with_task_details(qs, sparse_fields(self.request))
 
 
 class SubtaskViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
@@ -1359,59 +1258,14 @@ class RiskViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         response = super().create(request, *args, **kwargs)
 
         if response.status_code == 201:
-            risk = Risk.objects.get(id=response.data["id"])
+            risk = Risk.objects.select_related("project").get(id=response.data["id"])
 
-            # Generate AI mitigation using GPT
-            from .ai_risk_mitigation import generate_ai_mitigation
-
-            try:
-                # Prepare risk data for AI generation
-                risk_data = {
-                    "name": risk.name,
-                    "description": risk.description,
-                    "category": risk.category,
-                    "impact": risk.impact,
-                    "probability": risk.probability,
-                    "level": risk.level,
-                    "project_name": risk.project.name if risk.project else None,
-                    "project_description": (
-                        risk.project.description if risk.project else None
-                    ),
-                }
-
-                # Generate AI mitigation
-                ai_plan = generate_ai_mitigation(risk_data)
-
-                # Create AI mitigation with generated data
-                AIMitigation.objects.create(
-                    risk=risk,
-                    strategy=ai_plan["strategy"],
-                    actions=ai_plan["actions"],
-                    timeline=ai_plan["timeline"],
-                    cost=ai_plan["cost"],
-                    effectiveness=ai_plan["effectiveness"],
-                )
-            except Exception as e:
-                # Fallback to placeholder if AI generation fails
-                import logging
-
-                logger = logging.getLogger(__name__)
-                logger.error(f"Failed to generate AI mitigation: {e}")
-
-                AIMitigation.objects.create(
-                    risk=risk,
-                    strategy="AI analysis pending...",
-                    actions=[
-                        "Analyzing risk factors...",
-                        "Generating mitigation strategies...",
-                    ],
-                    timeline="TBD",
-                    cost="Medium",
-                    effectiveness="TBD",
-                )
+            # The plan is generated in the background and pushed when ready
+            mark_pending(risk)
+            queue_mitigations([risk.id])
 
             # Create empty manual mitigation
-            manual = ManualMitigation.objects.create(risk=risk, created_by=request.user)
+            ManualMitigation.objects.create(risk=risk, created_by=request.user)
 
             # Log activity
             try:
@@ -1425,8 +1279,7 @@ class RiskViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
             except Exception:
                 pass
 
-        # Re-serialize to include nested mitigations
-        if response.status_code == 201:
+            # Re-serialize to include nested mitigations
             data = RiskSerializer(risk, context={"request": request}).data
             return Response(data, status=status.HTTP_201_CREATED)
         return response
@@ -1453,64 +1306,26 @@ class RiskViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="regenerate-ai-mitigation")
     def regenerate_ai_mitigation(self, request, pk=None):
         """Regenerate AI mitigation plan for a risk."""
-        from .ai_risk_mitigation import generate_ai_mitigation
-        import logging
-
-        logger = logging.getLogger(__name__)
         risk = self.get_object()
 
+        # Queued like a new risk; the response carries the pending status
+        mark_pending(risk)
+        queue_mitigations([risk.id])
+
+        # Log activity
         try:
-            # Prepare risk data for AI generation
-            risk_data = {
-                "name": risk.name,
-                "description": risk.description,
-                "category": risk.category,
-                "impact": risk.impact,
-                "probability": risk.probability,
-                "level": risk.level,
-                "project_name": risk.project.name if risk.project else None,
-                "project_description": (
-                    risk.project.description if risk.project else None
-                ),
-            }
-
-            # Generate AI mitigation
-            ai_plan = generate_ai_mitigation(risk_data)
-
-            # Update or create AI mitigation
-            ai_mitigation, created = AIMitigation.objects.update_or_create(
-                risk=risk,
-                defaults={
-                    "strategy": ai_plan["strategy"],
-                    "actions": ai_plan["actions"],
-                    "timeline": ai_plan["timeline"],
-                    "cost": ai_plan["cost"],
-                    "effectiveness": ai_plan["effectiveness"],
-                },
+            ProjectActivity.objects.create(
+                project=risk.project,
+                user=request.user,
+                action="updated",
+                message=f"AI mitigation regenerated for risk '{risk.name}'",
+                target=risk,
             )
+        except Exception:
+            pass
 
-            # Log activity
-            try:
-                ProjectActivity.objects.create(
-                    project=risk.project,
-                    user=request.user,
-                    action="updated",
-                    message=f"AI mitigation regenerated for risk '{risk.name}'",
-                    target=risk,
-                )
-            except Exception:
-                pass
-
-            # Return updated risk with new AI mitigation
-            serializer = RiskSerializer(risk, context={"request": request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            logger.error(f"Failed to regenerate AI mitigation: {e}", exc_info=True)
-            return Response(
-                {"error": f"Failed to regenerate AI mitigation: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        serializer = RiskSerializer(risk, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
 
 class ManualMitigationViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
@@ -2108,3 +1923,59 @@ from rest_framework.decorators import api_view
 from datetime import datetime
 
 
+# ============================================
+# ASYNC FORECASTS (ASGI variants, see core/async_views.py)
+# ============================================
+
+from django.http import JsonResponse
+from core.async_views import async_api_view
+from .forecasting import aforecast_for_active_projects, aforecast_project_budget
+
+
+def _forecast_window(query_params):
+    """(window_months, horizon_months, error) from the query string, as the sync actions read it"""
+    try:
+        window_months = int(query_params.get("window_months", 4))
+    except (TypeError, ValueError):
+        return None, None, "window_months must be an integer"
+    try:
+        horizon_months = int(query_params.get("horizon_months", 3))
+    except (TypeError, ValueError):
+        return None, None, "horizon_months must be an integer"
+    if window_months < 1 or horizon_months < 1:
+        return None, None, "window_months and horizon_months must be >= 1"
+    return window_months, horizon_months, None
+
+
+@async_api_view(["GET"])
+async def aproject_forecast(request, pk):
+    """Async ProjectViewSet.forecast"""
+    try:
+        project = await Project.objects.aget(id=pk, company=request.user.company)
+    except Project.DoesNotExist:
+        return JsonResponse({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    window_months, horizon_months, error = _forecast_window(request.query_params)
+    if error:
+        return JsonResponse({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = await aforecast_project_budget(
+        project, window_months=window_months, horizon_months=horizon_months
+    )
+    return JsonResponse(asdict(result))
+
+
+@async_api_view(["GET"])
+async def aproject_forecasts(request):
+    """Async ProjectViewSet.forecasts: the projects' model calls run concurrently"""
+    window_months, horizon_months, error = _forecast_window(request.query_params)
+    if error:
+        return JsonResponse({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    forecasts = await aforecast_for_active_projects(
+        window_months=window_months,
+        horizon_months=horizon_months,
+        company=request.user.company,
+    )
+    payload = [asdict(result) for result in forecasts]
+    return JsonResponse({"count": len(payload), "results": payload})
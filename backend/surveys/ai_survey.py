@@ -1,16 +1,33 @@
 """
 AI-powered survey generation and analysis for projects and programs.
+
+Each prompt is built once and answered either synchronously or, for the
+async views in ai_views.py, with an `a`-prefixed coroutine.
 """
 import json
-from django.conf import settings
-from openai import OpenAI
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+from core import llm
 
+LLM_OPTIONS = {"model": "gpt-4o-mini", "temperature": 0.7, "json_mode": True}
 
-def generate_project_survey(project_data: dict) -> dict:
+
+def _answer(messages, key):
+    try:
+        return {"success": True, key: llm.complete_json(messages, **LLM_OPTIONS)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+async def _aanswer(messages, key):
+    try:
+        return {"success": True, key: await llm.acomplete_json(messages, **LLM_OPTIONS)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+def project_survey_messages(project_data: dict) -> list:
     """
-    Generate survey questions based on project data including
+    Prompt for survey questions based on project data including
     activities, milestones, deliverables, and KPIs.
     """
     prompt = f"""
@@ -61,26 +78,24 @@ def generate_project_survey(project_data: dict) -> dict:
     Generate 15-20 questions across 5-6 sections. Make questions specific to the project.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert project management consultant who creates effective post-project surveys. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return {"success": True, "survey": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return [
+        {"role": "system", "content": "You are an expert project management consultant who creates effective post-project surveys. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
 
 
-def analyze_survey_results(survey_data: dict, responses: list) -> dict:
+def generate_project_survey(project_data: dict) -> dict:
+    """Generate survey questions for a project"""
+    return _answer(project_survey_messages(project_data), "survey")
+
+
+async def agenerate_project_survey(project_data: dict) -> dict:
+    return await _aanswer(project_survey_messages(project_data), "survey")
+
+
+def survey_analysis_messages(survey_data: dict, responses: list) -> list:
     """
-    Analyze survey responses and generate insights, recommendations,
+    Prompt to analyze survey responses and generate insights, recommendations,
     and lessons learned.
     """
     prompt = f"""
@@ -139,26 +154,24 @@ def analyze_survey_results(survey_data: dict, responses: list) -> dict:
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert project analyst who provides actionable insights from survey data. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return {"success": True, "analysis": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return [
+        {"role": "system", "content": "You are an expert project analyst who provides actionable insights from survey data. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
 
 
-def generate_questionnaire_from_activities(activities: list, milestones: list, kpis: list) -> dict:
+def analyze_survey_results(survey_data: dict, responses: list) -> dict:
+    """Analyze survey responses"""
+    return _answer(survey_analysis_messages(survey_data, responses), "analysis")
+
+
+async def aanalyze_survey_results(survey_data: dict, responses: list) -> dict:
+    return await _aanswer(survey_analysis_messages(survey_data, responses), "analysis")
+
+
+def questionnaire_messages(activities: list, milestones: list, kpis: list) -> list:
     """
-    Auto-generate questionnaire items based on project activities,
+    Prompt to auto-generate questionnaire items based on project activities,
     milestones, and KPIs.
     """
     prompt = f"""
@@ -193,18 +206,16 @@ def generate_questionnaire_from_activities(activities: list, milestones: list, k
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a project management expert. Generate relevant survey questions. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return {"success": True, "questions": result}
-    except Exception as e:
-        return {"success": False, "error": str(e)}
+    return [
+        {"role": "system", "content": "You are a project management expert. Generate relevant survey questions. Always respond with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def generate_questionnaire_from_activities(activities: list, milestones: list, kpis: list) -> dict:
+    """Generate questionnaire items for project activities, milestones and KPIs"""
+    return _answer(questionnaire_messages(activities, milestones, kpis), "questions")
+
+
+async def agenerate_questionnaire_from_activities(activities: list, milestones: list, kpis: list) -> dict:
+    return await _aanswer(questionnaire_messages(activities, milestones, kpis), "questions")
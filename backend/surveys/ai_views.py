@@ -1,11 +1,16 @@
 """
 API views for AI-powered survey functionality.
 """
+from django.http import JsonResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .ai_survey import generate_project_survey, analyze_survey_results, generate_questionnaire_from_activities
+from core.async_views import async_api_view
+from .ai_survey import (
+    generate_project_survey, analyze_survey_results, generate_questionnaire_from_activities,
+    agenerate_project_survey, aanalyze_survey_results, agenerate_questionnaire_from_activities,
+)
 from .models import Survey, SurveyResponse
 from projects.models import Project
 
@@ -75,3 +80,59 @@ def generate_questionnaire(request):
     if result['success']:
         return Response(result['questions'])
     return Response({'error': result['error']}, status=500)
+
+
+# ============================================================
+# ASYNC VARIANTS (same contract, for ASGI; see core/async_views.py)
+# ============================================================
+
+def _result(result, key):
+    if result['success']:
+        return JsonResponse(result[key], safe=False)
+    return JsonResponse({'error': result['error']}, status=500)
+
+
+@async_api_view(['POST'])
+async def agenerate_survey_for_project(request, project_id):
+    try:
+        project = await Project.objects.aget(id=project_id)
+    except Project.DoesNotExist:
+        return JsonResponse({'error': 'Project not found'}, status=404)
+
+    project_data = {
+        'name': project.name,
+        'status': project.status,
+        'description': getattr(project, 'description', ''),
+    }
+    return _result(await agenerate_project_survey(project_data), 'survey')
+
+
+@async_api_view(['POST'])
+async def agenerate_survey_generic(request):
+    project_data = request.data.get('project_data', {})
+    if not project_data:
+        return JsonResponse({'error': 'project_data is required'}, status=400)
+    return _result(await agenerate_project_survey(project_data), 'survey')
+
+
+@async_api_view(['POST'])
+async def aanalyze_survey(request, survey_id):
+    try:
+        survey = await Survey.objects.aget(id=survey_id)
+    except Survey.DoesNotExist:
+        return JsonResponse({'error': 'Survey not found'}, status=404)
+
+    responses = [row async for row in SurveyResponse.objects.filter(survey=survey).values()]
+    if not responses:
+        return JsonResponse({'error': 'No responses to analyze'}, status=400)
+    return _result(await aanalyze_survey_results({'title': survey.title}, responses), 'analysis')
+
+
+@async_api_view(['POST'])
+async def agenerate_questionnaire(request):
+    result = await agenerate_questionnaire_from_activities(
+        request.data.get('activities', []),
+        request.data.get('milestones', []),
+        request.data.get('kpis', []),
+    )
+    return _result(result, 'questions')
@@ -0,0 +1,153 @@
+"""
+Survey analytics.
+
+SurveyAnalytics keeps running totals (responses started and completed,
+rating sum and count). A response is folded into them once, when it is
+created or completes, so reading the analytics never rescans the answers.
+Deletes fall back to a full recalculation, and changes to the recipients or
+invitations recount the invited total and the response rate.
+
+The per-question breakdown of the results page comes from one grouped
+aggregate over the answers. The serialized results payload is cached per
+survey and invalidated from surveys/signals.py.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import Survey, SurveyAnalytics, SurveyAnswer
+
+
+RESULTS_CACHE_TIMEOUT = 60 * 15
+
+
+def results_cache_key(survey_id):
+    return f"surveys:results:{survey_id}"
+
+
+def invalidate_results(survey_id):
+    """Drop the cached results payload for a survey"""
+    if survey_id:
+        cache.delete(results_cache_key(survey_id))
+
+
+def get_survey_analytics(survey):
+    """Stored analytics for a survey, calculated on first use"""
+    try:
+        return survey.analytics
+    except SurveyAnalytics.DoesNotExist:
+        analytics, _ = SurveyAnalytics.objects.get_or_create(survey=survey)
+        analytics.calculate_metrics()
+        return analytics
+
+
+def record_response(response, created=False, completed=False):
+    """Add one new or newly completed response to the survey counters"""
+    survey = response.survey
+    analytics, fresh = SurveyAnalytics.objects.get_or_create(survey=survey)
+    if fresh:
+        # First analytics row for an existing survey; it already counts this response
+        analytics.calculate_metrics()
+    else:
+        updates = {}
+        if created:
+            updates['total_started'] = F('total_started') + 1
+        if completed:
+            ratings = response.answers.filter(
+                question__question_type='rating', answer_rating__isnull=False
+            ).aggregate(total=Sum('answer_rating'), count=Count('id'))
+            updates['total_responses'] = F('total_responses') + 1
+            updates['rating_sum'] = F('rating_sum') + (ratings['total'] or 0)
+            updates['rating_count'] = F('rating_count') + ratings['count']
+        with transaction.atomic():
+            SurveyAnalytics.objects.filter(pk=analytics.pk).update(**updates)
+            analytics.refresh_from_db()
+            analytics.total_invited = survey.invited_count()
+            analytics.derive_rates()
+            analytics.save()
+
+    if completed:
+        Survey.objects.filter(pk=survey.pk).update(responses=analytics.total_responses)
+        survey.responses = analytics.total_responses
+    invalidate_results(survey.pk)
+
+
+def recalculate_survey(survey_id):
+    """Full recalculation, for changes the counters cannot follow (deletes)"""
+    analytics = SurveyAnalytics.objects.select_related('survey').filter(survey_id=survey_id).first()
+    if analytics:
+        analytics.calculate_metrics()
+        Survey.objects.filter(pk=survey_id).update(responses=analytics.total_responses)
+    invalidate_results(survey_id)
+
+
+def refresh_invited(survey_id):
+    """Follow a change in who the survey went out to (recipients, invitations)"""
+    analytics = SurveyAnalytics.objects.select_related('survey').filter(survey_id=survey_id).first()
+    if analytics:
+        analytics.total_invited = analytics.survey.invited_count()
+        analytics.derive_rates()
+        analytics.save(update_fields=['total_invited', 'response_rate'])
+    invalidate_results(survey_id)
+
+
+def question_summary(survey):
+    """
+    Per-question answer distributions for the complete responses, from a
+    single grouped aggregate. Questions are read from survey.questions so a
+    prefetch is reused.
+    """
+    rows = (
+        SurveyAnswer.objects.filter(question__survey=survey, response__is_complete=True)
+        .order_by()
+        .values('question', 'answer_rating', 'answer_choice', 'answer_boolean')
+        .annotate(total=Count('id'), texts=Count('answer_text'))
+    )
+    by_question = {}
+    for row in rows:
+        by_question.setdefault(row['question'], []).append(row)
+
+    summary = {}
+    for question in survey.questions.all():
+        groups = by_question.get(question.id, [])
+        question_summary = {
+            'question_text': question.text,
+            'question_type': question.question_type,
+            'total_responses': sum(row['total'] for row in groups),
+            'responses': []
+        }
+
+        if question.question_type == 'rating':
+            ratings = {str(i): 0 for i in range(1, 6)}
+            rated = total = 0
+            for row in groups:
+                rating = row['answer_rating']
+                if rating is None:
+                    continue
+                if str(rating) in ratings:
+                    ratings[str(rating)] += row['total']
+                rated += row['total']
+                total += rating * row['total']
+            question_summary['rating_distribution'] = ratings
+            question_summary['average_rating'] = round(total / rated, 2) if total else None
+
+        elif question.question_type == 'multiple_choice':
+            counts = {}
+            for row in groups:
+                counts[row['answer_choice']] = counts.get(row['answer_choice'], 0) + row['total']
+            question_summary['choice_distribution'] = {
+                choice: counts.get(choice, 0) for choice in question.choices or []
+            }
+
+        elif question.question_type == 'yes_no':
+            question_summary['yes_no_distribution'] = {
+                'yes': sum(row['total'] for row in groups if row['answer_boolean'] is True),
+                'no': sum(row['total'] for row in groups if row['answer_boolean'] is False),
+            }
+
+        elif question.question_type in ['text', 'textarea']:
+            question_summary['text_responses'] = sum(row['texts'] for row in groups)
+
+        summary[str(question.id)] = question_summary
+
+    return summary
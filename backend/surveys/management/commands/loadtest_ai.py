@@ -0,0 +1,94 @@
+"""
+Management command to measure how many concurrent AI requests one worker serves.
+Usage: python manage.py loadtest_ai --email admin@example.com [--concurrency 1,8,32] [--latency 0.5]
+
+Fires bursts of concurrent survey generation requests through the ASGI
+application in-process (one event loop, as in one ASGI worker) at:
+  sync   - ai/generate/        the DRF view, run on Django's single sync thread
+  async  - ai/generate/async/  the async view, awaiting the model
+The model is the offline stub answering after --latency seconds, so the
+numbers measure the worker rather than the API and nothing is billed. Every
+request has its own prompt, so the LLM cache does not help either path.
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+PATHS = {
+    "sync": "/api/v1/surveys/ai/generate/",
+    "async": "/api/v1/surveys/ai/generate/async/",
+}
+
+
+async def _burst(client, path, concurrency):
+    async def one():
+        started = time.perf_counter()
+        response = await client.post(path, json={"project_data": {"name": f"Load {uuid.uuid4().hex}"}})
+        return response.status_code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(seconds for _, seconds in results)
+    return {
+        "errors": sum(1 for status, _ in results if status != 200),
+        "seconds": elapsed,
+        "per_second": concurrency / elapsed,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def run_load(user, concurrency_levels, latency):
+    """{(mode, concurrency): burst stats} for the sync and async survey views"""
+    token = str(RefreshToken.for_user(user).access_token)
+    app = ASGIHandler()
+
+    async def main():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://localhost",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=None,
+        ) as client:
+            results = {}
+            for concurrency in concurrency_levels:
+                for mode, path in PATHS.items():
+                    results[mode, concurrency] = await _burst(client, path, concurrency)
+            return results
+
+    with override_settings(LLM_BACKEND="core.llm.StubBackend", LLM_STUB_LATENCY=latency):
+        # async_to_sync keeps the ORM's thread-sensitive work on this thread
+        return async_to_sync(main)()
+
+
+class Command(BaseCommand):
+    help = "Load test the sync and async AI views on one in-process ASGI worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True, help="User to authenticate as")
+        parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated burst sizes")
+        parser.add_argument("--latency", type=float, default=0.5, help="Seconds the stub model takes per call")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(email=options["email"]).first()
+        if user is None:
+            raise CommandError(f"No user with email {options['email']}")
+        levels = [int(level) for level in options["concurrency"].split(",")]
+
+        self.stdout.write(f"Stub model latency {options['latency']:.2f}s")
+        results = run_load(user, levels, options["latency"])
+        for (mode, concurrency), stats in results.items():
+            self.stdout.write(
+                f"  {mode:<6} x{concurrency:<4} {stats['seconds']:7.2f}s  "
+                f"{stats['per_second']:7.1f} req/s  p95 {stats['p95_ms']:8.0f} ms  errors {stats['errors']}"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Load test complete"))
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveyanalytics',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='surveyanalytics',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='surveyanalytics',
+            name='total_started',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
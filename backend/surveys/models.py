@@ -89,6 +89,17 @@ class Survey(models.Model):
         
         return True
     
+    def invited_count(self):
+        """Number of people the survey went out to"""
+        # Use recipients_emails if available, otherwise invitations, and the
+        # recipients field as a last fallback
+        total = 0
+        if self.recipients_emails:
+            total = len([email for email in self.recipients_emails.split(',') if email.strip()])
+        else:
+            total = self.invitations.count()
+        return total or self.recipients
+
     def update_response_count(self):
         """Update the responses count and recalculate analytics"""
         self.responses = self.survey_responses.filter(is_complete=True).count()
@@ -157,11 +168,21 @@ class SurveyResponse(models.Model):
         user_identifier = self.user.email if self.user else self.anonymous_email or "Anonymous"
         return f"{user_identifier} - {self.survey.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_complete = instance.__dict__.get('is_complete', False)
+        return instance
+
     def save(self, *args, **kwargs):
+        created = self._state.adding
+        completed = self.is_complete and not getattr(self, '_saved_complete', False)
         super().save(*args, **kwargs)
-        # Update survey response count
-        if self.is_complete:
-            self.survey.update_response_count()
+        self._saved_complete = self.is_complete
+        # Fold the response into the survey counters once, when it completes
+        if created or completed:
+            from .analytics import record_response
+            record_response(self, created=created, completed=completed)
 
 
 class SurveyAnswer(models.Model):
@@ -285,53 +306,49 @@ class SurveyAnalytics(models.Model):
     response_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     average_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
     completion_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
+    # Running totals so a new response updates the metrics without a rescan
+    total_started = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
     last_calculated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Analytics for {self.survey.name}"
 
-    def calculate_metrics(self):
-        """Recalculate all metrics"""
-        survey = self.survey
-        
-        # Calculate total invited - use recipients_emails count if available, otherwise invitations
-        if survey.recipients_emails:
-            email_list = [email.strip() for email in survey.recipients_emails.split(',') if email.strip()]
-            self.total_invited = len(email_list)
-        else:
-            self.total_invited = survey.invitations.count()
-        
-        # If no specific recipients, use the recipients field as fallback
-        if self.total_invited == 0:
-            self.total_invited = survey.recipients
-        
-        # Calculate total responses
-        self.total_responses = survey.survey_responses.filter(is_complete=True).count()
-        
-        # Calculate response rate
+    def derive_rates(self):
+        """Recompute the rates from the stored counters"""
         if self.total_invited > 0:
-            self.response_rate = (self.total_responses / self.total_invited) * 100
+            self.response_rate = round((self.total_responses / self.total_invited) * 100, 2)
         else:
             self.response_rate = 0
-
-        # Calculate average rating for rating questions
-        rating_answers = SurveyAnswer.objects.filter(
-            response__survey=survey,
-            question__question_type='rating',
-            answer_rating__isnull=False
-        )
-
-        if rating_answers.exists():
-            total_rating = sum(answer.answer_rating for answer in rating_answers)
-            self.average_rating = total_rating / rating_answers.count()
+        if self.rating_count:
+            self.average_rating = round(self.rating_sum / self.rating_count, 2)
         else:
             self.average_rating = None
-
-        # Calculate completion rate (responses that are complete)
-        total_responses = survey.survey_responses.count()
-        if total_responses > 0:
-            self.completion_rate = (self.total_responses / total_responses) * 100
+        if self.total_started > 0:
+            self.completion_rate = round((self.total_responses / self.total_started) * 100, 2)
         else:
             self.completion_rate = 0
 
+    def calculate_metrics(self):
+        """Recalculate all metrics from scratch"""
+        survey = self.survey
+        self.total_invited = survey.invited_count()
+
+        responses = survey.survey_responses.aggregate(
+            started=models.Count('id'),
+            complete=models.Count('id', filter=models.Q(is_complete=True)),
+        )
+        self.total_started = responses['started']
+        self.total_responses = responses['complete']
+
+        ratings = SurveyAnswer.objects.filter(
+            response__survey=survey,
+            question__question_type='rating',
+            answer_rating__isnull=False
+        ).aggregate(total=models.Sum('answer_rating'), count=models.Count('id'))
+        self.rating_sum = ratings['total'] or 0
+        self.rating_count = ratings['count']
+
+        self.derive_rates()
         self.save()
\ No newline at end of file
@@ -1,16 +1,16 @@
 # surveys/serializers.py
 from rest_framework import serializers
+from django.db import transaction
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
 from .models import (
     Survey, 
     Question, 
     ArchivedLesson, 
     SurveyResponse, 
     SurveyAnswer, 
-    SurveyInvitation,
-    SurveyAnalytics
+    SurveyInvitation
 )
+from .analytics import get_survey_analytics, question_summary
 
 User = get_user_model()
 
@@ -126,10 +126,9 @@ class SurveyDetailSerializer(serializers.ModelSerializer):
             pm_level = ROLE_HIERARCHY.get('pm', 999)
             
             if user_role_level >= pm_level or request.user.role == 'superadmin':
-                analytics, created = SurveyAnalytics.objects.get_or_create(survey=obj)
-                # Always recalculate to ensure fresh data
-                analytics.calculate_metrics()
-                
+                # Kept current as responses come in, see surveys/analytics.py
+                analytics = get_survey_analytics(obj)
+
                 return {
                     'response_rate': float(analytics.response_rate),
                     'average_rating': float(analytics.average_rating) if analytics.average_rating else None,
@@ -292,25 +291,27 @@ class SurveyResponseSerializer(serializers.ModelSerializer):
                 "You are not allowed to respond to this survey"
             )
 
-        # Create response
-        response = SurveyResponse.objects.create(
-            survey=survey,
-            user=request.user if not survey.is_anonymous else None,
-            anonymous_email=request.user.email if survey.is_anonymous else None,
-            anonymous_role=request.user.role if survey.is_anonymous else None,
-            is_complete=True,
-            **validated_data
-        )
-
-        # Create answers
-        for answer_data in answers_data:
-            question = answer_data.pop('question')
-            SurveyAnswer.objects.create(
-                response=response,
-                question=question,
-                **answer_data
+        validated_data.pop('is_complete', None)
+        with transaction.atomic():
+            # Create response
+            response = SurveyResponse.objects.create(
+                survey=survey,
+                user=request.user if not survey.is_anonymous else None,
+                anonymous_email=request.user.email if survey.is_anonymous else None,
+                anonymous_role=request.user.role if survey.is_anonymous else None,
+                **validated_data
             )
 
+            # Create answers
+            SurveyAnswer.objects.bulk_create([
+                SurveyAnswer(response=response, **answer_data)
+                for answer_data in answers_data
+            ])
+
+            # Completing after the answers exist lets the analytics count them
+            response.is_complete = True
+            response.save(update_fields=['is_complete'])
+
         return response
 
 
@@ -355,9 +356,7 @@ class SurveyResultsSerializer(serializers.ModelSerializer):
 
     def get_analytics(self, obj):
         """Get detailed analytics"""
-        analytics, created = SurveyAnalytics.objects.get_or_create(survey=obj)
-        # Always recalculate to ensure fresh data
-        analytics.calculate_metrics()
+        analytics = get_survey_analytics(obj)
 
         return {
             'total_invited': analytics.total_invited,
@@ -369,61 +368,7 @@ class SurveyResultsSerializer(serializers.ModelSerializer):
 
     def get_response_summary(self, obj):
         """Get summary of responses by question"""
-        summary = {}
-        
-        for question in obj.questions.all():
-            question_summary = {
-                'question_text': question.text,
-                'question_type': question.question_type,
-                'total_responses': 0,
-                'responses': []
-            }
-
-            answers = SurveyAnswer.objects.filter(
-                question=question,
-                response__is_complete=True
-            )
-
-            question_summary['total_responses'] = answers.count()
-
-            if question.question_type == 'rating':
-                # Calculate rating distribution
-                ratings = {}
-                for i in range(1, 6):
-                    ratings[str(i)] = answers.filter(answer_rating=i).count()
-                question_summary['rating_distribution'] = ratings
-                
-                avg_rating = answers.aggregate(
-                    avg=Avg('answer_rating')
-                )['avg']
-                question_summary['average_rating'] = round(avg_rating, 2) if avg_rating else None
-
-            elif question.question_type == 'multiple_choice':
-                # Calculate choice distribution
-                choices = {}
-                if question.choices:
-                    for choice in question.choices:
-                        choices[choice] = answers.filter(answer_choice=choice).count()
-                question_summary['choice_distribution'] = choices
-
-            elif question.question_type == 'yes_no':
-                # Calculate yes/no distribution
-                yes_count = answers.filter(answer_boolean=True).count()
-                no_count = answers.filter(answer_boolean=False).count()
-                question_summary['yes_no_distribution'] = {
-                    'yes': yes_count,
-                    'no': no_count
-                }
-
-            elif question.question_type in ['text', 'textarea']:
-                # For text questions, just provide response count
-                question_summary['text_responses'] = answers.filter(
-                    answer_text__isnull=False
-                ).count()
-
-            summary[str(question.id)] = question_summary
-
-        return summary
+        return question_summary(obj)
 
 
 # Company users serializer for recipient selection
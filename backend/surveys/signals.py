@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .analytics import invalidate_results, recalculate_survey, refresh_invited
+from .models import Survey, Question, SurveyResponse, SurveyAnswer, SurveyInvitation
+
+
+@receiver(post_save, sender=Survey)
+def refresh_invited_on_survey_save(sender, instance, created, **kwargs):
+    """recipients_emails may have changed, which moves the response rate"""
+    if not created:
+        refresh_invited(instance.pk)
+
+
+@receiver(post_save, sender=SurveyInvitation)
+@receiver(post_delete, sender=SurveyInvitation)
+def refresh_invited_on_invitation_change(sender, instance, **kwargs):
+    refresh_invited(instance.survey_id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_results_on_question_change(sender, instance, **kwargs):
+    invalidate_results(instance.survey_id)
+
+
+@receiver(post_save, sender=SurveyAnswer)
+def invalidate_results_on_answer_save(sender, instance, **kwargs):
+    invalidate_results(instance.response.survey_id)
+
+
+@receiver(post_delete, sender=SurveyResponse)
+def recalculate_on_response_delete(sender, instance, **kwargs):
+    """Counters cannot be walked back reliably, so recount once committed"""
+    survey_id = instance.survey_id
+    transaction.on_commit(lambda: recalculate_survey(survey_id))
@@ -32,3 +32,13 @@ urlpatterns += [
     path('ai/analyze/<int:survey_id>/', analyze_survey, name='ai-analyze-survey'),
     path('ai/questionnaire/', generate_questionnaire, name='ai-generate-questionnaire'),
 ]
+
+# Async variants for ASGI (core/async_views.py)
+from .ai_views import agenerate_survey_for_project, agenerate_survey_generic, aanalyze_survey, agenerate_questionnaire
+
+urlpatterns += [
+    path('ai/generate/<int:project_id>/async/', agenerate_survey_for_project, name='ai-generate-survey-async'),
+    path('ai/generate/async/', agenerate_survey_generic, name='ai-generate-survey-generic-async'),
+    path('ai/analyze/<int:survey_id>/async/', aanalyze_survey, name='ai-analyze-survey-async'),
+    path('ai/questionnaire/async/', agenerate_questionnaire, name='ai-generate-questionnaire-async'),
+]
@@ -4,7 +4,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Prefetch
+from django.core.cache import cache
+from django.db.models import Q, Prefetch, prefetch_related_objects
 from django.utils import timezone
 
 from .models import (
@@ -25,6 +26,7 @@ from .serializers import (
     SurveyResultsSerializer,
     CompanyUserSerializer
 )
+from .analytics import RESULTS_CACHE_TIMEOUT, results_cache_key
 from .permissions import (
     IsRoleAllowed,
     CanCreateSurvey,
@@ -116,8 +118,22 @@ class SurveyViewSet(viewsets.ModelViewSet):
     def results(self, request, pk=None):
         """Get detailed survey results and analytics"""
         survey = self.get_object()
-        serializer = SurveyResultsSerializer(survey, context={'request': request})
-        return Response(serializer.data)
+        key = results_cache_key(survey.pk)
+        data = cache.get(key)
+        if data is None:
+            prefetch_related_objects(
+                [survey],
+                'questions',
+                Prefetch(
+                    'survey_responses',
+                    queryset=SurveyResponse.objects.select_related('user').prefetch_related(
+                        Prefetch('answers', queryset=SurveyAnswer.objects.select_related('question'))
+                    ),
+                ),
+            )
+            data = SurveyResultsSerializer(survey, context={'request': request}).data
+            cache.set(key, data, RESULTS_CACHE_TIMEOUT)
+        return Response(data)
 
     @action(detail=True, methods=['post'], permission_classes=[CanManageSurvey])
     def activate(self, request, pk=None):
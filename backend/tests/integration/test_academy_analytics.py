@@ -0,0 +1,114 @@
+"""Tests for the database-backed academy admin analytics"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from academy.models import (
+    Course, CourseCategory, CourseLesson, CourseModule, Enrollment, QuizAttempt, QuoteRequest,
+)
+from academy.views import admin_dashboard_summary
+
+ANALYTICS_URL = '/api/v1/admin/training/analytics/'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def academy(db):
+    """Two courses, three paid enrollments (one completed), a refund and a pending one"""
+    category = CourseCategory.objects.create(name='PM', slug='pm')
+    scrum = Course.objects.create(title='Scrum', slug='scrum', category=category, price=Decimal('100'), rating=Decimal('4.0'))
+    agile = Course.objects.create(title='Agile', slug='agile', category=category, price=Decimal('50'), rating=Decimal('5.0'))
+    Course.objects.create(title='Draft', slug='draft', category=category, price=Decimal('10'))
+
+    enrollments = {}
+    for email, course, status, paid in [
+        ('a@example.com', scrum, 'active', '100'),
+        ('b@example.com', scrum, 'completed', '100'),
+        ('a@example.com', agile, 'active', '50'),
+        ('c@example.com', agile, 'refunded', '50'),
+        ('d@example.com', agile, 'pending', '0'),
+    ]:
+        enrollments[(email, course.slug)] = Enrollment.objects.create(
+            course=course, email=email, first_name=email[0].upper(), last_name='Student',
+            status=status, amount_paid=Decimal(paid),
+            completed_at=timezone.now() if status == 'completed' else None,
+        )
+    QuoteRequest.objects.create(company_name='TechCorp', contact_name='Peter', email='p@techcorp.nl')
+    QuoteRequest.objects.create(company_name='Hub', contact_name='Anna', email='a@hub.nl', status='contacted')
+    return enrollments
+
+
+def analytics(api_client, admin_user):
+    api_client.force_authenticate(user=admin_user)
+    return api_client.get(ANALYTICS_URL).data
+
+
+@pytest.mark.django_db
+class TestAcademyAnalytics:
+    """Test aggregates, monthly buckets and cache invalidation"""
+
+    def test_totals_come_from_enrollments(self, api_client, admin_user, academy):
+        data = analytics(api_client, admin_user)
+
+        assert data['total_courses'] == 3
+        assert data['total_students'] == 2
+        assert data['total_revenue'] == 250
+        assert data['avg_rating'] == 4.5
+        assert data['new_quotes'] == 1
+        assert data['completion_rate'] == 33.3
+        assert len(data['monthly_revenue']) == 6
+        assert data['monthly_revenue'][-1]['revenue'] == 250
+        assert data['monthly_enrollments'][-1] == {
+            'month': timezone.now().strftime('%b'), 'enrollments': 3, 'completions': 1,
+        }
+
+    def test_cached_until_an_enrollment_changes(self, api_client, admin_user, academy, django_assert_max_num_queries):
+        analytics(api_client, admin_user)
+        with django_assert_max_num_queries(0):
+            api_client.get(ANALYTICS_URL)
+
+        refund = academy[('a@example.com', 'agile')]
+        refund.status = 'refunded'
+        refund.save()
+        data = analytics(api_client, admin_user)
+        assert data['total_revenue'] == 200
+        assert data['monthly_revenue'][-1]['revenue'] == 200
+
+    def test_refund_in_a_closed_month_is_recounted(self, api_client, admin_user, academy):
+        enrollment = academy[('b@example.com', 'scrum')]
+        # Twenty days before the first of this month is always last month
+        earlier = timezone.now().replace(day=1, hour=12) - timedelta(days=20)
+        Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=earlier)
+        assert analytics(api_client, admin_user)['monthly_revenue'][-2]['revenue'] == 100
+
+        enrollment.refresh_from_db()
+        enrollment.status = 'refunded'
+        enrollment.save()
+        assert analytics(api_client, admin_user)['monthly_revenue'][-2]['revenue'] == 0
+
+    def test_quiz_attempts_invalidate(self, api_client, admin_user, academy):
+        assert analytics(api_client, admin_user)['quiz_pass_rate'] == 0
+
+        enrollment = academy[('a@example.com', 'scrum')]
+        module = CourseModule.objects.create(course=enrollment.course, title='Intro')
+        lesson = CourseLesson.objects.create(module=module, title='Quiz', lesson_type='quiz')
+        for passed in (True, False):
+            QuizAttempt.objects.create(enrollment=enrollment, lesson=lesson, passed=passed, completed_at=timezone.now())
+        assert analytics(api_client, admin_user)['quiz_pass_rate'] == 50.0
+
+    def test_dashboard_summary_reads_the_database(self, admin_user, academy):
+        request = APIRequestFactory().get('/academy/admin/dashboard/')
+        force_authenticate(request, user=admin_user)
+        data = admin_dashboard_summary(request).data
+
+        assert data['total_revenue'] == 250
+        assert len(data['recent_enrollments']) == 5
+        assert {e['email'] for e in data['recent_enrollments']} >= {'a@example.com', 'd@example.com'}
+        assert [q['company'] for q in data['recent_quotes']] == ['TechCorp']
@@ -0,0 +1,95 @@
+"""Tests for the superadmin company list and dashboard stats"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import Company, StatsSnapshot
+from accounts.views import CompanyListView
+from subscriptions.models import SubscriptionPlan, CompanySubscription
+
+User = get_user_model()
+
+
+@pytest.fixture
+def tenants(db):
+    monthly = SubscriptionPlan.objects.create(
+        name='Business', plan_type='monthly', plan_level='business', price=Decimal('100.00'), stripe_price_id='price_m'
+    )
+    yearly = SubscriptionPlan.objects.create(
+        name='Enterprise', plan_type='yearly', plan_level='enterprise', price=Decimal('1200.00'), stripe_price_id='price_y'
+    )
+    companies = []
+    for i in range(6):
+        company = Company.objects.create(name=f'Tenant {i}')
+        User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='x', company=company, role='admin')
+        User.objects.create_user(username=f'pm{i}', email=f'pm{i}@example.com', password='x', company=company, role='pm')
+        CompanySubscription.objects.create(
+            company=company,
+            plan=yearly if i % 2 else monthly,
+            billing_cycle='yearly' if i % 2 else 'monthly',
+            status='active' if i < 4 else 'canceled',
+        )
+        companies.append(company)
+    return companies
+
+
+@pytest.mark.django_db
+class TestCompanyList:
+    """Test the annotated company list"""
+
+    def test_list_is_one_query(self, tenants, admin_user, django_assert_num_queries):
+        request = APIRequestFactory().get('/companies/')
+        force_authenticate(request, user=admin_user)
+
+        with django_assert_num_queries(1):
+            response = CompanyListView.as_view()(request)
+
+        rows = {row['name']: row for row in response.data}
+        assert rows['tenant 1']['user_count'] == 2
+        assert rows['tenant 1']['owner']['email'] == 'owner1@example.com'
+        assert rows['tenant 1']['plan_name'] == 'Enterprise'
+        assert rows['tenant 5']['subscription_status'] == 'canceled'
+        assert rows['test company']['subscription_status'] == 'none'
+
+
+@pytest.mark.django_db
+class TestAdminStats:
+    """Test the snapshot-backed dashboard stats"""
+
+    def test_stats_compute_mrr_in_database(self, api_client, tenants, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        data = api_client.get('/api/v1/auth/admin/stats/').data
+
+        # Two monthly at 100 and two yearly at 1200/12
+        assert data['revenue'] == {'mrr': 400.0, 'arr': 4800.0, 'currency': 'EUR'}
+        assert data['overview']['active_subscriptions'] == 4
+        assert data['overview']['total_companies'] == 7
+        assert data['users']['project_managers'] == 6
+        assert {'plan': 'Business', 'count': 2} in data['subscriptions_by_plan']
+        assert 'computed_at' in data
+
+    def test_snapshot_is_served_until_stale(self, api_client, tenants, admin_user, settings, django_assert_max_num_queries):
+        settings.BACKGROUND_TASKS_EAGER = True
+        api_client.force_authenticate(user=admin_user)
+        first = api_client.get('/api/v1/auth/admin/stats/').data
+
+        Company.objects.create(name='Late tenant')
+        with django_assert_max_num_queries(3):
+            cached = api_client.get('/api/v1/auth/admin/stats/').data
+        assert cached == first
+
+        StatsSnapshot.objects.update(computed_at=timezone.now() - timedelta(hours=1))
+        api_client.get('/api/v1/auth/admin/stats/')
+        assert StatsSnapshot.objects.get().data['overview']['total_companies'] == 8
+
+    def test_non_superuser_is_forbidden(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        assert api_client.get('/api/v1/auth/admin/stats/').status_code == 403
+
+    def test_refresh_command(self, tenants, capsys):
+        call_command('refresh_admin_stats')
+        assert 'MRR 400.0' in capsys.readouterr().out
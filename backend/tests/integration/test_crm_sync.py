@@ -0,0 +1,147 @@
+"""Tests for the resumable CRM user sync and the newsletter's use of the mirror"""
+import json
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from accounts import crm
+from accounts.models import CrmApiKey, CrmUser
+from newsletters.models import Newsletter
+
+BASE_URL = 'https://crm.test'
+
+
+class FakeCRM(BaseAdapter):
+    """Serves tenant users a page at a time, optionally failing some pages once"""
+
+    def __init__(self, users, fail_pages=()):
+        super().__init__()
+        self.users = users
+        self.fail_pages = set(fail_pages)
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        params = dict(p.split('=', 1) for p in request.url.split('?', 1)[1].split('&'))
+        page, size = int(params['page']), int(params['page_size'])
+        self.calls.append(params)
+        if page in self.fail_pages:
+            self.fail_pages.discard(page)
+            raise requests.ConnectionError(f'page {page} dropped')
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({
+            'users': self.users[(page - 1) * size:page * size],
+            'count': len(self.users),
+        }).encode()
+        response.request, response.url = request, request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def make_users(count, name='User'):
+    return [{'id': i, 'email': f'user{i}@crm.test', 'first_name': name, 'last_name': str(i)} for i in range(count)]
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    def serve(users, fail_pages=()):
+        adapter = FakeCRM(users, fail_pages)
+        session = requests.Session()
+        session.mount(BASE_URL, adapter)
+        monkeypatch.setattr(crm, 'session', lambda: session)
+        return adapter
+    return serve
+
+
+@pytest.fixture
+def key(company, user):
+    return CrmApiKey.objects.create(company=company, name='CRM', api_key='secret', api_base_url=BASE_URL,
+                                    created_by=user)
+
+
+@pytest.mark.django_db
+class TestCrmSync:
+    """Test paging, upserts, checkpoints and incremental runs"""
+
+    def test_full_then_incremental_sync(self, serve, key):
+        fake = serve(make_users(250))
+        result = crm.sync_tenant_users(key)
+
+        assert (result['pages'], result['users'], result['resumed']) == (3, 250, False)
+        assert CrmUser.objects.filter(api_key=key).count() == 250
+        key.refresh_from_db()
+        assert key.sync_cursor is None and key.last_fetched_at is not None
+        assert 'updated_since' not in fake.calls[0]
+
+        # Changed users are updated in place, and only changes are asked for
+        fake = serve(make_users(5, name='Renamed'))
+        crm.sync_tenant_users(key)
+        assert 'updated_since' in fake.calls[0]
+        assert CrmUser.objects.filter(api_key=key).count() == 250
+        assert CrmUser.objects.get(api_key=key, external_id='3').first_name == 'Renamed'
+
+    def test_interrupted_run_resumes_from_checkpoint(self, serve, key, settings):
+        settings.CRM_SYNC_CONCURRENCY = 2
+        fake = serve(make_users(450), fail_pages={4})
+
+        with pytest.raises(requests.ConnectionError):
+            crm.sync_tenant_users(key)
+        key.refresh_from_db()
+        # Pages 1-3 are in; the window holding page 4 is retried as a whole
+        assert key.sync_cursor['page'] == 4
+        assert CrmUser.objects.filter(api_key=key).count() == 300
+
+        fake.calls.clear()
+        result = crm.sync_tenant_users(key)
+        assert result['resumed']
+        assert [int(call['page']) for call in fake.calls] == [4, 5]
+        assert CrmUser.objects.filter(api_key=key).count() == 450
+
+    def test_full_run_deactivates_departed_users(self, serve, key):
+        serve(make_users(3))
+        crm.sync_tenant_users(key)
+
+        serve(make_users(2))
+        crm.sync_tenant_users(key, full=True)
+        assert list(CrmUser.objects.filter(is_active=False).values_list('email', flat=True)) == ['user2@crm.test']
+
+    def test_session_retries_with_backoff(self):
+        adapter = crm.session().get_adapter(BASE_URL)
+        assert 429 in adapter.max_retries.status_forcelist
+        assert adapter.max_retries.backoff_factor > 0
+
+    def test_sync_and_users_endpoints(self, api_client, user, serve, key, settings):
+        settings.BACKGROUND_TASKS_EAGER = True
+        user.role = 'admin'
+        user.save()
+        api_client.force_authenticate(user=user)
+        serve(make_users(120))
+
+        response = api_client.post(f'/api/v1/auth/crm-api-keys/{key.id}/sync/')
+        assert response.status_code == 202
+        assert response.data['sync_cursor'] is None
+
+        response = api_client.get(f'/api/v1/auth/crm-api-keys/{key.id}/users/?search=user11')
+        assert len(response.data) == 11
+        response = api_client.get(f'/api/v1/auth/crm-api-keys/{key.id}/users/?search=user11@')
+        assert [(row['id'], row['email']) for row in response.data] == [('11', 'user11@crm.test')]
+
+        response = api_client.get(f'/api/v1/auth/crm-api-keys/{key.id}/users/?page_size=50')
+        assert len(response.data['results']) == 50 and response.data['next']
+
+    def test_newsletter_reads_crm_recipients_from_the_mirror(self, serve, key, user):
+        serve(make_users(3))
+        crm.sync_tenant_users(key)
+        CrmUser.objects.filter(email='user1@crm.test').update(is_active=False)
+
+        newsletter = Newsletter.objects.create(
+            subject='Update', recipient_type='custom', created_by=user,
+            crm_users=[{'email': f'user{i}@crm.test'} for i in range(3)] + [{'email': 'new@crm.test'}],
+        )
+        assert sorted(newsletter.get_recipient_emails()) == ['new@crm.test', 'user0@crm.test', 'user2@crm.test']
+        details = {row['email']: row for row in newsletter.get_recipient_details()}
+        assert (details['user0@crm.test']['name'], details['user0@crm.test']['role']) == ('User 0', 'CRM User')
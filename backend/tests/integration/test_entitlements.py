@@ -0,0 +1,82 @@
+"""Tests for the per-company entitlement cache"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from accounts.models import Company, Registration, SubscriptionTier
+from projects.models import Project
+from subscriptions.models import SubscriptionPlan, CompanySubscription
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def features(api_client, user):
+    # A fresh instance, so nothing is memoized from an earlier request
+    api_client.force_authenticate(user=User.objects.get(pk=user.pk))
+    return api_client.get('/api/v1/auth/user-features/').data
+
+
+@pytest.mark.django_db
+class TestEntitlements:
+    """Test tier, limits and usage served from the cache"""
+
+    def test_usage_follows_creates_and_deletes(self, api_client, user, company):
+        assert features(api_client, user)['usage'] == {'users': 1, 'programs': 0, 'projects': 0}
+
+        projects = [Project.objects.create(name=f'P{i}', company=company) for i in range(5)]
+        User.objects.create_user(username='second', email='second@example.com', password='x', company=company)
+        data = features(api_client, user)
+        assert data['usage'] == {'users': 2, 'programs': 0, 'projects': 5}
+        # Starter allows five projects
+        assert data['can_create']['project'] is False
+
+        projects[0].delete()
+        assert features(api_client, user)['can_create']['project'] is True
+
+    def test_warm_request_does_not_count(self, api_client, user, django_assert_max_num_queries):
+        features(api_client, user)
+        fresh = User.objects.get(pk=user.pk)
+        api_client.force_authenticate(user=fresh)
+
+        with django_assert_max_num_queries(0):
+            api_client.get('/api/v1/auth/user-features/')
+            assert SubscriptionTier.check_limit(fresh, 'projects') is True
+
+    def test_subscription_and_trial_change_tier(self, api_client, user, company):
+        assert features(api_client, user)['tier'] == 'starter'
+
+        plan = SubscriptionPlan.objects.create(
+            name='Enterprise', plan_type='monthly', plan_level='enterprise', price=Decimal('99'), stripe_price_id='p_e'
+        )
+        CompanySubscription.objects.create(company=company, plan=plan, status='active')
+        assert features(api_client, user)['tier'] == 'enterprise'
+
+        Registration.objects.create(
+            user=user, email=user.email, trial_days=14, trial_end_date=timezone.now() + timedelta(days=3)
+        )
+        assert features(api_client, user)['tier'] == 'trial'
+
+    def test_deactivating_a_user_recounts(self, api_client, user, company):
+        other = User.objects.create_user(username='other', email='other@example.com', password='x', company=company)
+        assert features(api_client, user)['usage']['users'] == 2
+
+        other.is_active = False
+        other.save()
+        assert features(api_client, user)['usage']['users'] == 1
+
+    def test_moving_a_user_recounts_both_companies(self, api_client, user, company):
+        other_company = Company.objects.create(name='Other Co')
+        mover = User.objects.create_user(username='mover', email='mover@example.com', password='x', company=company)
+        assert features(api_client, user)['usage']['users'] == 2
+
+        mover.company = other_company
+        mover.save()
+        assert features(api_client, user)['usage']['users'] == 1
@@ -0,0 +1,67 @@
+"""Tests for cached JWT user resolution and the shared request identity"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.identity import get_identity
+from bot.ai.utils import clear_user_session, get_current_identity, get_user_session, set_user_session
+
+PROJECTS_URL = '/api/v1/projects/'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    settings.IDENTITY_CACHE_TIMEOUT = 300
+    cache.clear()
+
+
+def user_queries(api_client):
+    """Status code and the queries that read the users table"""
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(PROJECTS_URL)
+    return response.status_code, [q['sql'] for q in queries if 'accounts_customuser' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestIdentityCache:
+    """Test that tokens resolve their user from the cache until it changes"""
+
+    @pytest.fixture
+    def bearer(self, api_client, user):
+        token = AccessToken.for_user(user)
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return token
+
+    def test_warm_request_does_not_read_the_user(self, api_client, user, bearer):
+        status, cold = user_queries(api_client)
+        assert status == 200 and len(cold) == 1
+        assert 'accounts_company' in cold[0]  # company joined in
+
+        assert user_queries(api_client) == (200, [])
+
+    def test_user_and_company_changes_apply_at_once(self, api_client, user, company, bearer):
+        user_queries(api_client)
+        company.name = 'Renamed'
+        company.save()
+        assert len(user_queries(api_client)[1]) == 1
+
+        user.is_active = False
+        user.save()
+        assert api_client.get(PROJECTS_URL).status_code == 401
+
+    def test_off_without_a_timeout(self, api_client, user, bearer, settings):
+        settings.IDENTITY_CACHE_TIMEOUT = 0
+        user_queries(api_client)
+        assert len(user_queries(api_client)[1]) == 1
+
+    def test_tools_share_the_request_identity(self, user, company, bearer):
+        identity = get_identity(user, bearer)
+        set_user_session(bearer, user)
+        try:
+            assert get_current_identity() is identity
+            assert get_user_session()['token'] == str(bearer)
+            assert (identity.company, identity.role, identity.jti) == (company, 'superadmin', bearer['jti'])
+        finally:
+            clear_user_session()
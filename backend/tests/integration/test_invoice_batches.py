@@ -0,0 +1,111 @@
+"""Tests for invoice batch runs"""
+import pytest
+from decimal import Decimal
+from django.core import mail
+
+from invoices.models import CompanyInvoice, InvoiceSettings, InvoiceDelivery
+from invoices.batch_service import deliver_due_invoices
+from subscriptions.models import SubscriptionPlan, CompanySubscription
+from accounts.models import Company
+
+
+GENERATE_URL = '/api/v1/admin/invoices/generate/'
+
+
+@pytest.fixture(autouse=True)
+def batch_settings(settings, tmp_path):
+    settings.BACKGROUND_TASKS_EAGER = True
+    settings.INVOICE_PDF_PROCESSES = 1
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    return settings
+
+
+@pytest.fixture
+def subscribed_companies(db):
+    InvoiceSettings.objects.create(
+        company_address='Almere', company_email='billing@example.com', invoice_number_sequence=1000
+    )
+    plan = SubscriptionPlan.objects.create(
+        name='Business', plan_type='monthly', plan_level='business', price=Decimal('100.00')
+    )
+    companies = []
+    for i in range(5):
+        company = Company.objects.create(name=f'Tenant {i}')
+        CompanySubscription.objects.create(
+            company=company, plan=plan, status='active', billing_cycle='monthly', payment_method='invoice'
+        )
+        companies.append(company)
+    return companies
+
+
+@pytest.mark.django_db
+class TestInvoiceBatches:
+    """Test bulk invoice generation"""
+
+    def test_generate_creates_invoices_in_bulk(self, api_client, admin_user, subscribed_companies,
+                                               django_assert_max_num_queries):
+        """A batch run creates every invoice with a constant number of queries"""
+        pytest.importorskip('reportlab')
+        api_client.force_authenticate(user=admin_user)
+        with django_assert_max_num_queries(30):
+            response = api_client.post(GENERATE_URL, {'invoice_date': '2026-03-15'}, format='json')
+
+        assert response.status_code == 202
+        assert response.data['generated_count'] == 5
+        invoices = CompanyInvoice.objects.order_by('invoice_number')
+        assert [inv.invoice_number for inv in invoices] == [f'INV-{n:06d}' for n in range(1000, 1005)]
+        assert all(inv.total == Decimal('121.00') for inv in invoices)
+        assert all(inv.pdf_file for inv in invoices)
+        assert InvoiceSettings.objects.get().invoice_number_sequence == 1005
+
+        status_response = api_client.get(response.data['status_url'])
+        assert status_response.status_code == 200
+        assert status_response.data['status'] == 'completed'
+        assert status_response.data['pdfs_rendered'] == 5
+
+    def test_rerun_is_idempotent(self, api_client, admin_user, subscribed_companies, settings):
+        """Running the same period twice does not duplicate invoices"""
+        settings.INVOICE_PDF_PROCESSES = 0
+        api_client.force_authenticate(user=admin_user)
+        payload = {'invoice_date': '2026-03-15', 'period_start': '2026-03-01', 'period_end': '2026-03-31'}
+        api_client.post(GENERATE_URL, payload, format='json')
+        response = api_client.post(GENERATE_URL, payload, format='json')
+
+        assert response.data['generated_count'] == 0
+        assert response.data['skipped_count'] == 5
+        assert CompanyInvoice.objects.count() == 5
+
+    def test_auto_send_queues_and_delivers(self, api_client, admin_user, subscribed_companies):
+        """Auto-send delivers each invoice once and marks it sent"""
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.post(
+            GENERATE_URL, {'invoice_date': '2026-03-15', 'company_ids': [subscribed_companies[0].id],
+                           'auto_send': True}, format='json'
+        )
+
+        assert response.data['batch']['deliveries'] == {'queued': 0, 'sent': 1, 'failed': 0}
+        assert len(mail.outbox) == 1
+        assert CompanyInvoice.objects.get().status == 'sent'
+
+    def test_failed_delivery_is_retried(self, api_client, admin_user, subscribed_companies, settings):
+        """A delivery that fails to send is rescheduled instead of dropped"""
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = '127.0.0.1'
+        settings.EMAIL_PORT = 1
+        settings.EMAIL_USE_TLS = False
+        api_client.force_authenticate(user=admin_user)
+        api_client.post(
+            GENERATE_URL, {'invoice_date': '2026-03-15', 'company_ids': [subscribed_companies[0].id],
+                           'auto_send': True}, format='json'
+        )
+
+        delivery = InvoiceDelivery.objects.get()
+        assert delivery.status == 'queued'
+        assert delivery.attempts == 1
+        assert delivery.last_error
+        assert deliver_due_invoices() == {'sent': 0, 'retried': 0, 'failed': 0}
+
+    def test_generate_requires_superuser(self, authenticated_client, subscribed_companies):
+        response = authenticated_client.post(GENERATE_URL, {}, format='json')
+        assert response.status_code == 403
@@ -0,0 +1,76 @@
+"""Tests for cached invoice PDF rendering"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.core.management import call_command
+
+pytest.importorskip('reportlab')
+
+from accounts.models import Company
+from invoices.models import CompanyInvoice, InvoiceItem, InvoiceSettings
+from invoices.utils import generate_invoice_pdf, invoice_content_hash, InvoicePDFGenerator
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+
+@pytest.fixture
+def invoice(db):
+    InvoiceSettings.objects.create(company_address='Almere', company_email='billing@example.com')
+    invoice = CompanyInvoice.objects.create(
+        invoice_number='INV-001000',
+        company=Company.objects.create(name='Tenant'),
+        invoice_date=date(2026, 3, 15),
+        due_date=date(2026, 4, 14),
+        period_start=date(2026, 3, 1),
+        period_end=date(2026, 3, 31),
+        customer_name='Tenant',
+        customer_address='Street 1',
+        customer_email='tenant@example.com',
+        vat_rate=Decimal('21.00'),
+    )
+    InvoiceItem.objects.create(invoice=invoice, description='Plan', unit_price=Decimal('100.00'))
+    invoice.refresh_from_db()
+    return invoice
+
+
+@pytest.mark.django_db
+class TestInvoicePDFs:
+    """Test hash-keyed PDF storage"""
+
+    def test_unchanged_invoice_is_not_rerendered(self, invoice, monkeypatch):
+        """A second render of an unchanged invoice reuses the stored file"""
+        first_url = generate_invoice_pdf(invoice)
+        assert invoice.pdf_hash == invoice_content_hash(invoice, InvoiceSettings.objects.first())
+
+        monkeypatch.setattr(InvoicePDFGenerator, 'generate', lambda self: pytest.fail('re-rendered'))
+        assert generate_invoice_pdf(CompanyInvoice.objects.get(pk=invoice.pk)) == first_url
+
+    def test_changed_invoice_is_rerendered(self, invoice):
+        """Editing a line item changes the hash and replaces the stored file"""
+        generate_invoice_pdf(invoice)
+        old_name, old_hash = invoice.pdf_file.name, invoice.pdf_hash
+
+        InvoiceItem.objects.create(invoice=invoice, description='Extra seat', unit_price=Decimal('10.00'))
+        invoice.refresh_from_db()
+        generate_invoice_pdf(invoice)
+
+        assert invoice.pdf_hash != old_hash
+        assert invoice.pdf_file.name != old_name
+        assert not invoice.pdf_file.storage.exists(old_name)
+
+    def test_download_streams_stored_pdf(self, api_client, admin_user, invoice):
+        api_client.force_authenticate(user=admin_user)
+        url = f'/api/v1/admin/invoices/{invoice.id}/pdf/'
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/pdf'
+        assert b''.join(response.streaming_content).startswith(b'%PDF')
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    def test_benchmark_command(self, invoice, capsys):
+        call_command('benchmark_invoice_pdfs', count=1, rounds=1)
+        assert 'ms/invoice' in capsys.readouterr().out
@@ -0,0 +1,121 @@
+"""Tests for the LLM gateway on the offline stub backend"""
+import asyncio
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from core import llm
+from projects.ai_risk_mitigation import generate_ai_mitigation
+
+
+@pytest.fixture(autouse=True)
+def clean_gateway():
+    cache.clear()
+    llm.clear_stubs()
+    llm.reset_metrics()
+    yield
+    llm.clear_stubs()
+
+
+def run_together(calls):
+    """Run the callables in parallel threads; return their results or exceptions"""
+    results = [None] * len(calls)
+
+    def run(index, call):
+        try:
+            results[index] = call()
+        except Exception as exc:
+            results[index] = exc
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestGateway:
+    """Test caching, coalescing, the concurrency limit and metrics"""
+
+    def test_identical_prompts_are_cached(self):
+        first = llm.complete('Summarise the portfolio', temperature=0)
+        second = llm.complete('Summarise the portfolio', temperature=0)
+        llm.complete('Summarise the portfolio', temperature=0.5)
+
+        assert (first.cached, second.cached) == (False, True)
+        assert second.content == first.content == 'Stub response'
+        stats = llm.metrics()
+        assert (stats['requests'], stats['cache_hits']) == (2, 1)
+        assert stats['prompt_tokens'] == 6
+
+    def test_sampled_prompts_are_not_cached_by_default(self):
+        llm.complete('Write a quiz', temperature=0.7)
+        retry = llm.complete('Write a quiz', temperature=0.7)
+        pinned = [llm.complete('Write a quiz', temperature=0.7, use_cache=True) for _ in range(2)]
+
+        assert not retry.cached
+        assert [c.cached for c in pinned] == [False, True]
+        assert llm.metrics()['requests'] == 3
+
+    def test_in_flight_prompts_are_coalesced(self, settings):
+        settings.LLM_STUB_LATENCY = 0.2
+        results = run_together([lambda: llm.complete('Same question', use_cache=False)] * 5)
+
+        assert all(r.content == 'Stub response' for r in results)
+        stats = llm.metrics()
+        assert (stats['requests'], stats['coalesced']) == (1, 4)
+
+    def test_concurrency_limit(self, settings):
+        settings.LLM_STUB_LATENCY = 0.3
+        settings.LLM_MAX_CONCURRENCY = 1
+        results = run_together([
+            lambda i=i: llm.complete(f'Question {i}', timeout=0.05) for i in range(3)
+        ])
+
+        assert sum(isinstance(r, llm.Completion) for r in results) == 1
+        assert all('capacity' in str(r) for r in results if isinstance(r, llm.LLMError))
+
+    def test_async_calls_overlap_coalesce_and_cache(self, settings):
+        settings.LLM_STUB_LATENCY = 0.2
+
+        async def burst():
+            return await asyncio.gather(
+                *(llm.acomplete(f'Question {i}') for i in range(5)),
+                *(llm.acomplete('Same question', temperature=0) for _ in range(3)),
+            )
+
+        started = time.monotonic()
+        results = asyncio.run(burst())
+        assert time.monotonic() - started < 0.6
+        assert all(r.content == 'Stub response' for r in results)
+        stats = llm.metrics()
+        assert (stats['requests'], stats['coalesced']) == (6, 2)
+
+        again = asyncio.run(llm.acomplete('Same question', temperature=0))
+        assert again.cached
+
+    def test_json_replies_and_stubs(self):
+        llm.register_stub('forecast', '```json\n{"predictions": [1, 2]}\n```')
+        assert llm.complete_json('Please forecast spend') == {'predictions': [1, 2]}
+
+        with pytest.raises(llm.LLMError):
+            llm.complete_json('Anything else')  # "Stub response" is not JSON
+
+    def test_call_sites_use_the_gateway(self):
+        plan = {'strategy': 'Add a buffer', 'actions': ['Plan'], 'timeline': '2 weeks', 'cost': 'low', 'effectiveness': '80%'}
+        llm.register_stub('Vendor delay', plan)
+        result = generate_ai_mitigation({'name': 'Vendor delay', 'category': 'Schedule'})
+        assert result['strategy'] == 'Add a buffer'
+        assert result['cost'] == 'Low'
+
+        # Unparseable replies fall back to the canned plan
+        fallback = generate_ai_mitigation({'name': 'Scope creep', 'category': 'Schedule'})
+        assert fallback['effectiveness'] == '70%'
+
+    def test_agents_get_a_pooled_stub_model(self):
+        model = llm.chat_model(model='gpt-4o', temperature=0.3)
+        assert model is llm.chat_model(model='gpt-4o', temperature=0.3)
+        assert model.invoke('hello').content == 'Stub response'
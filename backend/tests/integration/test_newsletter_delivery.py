@@ -0,0 +1,115 @@
+"""Tests for the newsletter delivery pipeline"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+
+from newsletters.models import Newsletter, NewsletterDelivery
+from newsletters.delivery import ProviderThrottle, deliver_newsletter, queue_newsletter
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def delivery_settings(settings):
+    settings.BACKGROUND_TASKS_EAGER = True
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.NEWSLETTER_PROVIDER_RATE_LIMITS = {'default': 600000}
+
+
+@pytest.fixture
+def newsletter(db, admin_user, waterfall_project):
+    newsletter = Newsletter.objects.create(
+        project=waterfall_project, subject='Update', recipient_type='custom', created_by=admin_user
+    )
+    for i in range(7):
+        newsletter.custom_recipients.add(
+            User.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com', password='x')
+        )
+    return newsletter
+
+
+@pytest.mark.django_db
+class TestNewsletterDelivery:
+    """Test chunked per-recipient newsletter delivery"""
+
+    def test_send_delivers_one_message_per_recipient(self, api_client, admin_user, newsletter):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.post(f'/api/v1/newsletters/newsletters/{newsletter.id}/send/', {}, format='json')
+
+        assert response.status_code == 202
+        assert response.data['delivery'] == {'queued': 0, 'sent': 7, 'failed': 0, 'total': 7}
+        assert len(mail.outbox) == 7
+        assert all(len(message.to) == 1 and not message.bcc for message in mail.outbox)
+        newsletter.refresh_from_db()
+        assert newsletter.status == 'sent'
+
+    def test_failed_recipient_is_retried_without_resending_others(self, newsletter, monkeypatch):
+        """One bad recipient stays queued while the rest are marked sent"""
+        from django.core.mail.backends.locmem import EmailBackend
+        original = EmailBackend.send_messages
+
+        def flaky(self, messages):
+            if messages[0].to == ['reader3@example.com']:
+                raise ConnectionError('mailbox unavailable')
+            return original(self, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', flaky)
+        queue_newsletter(newsletter, newsletter.get_recipient_emails())
+
+        failed = NewsletterDelivery.objects.get(email='reader3@example.com')
+        assert failed.status == 'queued' and failed.attempts == 1
+        assert NewsletterDelivery.objects.filter(status='sent').count() == 6
+        newsletter.refresh_from_db()
+        assert newsletter.status == 'sending'
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', original)
+        NewsletterDelivery.objects.filter(pk=failed.pk).update(next_attempt_at=failed.created_at)
+        summary = deliver_newsletter(newsletter.id)
+        assert summary['sent'] == 7
+        assert len(mail.outbox) == 7
+
+    def test_throttle_spaces_sends_per_provider(self):
+        clock = [0.0]
+        sleeps = []
+        throttle = ProviderThrottle(
+            rates={'google': 60, 'default': 6000},
+            clock=lambda: clock[0],
+            sleep=sleeps.append,
+        )
+        throttle.wait('google')
+        throttle.wait('google')
+        throttle.wait('example.com')
+
+        assert sleeps == [1.0]
+
+    def test_test_email_leaves_delivery_and_status_untouched(self, api_client, admin_user, newsletter):
+        api_client.force_authenticate(user=admin_user)
+        newsletter.custom_recipients.add(admin_user)
+        response = api_client.post(
+            f'/api/v1/newsletters/newsletters/{newsletter.id}/send/',
+            {'test_email': admin_user.email},
+            format='json',
+        )
+
+        assert response.status_code == 200
+        assert [message.to for message in mail.outbox] == [[admin_user.email]]
+        assert not NewsletterDelivery.objects.exists()
+        newsletter.refresh_from_db()
+        assert newsletter.status == 'draft'
+
+        queue_newsletter(newsletter, newsletter.get_recipient_emails())
+        assert NewsletterDelivery.objects.filter(email=admin_user.email, status='sent').exists()
+
+    def test_rows_claimed_by_another_run_are_skipped(self, newsletter, settings, monkeypatch):
+        from newsletters import delivery
+        settings.BACKGROUND_TASKS_EAGER = False
+        queue_newsletter(newsletter, newsletter.get_recipient_emails())
+
+        monkeypatch.setattr(delivery, 'CHUNK_SIZE', 3)
+        claimed = delivery._claim_chunk(newsletter, 0)
+        summary = deliver_newsletter(newsletter.id)
+
+        assert len(claimed) == 3
+        assert len(mail.outbox) == 4
+        assert {message.to[0] for message in mail.outbox}.isdisjoint(d.email for d in claimed)
+        assert summary['queued'] == 3
@@ -0,0 +1,70 @@
+"""Tests for newsletter recipient resolution"""
+import pytest
+from django.contrib.auth import get_user_model
+
+from execution.models import Stakeholder
+from newsletters.models import Newsletter, MailingList, MailingListMember, ExternalSubscriber
+from projects.models import Project, ProjectTeam
+
+User = get_user_model()
+
+
+@pytest.fixture
+def audience(db, company, admin_user):
+    """Two mailing lists and two projects whose audiences overlap"""
+    shared = User.objects.create_user(username='shared', email='shared@example.com', password='x', company=company)
+    projects = []
+    for i in range(2):
+        project = Project.objects.create(name=f'Audience {i}', company=company)
+        ProjectTeam.objects.create(project=project, user=shared)
+        member = User.objects.create_user(username=f'member{i}', email=f'member{i}@example.com', password='x')
+        ProjectTeam.objects.create(project=project, user=member)
+        Stakeholder.objects.create(company=company, project=project, name=f'Sponsor {i}', contact=f'sponsor{i}@example.com')
+        projects.append(project)
+
+    newsletter = Newsletter.objects.create(
+        subject='All hands',
+        recipient_type='mailing_list',
+        created_by=admin_user,
+        crm_users=[{'email': 'shared@example.com'}, {'email': 'crm@example.com'}],
+        project_recipients=[
+            {'project_id': project.id, 'type': kind} for project in projects for kind in ('team', 'stakeholders')
+        ],
+    )
+    for i in range(2):
+        mailing_list = MailingList.objects.create(name=f'List {i}', list_type='custom', company=company)
+        subscriber = ExternalSubscriber.objects.create(email=f'reader{i}@example.com', company=company)
+        MailingListMember.objects.create(mailing_list=mailing_list, external_subscriber=subscriber)
+        MailingListMember.objects.create(mailing_list=mailing_list, user=shared)
+        newsletter.mailing_lists.add(mailing_list)
+    return newsletter
+
+
+@pytest.mark.django_db
+class TestRecipientResolution:
+    """Test the UNION-based recipient resolver"""
+
+    def test_emails_are_deduplicated_across_sources(self, audience):
+        emails = audience.get_recipient_emails()
+
+        assert sorted(emails) == sorted([
+            'shared@example.com', 'member0@example.com', 'member1@example.com',
+            'sponsor0@example.com', 'sponsor1@example.com',
+            'reader0@example.com', 'reader1@example.com', 'crm@example.com',
+        ])
+        assert audience.recipients.count() == len(emails)
+
+    def test_query_count_does_not_grow_with_sources(self, audience, django_assert_max_num_queries):
+        """Resolving emails costs the same no matter how many lists and projects feed in"""
+        # Newsletter, the UNION, and the CRM membership check
+        with django_assert_max_num_queries(3):
+            list(Newsletter.objects.get(pk=audience.pk).recipients.emails())
+
+    def test_details_use_repo_id_formats(self, audience):
+        details = {row['email']: row for row in audience.get_recipient_details()}
+
+        assert isinstance(details['shared@example.com']['id'], int)
+        assert details['reader0@example.com']['role'] == 'External Subscriber'
+        assert details['sponsor0@example.com']['id'].startswith('stakeholder_')
+        # Blank role falls back to the governance type, as before
+        assert details['sponsor0@example.com']['role'] == 'Sponsor'
@@ -0,0 +1,115 @@
+"""Tests for cached answer keys and batch quiz grading"""
+import pytest
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from academy.grading import get_answer_key
+from academy.models import (
+    Course, CourseCategory, CourseLesson, CourseModule, Enrollment, QuizAnswer, QuizAttempt, QuizQuestion,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def quiz(db):
+    """A quiz lesson with ten single-answer questions of one point each"""
+    category = CourseCategory.objects.create(name='PM', slug='pm')
+    course = Course.objects.create(title='Scrum', slug='scrum', category=category, price=Decimal('100'))
+    module = CourseModule.objects.create(course=course, title='Basics')
+    lesson = CourseLesson.objects.create(module=module, title='Quiz', lesson_type='quiz')
+    correct = {}
+    for i in range(10):
+        question = QuizQuestion.objects.create(lesson=lesson, question_text=f'Q{i}', order=i)
+        right = QuizAnswer.objects.create(question=question, answer_text='Right', is_correct=True)
+        QuizAnswer.objects.create(question=question, answer_text='Wrong')
+        correct[str(question.id)] = [right.id]
+    lesson.correct = correct
+    return lesson
+
+
+def enroll(lesson, email, user=None):
+    return Enrollment.objects.create(
+        course=lesson.module.course, user=user, email=email, first_name='S', last_name='S', status='active'
+    )
+
+
+def submit(api_client, user, lesson, answers):
+    api_client.force_authenticate(user=user)
+    return api_client.post(f'/api/v1/academy/quiz/{lesson.id}/submit/', {'answers': answers}, format='json')
+
+
+@pytest.mark.django_db
+class TestQuizGrading:
+    """Test grading from the cached answer key"""
+
+    def test_submit_grades_and_records(self, api_client, quiz, user):
+        enrollment = enroll(quiz, user.email, user)
+        answers = dict(list(quiz.correct.items())[:7])
+
+        data = submit(api_client, user, quiz, answers).data
+        assert (data['score'], data['max_score'], data['passed']) == (7, 10, True)
+        assert QuizAttempt.objects.get(enrollment=enrollment).score == 7
+        assert enrollment.completed_lessons.filter(pk=quiz.pk).exists()
+
+    def test_warm_submit_does_not_read_questions(self, api_client, quiz, user, django_assert_num_queries):
+        enroll(quiz, user.email, user)
+        # Warm the answer key and any per-request lookups
+        submit(api_client, user, quiz, {})
+
+        # Lesson, enrollment, attempt insert; nothing per question
+        with django_assert_num_queries(3):
+            data = submit(api_client, user, quiz, {}).data
+        assert data['score'] == 0
+
+    def test_key_follows_question_changes(self, quiz, user):
+        before = get_answer_key(quiz.id)
+        question = QuizQuestion.objects.filter(lesson=quiz).first()
+        QuizAnswer.objects.filter(question=question, is_correct=False).first().delete()
+        QuizAnswer.objects.create(question=question, answer_text='Also right', is_correct=True)
+
+        after = get_answer_key(quiz.id)
+        assert after['version'] != before['version']
+        assert len(next(q for q in after['questions'] if q['id'] == question.id)['correct']) == 2
+
+    def test_invalid_answers_are_rejected(self, api_client, quiz, user):
+        response = submit(api_client, user, quiz, {str(QuizQuestion.objects.first().id): ['abc']})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestBatchGrading:
+    """Test the batch grading endpoint"""
+
+    def test_batch_costs_constant_queries(self, api_client, admin_user, quiz, django_assert_max_num_queries):
+        enrollments = [enroll(quiz, f's{i}@example.com') for i in range(50)]
+        other = enroll(quiz, 'late@example.com')
+        attempts = [
+            {'enrollment': str(e.pk), 'answers': quiz.correct if i % 2 else {}}
+            for i, e in enumerate(enrollments)
+        ]
+        attempts.append({'enrollment': 'not-a-uuid', 'answers': {}})
+        api_client.force_authenticate(user=admin_user)
+        url = f'/api/v1/academy/quiz/{quiz.id}/grade/'
+        # Warm the key and the auth lookups so only the grading is counted
+        api_client.post(url, {'attempts': [{'enrollment': str(other.pk), 'answers': {}}]}, format='json')
+
+        with django_assert_max_num_queries(8):
+            response = api_client.post(url, {'attempts': attempts}, format='json')
+
+        assert response.status_code == 200
+        assert (response.data['graded'], response.data['failed']) == (50, 1)
+        assert QuizAttempt.objects.filter(lesson=quiz).count() == 51
+        assert QuizAttempt.objects.filter(lesson=quiz, passed=True).count() == 25
+        assert Enrollment.completed_lessons.through.objects.filter(courselesson=quiz).count() == 25
+
+    def test_batch_requires_admin(self, api_client, user, quiz):
+        api_client.force_authenticate(user=user)
+        response = api_client.post(f'/api/v1/academy/quiz/{quiz.id}/grade/', {'attempts': []}, format='json')
+        assert response.status_code == 403
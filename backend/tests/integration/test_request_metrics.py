@@ -0,0 +1,115 @@
+"""Tests for the request instrumentation: SQL, cache and LLM counts, histograms and slow samples"""
+import json
+import logging
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core import llm, metrics
+from core.middleware.performance import PerformanceLoggingMiddleware
+from projects.models import Project
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    cache.clear()
+    llm.clear_stubs()
+    metrics.reset_metrics()
+    yield
+    llm.clear_stubs()
+
+
+def n_plus_one(request):
+    for user_id in range(12):
+        User.objects.filter(pk=user_id).exists()
+    return HttpResponse('ok')
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    """Test what one request records and where it ends up"""
+
+    def test_counts_sql_cache_and_llm(self, settings):
+        settings.LLM_STUB_LATENCY = 0.01
+        request_metrics, token = metrics.start()
+        try:
+            User.objects.count()
+            cache.get('missing')
+            cache.set('present', None)
+            cache.get_many(['present', 'missing'])
+            llm.complete('Hello', temperature=0)
+        finally:
+            metrics.stop(token)
+
+        assert request_metrics.queries == 1 and request_metrics.db_ms > 0
+        # get, get_many and the gateway's own prompt lookup
+        assert (request_metrics.cache_hits, request_metrics.cache_misses) == (1, 3)
+        assert request_metrics.llm_calls == 1 and request_metrics.llm_ms >= 10
+
+        # Outside a request nothing is recorded
+        User.objects.count()
+        assert request_metrics.queries == 1
+
+    def test_n_plus_one_is_logged_and_slow_request_sampled(self, settings, caplog):
+        settings.SLOW_REQUEST_MS = 0
+        middleware = PerformanceLoggingMiddleware(n_plus_one)
+
+        with caplog.at_level(logging.WARNING, logger='core.middleware.performance'):
+            response = middleware(RequestFactory().get('/users/'))
+        assert 'Possible N+1 on GET /users/: 12 runs of' in caplog.text
+        assert response['Server-Timing'].startswith('db;desc="12 queries"')
+
+        [sample] = metrics.slow_requests()
+        assert (sample['path'], sample['route'], sample['queries']) == ('/users/', 'unmatched', 12)
+        assert sample['duplicates'][0]['count'] == 12
+        assert len(sample['statements']) == 12
+
+    def test_sampler_keeps_the_slowest(self, settings):
+        settings.SLOW_REQUEST_MS = 0
+        settings.SLOW_REQUEST_SAMPLES = 2
+        request = RequestFactory().get('/')
+        for seconds in (0.3, 0.1, 0.5, 0.2):
+            metrics.observe(request, 200, seconds, metrics.RequestMetrics(), 'route')
+        assert [sample['duration_ms'] for sample in metrics.slow_requests()] == [500.0, 300.0]
+
+    def test_metrics_endpoint(self, api_client, user, company, settings):
+        settings.METRICS_TOKEN = 'scrape'
+        Project.objects.create(name='Apollo', company=company, methodology='scrum')
+        api_client.force_authenticate(user=user)
+        response = api_client.get('/api/v1/projects/')
+        assert response.status_code == 200
+        assert 'X-Response-Time' in response and 'total;dur=' in response['Server-Timing']
+
+        assert APIClient().get('/metrics/').status_code == 403
+        response = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer scrape')
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        route = 'route="api/v1/projects/$",method="GET"'
+        assert f'http_request_duration_seconds_count{{{route}}} 1' in body
+        assert f'http_request_db_queries_bucket{{{route},le="+Inf"}} 1' in body
+        assert 'http_requests_total{route="api/v1/projects/$",method="GET",status="200"} 1' in body
+        assert 'llm_requests_total ' in body
+
+        user.is_staff = True
+        user.save()
+        client = APIClient()
+        client.force_login(user)
+        assert json.loads(client.get('/metrics/slow/').content)['threshold_ms'] == 500
+
+    def test_async_view_queries_are_counted(self, api_client, user, company):
+        Project.objects.create(name='Live', company=company, methodology='scrum', status='active')
+        llm.register_stub('Total Projects: 1', {'title': 'Portfolio Analysis Report'})
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+        response = api_client.post('/api/v1/governance/reports/generate/async/', {'report_id': 'portfolio-analysis'},
+                                   format='json')
+        assert response.status_code == 200
+        queries = int(response['Server-Timing'].split('"')[1].split()[0])
+        assert queries > 0
@@ -0,0 +1,115 @@
+"""Tests for background AI risk mitigation generation"""
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+
+from core import llm
+from projects import mitigation_queue
+from projects.models import AIMitigation, Project, Risk
+
+RISKS_URL = '/api/v1/projects/risks/'
+PLAN = {'strategy': 'Add a buffer', 'actions': ['Plan'], 'timeline': '2 weeks', 'cost': 'Low', 'effectiveness': '80%'}
+
+
+@pytest.fixture(autouse=True)
+def clean_gateway():
+    cache.clear()
+    llm.clear_stubs()
+    yield
+    llm.clear_stubs()
+
+
+@pytest.fixture
+def project(company):
+    return Project.objects.create(name='Migration', company=company, methodology='scrum')
+
+
+def risk_body(project, name):
+    return {
+        'project': project.id, 'name': name, 'description': 'Late delivery',
+        'category': 'Schedule', 'impact': 'High', 'probability': 60, 'level': 'High',
+    }
+
+
+def listen(project):
+    """A channel subscribed to the project's risk group"""
+    layer = get_channel_layer()
+    channel = async_to_sync(layer.new_channel)()
+    async_to_sync(layer.group_add)(mitigation_queue.group_name(project.id), channel)
+    return layer, channel
+
+
+@pytest.mark.django_db
+class TestMitigationQueue:
+    """Test pending placeholders, batched generation and the push"""
+
+    def test_create_returns_pending_without_calling_the_model(self, api_client, user, project, settings):
+        settings.BACKGROUND_TASKS_EAGER = False
+        llm.reset_metrics()
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(RISKS_URL, risk_body(project, 'Vendor delay'), format='json')
+
+        assert response.status_code == 201
+        assert response.data['ai_mitigation']['status'] == 'pending'
+        assert llm.metrics()['requests'] == 0
+
+    def test_queued_risk_is_generated_and_pushed(self, api_client, user, project, settings):
+        settings.BACKGROUND_TASKS_EAGER = True
+        llm.register_stub('Vendor delay', PLAN)
+        layer, channel = listen(project)
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(RISKS_URL, risk_body(project, 'Vendor delay'), format='json')
+
+        mitigation = AIMitigation.objects.get(risk_id=response.data['id'])
+        assert (mitigation.status, mitigation.strategy) == ('ready', 'Add a buffer')
+        message = async_to_sync(layer.receive)(channel)
+        assert message['type'] == 'mitigation_ready'
+        assert message['risks'][0]['ai_mitigation']['strategy'] == 'Add a buffer'
+
+    def test_batch_costs_constant_queries(self, project, django_assert_num_queries):
+        risks = [
+            Risk.objects.create(project=project, name=f'Risk {i}', description='d', category='Technical',
+                                impact='Low', level='Low')
+            for i in range(10)
+        ]
+        for risk in risks:
+            mitigation_queue.mark_pending(risk)
+
+        # Risks with their placeholders, one bulk update
+        with django_assert_num_queries(2):
+            done = mitigation_queue.generate_batch([risk.id for risk in risks])
+
+        assert len(done) == 10
+        assert not AIMitigation.objects.filter(status='pending').exists()
+
+    def test_regenerate_uses_the_queue(self, api_client, user, project, settings):
+        settings.BACKGROUND_TASKS_EAGER = True
+        risk = Risk.objects.create(project=project, name='Vendor delay', description='d', category='Schedule',
+                                   impact='High', level='High')
+        AIMitigation.objects.create(risk=risk, strategy='Old', timeline='1 week', cost='Low', effectiveness='50%')
+        llm.register_stub('Vendor delay', PLAN)
+        api_client.force_authenticate(user=user)
+
+        response = api_client.post(f'{RISKS_URL}{risk.id}/regenerate-ai-mitigation/')
+
+        assert response.status_code == 202
+        risk.ai_mitigation.refresh_from_db()
+        assert (risk.ai_mitigation.status, risk.ai_mitigation.strategy) == ('ready', 'Add a buffer')
+
+    def test_regenerate_bypasses_the_gateway_cache(self, api_client, user, project, settings):
+        settings.BACKGROUND_TASKS_EAGER = True
+        risk = Risk.objects.create(project=project, name='Vendor delay', description='d', category='Schedule',
+                                   impact='High', level='High')
+        AIMitigation.objects.create(risk=risk, strategy='Old', timeline='1 week', cost='Low', effectiveness='50%')
+        llm.register_stub('Vendor delay', PLAN)
+        llm.reset_metrics()
+        api_client.force_authenticate(user=user)
+
+        for _ in range(2):
+            api_client.post(f'{RISKS_URL}{risk.id}/regenerate-ai-mitigation/')
+
+        stats = llm.metrics()
+        assert (stats['requests'], stats['cache_hits']) == (2, 0)
@@ -0,0 +1,63 @@
+"""Tests for bulk skill point awards"""
+import pytest
+
+from academy.models import LessonSkillMapping, Skill, SkillActivity, SkillCategory, SkillGoal, UserSkill
+
+AWARD_URL = '/api/v1/academy/skills/user-skills/award_points/'
+
+
+@pytest.fixture
+def skills(db):
+    """Two skills; lesson l1 trains both, l2 only planning"""
+    category = SkillCategory.objects.create(id='pm', name='PM', name_nl='PM')
+    planning = Skill.objects.create(id='planning', category=category, name='Planning', name_nl='Planning')
+    risk = Skill.objects.create(id='risk', category=category, name='Risk', name_nl='Risico')
+    LessonSkillMapping.objects.create(lesson_id='l1', skill=planning, points_awarded=40, quiz_bonus=20)
+    LessonSkillMapping.objects.create(lesson_id='l1', skill=risk, points_awarded=10)
+    LessonSkillMapping.objects.create(lesson_id='l2', skill=planning, points_awarded=30)
+    return planning, risk
+
+
+@pytest.mark.django_db
+class TestSkillAwards:
+    """Test single and replayed awards, level-ups and goals"""
+
+    def test_single_lesson_award(self, api_client, user, skills):
+        api_client.force_authenticate(user=user)
+        response = api_client.post(AWARD_URL, {'lesson_id': 'l1', 'activity_type': 'quiz_pass'}, format='json')
+
+        assert response.status_code == 200
+        points = {s['skill_id']: s['points_awarded'] for s in response.data['awarded_skills']}
+        assert points == {'planning': 60, 'risk': 10}
+        assert SkillActivity.objects.filter(user=user).count() == 2
+
+    def test_replay_levels_up_and_closes_goals(self, api_client, user, skills, django_assert_max_num_queries):
+        planning, _ = skills
+        UserSkill.objects.create(user=user, skill=planning, points=50, level=1)
+        goal = SkillGoal.objects.create(user=user, skill=planning, target_level=2)
+        events = [{'lesson_id': 'l2', 'occurred_at': f'2026-01-0{i + 1}T10:00:00Z'} for i in range(5)]
+        events.append({'lesson_id': 'missing'})
+        api_client.force_authenticate(user=user)
+        api_client.get('/api/v1/academy/skills/user-skills/')
+
+        # Mappings, insert-missing, locked read, upsert, activities, goals read + update
+        with django_assert_max_num_queries(10):
+            response = api_client.post(AWARD_URL, {'events': events}, format='json')
+
+        assert response.data['level_ups'] == [
+            {'skill_id': 'planning', 'skill_name': 'Planning', 'old_level': 1, 'new_level': 2}
+        ]
+        assert response.data['unmatched_lessons'] == ['missing']
+        skill = UserSkill.objects.get(user=user, skill=planning)
+        assert (skill.points, skill.level) == (200, 2)
+        assert SkillActivity.objects.filter(user=user, skill=planning).count() == 5
+        goal.refresh_from_db()
+        assert goal.achieved and goal.achieved_at
+
+    def test_unknown_lesson_and_bad_input(self, api_client, user, skills):
+        api_client.force_authenticate(user=user)
+        assert api_client.post(AWARD_URL, {'lesson_id': 'nope'}, format='json').status_code == 404
+        assert api_client.post(AWARD_URL, {}, format='json').status_code == 400
+        response = api_client.post(AWARD_URL, {'lesson_id': 'l1', 'bonus_multiplier': 'x'}, format='json')
+        assert response.status_code == 400
+        assert not UserSkill.objects.exists()
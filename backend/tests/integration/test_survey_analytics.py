@@ -0,0 +1,107 @@
+"""Tests for incremental survey analytics and cached results"""
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from surveys.models import Survey, Question, SurveyAnalytics
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def survey(db, admin_user, waterfall_project, company):
+    emails = [f'respondent{i}@example.com' for i in range(4)]
+    for i, email in enumerate(emails):
+        User.objects.create_user(username=f'respondent{i}', email=email, password='x', company=company)
+    survey = Survey.objects.create(
+        project=waterfall_project,
+        name='Retro',
+        status='Active',
+        created_by=admin_user,
+        recipients_emails=','.join(emails + ['absent@example.com']),
+    )
+    Question.objects.create(survey=survey, text='Score', question_type='rating', order=1)
+    Question.objects.create(survey=survey, text='Pick', question_type='multiple_choice', choices=['A', 'B'], order=2)
+    Question.objects.create(survey=survey, text='Again?', question_type='yes_no', order=3)
+    Question.objects.create(survey=survey, text='Notes', question_type='text', order=4)
+    return survey
+
+
+def respond(api_client, survey, index, rating, choice, again):
+    api_client.force_authenticate(user=User.objects.get(username=f'respondent{index}'))
+    questions = {q.question_type: q.id for q in survey.questions.all()}
+    response = api_client.post(f'/api/v1/surveys/survey/{survey.id}/respond/', {'answers': [
+        {'question_id': questions['rating'], 'answer_rating': rating},
+        {'question_id': questions['multiple_choice'], 'answer_choice': choice},
+        {'question_id': questions['yes_no'], 'answer_boolean': again},
+        {'question_id': questions['text'], 'answer_text': 'fine'},
+    ]}, format='json')
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+class TestSurveyAnalytics:
+    """Test running survey totals and the grouped results summary"""
+
+    def test_responses_update_analytics_incrementally(self, api_client, survey):
+        respond(api_client, survey, 0, 5, 'A', True)
+        respond(api_client, survey, 1, 2, 'A', False)
+
+        analytics = SurveyAnalytics.objects.get(survey=survey)
+        assert (analytics.total_invited, analytics.total_responses, analytics.total_started) == (5, 2, 2)
+        assert float(analytics.average_rating) == 3.5
+        assert float(analytics.response_rate) == 40.0
+
+        before = (analytics.total_responses, analytics.rating_sum, analytics.rating_count)
+        analytics.calculate_metrics()
+        assert (analytics.total_responses, analytics.rating_sum, analytics.rating_count) == before
+        survey.refresh_from_db()
+        assert survey.responses == 2
+
+    def test_recipient_changes_move_the_response_rate(self, api_client, survey):
+        respond(api_client, survey, 0, 5, 'A', True)
+        survey.recipients_emails = 'respondent0@example.com,respondent1@example.com'
+        survey.save()
+
+        analytics = SurveyAnalytics.objects.get(survey=survey)
+        assert (analytics.total_invited, float(analytics.response_rate)) == (2, 50.0)
+
+    def test_results_summary_and_cache(self, api_client, admin_user, survey, django_assert_max_num_queries):
+        respond(api_client, survey, 0, 5, 'A', True)
+        respond(api_client, survey, 1, 4, 'B', True)
+        respond(api_client, survey, 2, 4, 'A', False)
+
+        api_client.force_authenticate(user=admin_user)
+        url = f'/api/v1/surveys/survey/{survey.id}/results/'
+        data = api_client.get(url).data
+        summary = {row['question_type']: row for row in data['response_summary'].values()}
+
+        assert summary['rating']['rating_distribution'] == {'1': 0, '2': 0, '3': 0, '4': 2, '5': 1}
+        assert summary['rating']['average_rating'] == 4.33
+        assert summary['multiple_choice']['choice_distribution'] == {'A': 2, 'B': 1}
+        assert summary['yes_no']['yes_no_distribution'] == {'yes': 2, 'no': 1}
+        assert summary['text']['text_responses'] == 3
+        assert data['analytics']['total_responses'] == 3
+
+        # A cached payload only costs the permission checks
+        with django_assert_max_num_queries(3):
+            assert api_client.get(url).data == data
+
+        # A new response invalidates the cache
+        respond(api_client, survey, 3, 1, 'B', False)
+        api_client.force_authenticate(user=admin_user)
+        assert api_client.get(url).data['analytics']['total_responses'] == 4
+
+    def test_results_query_count_is_flat(self, api_client, admin_user, survey, django_assert_max_num_queries):
+        for index in range(4):
+            respond(api_client, survey, index, 3, 'A', True)
+        cache.clear()
+
+        api_client.force_authenticate(user=admin_user)
+        with django_assert_max_num_queries(8):
+            api_client.get(f'/api/v1/surveys/survey/{survey.id}/results/')
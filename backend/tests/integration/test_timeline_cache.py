@@ -0,0 +1,91 @@
+"""Tests for the cached timeline payload"""
+import gzip
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.core.cache import cache
+
+from projects.models import Milestone, Project, Task
+from projects.timeline_service import shift_project_timeline
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture
+def project(db, company, user):
+    project = Project.objects.create(
+        name='Gantt', company=company, methodology='waterfall', created_by=user,
+        start_date=date(2026, 1, 1), end_date=date(2026, 6, 30),
+    )
+    milestone = Milestone.objects.create(project=project, name='Build', status='in_progress',
+                                         start_date=date(2026, 2, 1), end_date=date(2026, 3, 1))
+    for i in range(20):
+        Task.objects.create(milestone=milestone, title=f'Task {i}', priority='urgent', assigned_to=user,
+                            due_date=date(2026, 2, 10))
+    return project
+
+
+def timeline(api_client, project, **headers):
+    return api_client.get(f'/api/v1/projects/{project.id}/timeline/', **headers)
+
+
+@pytest.mark.django_db
+class TestTimelineCache:
+    """Test the cached payload, ETags and invalidation"""
+
+    def test_payload_and_conditional_get(self, api_client, user, project, django_assert_max_num_queries):
+        api_client.force_authenticate(user=user)
+        response = timeline(api_client, project)
+        data = json.loads(response.content)
+        task = data['milestones'][1]['details']
+        assert (data['title'], data['dateline']) == ('Gantt', '30/06/2026')
+        assert (task['priority'], task['startDate'], task['owner']['name']) == ('High', '2026-02-01', 'Test')
+        assert len(data['milestones']) == 21
+
+        # Cached: only the project lookup
+        with django_assert_max_num_queries(2):
+            again = timeline(api_client, project, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert again.status_code == 304
+
+    def test_gzip_when_accepted(self, api_client, user, project):
+        api_client.force_authenticate(user=user)
+        plain = timeline(api_client, project)
+        zipped = timeline(api_client, project, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        assert zipped['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(zipped.content) == plain.content
+        assert zipped['ETag'] != plain['ETag']
+        assert timeline(api_client, project, HTTP_ACCEPT_ENCODING='gzip',
+                        HTTP_IF_NONE_MATCH=zipped['ETag']).status_code == 304
+        assert timeline(api_client, project, HTTP_IF_NONE_MATCH=zipped['ETag']).status_code == 200
+
+    def test_writes_and_bulk_shifts_invalidate(self, api_client, user, project):
+        api_client.force_authenticate(user=user)
+        etag = timeline(api_client, project)['ETag']
+
+        task = Task.objects.filter(milestone__project=project).first()
+        task.title = 'Renamed'
+        task.save()
+        response = timeline(api_client, project, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert b'Renamed' in response.content
+
+        etag = response['ETag']
+        shift_project_timeline([project.id], timedelta(days=7))
+        response = timeline(api_client, project, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert json.loads(response.content)['dateline'] == '07/07/2026'
+
+    def test_owner_rename_invalidates(self, api_client, user, project):
+        api_client.force_authenticate(user=user)
+        etag = timeline(api_client, project)['ETag']
+
+        user.first_name = 'Renamed'
+        user.save()
+        response = timeline(api_client, project, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert json.loads(response.content)['milestones'][1]['details']['owner']['name'] == 'Renamed'
@@ -0,0 +1,63 @@
+"""Tests for bulk timeline shifting"""
+import pytest
+from datetime import date, timedelta
+
+from projects.models import Project, Milestone, Task, ProjectActivity
+from projects.timeline_service import shift_project_timeline, shift_milestone_timeline
+
+
+@pytest.fixture
+def scheduled_project(db, company):
+    project = Project.objects.create(
+        name='Schedule Project',
+        company=company,
+        methodology='waterfall',
+        start_date=date(2026, 1, 1),
+        end_date=date(2026, 6, 30),
+    )
+    milestone = Milestone.objects.create(
+        project=project, name='Build', start_date=date(2026, 2, 1), end_date=date(2026, 3, 1)
+    )
+    for i in range(5):
+        Task.objects.create(
+            milestone=milestone, title=f'Task {i}',
+            start_date=date(2026, 2, 1), due_date=date(2026, 2, 10 + i),
+        )
+    return project
+
+
+@pytest.mark.django_db
+class TestTimelineShift:
+    """Test bulk timeline shifting"""
+
+    def test_dry_run_writes_nothing(self, scheduled_project):
+        """A dry run previews the shift without touching any rows"""
+        activities_before = ProjectActivity.objects.count()
+        result = shift_project_timeline([scheduled_project.id], timedelta(weeks=1), dry_run=True)
+
+        assert result['tasks']['rows'] == 5
+        assert result['tasks']['due_date']['new_max'] == '2026-02-21'
+        scheduled_project.refresh_from_db()
+        assert scheduled_project.end_date == date(2026, 6, 30)
+        assert ProjectActivity.objects.count() == activities_before
+
+    def test_project_shift_is_bulk(self, scheduled_project, django_assert_max_num_queries):
+        """Project, milestones and tasks move with a constant number of queries"""
+        activities_before = ProjectActivity.objects.count()
+        with django_assert_max_num_queries(10):
+            shift_project_timeline([scheduled_project.id], timedelta(days=7), end_only=False)
+
+        scheduled_project.refresh_from_db()
+        assert scheduled_project.start_date == date(2026, 1, 8)
+        assert scheduled_project.end_date == date(2026, 7, 7)
+        assert set(Task.objects.values_list('start_date', flat=True)) == {date(2026, 2, 8)}
+        assert ProjectActivity.objects.count() == activities_before + 1
+
+    def test_milestone_shift_without_tasks(self, scheduled_project):
+        """Milestones can be shifted without cascading to tasks"""
+        milestone = scheduled_project.milestones.get()
+        shift_milestone_timeline([milestone.id], timedelta(days=-3), cascade_to_tasks=False)
+
+        milestone.refresh_from_db()
+        assert milestone.end_date == date(2026, 2, 26)
+        assert Task.objects.filter(due_date=date(2026, 2, 10)).exists()
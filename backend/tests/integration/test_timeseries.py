@@ -0,0 +1,144 @@
+"""Tests for the bucketed metric time series and the dashboards using it"""
+import pytest
+from datetime import date, datetime
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from academy.models import Course, CourseCategory, Enrollment
+from core.timeseries import Metric, change, series, shift
+from overview.views import BILLABLE_STATUSES, PROJECTS_METRIC, REVENUE_METRIC, overview_stats
+from projects.models import Project
+from subscriptions.models import CompanySubscription, SubscriptionPlan
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def at(year, month, day):
+    return timezone.make_aware(datetime(year, month, day, 12))
+
+
+@pytest.fixture
+def projects(db, company):
+    """Projects created in January (2), February (1) and March (3) 2026"""
+    for created in [at(2026, 1, 5), at(2026, 1, 20), at(2026, 2, 3), at(2026, 3, 1), at(2026, 3, 2), at(2026, 3, 9)]:
+        project = Project.objects.create(name='P', company=company)
+        Project.objects.filter(pk=project.pk).update(created_at=created)
+
+
+@pytest.mark.django_db
+class TestTimeSeries:
+    """Test grouped bucket queries and closed-bucket caching"""
+
+    def test_monthly_series_with_deltas(self, projects):
+        metric = Metric('test.projects', Project.objects.all(), 'created_at')
+        points = series(metric, 'month', periods=4, now=at(2026, 3, 15))
+
+        assert points == [
+            {'period': date(2025, 12, 1), 'value': 0},
+            {'period': date(2026, 1, 1), 'value': 2},
+            {'period': date(2026, 2, 1), 'value': 1},
+            {'period': date(2026, 3, 1), 'value': 3},
+        ]
+        assert change(points) == 200.0
+
+    def test_weekly_and_daily_buckets(self, projects):
+        metric = Metric('test.projects', Project.objects.all(), 'created_at')
+        weeks = series(metric, 'week', periods=2, now=at(2026, 3, 9))
+        # 2026-03-01 is a Sunday, so it falls in the week of 23 February
+        assert weeks == [{'period': date(2026, 3, 2), 'value': 1}, {'period': date(2026, 3, 9), 'value': 1}]
+
+        days = series(metric, 'day', periods=3, start=date(2026, 3, 1), now=at(2026, 3, 2))
+        assert [p['value'] for p in days] == [1, 1, 0]
+
+    def test_closed_buckets_are_cached(self, projects, company, django_assert_num_queries):
+        metric = Metric('test.projects', Project.objects.all(), 'created_at')
+        with django_assert_num_queries(1):
+            series(metric, 'month', periods=12, now=at(2026, 3, 15))
+
+        # A late row in a closed month is not picked up; only March is queried
+        Project.objects.filter(pk=Project.objects.create(name='Late', company=company).pk).update(created_at=at(2026, 1, 9))
+        with django_assert_num_queries(1):
+            points = series(metric, 'month', periods=12, now=at(2026, 3, 15))
+        assert points[-3]['value'] == 2
+
+    def test_sum_measure(self, db):
+        category = CourseCategory.objects.create(name='PM', slug='pm')
+        course = Course.objects.create(title='Agile', slug='agile', category=category, price=Decimal('50'))
+        for i, status in enumerate(['active', 'completed', 'refunded']):
+            Enrollment.objects.create(
+                course=course, email=f's{i}@example.com', first_name='S', last_name=str(i),
+                status=status, amount_paid=Decimal('50.00'),
+            )
+        metric = Metric('test.revenue', Enrollment.objects.exclude(status='refunded'), 'enrolled_at', Sum('amount_paid'))
+        assert series(metric, 'month', periods=1)[0]['value'] == 100.0
+
+    def test_shift_crosses_years(self):
+        assert shift(date(2026, 1, 1), 'month', -1) == date(2025, 12, 1)
+        assert shift(date(2025, 12, 1), 'month', 13) == date(2027, 1, 1)
+
+
+@pytest.mark.django_db
+class TestOverviewStats:
+    """Test the superadmin overview on top of the time series"""
+
+    def test_overview_shape_and_cached_queries(self, projects, company, django_assert_max_num_queries):
+        superadmin = User.objects.create_user(
+            username='root', email='root@example.com', password='x', role='superadmin', company=company
+        )
+
+        def fetch():
+            request = APIRequestFactory().get('/overview/stats')
+            force_authenticate(request, user=superadmin)
+            return overview_stats(request).data
+
+        data = fetch()
+        assert len(data['series']['monthly_revenue']) == 12
+        assert [d['day'] for d in data['series']['weekly_projects']] == ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        assert data['totals']['total_projects'] == 6
+
+        # Warm: three totals queries plus one open bucket per metric
+        with django_assert_max_num_queries(8):
+            assert fetch() == data
+
+    def test_changes_in_closed_months_are_recounted(self, projects, company):
+        plan = SubscriptionPlan.objects.create(
+            name='Pro', plan_type='monthly', plan_level='professional', price=Decimal('40'), stripe_price_id='p_p'
+        )
+        subscription = CompanySubscription.objects.create(company=company, plan=plan, status='active')
+        CompanySubscription.objects.filter(pk=subscription.pk).update(created_at=at(2026, 1, 10))
+        subscription.refresh_from_db()
+
+        billable = CompanySubscription.objects.filter(status__in=BILLABLE_STATUSES)
+        revenue = Metric(REVENUE_METRIC, billable, 'created_at', Sum('plan__price'))
+        projects_metric = Metric(PROJECTS_METRIC, Project.objects.all(), 'created_at')
+        now = at(2026, 3, 15)
+        assert series(revenue, 'month', periods=3, now=now)[0]['value'] == 40.0
+        assert series(projects_metric, 'month', periods=3, now=now)[0]['value'] == 2
+
+        subscription.status = 'canceled'
+        subscription.save()
+        Project.objects.filter(created_at__month=1).first().delete()
+
+        assert series(revenue, 'month', periods=3, now=now)[0]['value'] == 0
+        assert series(projects_metric, 'month', periods=3, now=now)[0]['value'] == 1
+
+    def test_academy_revenue_series(self, api_client, admin_user):
+        category = CourseCategory.objects.create(name='PM', slug='pm')
+        course = Course.objects.create(title='Scrum', slug='scrum', category=category, price=Decimal('80'))
+        Enrollment.objects.create(
+            course=course, email='s@example.com', first_name='S', last_name='S', status='active', amount_paid=Decimal('80')
+        )
+        api_client.force_authenticate(user=admin_user)
+        monthly = api_client.get('/api/v1/admin/training/analytics/').data['monthly_revenue']
+
+        assert len(monthly) == 6
+        assert monthly[-1] == {'month': timezone.now().strftime('%b'), 'revenue': 80}
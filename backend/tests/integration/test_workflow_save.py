@@ -0,0 +1,86 @@
+"""Tests for the diff-based workflow diagram save"""
+import pytest
+
+from workflow.models import WorkflowDiagram, WorkflowNode, WorkflowEdge
+
+
+def nodes(count, label='Step'):
+    return [
+        {'id': f'n{i}', 'type': 'rectangle', 'position': {'x': i * 10, 'y': 0}, 'data': {'label': f'{label} {i}'}}
+        for i in range(count)
+    ]
+
+
+def edges(count):
+    return [{'id': f'e{i}', 'source': f'n{i}', 'target': f'n{i + 1}'} for i in range(count)]
+
+
+@pytest.fixture
+def diagram(db, waterfall_project, admin_user):
+    return WorkflowDiagram.objects.create(project=waterfall_project, created_by=admin_user)
+
+
+@pytest.fixture
+def save_url(diagram):
+    return f'/api/v1/workflow/diagrams/{diagram.id}/save-workflow/'
+
+
+@pytest.mark.django_db
+class TestWorkflowSave:
+    """Test that saves only write what changed"""
+
+    def test_save_applies_diff(self, api_client, admin_user, diagram, save_url):
+        api_client.force_authenticate(user=admin_user)
+        api_client.post(save_url, {'nodes': nodes(5), 'edges': edges(4)}, format='json')
+        kept = WorkflowNode.objects.get(workflow=diagram, node_id='n0')
+
+        changed = nodes(4)
+        changed[1]['data']['label'] = 'Renamed'
+        changed.append({'id': 'n9', 'type': 'diamond', 'data': {'label': 'Decision'}})
+        response = api_client.post(save_url, {'nodes': changed, 'edges': edges(2)}, format='json')
+
+        assert response.status_code == 200
+        assert [node['id'] for node in response.data['nodes']] == ['n0', 'n1', 'n2', 'n3', 'n9']
+        assert WorkflowNode.objects.get(workflow=diagram, node_id='n1').label == 'Renamed'
+        # Unchanged rows keep their identity and are not rewritten
+        unchanged = WorkflowNode.objects.get(pk=kept.pk)
+        assert unchanged.updated_at == kept.updated_at
+        assert set(WorkflowEdge.objects.filter(workflow=diagram).values_list('edge_id', flat=True)) == {'e0', 'e1'}
+        assert response.data['version'] == 3
+
+    def test_large_save_is_batched(self, admin_user, diagram, django_assert_max_num_queries):
+        from workflow.sync import save_diagram
+        save_diagram(diagram, nodes(500), edges(499))
+
+        changed = nodes(500, label='Moved')
+        # Reads, the diagram touch and a handful of bulk UPDATE batches
+        # (SQLite caps parameters per statement) instead of 500 saves
+        with django_assert_max_num_queries(15):
+            save_diagram(diagram, changed, edges(499))
+        assert WorkflowNode.objects.filter(workflow=diagram, label__startswith='Moved').count() == 500
+
+    def test_stale_version_is_rejected(self, api_client, admin_user, diagram, save_url):
+        api_client.force_authenticate(user=admin_user)
+        first = api_client.post(save_url, {'nodes': nodes(2), 'version': 1}, format='json')
+        assert first.data['version'] == 2
+
+        stale = api_client.post(save_url, {'nodes': nodes(3), 'version': 1}, format='json')
+
+        assert stale.status_code == 409
+        assert stale.data['current_version'] == 2
+        assert WorkflowNode.objects.filter(workflow=diagram).count() == 2
+
+    def test_single_node_edits_bump_version_once(self, api_client, admin_user, diagram, save_url):
+        api_client.force_authenticate(user=admin_user)
+        api_client.post(save_url, {'nodes': nodes(2)}, format='json')
+        node = WorkflowNode.objects.get(workflow=diagram, node_id='n0')
+
+        response = api_client.patch(f'/api/v1/workflow/nodes/{node.pk}/', {'label': 'Renamed'}, format='json')
+        assert response.status_code == 200
+        diagram.refresh_from_db()
+        assert diagram.version == 3
+
+        response = api_client.delete(f'/api/v1/workflow/nodes/{node.pk}/')
+        assert response.status_code == 204
+        diagram.refresh_from_db()
+        assert diagram.version == 4
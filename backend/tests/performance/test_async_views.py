@@ -0,0 +1,118 @@
+"""Async variants of the AI and CRM views, and one worker's concurrency under ASGI"""
+import json
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import crm
+from accounts.models import CrmApiKey
+from core import llm
+from projects.models import Expense, Project
+from surveys.management.commands.loadtest_ai import run_load
+
+SURVEY = {'title': 'Retro', 'sections': []}
+
+
+@pytest.fixture(autouse=True)
+def clean_gateway():
+    cache.clear()
+    llm.clear_stubs()
+    yield
+    llm.clear_stubs()
+
+
+@pytest.fixture
+def client(api_client, user):
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return api_client
+
+
+def post(client, url, data=None):
+    return client.post(url, data or {}, format='json')
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """Test that the async variants answer like the sync views"""
+
+    def test_survey_matches_sync_view(self, client):
+        llm.register_stub('Name: Apollo', SURVEY)
+        data = {'project_data': {'name': 'Apollo'}}
+
+        sync = post(client, '/api/v1/surveys/ai/generate/', data)
+        response = post(client, '/api/v1/surveys/ai/generate/async/', data)
+        assert response.status_code == 200
+        assert json.loads(response.content) == sync.data == SURVEY
+
+        response = post(client, '/api/v1/surveys/ai/generate/async/')
+        assert (response.status_code, json.loads(response.content)) == (400, {'error': 'project_data is required'})
+
+    def test_authentication_and_permissions(self, client, user):
+        response = post(APIClient(), '/api/v1/surveys/ai/generate/async/', {'project_data': {'name': 'X'}})
+        assert response.status_code == 401
+
+        user.is_staff = False
+        user.save()
+        response = post(client, '/api/v1/academy/ai/generate-content/async/', {'context': {}})
+        assert response.status_code == 403
+        assert client.get('/api/v1/surveys/ai/generate/async/').status_code == 405
+
+    def test_governance_report(self, client, company):
+        Project.objects.create(name='Live', company=company, methodology='scrum', status='active')
+        llm.register_stub('Total Projects: 1', {'title': 'Portfolio Analysis Report'})
+
+        response = post(client, '/api/v1/governance/reports/generate/async/', {'report_id': 'portfolio-analysis'})
+        assert json.loads(response.content) == {'title': 'Portfolio Analysis Report'}
+
+    def test_forecasts_run_together(self, client, company, settings):
+        settings.OPENAI_API_KEY = 'test'
+        llm.register_stub('horizon_months', {'predictions': [100, 110, 120]})
+        for i in range(3):
+            project = Project.objects.create(name=f'P{i}', company=company, methodology='scrum', status='in_progress')
+            Expense.objects.create(project=project, description='Licence', category='Software',
+                                   date=date(2026, 1, 1), amount=Decimal('90.00'))
+
+        data = json.loads(client.get('/api/v1/projects/forecasts/async/?horizon_months=3').content)
+        assert data['count'] == 3
+        assert [row['amount'] for row in data['results'][0]['forecast']] == [100, 110, 120]
+        assert data['results'][0]['actuals'][-1] == {'month': '2026-01', 'label': 'Jan 2026', 'amount': 90.0}
+
+        single = client.get(f'/api/v1/projects/{project.id}/forecast/async/')
+        assert json.loads(single.content)['project_name'] == 'P2'
+        assert client.get(f'/api/v1/projects/{project.id}/forecast/async/?window_months=0').status_code == 400
+
+    def test_crm_fetch_users(self, client, user, company, monkeypatch):
+        user.role = 'admin'
+        user.save()
+        key = CrmApiKey.objects.create(company=company, name='CRM', api_key='secret', api_base_url='https://crm.test/')
+
+        def tenant_users(request):
+            assert request.headers['X-Tenant-API-Key'] == 'secret'
+            assert request.url.params['page_size'] == '100'
+            return httpx.Response(200, json={'users': [{'email': 'a@crm.test'}], 'count': 1, 'tenant_name': 'Acme'})
+
+        monkeypatch.setattr(crm, '_async_client', lambda: httpx.AsyncClient(transport=httpx.MockTransport(tenant_users)))
+        response = post(client, f'/api/v1/auth/crm-api-keys/{key.id}/fetch-users/async/', {'page_size': 500})
+        data = json.loads(response.content)
+        assert (data['success'], data['count'], data['tenant_name']) == (True, 1, 'Acme')
+        key.refresh_from_db()
+        assert key.last_fetched_at is not None
+
+
+@pytest.mark.django_db
+class TestWorkerConcurrency:
+    """Test that one ASGI worker overlaps AI requests on the async path only"""
+
+    def test_async_view_serves_a_burst_concurrently(self, user):
+        results = run_load(user, [8], latency=0.2)
+        sync, async_ = results['sync', 8], results['async', 8]
+
+        assert sync['errors'] == async_['errors'] == 0
+        # Sync requests queue on the one sync thread: 8 x 0.2s
+        assert sync['seconds'] >= 1.6
+        assert async_['seconds'] < 0.8
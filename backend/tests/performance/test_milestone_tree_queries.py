@@ -0,0 +1,71 @@
+"""Query counts and sparse fieldsets of the milestone/task trees"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from projects.models import Milestone, Project, Subtask, Task
+
+
+def make_tree(project, user, milestones):
+    """Milestones with three tasks each, every task assigned and with two subtasks"""
+    for m in range(milestones):
+        milestone = Milestone.objects.create(project=project, name=f'M{m}', order_index=m)
+        for t in range(3):
+            task = Task.objects.create(milestone=milestone, title=f'T{m}.{t}', assigned_to=user,
+                                       raci_accountable=user)
+            task.raci_informed.add(user)
+            Subtask.objects.bulk_create([Subtask(task=task, title='S'), Subtask(task=task, title='S', completed=True)])
+
+
+def count_queries(api_client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(url)
+    assert response.status_code == 200
+    return len(queries), response.data
+
+
+@pytest.mark.django_db
+class TestMilestoneTree:
+    """Test that the nested tree costs a fixed number of queries"""
+
+    @pytest.fixture
+    def project(self, api_client, user, company):
+        api_client.force_authenticate(user=user)
+        return Project.objects.create(name='Tree', company=company, methodology='waterfall')
+
+    def test_tree_query_count_is_flat(self, api_client, user, project):
+        url = f'/api/v1/projects/milestones/?project={project.id}'
+        make_tree(project, user, 1)
+        small, _ = count_queries(api_client, url)
+
+        make_tree(project, user, 9)
+        large, data = count_queries(api_client, url)
+
+        assert large == small
+        assert len(data) == 10
+        task = data[0]['tasks'][0]
+        assert task['assigned_to_email'] == user.email
+        assert task['raci_informed_ids'] == [user.id]
+        assert [s['completed'] for s in task['subtasks']] == [False, True]
+
+    def test_sparse_fieldset_trims_payload_and_queries(self, api_client, user, project):
+        make_tree(project, user, 3)
+        url = f'/api/v1/projects/milestones/?project={project.id}'
+        full, _ = count_queries(api_client, url)
+
+        sparse, data = count_queries(api_client, url + '&fields=id,name,tasks.id,tasks.title,tasks.due_date')
+
+        assert set(data[0]) == {'id', 'name', 'tasks'}
+        assert set(data[0]['tasks'][0]) == {'id', 'title', 'due_date'}
+        # No subtask or RACI list prefetches
+        assert sparse == full - 3
+
+        _, data = count_queries(api_client, url + '&fields=id,start_date,end_date')
+        assert set(data[0]) == {'id', 'start_date', 'end_date'}
+
+    def test_project_detail_nests_the_tree(self, api_client, user, project):
+        make_tree(project, user, 2)
+        _, data = count_queries(api_client, f'/api/v1/projects/{project.id}/?fields=id,milestones.name,milestones.tasks')
+        assert set(data) == {'id', 'milestones'}
+        assert set(data['milestones'][0]) == {'name', 'tasks'}
+        assert len(data['milestones'][0]['tasks'][0]['subtasks']) == 2
@@ -0,0 +1,111 @@
+"""Query counts of the project list as the number of projects grows"""
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from projects.models import Expense, Milestone, Project, ProjectTeam, Subtask, Task
+
+PROJECTS_URL = '/api/v1/projects/'
+
+
+def make_projects(company, user, count):
+    """Projects with a milestone, two tasks (one with subtasks), an expense and the user on the team"""
+    projects = Project.objects.bulk_create(
+        [Project(name=f'P{i}', company=company, methodology='scrum') for i in range(count)]
+    )
+    milestones = Milestone.objects.bulk_create([Milestone(project=p, name='M') for p in projects])
+    tasks = Task.objects.bulk_create(
+        [Task(milestone=m, title=t, progress=50) for m in milestones for t in ('A', 'B')]
+    )
+    Subtask.objects.bulk_create(
+        [Subtask(task=t, title='S', completed=done) for t in tasks[::2] for done in (True, False)]
+    )
+    Expense.objects.bulk_create([
+        Expense(project=p, description='Licence', category='Software', date=datetime.date(2026, 1, 1),
+                amount=Decimal('100.00'))
+        for p in projects
+    ])
+    ProjectTeam.objects.bulk_create([ProjectTeam(project=p, user=user) for p in projects])
+    return projects
+
+
+def list_queries(api_client, params=''):
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get(PROJECTS_URL + params)
+    assert response.status_code == 200
+    return len(queries), response
+
+
+@pytest.mark.django_db
+class TestProjectListQueries:
+    """Test that the list reads rollups from annotations"""
+
+    @pytest.fixture
+    def member(self, api_client, user):
+        user.role = 'pm'
+        user.save()
+        api_client.force_authenticate(user=user)
+        return user
+
+    def test_query_count_is_flat(self, api_client, member, company):
+        make_projects(company, member, 10)
+        small, response = list_queries(api_client)
+        row = response.data[0]
+        assert (row['progress'], row['team_members_count'], row['expenses_total']) == (50, 1, Decimal('100.00'))
+
+        make_projects(company, member, 990)
+        large, response = list_queries(api_client)
+        assert len(response.data) == 1000
+        assert large == small
+
+    def test_rollups_match_the_model_helpers(self, api_client, member, company):
+        project = make_projects(company, member, 1)[0]
+        Milestone.objects.create(project=project, name='Done', status='completed')
+
+        _, response = list_queries(api_client)
+        assert response.data[0]['progress'] == project.compute_progress_from_work()
+
+    def test_rollups_round_each_task_like_the_model(self, api_client, member, company):
+        """Each task is rounded before averaging, halves to even as Python does"""
+        project = Project.objects.create(name='Thirds', company=company, methodology='scrum')
+        ProjectTeam.objects.create(project=project, user=member)
+        milestone = Milestone.objects.create(project=project, name='M')
+        thirds = Task.objects.create(milestone=milestone, title='A')
+        Subtask.objects.bulk_create([Subtask(task=thirds, title='S', completed=done) for done in (True, False, False)])
+        eighths = Task.objects.create(milestone=milestone, title='B')
+        Subtask.objects.bulk_create([Subtask(task=eighths, title='S', completed=i == 0) for i in range(8)])
+        Task.objects.create(milestone=milestone, title='C', progress=0)
+
+        # 1/8 is 12.5, which Python rounds to 12; (33 + 12 + 0) / 3 is 15
+        _, response = list_queries(api_client)
+        assert response.data[0]['progress'] == project.compute_progress_from_work() == 15
+
+        # 33 and 0 average 16.5, which also rounds to even
+        Task.objects.filter(pk=eighths.pk).delete()
+        _, response = list_queries(api_client)
+        assert response.data[0]['progress'] == project.compute_progress_from_work() == 16
+
+    def test_keyset_pages(self, api_client, member, company):
+        make_projects(company, member, 25)
+
+        queries, response = list_queries(api_client, '?page_size=10')
+        assert len(response.data['results']) == 10
+        seen = [row['id'] for row in response.data['results']]
+        while response.data['next']:
+            response = api_client.get(response.data['next'])
+            seen += [row['id'] for row in response.data['results']]
+        assert sorted(seen) == sorted(Project.objects.values_list('id', flat=True))
+        assert len(seen) == 25
+
+    def test_paging_is_opt_in_per_view(self, api_client, admin_user):
+        """Lists that already take ?page=&page_size= are not switched to cursors"""
+        admin_user.role = 'superadmin'
+        admin_user.save()
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get('/api/v1/admin/users/?page=1&page_size=20')
+
+        assert response.status_code == 200
+        assert isinstance(response.data, list)
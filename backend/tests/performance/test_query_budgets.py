@@ -0,0 +1,304 @@
+"""
+Query and wall-time budgets of the hot endpoints on synthetic tenants.
+
+Every tenant is seeded at a scale of N projects x M milestones x K tasks,
+with methodology boards, a survey and a newsletter sized to match, and each
+endpoint is measured cold (cache cleared) at every scale. Query budgets are
+per scale: an endpoint whose two budgets are equal must not start growing
+with the data, and the others must not grow faster. Wall-time budgets apply
+at the largest scale.
+
+    pytest tests/performance/test_query_budgets.py
+    BUDGET_REPORT=budgets.json pytest ...   # also write a JSON report to diff between commits
+    TEST_POSTGRES=1 pytest ...              # Postgres (POSTGRES_* settings) instead of in-memory SQLite
+    BUDGET_TIME_FACTOR=3 pytest ...         # loosen the wall-time budgets on a slow machine
+"""
+import datetime
+import json
+import os
+import statistics
+import time
+from decimal import Decimal
+
+import django
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Company
+from kanban.models import KanbanBoard, KanbanCard, KanbanColumn
+from newsletters.models import Newsletter
+from projects.models import Expense, Milestone, Project, ProjectTeam, Task
+from scrum.models import BacklogItem, ProductBacklog, ScrumTeam, Sprint, Velocity
+from sixsigma.models import BaselineMetric, ControlChart, ControlChartData, TollgateReview
+from surveys.models import Question, Survey, SurveyAnswer, SurveyResponse
+from waterfall.models import WaterfallPhase, WaterfallTask
+
+User = get_user_model()
+
+# name: (projects, milestones per project, tasks per milestone)
+SCALES = {
+    'small': (2, 2, 3),
+    'large': (12, 4, 8),
+}
+
+# name: (max queries at each scale in SCALES, max median milliseconds at the largest scale).
+# Where the two query budgets differ the endpoint still does per-row lookups (summary per
+# milestone and task, company dashboard per project, the kanban, scrum and six sigma
+# dashboards per column, sprint and chart); the budget pins them so they get no worse.
+BUDGETS = {
+    'project_list': ((1, 1), 150),
+    'project_summary': ((29, 107), 400),
+    'project_timeline': ((5, 5), 150),
+    'company_dashboard': ((10, 20), 200),
+    'kanban_dashboard': ((13, 17), 200),
+    'scrum_dashboard': ((22, 29), 250),
+    'sixsigma_dashboard': ((20, 22), 200),
+    'waterfall_dashboard': ((3, 3), 150),
+    'newsletter_send': ((18, 19), 250),
+    'survey_results': ((15, 15), 250),
+}
+
+# Timed runs per endpoint; the median is compared with the budget
+RUNS = 3
+
+TODAY = datetime.date(2026, 1, 15)
+
+
+def seed_tenant(company, owner, projects, milestones, tasks):
+    """
+    One company's data at the given scale; returns the ids the endpoints need.
+
+    `tasks` members share the work: they are on every project team, assigned
+    the tasks, on the scrum team, answer the survey and receive the newsletter.
+    """
+    # Unusable passwords skip the deliberately slow hashing
+    members = User.objects.bulk_create([
+        User(username=f'member{i}', email=f'member{i}@tenant.test', password=make_password(None),
+             company=company, role='pm')
+        for i in range(tasks)
+    ])
+    project_rows = Project.objects.bulk_create([
+        Project(name=f'Project {p}', company=company, methodology='waterfall', status='active',
+                budget=Decimal('10000.00'), created_by=owner)
+        for p in range(projects)
+    ])
+    ProjectTeam.objects.bulk_create(
+        [ProjectTeam(project=project, user=member) for project in project_rows for member in [owner] + members]
+    )
+    Expense.objects.bulk_create([
+        Expense(project=project, description='Licence', category='Software', date=TODAY,
+                amount=Decimal('100.00'), status='Paid')
+        for project in project_rows
+    ])
+    milestone_rows = Milestone.objects.bulk_create([
+        Milestone(project=project, name=f'M{m}', order_index=m, start_date=TODAY,
+                  end_date=TODAY + datetime.timedelta(days=30 * (m + 1)))
+        for project in project_rows for m in range(milestones)
+    ])
+    Task.objects.bulk_create([
+        Task(milestone=milestone, title=f'T{t}', progress=25 * (t % 5), assigned_to=members[t],
+             due_date=TODAY + datetime.timedelta(days=t))
+        for milestone in milestone_rows for t in range(tasks)
+    ])
+    main = project_rows[0]
+
+    phases = WaterfallPhase.objects.bulk_create([
+        WaterfallPhase(project=main, phase_type=phase_type, name=label, order=m, status='in_progress')
+        for m, (phase_type, label) in enumerate(WaterfallPhase.PHASE_CHOICES[:milestones])
+    ])
+    WaterfallTask.objects.bulk_create([
+        WaterfallTask(project=main, phase=phase, title=f'WT{t}', assignee=members[t])
+        for phase in phases for t in range(tasks)
+    ])
+
+    kanban = Project.objects.create(name='Kanban', company=company, methodology='kanban', created_by=owner)
+    board = KanbanBoard.objects.create(project=kanban, name='Board')
+    columns = KanbanColumn.objects.bulk_create([
+        KanbanColumn(board=board, name=f'Column {m}', order=m, wip_limit=tasks - 1,
+                     is_done_column=m == milestones - 1)
+        for m in range(milestones)
+    ])
+    KanbanCard.objects.bulk_create([
+        KanbanCard(board=board, column=column, title=f'Card {t}', order=t, assignee=members[t],
+                   is_blocked=t == 0, due_date=TODAY)
+        for column in columns for t in range(tasks)
+    ])
+
+    scrum = Project.objects.create(name='Scrum', company=company, methodology='scrum', created_by=owner)
+    backlog = ProductBacklog.objects.create(project=scrum)
+    sprints = Sprint.objects.bulk_create([
+        Sprint(project=scrum, name=f'Sprint {m}', number=m + 1,
+               status='active' if m == milestones - 1 else 'completed')
+        for m in range(milestones)
+    ])
+    Velocity.objects.bulk_create([
+        Velocity(project=scrum, sprint=sprint, committed_points=tasks * 3, completed_points=tasks * 2)
+        for sprint in sprints
+    ])
+    BacklogItem.objects.bulk_create([
+        BacklogItem(backlog=backlog, title=f'Story {t}', story_points=3, sprint=sprint, assignee=members[t],
+                    status='ready' if t % 2 else 'done')
+        for sprint in sprints for t in range(tasks)
+    ])
+    ScrumTeam.objects.bulk_create([ScrumTeam(project=scrum, user=member) for member in members])
+
+    sixsigma = Project.objects.create(name='Six Sigma', company=company, methodology='lss_green', created_by=owner)
+    TollgateReview.objects.bulk_create([
+        TollgateReview(project=sixsigma, phase=phase, status='approved')
+        for phase, _ in TollgateReview.PHASE_CHOICES
+    ])
+    BaselineMetric.objects.bulk_create([
+        BaselineMetric(project=sixsigma, metric_name=f'Metric {m}', baseline_value=1, current_value=2,
+                       target_value=3, unit='%', baseline_sigma=2, current_sigma=3, target_sigma=4)
+        for m in range(milestones)
+    ])
+    charts = ControlChart.objects.bulk_create([
+        ControlChart(project=sixsigma, name=f'Chart {m}', chart_type='i_mr', metric_name='Defects', ucl=10, lcl=0,
+                     center_line=5)
+        for m in range(milestones)
+    ])
+    ControlChartData.objects.bulk_create([
+        ControlChartData(chart=chart, date=datetime.datetime(2026, 1, 1, t, tzinfo=datetime.timezone.utc),
+                         value=t, is_violation=t == 0)
+        for chart in charts for t in range(tasks)
+    ])
+
+    survey = Survey.objects.create(project=main, name='Retro', status='Active', created_by=owner)
+    questions = Question.objects.bulk_create([
+        Question(survey=survey, text='Score', question_type='rating', order=1),
+        Question(survey=survey, text='Pick', question_type='multiple_choice', choices=['A', 'B'], order=2),
+        Question(survey=survey, text='Notes', question_type='text', order=3),
+    ])
+    responses = SurveyResponse.objects.bulk_create(
+        [SurveyResponse(survey=survey, user=member, is_complete=True) for member in members]
+        + [SurveyResponse(survey=survey, anonymous_email=f'guest{i}@tenant.test', is_complete=True)
+           for i in range(projects * milestones)]
+    )
+    SurveyAnswer.objects.bulk_create([
+        answer
+        for i, response in enumerate(responses)
+        for answer in (
+            SurveyAnswer(response=response, question=questions[0], answer_rating=i % 5 + 1),
+            SurveyAnswer(response=response, question=questions[1], answer_choice='AB'[i % 2]),
+            SurveyAnswer(response=response, question=questions[2], answer_text='fine'),
+        )
+    ])
+
+    newsletter = Newsletter.objects.create(
+        project=main, subject='Update', recipient_type='custom', created_by=owner,
+        crm_users=[{'email': f'contact{i}@crm.test'} for i in range(projects * milestones)],
+    )
+    newsletter.custom_recipients.add(*members)
+
+    return {
+        'project': main.id,
+        'kanban': kanban.id,
+        'scrum': scrum.id,
+        'sixsigma': sixsigma.id,
+        'survey': survey.id,
+        'newsletter': newsletter.id,
+    }
+
+
+# name: (method, url given the tenant's ids, expected status)
+ENDPOINTS = {
+    'project_list': ('get', lambda ids: '/api/v1/projects/', 200),
+    'project_summary': ('get', lambda ids: f"/api/v1/projects/{ids['project']}/summary/", 200),
+    'project_timeline': ('get', lambda ids: f"/api/v1/projects/{ids['project']}/timeline/", 200),
+    'company_dashboard': ('get', lambda ids: '/api/v1/projects/company-dashboard/', 200),
+    'kanban_dashboard': ('get', lambda ids: f"/api/v1/projects/{ids['kanban']}/kanban/dashboard/", 200),
+    'scrum_dashboard': ('get', lambda ids: f"/api/v1/projects/{ids['scrum']}/scrum/dashboard/", 200),
+    'sixsigma_dashboard': ('get', lambda ids: f"/api/v1/sixsigma/projects/{ids['sixsigma']}/sixsigma/dashboard/", 200),
+    'waterfall_dashboard': ('get', lambda ids: f"/api/v1/projects/{ids['project']}/waterfall/dashboard/", 200),
+    'newsletter_send': ('post', lambda ids: f"/api/v1/newsletters/newsletters/{ids['newsletter']}/send/", 202),
+    'survey_results': ('get', lambda ids: f"/api/v1/surveys/survey/{ids['survey']}/results/", 200),
+}
+
+
+def measure(api_client, name, ids):
+    """Queries of the first cold call, and the median milliseconds of RUNS cold calls"""
+    method, url, expected = ENDPOINTS[name]
+    counts, timings = [], []
+    for _ in range(RUNS):
+        cache.clear()
+        if name == 'newsletter_send':
+            Newsletter.objects.filter(pk=ids['newsletter']).update(status='draft')
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(api_client, method)(url(ids), format='json')
+            timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == expected, (name, response.status_code)
+        counts.append(len(queries))
+    return counts[0], statistics.median(timings)
+
+
+class Report:
+    """Measurements of the session, written to BUDGET_REPORT as JSON at the end"""
+
+    def __init__(self):
+        self.results = []
+
+    def add(self, **result):
+        self.results.append(result)
+
+    def write(self, path):
+        report = {
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'scales': {name: dict(zip(('projects', 'milestones', 'tasks'), scale)) for name, scale in SCALES.items()},
+            'results': sorted(self.results, key=lambda result: (result['endpoint'], result['scale'])),
+        }
+        with open(path, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+
+
+@pytest.fixture(scope='session')
+def report():
+    report = Report()
+    yield report
+    path = os.environ.get('BUDGET_REPORT')
+    if path and report.results:
+        report.write(path)
+
+
+@pytest.fixture(params=list(SCALES))
+def tenant(request, db):
+    """A company seeded at one scale, with an admin to call the endpoints as"""
+    company = Company.objects.create(name=f'Tenant {request.param}', is_subscribed=True)
+    owner = User.objects.create(username='owner', email='owner@tenant.test', password=make_password(None),
+                                company=company, role='admin', is_staff=True)
+    return request.param, owner, seed_tenant(company, owner, *SCALES[request.param])
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Test that the hot endpoints stay within their query and wall-time budgets"""
+
+    @pytest.fixture(autouse=True)
+    def eager_delivery(self, settings):
+        """Newsletter delivery runs inside the send request, so its queries count against it"""
+        settings.BACKGROUND_TASKS_EAGER = True
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        settings.NEWSLETTER_PROVIDER_RATE_LIMITS = {'default': 600000}
+
+    @pytest.mark.parametrize('endpoint', list(ENDPOINTS))
+    def test_endpoint_within_budget(self, api_client, tenant, endpoint, report):
+        scale, owner, ids = tenant
+        api_client.force_authenticate(user=owner)
+        queries, ms = measure(api_client, endpoint, ids)
+
+        query_budgets, budget_ms = BUDGETS[endpoint]
+        budget_queries = query_budgets[list(SCALES).index(scale)]
+        budget_ms *= float(os.environ.get('BUDGET_TIME_FACTOR', 1))
+        largest = scale == list(SCALES)[-1]
+        report.add(endpoint=endpoint, scale=scale, queries=queries, ms=round(ms, 1),
+                   budget_queries=budget_queries, budget_ms=budget_ms if largest else None)
+
+        assert queries <= budget_queries, f'{endpoint} ran {queries} queries at {scale} scale'
+        if largest:
+            assert ms <= budget_ms, f'{endpoint} took {ms:.0f}ms at {scale} scale'
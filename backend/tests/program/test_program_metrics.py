@@ -0,0 +1,80 @@
+"""Tests for Program metric rollups"""
+import pytest
+from django.core.cache import cache
+
+from programs.models import Program, ProgramRisk, ProgramBenefit
+from projects.models import Project, Milestone, Task, Subtask, Expense, ProjectTeam
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def program_with_projects(db, company, user):
+    program = Program.objects.create(name='Metrics Program', company=company, total_budget=1000)
+    for i in range(3):
+        project = Project.objects.create(name=f'Project {i}', company=company, budget=100, status='in_progress')
+        milestone = Milestone.objects.create(project=project, name='M')
+        task = Task.objects.create(milestone=milestone, title='T', progress=40)
+        Subtask.objects.create(task=task, title='done', completed=True)
+        Subtask.objects.create(task=task, title='open', completed=False)
+        Task.objects.create(milestone=milestone, title='No subtasks', progress=100)
+        Expense.objects.create(project=project, description='E', category='Other', date='2026-01-01', amount=30)
+        ProjectTeam.objects.create(project=project, user=user)
+        program.projects.add(project)
+    ProgramRisk.objects.create(program=program, name='R1', description='d', impact='high', status='open')
+    ProgramRisk.objects.create(program=program, name='R2', description='d', status='closed')
+    ProgramBenefit.objects.create(program=program, name='B1', status='realized')
+    return program
+
+
+@pytest.mark.django_db
+class TestProgramMetrics:
+    """Test program metrics rollups"""
+
+    def test_metrics_match_model_helpers(self, authenticated_client, program_with_projects):
+        """Annotated rollups agree with the per-project Python helpers"""
+        response = authenticated_client.get(f'/api/v1/programs/{program_with_projects.id}/metrics/')
+        assert response.status_code == 200
+        assert response.data['total_projects'] == 3
+        assert response.data['progress'] == program_with_projects.progress == 75
+        assert response.data['project_budget_total'] == 300.0
+        assert response.data['project_spent_total'] == 90.0
+        assert response.data['team_size'] == 3
+        assert response.data['open_risks'] == 1
+        assert response.data['high_risks'] == 1
+        assert response.data['realized_benefits'] == 1
+
+    def test_metrics_query_count_is_flat(self, authenticated_client, program_with_projects,
+                                         company, django_assert_max_num_queries):
+        """Adding projects does not add queries"""
+        for i in range(10):
+            program_with_projects.projects.add(Project.objects.create(name=f'Extra {i}', company=company))
+        cache.clear()
+        with django_assert_max_num_queries(6):
+            authenticated_client.get(f'/api/v1/programs/{program_with_projects.id}/metrics/')
+
+    def test_risk_change_invalidates_cache(self, authenticated_client, program_with_projects):
+        url = f'/api/v1/programs/{program_with_projects.id}/metrics/'
+        authenticated_client.get(url)
+        ProgramRisk.objects.create(program=program_with_projects, name='R3', description='d')
+        assert authenticated_client.get(url).data['open_risks'] == 2
+
+    def test_portfolio_metrics(self, authenticated_client, program_with_projects):
+        response = authenticated_client.get('/api/v1/programs/portfolio-metrics/')
+        assert response.status_code == 200
+        assert [row['program_id'] for row in response.data] == [program_with_projects.id]
+
+    def test_dashboard_and_ai_insights(self, authenticated_client, program_with_projects):
+        dashboard = authenticated_client.get(f'/api/v1/programs/{program_with_projects.id}/dashboard/')
+        assert dashboard.status_code == 200
+        assert dashboard.data['progress'] == 75
+        assert dashboard.data['metrics']['total_projects'] == 3
+
+        insights = authenticated_client.get(f'/api/v1/programs/{program_with_projects.id}/ai-insights/')
+        assert insights.status_code == 200
+        assert insights.data['program_id'] == program_with_projects.id
@@ -0,0 +1,71 @@
+"""Tests for the Waterfall dashboard rollups"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from waterfall.models import (
+    WaterfallPhase, WaterfallMilestone, WaterfallBudget, WaterfallBudgetItem,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestWaterfallDashboard:
+    """Test Waterfall dashboard rollups"""
+
+    def _seed(self, project):
+        WaterfallPhase.objects.create(project=project, phase_type='requirements', name='Req', order=0, progress=100, status='completed')
+        WaterfallPhase.objects.create(project=project, phase_type='design', name='Design', order=1, progress=50, status='in_progress')
+        WaterfallMilestone.objects.create(project=project, name='M1', due_date='2026-03-01', status='completed')
+        WaterfallMilestone.objects.create(project=project, name='M2', due_date='2026-04-01', status='at_risk')
+        budget = WaterfallBudget.objects.create(project=project, total_budget=1000)
+        WaterfallBudgetItem.objects.create(budget=budget, category='Dev', description='Build', actual_amount=250)
+
+    def test_dashboard_rollup(self, authenticated_client, waterfall_project):
+        """Dashboard numbers are aggregated correctly"""
+        self._seed(waterfall_project)
+        url = reverse('waterfall:waterfall-dashboard', kwargs={'project_id': waterfall_project.id})
+        response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert response.data['has_initialized'] is True
+        assert response.data['overall_progress'] == 75
+        assert response.data['current_phase']['name'] == 'Design'
+        assert response.data['total_milestones'] == 2
+        assert response.data['completed_milestones'] == 1
+        assert response.data['at_risk_milestones'] == 1
+        assert response.data['budget_utilization'] == 25.0
+
+    def test_dashboard_cached_and_invalidated(self, authenticated_client, waterfall_project):
+        """Second read hits the cache, a milestone save invalidates it"""
+        self._seed(waterfall_project)
+        url = reverse('waterfall:waterfall-dashboard', kwargs={'project_id': waterfall_project.id})
+        authenticated_client.get(url)
+
+        with CaptureQueriesContext(connection) as cached_ctx:
+            authenticated_client.get(url)
+        with CaptureQueriesContext(connection) as cold_ctx:
+            cache.clear()
+            authenticated_client.get(url)
+        assert len(cached_ctx) < len(cold_ctx)
+
+        WaterfallMilestone.objects.create(project=waterfall_project, name='M3', due_date='2026-05-01')
+        response = authenticated_client.get(url)
+        assert response.data['total_milestones'] == 3
+
+    def test_portfolio_dashboard(self, authenticated_client, waterfall_project):
+        """Rollups are served in bulk for all waterfall projects"""
+        self._seed(waterfall_project)
+        url = reverse('waterfall:waterfall-portfolio-dashboard')
+        response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert len(response.data) == 1
+        assert response.data[0]['project_id'] == waterfall_project.id
+        assert response.data[0]['team_size'] == 0
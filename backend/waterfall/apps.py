@@ -5,3 +5,6 @@ class WaterfallConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'waterfall'
     verbose_name = 'Waterfall Methodology'
+
+    def ready(self):
+        import waterfall.signals
@@ -0,0 +1,177 @@
+"""
+Waterfall dashboard rollups.
+
+The dashboard numbers are computed for any number of projects in two
+queries: one over projects with correlated aggregate subqueries
+(milestones, team, change requests, budget) and one over the phases.
+Results are cached per project and invalidated from the waterfall
+model signals (see waterfall/signals.py).
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import (
+    Count, DecimalField, IntegerField, OuterRef, Q, Subquery, Sum,
+)
+from django.db.models.functions import Coalesce
+
+from projects.models import Project
+from .models import (
+    WaterfallPhase, WaterfallMilestone, WaterfallTeamMember,
+    WaterfallChangeRequest, WaterfallBudget, WaterfallBudgetItem,
+)
+from .serializers import WaterfallPhaseSerializer
+
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 15
+PENDING_CHANGE_STATUSES = ['submitted', 'under_review']
+AT_RISK_MILESTONE_STATUSES = ['at_risk', 'overdue']
+
+
+def dashboard_cache_key(project_id):
+    return f"waterfall:dashboard:{project_id}"
+
+
+def invalidate_dashboard(project_id):
+    """Drop the cached rollup for a project"""
+    if project_id:
+        cache.delete(dashboard_cache_key(project_id))
+
+
+def _count_subquery(model, project_lookup='project', condition=None):
+    """Correlated COUNT(*) over `model` rows of the outer project"""
+    qs = (
+        model.objects.filter(**{project_lookup: OuterRef('pk')})
+        .order_by()
+        .values(project_lookup)
+        .annotate(total=Count('pk', filter=condition))
+        .values('total')
+    )
+    return Coalesce(Subquery(qs, output_field=IntegerField()), 0)
+
+
+def _annotated_projects(project_ids):
+    money = DecimalField(max_digits=14, decimal_places=2)
+    spent = (
+        WaterfallBudgetItem.objects.filter(budget__project=OuterRef('pk'))
+        .order_by()
+        .values('budget__project')
+        .annotate(total=Sum('actual_amount'))
+        .values('total')
+    )
+    total_budget = WaterfallBudget.objects.filter(project=OuterRef('pk')).values('total_budget')[:1]
+
+    return (
+        Project.objects.filter(id__in=project_ids)
+        .order_by()
+        .annotate(
+            wf_total_milestones=_count_subquery(WaterfallMilestone),
+            wf_completed_milestones=_count_subquery(
+                WaterfallMilestone, condition=Q(status='completed')
+            ),
+            wf_at_risk_milestones=_count_subquery(
+                WaterfallMilestone, condition=Q(status__in=AT_RISK_MILESTONE_STATUSES)
+            ),
+            wf_team_size=_count_subquery(WaterfallTeamMember),
+            wf_pending_change_requests=_count_subquery(
+                WaterfallChangeRequest, condition=Q(status__in=PENDING_CHANGE_STATUSES)
+            ),
+            wf_total_budget=Subquery(total_budget, output_field=money),
+            wf_total_spent=Coalesce(Subquery(spent, output_field=money), 0, output_field=money),
+        )
+        .values(
+            'id', 'wf_total_milestones', 'wf_completed_milestones',
+            'wf_at_risk_milestones', 'wf_team_size', 'wf_pending_change_requests',
+            'wf_total_budget', 'wf_total_spent',
+        )
+    )
+
+
+def compute_dashboard_rollups(project_ids):
+    """
+    Build dashboard rollups for the given projects without touching the cache.
+    Returns {project_id: rollup}.
+    """
+    project_ids = list(project_ids)
+    if not project_ids:
+        return {}
+
+    phases_by_project = {}
+    phases = (
+        WaterfallPhase.objects.filter(project_id__in=project_ids)
+        .select_related('signed_off_by')
+        .annotate(task_total=Count('tasks'))
+        .order_by('project_id', 'order')
+    )
+    for phase in phases:
+        phases_by_project.setdefault(phase.project_id, []).append(phase)
+
+    rollups = {}
+    for row in _annotated_projects(project_ids):
+        project_phases = phases_by_project.get(row['id'], [])
+        serialized = WaterfallPhaseSerializer(project_phases, many=True).data
+
+        current_phase = None
+        for phase, data in zip(project_phases, serialized):
+            if phase.status == 'in_progress':
+                current_phase = data
+                break
+
+        if project_phases:
+            overall_progress = int(sum(p.progress for p in project_phases) / len(project_phases))
+        else:
+            overall_progress = 0
+
+        last_phase = project_phases[-1] if project_phases else None
+        total_budget = row['wf_total_budget']
+        if total_budget and total_budget > 0:
+            budget_utilization = float((row['wf_total_spent'] / total_budget) * 100)
+        else:
+            budget_utilization = 0
+
+        rollups[row['id']] = {
+            'has_initialized': bool(project_phases),
+            'current_phase': current_phase,
+            'phases': serialized,
+            'overall_progress': overall_progress,
+            'end_date': last_phase.end_date if last_phase else None,
+            'total_milestones': row['wf_total_milestones'],
+            'completed_milestones': row['wf_completed_milestones'],
+            'at_risk_milestones': row['wf_at_risk_milestones'],
+            'team_size': row['wf_team_size'],
+            'pending_change_requests': row['wf_pending_change_requests'],
+            'budget_utilization': budget_utilization,
+        }
+
+    return rollups
+
+
+def _present(rollup):
+    """Turn a cached rollup into the dashboard payload (days_remaining is date-relative)"""
+    data = dict(rollup)
+    end_date = data.pop('end_date', None)
+    data['days_remaining'] = max(0, (end_date - date.today()).days) if end_date else 0
+    return data
+
+
+def get_dashboard_rollups(project_ids):
+    """Cached rollups for many projects; only cache misses are recomputed, in bulk"""
+    project_ids = list(dict.fromkeys(project_ids))
+    keys = {dashboard_cache_key(pid): pid for pid in project_ids}
+    cached = cache.get_many(list(keys))
+    rollups = {keys[key]: value for key, value in cached.items()}
+
+    missing = [pid for pid in project_ids if pid not in rollups]
+    if missing:
+        fresh = compute_dashboard_rollups(missing)
+        cache.set_many(
+            {dashboard_cache_key(pid): rollup for pid, rollup in fresh.items()},
+            DASHBOARD_CACHE_TIMEOUT,
+        )
+        rollups.update(fresh)
+
+    return {pid: _present(rollups[pid]) for pid in project_ids if pid in rollups}
+
+
+def get_dashboard_rollup(project_id):
+    return get_dashboard_rollups([project_id]).get(project_id)
@@ -29,6 +29,8 @@ class WaterfallPhaseSerializer(serializers.ModelSerializer):
         ]
     
     def get_task_count(self, obj):
+        if hasattr(obj, 'task_total'):
+            return obj.task_total
         return obj.tasks.count() if hasattr(obj, 'tasks') else 0
 
 
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .dashboard import invalidate_dashboard
+from .models import (
+    WaterfallPhase, WaterfallTask, WaterfallMilestone, WaterfallTeamMember,
+    WaterfallChangeRequest, WaterfallBudget, WaterfallBudgetItem,
+)
+
+
+@receiver(post_save, sender=WaterfallPhase)
+@receiver(post_delete, sender=WaterfallPhase)
+@receiver(post_save, sender=WaterfallTask)
+@receiver(post_delete, sender=WaterfallTask)
+@receiver(post_save, sender=WaterfallMilestone)
+@receiver(post_delete, sender=WaterfallMilestone)
+@receiver(post_save, sender=WaterfallTeamMember)
+@receiver(post_delete, sender=WaterfallTeamMember)
+@receiver(post_save, sender=WaterfallChangeRequest)
+@receiver(post_delete, sender=WaterfallChangeRequest)
+@receiver(post_save, sender=WaterfallBudget)
+@receiver(post_delete, sender=WaterfallBudget)
+def invalidate_dashboard_on_change(sender, instance, **kwargs):
+    """Any change to a dashboard input drops the project's cached rollup"""
+    invalidate_dashboard(instance.project_id)
+
+
+@receiver(post_save, sender=WaterfallBudgetItem)
+@receiver(post_delete, sender=WaterfallBudgetItem)
+def invalidate_dashboard_on_budget_item(sender, instance, **kwargs):
+    project_id = (
+        WaterfallBudget.objects.filter(pk=instance.budget_id)
+        .values_list('project_id', flat=True)
+        .first()
+    )
+    invalidate_dashboard(project_id)
@@ -26,6 +26,7 @@ from .views import (
 urlpatterns = [
     # Dashboard
     path('projects/<int:project_id>/waterfall/dashboard/', WaterfallDashboardViewSet.as_view({'get': 'retrieve'}), name='waterfall-dashboard'),
+    path('waterfall/portfolio-dashboard/', WaterfallDashboardViewSet.as_view({'get': 'portfolio'}), name='waterfall-portfolio-dashboard'),
     path('projects/<int:project_id>/waterfall/initialize/', WaterfallDashboardViewSet.as_view({'post': 'initialize'}), name='waterfall-initialize'),
     
     # Phases
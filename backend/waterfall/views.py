@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Count, Q, Max, Min, Avg
+from django.db.models import Count, Q, Max, Min, Avg
 from django.utils import timezone
 from datetime import date
 
@@ -29,6 +29,7 @@ from .serializers import (
     WaterfallRiskSerializer, WaterfallIssueSerializer,
     WaterfallDeliverableSerializer, WaterfallBaselineSerializer
 )
+from .dashboard import get_dashboard_rollup, get_dashboard_rollups
 
 User = get_user_model()
 
@@ -52,66 +53,40 @@ class WaterfallDashboardViewSet(viewsets.ViewSet):
     
     def retrieve(self, request, project_id=None):
         project = get_object_or_404(Project, id=project_id)
-        
-        # Check if initialized
-        phases = WaterfallPhase.objects.filter(project=project).order_by('order')
-        has_initialized = phases.exists()
-        
-        # Current phase
-        current_phase = phases.filter(status='in_progress').first()
-        
-        # Overall progress
-        if phases.exists():
-            total_progress = phases.aggregate(avg=Sum('progress'))['avg'] or 0
-            overall_progress = int(total_progress / phases.count())
-        else:
-            overall_progress = 0
-        
-        # Days remaining (from last phase end date)
-        last_phase = phases.last()
-        if last_phase and last_phase.end_date:
-            days_remaining = (last_phase.end_date - date.today()).days
-            days_remaining = max(0, days_remaining)
-        else:
-            days_remaining = 0
-        
-        # Milestones
-        milestones = WaterfallMilestone.objects.filter(project=project)
-        total_milestones = milestones.count()
-        completed_milestones = milestones.filter(status='completed').count()
-        at_risk_milestones = milestones.filter(status__in=['at_risk', 'overdue']).count()
-        
-        # Team size
-        team_size = WaterfallTeamMember.objects.filter(project=project).count()
-        
-        # Pending change requests
-        pending_cr = WaterfallChangeRequest.objects.filter(
-            project=project,
-            status__in=['submitted', 'under_review']
-        ).count()
-        
-        # Budget utilization
-        budget = WaterfallBudget.objects.filter(project=project).first()
-        if budget and budget.total_budget > 0:
-            budget_utilization = float((budget.total_spent / budget.total_budget) * 100)
-        else:
-            budget_utilization = 0
-        
-        data = {
-            'has_initialized': has_initialized,
-            'current_phase': WaterfallPhaseSerializer(current_phase).data if current_phase else None,
-            'phases': WaterfallPhaseSerializer(phases, many=True).data,
-            'overall_progress': overall_progress,
-            'days_remaining': days_remaining,
-            'total_milestones': total_milestones,
-            'completed_milestones': completed_milestones,
-            'at_risk_milestones': at_risk_milestones,
-            'team_size': team_size,
-            'pending_change_requests': pending_cr,
-            'budget_utilization': budget_utilization,
-        }
-        
-        return Response(data)
+        return Response(get_dashboard_rollup(project.id))
+    
+    def portfolio(self, request):
+        """
+        Dashboard rollups for many waterfall projects at once.
+        Filter with ?portfolio=<id> and/or ?projects=1,2,3
+        """
+        projects = Project.objects.filter(methodology='waterfall')
+        company = getattr(request.user, 'company', None)
+        if not request.user.is_superuser:
+            projects = projects.filter(company=company)
+        
+        portfolio_id = request.query_params.get('portfolio')
+        if portfolio_id:
+            projects = projects.filter(portfolio_id=portfolio_id)
+        
+        project_ids = request.query_params.get('projects')
+        if project_ids:
+            try:
+                ids = [int(pid) for pid in project_ids.split(',') if pid.strip()]
+            except ValueError:
+                return Response(
+                    {'error': 'projects must be a comma separated list of ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            projects = projects.filter(id__in=ids)
+        
+        project_rows = list(projects.order_by('name').values('id', 'name'))
+        rollups = get_dashboard_rollups([row['id'] for row in project_rows])
+        
+        return Response([
+            {'project_id': row['id'], 'project_name': row['name'], **rollups[row['id']]}
+            for row in project_rows if row['id'] in rollups
+        ])
     
     @action(detail=False, methods=['post'])
     def initialize(self, request, project_id=None):
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflow', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowdiagram',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Bumped on every save, used to detect concurrent edits'),
+        ),
+    ]
@@ -28,6 +28,9 @@ class WorkflowDiagram(models.Model):
         blank=True,
         related_name="created_workflows",
     )
+    version = models.PositiveIntegerField(
+        default=1, help_text="Bumped on every save, used to detect concurrent edits"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import WorkflowDiagram, WorkflowNode, WorkflowEdge
+from .sync import node_values, edge_values, sync_nodes, sync_edges
 
 
 class WorkflowNodeSerializer(serializers.ModelSerializer):
@@ -133,10 +134,11 @@ class WorkflowDiagramSerializer(serializers.ModelSerializer):
             "edges",
             "created_by",
             "created_by_email",
+            "version",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_by", "created_at", "updated_at"]
+        read_only_fields = ["created_by", "version", "created_at", "updated_at"]
 
 
 class WorkflowDiagramCreateUpdateSerializer(serializers.ModelSerializer):
@@ -182,58 +184,33 @@ class WorkflowDiagramCreateUpdateSerializer(serializers.ModelSerializer):
         # Update workflow diagram fields
         instance.name = validated_data.get("name", instance.name)
         instance.description = validated_data.get("description", instance.description)
+        instance.version += 1
         instance.save()
 
-        # Update nodes if provided
+        # Sync nodes and edges if provided
         if nodes_data is not None:
-            # Delete existing nodes (cascade will delete edges)
-            instance.nodes.all().delete()
-            self._create_nodes(instance, nodes_data)
-
-        # Update edges if provided
+            sync_nodes(instance, nodes_data)
         if edges_data is not None:
-            # Delete existing edges
-            instance.edges.all().delete()
-            self._create_edges(instance, edges_data)
+            sync_edges(instance, edges_data)
 
         return instance
 
     def _create_nodes(self, workflow, nodes_data):
         """Helper method to create nodes from data"""
-        for idx, node_data in enumerate(nodes_data):
-            position = node_data.get("position", {})
-            data = node_data.get("data", {})
-
-            WorkflowNode.objects.create(
-                workflow=workflow,
-                node_id=node_data.get("id"),
-                node_type=node_data.get("type", "rectangle"),
-                label=data.get("label", ""),
-                position_x=position.get("x", 0),
-                position_y=position.get("y", 0),
-                color=data.get("color", "#1e40af"),
-                text_color=data.get("textColor", "#ffffff"),
-                font_size=data.get("fontSize", 12),
-                order_index=idx,
-            )
+        WorkflowNode.objects.bulk_create(
+            [
+                WorkflowNode(workflow=workflow, node_id=node_data.get("id"), **node_values(node_data, idx))
+                for idx, node_data in enumerate(nodes_data)
+            ],
+            batch_size=500,
+        )
 
     def _create_edges(self, workflow, edges_data):
         """Helper method to create edges from data"""
-        for edge_data in edges_data:
-            style = edge_data.get("style", {})
-            marker_end = edge_data.get("markerEnd", {})
-
-            WorkflowEdge.objects.create(
-                workflow=workflow,
-                edge_id=edge_data.get("id"),
-                source_node_id=edge_data.get("source"),
-                target_node_id=edge_data.get("target"),
-                source_handle=edge_data.get("sourceHandle"),
-                target_handle=edge_data.get("targetHandle"),
-                label=edge_data.get("label", ""),
-                animated=edge_data.get("animated", False),
-                stroke_color=style.get("stroke", "#374151"),
-                stroke_width=style.get("strokeWidth", 2),
-                marker_type=marker_end.get("type", "arrowclosed"),
-                marker_color=marker_end.get("color", "#374151"),
-            )
+        WorkflowEdge.objects.bulk_create(
+            [
+                WorkflowEdge(workflow=workflow, edge_id=edge_data.get("id"), **edge_values(edge_data))
+                for edge_data in edges_data
+            ],
+            batch_size=500,
+        )
@@ -1,6 +1,6 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import WorkflowDiagram, WorkflowNode, WorkflowEdge
+from .models import WorkflowDiagram
 
 
 @receiver(post_save, sender=WorkflowDiagram)
@@ -22,24 +22,4 @@ def workflow_diagram_deleted(sender, instance, **kwargs):
     """
     print(
         f"Workflow diagram deleted: {instance.name} for project {instance.project.name}"
-    )
-
-
-@receiver(post_save, sender=WorkflowNode)
-def workflow_node_saved(sender, instance, created, **kwargs):
-    """
-    Signal handler for when a WorkflowNode is saved
-    Updates the workflow's updated_at timestamp
-    """
-    if instance.workflow:
-        instance.workflow.save(update_fields=["updated_at"])
-
-
-@receiver(post_save, sender=WorkflowEdge)
-def workflow_edge_saved(sender, instance, created, **kwargs):
-    """
-    Signal handler for when a WorkflowEdge is saved
-    Updates the workflow's updated_at timestamp
-    """
-    if instance.workflow:
-        instance.workflow.save(update_fields=["updated_at"])
+    )
\ No newline at end of file
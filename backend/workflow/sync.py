@@ -0,0 +1,148 @@
+"""
+Diff-based saving of workflow diagrams.
+
+The editor posts the complete diagram (ReactFlow nodes and edges) on every
+save. Instead of deleting and recreating everything, the incoming node and
+edge ids are compared with the stored ones: new ids are bulk-created,
+changed rows are bulk-updated and missing ids are removed with one DELETE.
+Unchanged rows are not written at all.
+
+The diagram row is touched exactly once per save. Its `version` is bumped
+in the same UPDATE, which doubles as the optimistic concurrency check when
+the client sends the version it loaded.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import WorkflowDiagram, WorkflowNode, WorkflowEdge
+
+
+NODE_FIELDS = [
+    "node_type", "label", "position_x", "position_y",
+    "color", "text_color", "font_size", "order_index",
+]
+EDGE_FIELDS = [
+    "source_node_id", "target_node_id", "source_handle", "target_handle", "label",
+    "animated", "stroke_color", "stroke_width", "marker_type", "marker_color",
+]
+
+
+class VersionConflict(Exception):
+    """The diagram changed since the client loaded it"""
+
+    def __init__(self, current_version):
+        super().__init__(f"Workflow was modified (current version {current_version})")
+        self.current_version = current_version
+
+
+def node_values(node_data, idx):
+    """Model field values for a ReactFlow node"""
+    position = node_data.get("position", {})
+    data = node_data.get("data", {})
+    return {
+        "node_type": node_data.get("type", "rectangle"),
+        "label": data.get("label", ""),
+        "position_x": position.get("x", 0),
+        "position_y": position.get("y", 0),
+        "color": data.get("color", "#1e40af"),
+        "text_color": data.get("textColor", "#ffffff"),
+        "font_size": data.get("fontSize", 12),
+        "order_index": idx,
+    }
+
+
+def edge_values(edge_data):
+    """Model field values for a ReactFlow edge"""
+    style = edge_data.get("style", {})
+    marker_end = edge_data.get("markerEnd", {})
+    return {
+        "source_node_id": edge_data.get("source"),
+        "target_node_id": edge_data.get("target"),
+        "source_handle": edge_data.get("sourceHandle"),
+        "target_handle": edge_data.get("targetHandle"),
+        "label": edge_data.get("label", ""),
+        "animated": edge_data.get("animated", False),
+        "stroke_color": style.get("stroke", "#374151"),
+        "stroke_width": style.get("strokeWidth", 2),
+        "marker_type": marker_end.get("type", "arrowclosed"),
+        "marker_color": marker_end.get("color", "#374151"),
+    }
+
+
+def _incoming(items, key, values):
+    """{client id: field values}; items without an id are skipped, the last duplicate wins"""
+    incoming = {}
+    for idx, item in enumerate(items):
+        if item.get("id"):
+            incoming[str(item["id"])] = values(item, idx)
+    return incoming
+
+
+def _sync(model, workflow, key, incoming, fields, now):
+    """Apply the difference between the stored rows and `incoming`"""
+    existing = {getattr(obj, key): obj for obj in model.objects.filter(workflow=workflow)}
+
+    to_create, to_update = [], []
+    for client_id, values in incoming.items():
+        obj = existing.get(client_id)
+        if obj is None:
+            to_create.append(model(workflow=workflow, **{key: client_id}, **values))
+        elif any(getattr(obj, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(obj, field, value)
+            # bulk_update does not apply auto_now
+            obj.updated_at = now
+            to_update.append(obj)
+
+    removed = [client_id for client_id in existing if client_id not in incoming]
+    if removed:
+        model.objects.filter(workflow=workflow, **{f"{key}__in": removed}).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, fields + ["updated_at"], batch_size=500)
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=500)
+    return {"created": len(to_create), "updated": len(to_update), "deleted": len(removed)}
+
+
+def sync_nodes(workflow, nodes_data, now=None):
+    incoming = _incoming(nodes_data, "node_id", node_values)
+    return _sync(WorkflowNode, workflow, "node_id", incoming, NODE_FIELDS, now or timezone.now())
+
+
+def sync_edges(workflow, edges_data, now=None):
+    incoming = _incoming(edges_data, "edge_id", lambda item, idx: edge_values(item))
+    return _sync(WorkflowEdge, workflow, "edge_id", incoming, EDGE_FIELDS, now or timezone.now())
+
+
+def touch_diagram(workflow_id, expected_version=None, now=None):
+    """
+    Bump updated_at and version with one UPDATE. With expected_version the
+    update only applies to that version; VersionConflict is raised otherwise.
+    """
+    diagrams = WorkflowDiagram.objects.filter(pk=workflow_id)
+    if expected_version is not None:
+        diagrams = diagrams.filter(version=expected_version)
+    updated = diagrams.update(updated_at=now or timezone.now(), version=F("version") + 1)
+    if not updated and expected_version is not None:
+        current = WorkflowDiagram.objects.filter(pk=workflow_id).values_list("version", flat=True).first()
+        raise VersionConflict(current)
+    return updated
+
+
+def save_diagram(workflow, nodes_data=None, edges_data=None, expected_version=None):
+    """
+    Save the posted diagram in one transaction. None leaves nodes or edges
+    untouched. Returns the created/updated/deleted counts.
+    """
+    now = timezone.now()
+    changes = {}
+    with transaction.atomic():
+        # Touch first: the UPDATE locks the diagram row for the rest of the save
+        touch_diagram(workflow.pk, expected_version, now)
+        if nodes_data is not None:
+            changes["nodes"] = sync_nodes(workflow, nodes_data, now)
+        if edges_data is not None:
+            changes["edges"] = sync_edges(workflow, edges_data, now)
+    workflow.refresh_from_db(fields=["version", "updated_at"])
+    return changes
@@ -6,6 +6,7 @@ from accounts.permissions import HasRole
 from django.shortcuts import get_object_or_404
 
 from .models import WorkflowDiagram, WorkflowNode, WorkflowEdge
+from .sync import VersionConflict, save_diagram, touch_diagram
 from .serializers import (
     WorkflowDiagramSerializer,
     WorkflowDiagramCreateUpdateSerializer,
@@ -98,64 +99,69 @@ class WorkflowDiagramViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         Expected payload:
         {
             "nodes": [...],
-            "edges": [...]
+            "edges": [...],
+            "version": 3    # optional, the version the editor loaded
         }
+
+        Only the nodes and edges that changed are written. When a version
+        is sent and the diagram has moved on since, nothing is saved and
+        409 is returned with the current version.
         """
         workflow = self.get_object()
 
-        nodes_data = request.data.get("nodes", [])
-        edges_data = request.data.get("edges", [])
-
-        # Delete existing nodes and edges
-        workflow.nodes.all().delete()
-        workflow.edges.all().delete()
-
-        # Create new nodes
-        for idx, node_data in enumerate(nodes_data):
-            position = node_data.get("position", {})
-            data = node_data.get("data", {})
-
-            WorkflowNode.objects.create(
-                workflow=workflow,
-                node_id=node_data.get("id"),
-                node_type=node_data.get("type", "rectangle"),
-                label=data.get("label", ""),
-                position_x=position.get("x", 0),
-                position_y=position.get("y", 0),
-                color=data.get("color", "#1e40af"),
-                text_color=data.get("textColor", "#ffffff"),
-                font_size=data.get("fontSize", 12),
-                order_index=idx,
+        expected_version = request.data.get("version")
+        if expected_version in (None, ""):
+            expected_version = None
+        else:
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "version must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        try:
+            save_diagram(
+                workflow,
+                request.data.get("nodes", []),
+                request.data.get("edges", []),
+                expected_version=expected_version,
             )
-
-        # Create new edges
-        for edge_data in edges_data:
-            style = edge_data.get("style", {})
-            marker_end = edge_data.get("markerEnd", {})
-
-            WorkflowEdge.objects.create(
-                workflow=workflow,
-                edge_id=edge_data.get("id"),
-                source_node_id=edge_data.get("source"),
-                target_node_id=edge_data.get("target"),
-                source_handle=edge_data.get("sourceHandle"),
-                target_handle=edge_data.get("targetHandle"),
-                label=edge_data.get("label", ""),
-                animated=edge_data.get("animated", False),
-                stroke_color=style.get("stroke", "#374151"),
-                stroke_width=style.get("strokeWidth", 2),
-                marker_type=marker_end.get("type", "arrowclosed"),
-                marker_color=marker_end.get("color", "#374151"),
+        except VersionConflict as e:
+            return Response(
+                {
+                    "error": "This workflow was changed by someone else. Reload it and try again.",
+                    "current_version": e.current_version,
+                },
+                status=status.HTTP_409_CONFLICT,
             )
 
-        # Refresh the workflow to get updated nodes and edges
-        workflow.refresh_from_db()
+        # Re-read with the nodes and edges prefetched
+        workflow = self.get_queryset().get(pk=workflow.pk)
         serializer = WorkflowDiagramSerializer(workflow)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class WorkflowNodeViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
+class TouchDiagramMixin:
+    """Single node/edge edits bump the parent diagram's version too"""
+
+    def perform_create(self, serializer):
+        instance = serializer.save()
+        touch_diagram(instance.workflow_id)
+
+    def perform_update(self, serializer):
+        instance = serializer.save()
+        touch_diagram(instance.workflow_id)
+
+    def perform_destroy(self, instance):
+        workflow_id = instance.workflow_id
+        instance.delete()
+        touch_diagram(workflow_id)
+
+
+class WorkflowNodeViewSet(TouchDiagramMixin, CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for individual WorkflowNode operations
     Usually you'll use the WorkflowDiagram save-workflow endpoint instead
@@ -175,7 +181,7 @@ class WorkflowNodeViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
         return base_qs.filter(workflow__project__company=user.company)
 
 
-class WorkflowEdgeViewSet(CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
+class WorkflowEdgeViewSet(TouchDiagramMixin, CompanyScopedQuerysetMixin, viewsets.ModelViewSet):
     """
     ViewSet for individual WorkflowEdge operations
     Usually you'll use the WorkflowDiagram save-workflow endpoint instead